@@ -0,0 +1,121 @@
+"""
+並列バックフィルのワーカー数に対するスケーリングを計測するベンチマーク
+
+ウェアハウスの代わりに、推論プロシージャの呼び出しを日数に比例した待ち時間として
+模したセッションを用いる。ウェアハウスの同時実行数（MAX_CONCURRENCY_LEVEL）を
+--warehouse-slots で制限し、それを超える呼び出しは待たされる。
+
+使用例:
+    python -m benchmarks.bench_backfill_scaling --days 90 --workers 1 2 4 8
+"""
+
+import argparse
+import json
+import logging
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+
+from src.pipelines.backfill import run_backfill
+
+
+class _WarehouseStandInSession:
+    """プロシージャの呼び出しを同時実行数付きの待ち時間として模したセッション"""
+
+    def __init__(
+        self, slots: threading.Semaphore, seconds_per_day: float, call_overhead: float
+    ) -> None:
+        self._slots = slots
+        self._seconds_per_day = seconds_per_day
+        self._call_overhead = call_overhead
+
+    def call(self, procedure_name: str, start_date: str, end_date: str) -> int:
+        days = (pd.Timestamp(end_date) - pd.Timestamp(start_date)).days + 1
+        time.sleep(self._call_overhead)
+        with self._slots:
+            time.sleep(days * self._seconds_per_day)
+        return 1
+
+    def close(self) -> None:
+        pass
+
+
+def run(
+    days: int,
+    workers_list: List[int],
+    partition_days: int,
+    seconds_per_day: float,
+    call_overhead: float,
+    warehouse_slots: int,
+) -> List[Dict[str, float]]:
+    """ワーカー数ごとにバックフィル全体の処理時間を計測する"""
+    start_date = "2024-01-01"
+    end_date = (pd.Timestamp(start_date) + pd.Timedelta(days=days - 1)).strftime(
+        "%Y-%m-%d"
+    )
+    slots = threading.Semaphore(warehouse_slots)
+
+    results = []
+    for workers in workers_list:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            start = time.perf_counter()
+            run_backfill(
+                start_date,
+                end_date,
+                session_factory=lambda: _WarehouseStandInSession(
+                    slots, seconds_per_day, call_overhead
+                ),
+                workers=workers,
+                partition_days=partition_days,
+                checkpoint_path=str(Path(tmp_dir) / "checkpoint.json"),
+            )
+            seconds = time.perf_counter() - start
+        results.append({"workers": workers, "seconds": seconds})
+
+    baseline = results[0]["seconds"] * results[0]["workers"]
+    print(f"{'workers':>8} {'seconds':>9} {'speedup':>8} {'efficiency':>11}")
+    for r in results:
+        r["speedup"] = baseline / r["seconds"]
+        r["efficiency"] = r["speedup"] / r["workers"]
+        print(
+            f"{r['workers']:>8} {r['seconds']:>9.2f} "
+            f"{r['speedup']:>8.2f} {r['efficiency']:>11.2f}"
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Parallel backfill scaling benchmark")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--partition-days", type=int, default=1)
+    parser.add_argument(
+        "--seconds-per-day", type=float, default=0.1, help="1日分の推論にかかる時間"
+    )
+    parser.add_argument(
+        "--call-overhead", type=float, default=0.01, help="呼び出しごとの固定の待ち時間"
+    )
+    parser.add_argument("--warehouse-slots", type=int, default=8)
+    parser.add_argument("--output", type=str, help="結果を書き出す JSON ファイル")
+    args = parser.parse_args()
+
+    logging.getLogger("src").setLevel(logging.WARNING)
+    results = run(
+        args.days,
+        args.workers,
+        args.partition_days,
+        args.seconds_per_day,
+        args.call_overhead,
+        args.warehouse_slots,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
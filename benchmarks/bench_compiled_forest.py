@@ -0,0 +1,113 @@
+"""
+CompiledForest と sklearn Pipeline の推論レイテンシ・スループットを比較するベンチマーク
+
+使用例:
+    python -m benchmarks.bench_compiled_forest --n-estimators 200 --max-depth 20
+"""
+
+import argparse
+import json
+import logging
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_sessions
+from src.models.compiled_forest import compile_pipeline
+from src.models.trainer import create_model_pipeline
+from src.utils.constants import TARGET
+
+DEFAULT_BATCH_SIZES = [1, 10, 100, 1_000, 10_000, 100_000]
+
+
+def _median_seconds(fn: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def run(
+    n_estimators: int,
+    max_depth: int,
+    batch_sizes: List[int],
+    n_train: int,
+    repeat: int,
+) -> List[Dict[str, float]]:
+    """バッチサイズごとに両エンジンの推論時間を計測する"""
+    train = generate_sessions(n_train, seed=0, with_uid=False)
+    X_train = train.drop(columns=["UID", "SESSION_DATE"] + TARGET)
+    pipeline = create_model_pipeline(
+        params={"n_estimators": n_estimators, "max_depth": max_depth}
+    ).fit(X_train, train[TARGET[0]])
+
+    start = time.perf_counter()
+    compiled = compile_pipeline(pipeline)
+    compile_seconds = time.perf_counter() - start
+    print(f"compile: {compile_seconds * 1000:.1f} ms")
+
+    pool = generate_sessions(max(batch_sizes), seed=1, with_uid=False)
+    pool = pool.drop(columns=["UID", "SESSION_DATE"] + TARGET)
+
+    results = []
+    for batch_size in batch_sizes:
+        batch: pd.DataFrame = pool.iloc[:batch_size]
+        if not np.array_equal(
+            pipeline.predict_proba(batch), compiled.predict_proba(batch)
+        ):
+            raise AssertionError(f"Outputs differ at batch size {batch_size}")
+
+        n = repeat if batch_size < 10_000 else max(1, repeat // 5)
+        sklearn_s = _median_seconds(lambda: pipeline.predict_proba(batch), n)
+        compiled_s = _median_seconds(lambda: compiled.predict_proba(batch), n)
+        results.append(
+            {
+                "batch_size": batch_size,
+                "sklearn_latency_ms": sklearn_s * 1000,
+                "compiled_latency_ms": compiled_s * 1000,
+                "sklearn_rows_per_sec": batch_size / sklearn_s,
+                "compiled_rows_per_sec": batch_size / compiled_s,
+                "speedup": sklearn_s / compiled_s,
+            }
+        )
+
+    print(
+        f"{'batch':>8} {'sklearn ms':>12} {'compiled ms':>12} "
+        f"{'sklearn rows/s':>15} {'compiled rows/s':>16} {'speedup':>8}"
+    )
+    for r in results:
+        print(
+            f"{r['batch_size']:>8} {r['sklearn_latency_ms']:>12.2f} "
+            f"{r['compiled_latency_ms']:>12.2f} {r['sklearn_rows_per_sec']:>15.0f} "
+            f"{r['compiled_rows_per_sec']:>16.0f} {r['speedup']:>8.2f}"
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CompiledForest benchmark")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--max-depth", type=int, default=15)
+    parser.add_argument("--n-train", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--batch-sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES
+    )
+    parser.add_argument("--output", type=str, help="結果を書き出す JSON ファイル")
+    args = parser.parse_args()
+
+    logging.getLogger("src").setLevel(logging.WARNING)
+    results = run(
+        args.n_estimators, args.max_depth, args.batch_sizes, args.n_train, args.repeat
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
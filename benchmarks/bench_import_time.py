@@ -0,0 +1,150 @@
+"""
+ストアドプロシージャのモジュールの読み込み時間（コールドスタート）を計測するベンチマーク
+
+モジュールごとに新しいプロセスで python -X importtime を実行し、出力からモジュール全体の
+読み込み時間と、依存パッケージごとの読み込み時間を集計する。ばらつきを抑えるため
+--repeat 回計測した最小値を用いる。
+
+import_budget.json に記載した上限（max_ms）を超えた場合、または読み込まないはずの
+パッケージ（forbidden）が読み込まれた場合は終了コード 1 で終了する。
+
+使用例:
+    python -m benchmarks.bench_import_time --repeat 3
+    python -m benchmarks.bench_import_time --modules src.pipelines.sproc_prediction
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+_BUDGET_PATH = Path(__file__).parent / "import_budget.json"
+_IMPORTTIME_LINE = re.compile(
+    r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$", re.MULTILINE
+)
+
+
+def parse_importtime(output: str) -> Dict[str, Dict[str, int]]:
+    """
+    -X importtime の出力をモジュールごとの読み込み時間に変換する
+
+    Args:
+        output (str): -X importtime の標準エラー出力
+
+    Returns:
+        Dict[str, Dict[str, int]]: モジュール名ごとの self_us / cumulative_us / depth
+            （depth は読み込みの入れ子の深さ。0 は -c で直接読み込んだモジュール）
+    """
+    modules = {}
+    for self_us, cumulative_us, indent, name in _IMPORTTIME_LINE.findall(output):
+        modules[name] = {
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            "depth": (len(indent) - 1) // 2,
+        }
+    return modules
+
+
+def measure(module: str) -> Dict[str, Dict[str, int]]:
+    """新しいプロセスでモジュールを読み込み、読み込み時間を計測する"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Failed to import {module}:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def _top_packages(modules: Dict[str, Dict[str, int]], n: int) -> List[tuple]:
+    """トップレベルのパッケージごとの self 時間の合計（多い順）"""
+    totals: Dict[str, int] = {}
+    for name, timing in modules.items():
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0) + timing["self_us"]
+    return sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:n]
+
+
+def run(
+    modules: List[str], budgets: Dict[str, Any], repeat: int, top: int
+) -> List[Dict[str, Any]]:
+    """モジュールごとに読み込み時間を計測し、上限と比較する"""
+    results = []
+    for module in modules:
+        runs = [measure(module) for _ in range(repeat)]
+        best = min(runs, key=lambda r: r[module]["cumulative_us"])
+        budget = budgets.get(module, {})
+        forbidden = [
+            name
+            for name in budget.get("forbidden", [])
+            if any(m == name or m.startswith(f"{name}.") for m in best)
+        ]
+        total_ms = best[module]["cumulative_us"] / 1000
+        max_ms = budget.get("max_ms")
+        results.append(
+            {
+                "module": module,
+                "total_ms": total_ms,
+                "max_ms": max_ms,
+                "n_modules": len(best),
+                "forbidden_imported": forbidden,
+                "ok": (max_ms is None or total_ms <= max_ms) and not forbidden,
+                "top_packages_ms": {
+                    package: us / 1000 for package, us in _top_packages(best, top)
+                },
+            }
+        )
+
+    print(f"{'module':<40} {'total ms':>9} {'budget':>7} {'modules':>8}  status")
+    for r in results:
+        budget = f"{r['max_ms']:>7}" if r["max_ms"] is not None else f"{'-':>7}"
+        status = "ok" if r["ok"] else "OVER BUDGET"
+        if r["forbidden_imported"]:
+            status += f" (imports {', '.join(r['forbidden_imported'])})"
+        print(
+            f"{r['module']:<40} {r['total_ms']:>9.0f} {budget} "
+            f"{r['n_modules']:>8}  {status}"
+        )
+        print(
+            "    "
+            + ", ".join(f"{p} {ms:.0f}ms" for p, ms in r["top_packages_ms"].items())
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stored procedure import time")
+    parser.add_argument(
+        "--modules",
+        type=str,
+        nargs="+",
+        help="計測するモジュール（デフォルトは import_budget.json の全モジュール）",
+    )
+    parser.add_argument("--budget", type=str, default=str(_BUDGET_PATH))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--top", type=int, default=5, help="表示する読み込み時間の多いパッケージ数"
+    )
+    parser.add_argument("--output", type=str, help="結果を書き出す JSON ファイル")
+    args = parser.parse_args()
+
+    logging.getLogger("src").setLevel(logging.WARNING)
+    with open(args.budget) as f:
+        budgets = json.load(f)
+    results = run(args.modules or list(budgets), budgets, args.repeat, args.top)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if not all(r["ok"] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
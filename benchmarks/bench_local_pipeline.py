@@ -0,0 +1,144 @@
+"""
+DuckDB をバックエンドとするローカルセッションでパイプライン全体を実行するベンチマーク
+
+Snowflake に接続せずに、環境構築 → データセット更新 → 学習 → 推論 → オフライン
+テストを LocalSession 上で順に実行し、ストアドプロシージャ・ステージごとの時間を
+スパンから集計する。ソースは UCI のデータセットの代わりに合成データを使用し、
+SESSION_DATE は今日の period_days 日前から14日後までに割り振る（オフラインテストで
+モデルの作成日以降の2週間を評価するため）。
+
+データベースはメモリ上に、モデルは一時ディレクトリに作成し、終了時に破棄する
+（--root-dir を指定した場合はファイルに保存して残す）。
+
+使用例:
+    python -m benchmarks.bench_local_pipeline --rows 5000
+"""
+
+import argparse
+import dataclasses
+import json
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from benchmarks.synthetic import generate_sessions
+from src.local import LocalSession
+from src.pipelines.sproc_dataset import sproc_dataset
+from src.pipelines.sproc_offline_testing import sproc_offline_testing
+from src.pipelines.sproc_prediction import sproc_prediction
+from src.pipelines.sproc_training import sproc_training
+from src.setup import setup_steps
+from src.utils.async_query import AsyncQueryExecutor
+from src.utils.constants import SCHEMA, SOURCE
+from src.utils.snowflake import upload_dataframe_to_snowflake
+from src.utils.tracing import set_sink, span
+
+# 学習後にモデルの作成日より後のデータセットを追加する日数（オフラインテストの評価期間）
+_TEST_DAYS = 14
+
+
+def _upload_source(
+    session: LocalSession, database_name: str, rows: int, period_days: int
+) -> None:
+    """合成データをソーステーブルにロードする"""
+    today = date.today()
+    dates = [
+        today + timedelta(days=offset) for offset in range(-period_days, _TEST_DAYS + 1)
+    ]
+    df = generate_sessions(rows, session_dates=dates)
+    # 特徴量には使用しないが、データセットの作成時に参照するカラム
+    df["OPERATINGSYSTEMS"] = 1 + df.index % 8
+    upload_dataframe_to_snowflake(
+        session=session,
+        df=df,
+        database_name=database_name,
+        schema_name=SCHEMA,
+        table_name=SOURCE,
+        mode="overwrite",
+    )
+
+
+def _wait_for_next_second() -> None:
+    """バージョン名は秒単位の時刻のため、前のバージョンと重ならないよう次の秒まで待つ"""
+    time.sleep(1.0 - time.time() % 1.0)
+
+
+def setup_local_environment(session: LocalSession, rows: int, period_days: int) -> None:
+    """環境構築の処理を、ソースのロードを合成データに置き換えて実行する"""
+    database_name = session.get_current_database()
+    steps = [
+        dataclasses.replace(
+            step,
+            action=lambda s: _upload_source(s, database_name, rows, period_days),
+        )
+        if step.name == "source"
+        else step
+        for step in setup_steps(database_name)
+    ]
+    with span("setup", rows=rows):
+        AsyncQueryExecutor(session).run(steps)
+
+
+def evaluation_dates(today: date) -> List[str]:
+    """学習後にデータセットに追加する日付（オフラインテストの評価期間）"""
+    return [
+        (today + timedelta(days=offset)).isoformat()
+        for offset in range(1, _TEST_DAYS + 1)
+    ]
+
+
+def run(rows: int, period_days: int, root_dir: Optional[str]) -> List[Dict[str, Any]]:
+    """パイプライン全体を実行し、スパンごとの時間を返す"""
+    records: List[Dict[str, Any]] = []
+    set_sink("bench", records.append)
+    session = LocalSession(root_dir=root_dir)
+    today = date.today()
+    try:
+        setup_local_environment(session, rows, period_days)
+        for target_date in evaluation_dates(today):
+            sproc_dataset(session, target_date)
+        sproc_training(session)
+        sproc_prediction(session, today.isoformat())
+        # 2つ目のバージョンを Challenger としてオフラインテストを行う
+        _wait_for_next_second()
+        sproc_training(session)
+        sproc_offline_testing(session)
+    finally:
+        set_sink("bench", None)
+        session.close()
+    return records
+
+
+def _summarize(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """スパンのパスごとに実行回数と時間を合計する"""
+    summary: Dict[str, Dict[str, Any]] = {}
+    for r in records:
+        entry = summary.setdefault(
+            r["path"], {"path": r["path"], "calls": 0, "wall_seconds": 0.0}
+        )
+        entry["calls"] += 1
+        entry["wall_seconds"] += r["wall_seconds"]
+    return sorted(summary.values(), key=lambda e: e["path"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local end-to-end pipeline benchmark")
+    parser.add_argument("--rows", type=int, default=5_000)
+    parser.add_argument("--period-days", type=int, default=100)
+    parser.add_argument("--root-dir", type=str, help="データベースとモデルの保存先")
+    parser.add_argument("--output", type=str, help="結果を書き出す JSON ファイル")
+    args = parser.parse_args()
+
+    records = run(args.rows, args.period_days, args.root_dir)
+
+    summary = _summarize(records)
+    print(f"{'stage':<45} {'calls':>5} {'seconds':>9}")
+    for e in summary:
+        print(f"{e['path']:<45} {e['calls']:>5} {e['wall_seconds']:>9.3f}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Optuna の1試行あたりのロギングのオーバーヘッドを計測するベンチマーク
+
+1試行で実行されるモデルパイプラインの作成（交差検証の分割数分）と、そのログ出力を
+繰り返し、以下の設定で1試行あたりの時間を比較する。モデルの学習は含まない。
+
+- disabled: ログを出力しない（基準）
+- sync: ハンドラーをロガーに直接取り付け、呼び出し元のスレッドで書き込む（従来の設定）
+- queue: setup_logging の設定（QueueHandler に積み、リスナーのスレッドで書き込む）
+
+コンソール出力は /dev/null に、ファイル出力は一時ディレクトリに書き込む。
+
+使用例:
+    python -m benchmarks.bench_logging_overhead --trials 200
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import logging.config
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+from unittest import mock
+
+import numpy as np
+
+from src.models import trainer
+from src.utils import logger as logger_module
+
+_MODES = ("disabled", "sync", "queue")
+
+
+def _trial(n_splits: int) -> None:
+    """1試行分のパイプラインの作成とログ出力（objective から学習を除いたもの）"""
+    for _ in range(n_splits):
+        trainer.create_model_pipeline(params={"n_estimators": 10})
+    trainer.logger.info("Average PR-AUC: %.3f", 0.5)
+
+
+def _configure(mode: str) -> Callable[[], None]:
+    """ロギングを設定し、設定を解除する関数を返す"""
+    logger_module.shutdown_logging()
+    if mode == "disabled":
+        logging.disable(logging.CRITICAL)
+        return lambda: logging.disable(logging.NOTSET)
+    if mode == "sync":
+        logging.config.dictConfig(logger_module.get_logging_config())
+
+        def teardown() -> None:
+            for handler in logging.getLogger("src").handlers:
+                handler.close()
+
+        return teardown
+    logger_module.setup_logging()
+    return logger_module.shutdown_logging
+
+
+def run(trials: int, n_splits: int, repeat: int) -> List[Dict[str, Any]]:
+    """設定ごとに1試行あたりの時間を計測する"""
+    seconds: Dict[str, float] = {}
+    with (
+        tempfile.TemporaryDirectory() as log_dir,
+        open(os.devnull, "w") as devnull,
+        contextlib.redirect_stderr(devnull),
+        mock.patch.object(logger_module, "_log_dir", return_value=Path(log_dir)),
+    ):
+        # インポート時の設定は元の標準エラー出力に書き込むため、解除してから計測する
+        logger_module.shutdown_logging()
+        _trial(n_splits)  # ウォームアップ
+        for mode in _MODES:
+            teardown = _configure(mode)
+            try:
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    for _ in range(trials):
+                        _trial(n_splits)
+                    timings.append((time.perf_counter() - start) / trials)
+                seconds[mode] = float(np.median(timings))
+            finally:
+                teardown()
+
+    results = [
+        {
+            "mode": mode,
+            "trial_ms": seconds[mode] * 1000,
+            "overhead_ms": (seconds[mode] - seconds["disabled"]) * 1000,
+        }
+        for mode in _MODES
+    ]
+    print(f"{'mode':>9} {'trial ms':>10} {'overhead ms':>12}")
+    for r in results:
+        print(f"{r['mode']:>9} {r['trial_ms']:>10.3f} {r['overhead_ms']:>12.3f}")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Logging overhead benchmark")
+    parser.add_argument("--trials", type=int, default=200)
+    parser.add_argument("--n-splits", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=str, help="結果を書き出す JSON ファイル")
+    args = parser.parse_args()
+
+    results = run(args.trials, args.n_splits, args.repeat)
+    logger_module.setup_logging()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+ストアドプロシージャごとの処理時間・メモリ使用量を計測し、基準値と比較するベンチマーク
+
+合成データの行数（スケール）ごとに LocalSession 上で環境を構築し、以下の順に
+各プロシージャを実行する。最大常駐メモリはプロセス内で単調に増えるため、
+プロシージャごとに新しいプロセスで実行する（データベースとモデルはスケールごとの
+一時ディレクトリに保存して引き継ぐ）。
+
+- dataset: 学習日の翌日から14日分のデータセット更新（14回の呼び出しの合計）
+- training: 学習（Optuna の10試行を含む）とモデルの登録
+- prediction: 当日分の推論
+- offline_testing: デフォルトバージョンと最新バージョンの比較
+
+結果（経過時間・最大常駐メモリ・処理した行数と1秒あたりの処理行数）は --output の
+JSON に書き出す。処理した行数は各呼び出しの直下のステージ（取得・追加・推論など）の
+最大の行数で、合成データの行数ではない。学習は Optuna の探索も含めて乱数シードを
+固定しているため、同じ環境では実行ごとの差は小さい。
+pipeline_baseline.json の基準値に許容倍率（tolerance）を掛けた値を超えた場合
+（増加量が min_delta 未満の場合を除く）は終了コード 1 で終了する。基準値は実行環境に
+依存するため、計測環境を変えた場合は --update-baseline で更新する。
+
+使用例:
+    python -m benchmarks.bench_pipeline --output bench_results.json
+    python -m benchmarks.bench_pipeline --scales 2000 --update-baseline
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List
+
+_BASELINE_PATH = Path(__file__).parent / "pipeline_baseline.json"
+_PROCEDURES = ("dataset", "training", "prediction", "offline_testing")
+_SCALES = (2_000, 10_000)
+_PERIOD_DAYS = 100
+# 基準値が未設定の場合の許容倍率
+_DEFAULT_TOLERANCE = {"wall_seconds": 1.5, "peak_rss_mb": 1.25}
+# 許容倍率によらず許容する増加量（短時間の処理で誤差を回帰と判定しないため）
+_DEFAULT_MIN_DELTA = {"wall_seconds": 0.5, "peak_rss_mb": 25.0}
+
+
+def _run_procedure(procedure: str, root_dir: str, rows: int) -> Dict[str, Any]:
+    """
+    子プロセスの中で1つの処理を実行し、ルートのスパンの計測結果を返す
+
+    Args:
+        procedure (str): "setup" または _PROCEDURES のいずれか
+        root_dir (str): LocalSession のデータベースとモデルの保存先
+        rows (int): 合成データの行数
+
+    Returns:
+        Dict[str, Any]: 経過時間・処理した行数（複数回呼び出す場合は合計）と
+            最大常駐メモリ
+    """
+    from benchmarks.bench_local_pipeline import (
+        evaluation_dates,
+        setup_local_environment,
+    )
+    from src.local import LocalSession
+    from src.pipelines.sproc_dataset import sproc_dataset
+    from src.pipelines.sproc_offline_testing import sproc_offline_testing
+    from src.pipelines.sproc_prediction import sproc_prediction
+    from src.pipelines.sproc_training import sproc_training
+    from src.utils.tracing import set_sink
+
+    # ルートのスパンと、処理した行数を求めるためその直下のスパンを記録する
+    records: List[Dict[str, Any]] = []
+    set_sink(
+        "bench", lambda r: records.append(r) if r["path"].count("/") <= 1 else None
+    )
+    session = LocalSession(root_dir=root_dir)
+    today = date.today()
+    try:
+        if procedure == "setup":
+            setup_local_environment(session, rows, _PERIOD_DAYS)
+        elif procedure == "dataset":
+            for target_date in evaluation_dates(today):
+                sproc_dataset(session, target_date)
+        elif procedure == "training":
+            sproc_training(session)
+        elif procedure == "prediction":
+            sproc_prediction(session, today.isoformat())
+        elif procedure == "offline_testing":
+            sproc_offline_testing(session)
+        else:
+            raise ValueError(f"Unknown procedure: {procedure}")
+    finally:
+        session.close()
+
+    roots = [r for r in records if "/" not in r["path"]]
+    rows_by_call: Dict[str, int] = {}
+    for r in records:
+        if "/" in r["path"] and r["rows"] is not None:
+            rows_by_call[r["trace_id"]] = max(
+                rows_by_call.get(r["trace_id"], 0), r["rows"]
+            )
+    return {
+        "wall_seconds": sum(r["wall_seconds"] for r in roots),
+        "peak_rss_mb": max(r["peak_rss_mb"] for r in roots),
+        "rows": sum(rows_by_call.values()),
+    }
+
+
+def measure(procedure: str, root_dir: str, rows: int) -> Dict[str, Any]:
+    """新しいプロセスで1つの処理を実行し、計測結果を取得する"""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.bench_pipeline",
+            "--worker",
+            procedure,
+            "--root-dir",
+            root_dir,
+            "--scales",
+            str(rows),
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"{procedure} failed (rows={rows}):\n{result.stderr[-2000:]}"
+        )
+    return json.loads((Path(root_dir) / f"{procedure}.json").read_text())
+
+
+def run(scales: List[int]) -> List[Dict[str, Any]]:
+    """スケールごとに各プロシージャを実行して計測する"""
+    results = []
+    for rows in scales:
+        with tempfile.TemporaryDirectory() as root_dir:
+            measure("setup", root_dir, rows)
+            for procedure in _PROCEDURES:
+                metrics = measure(procedure, root_dir, rows)
+                results.append(
+                    {
+                        "scale": rows,
+                        "procedure": procedure,
+                        **metrics,
+                        "rows_per_second": metrics["rows"] / metrics["wall_seconds"],
+                    }
+                )
+    return results
+
+
+def compare(
+    results: List[Dict[str, Any]], baseline: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """
+    計測結果を基準値と比較する
+
+    Args:
+        results (List[Dict[str, Any]]): run の結果
+        baseline (Dict[str, Any]): 基準値（tolerance・min_delta と scale ごとの results）
+
+    Returns:
+        List[Dict[str, Any]]: 基準値を超えた指標（procedure, scale, metric, value, limit）
+    """
+    tolerance = {**_DEFAULT_TOLERANCE, **baseline.get("tolerance", {})}
+    min_delta = {**_DEFAULT_MIN_DELTA, **baseline.get("min_delta", {})}
+    regressions = []
+    for r in results:
+        expected = baseline.get("results", {}).get(str(r["scale"]), {})
+        for metric, ratio in tolerance.items():
+            base = expected.get(r["procedure"], {}).get(metric)
+            if base is None:
+                continue
+            r[f"{metric}_baseline"] = base
+            limit = max(base * ratio, base + min_delta[metric])
+            if r[metric] > limit:
+                regressions.append(
+                    {
+                        "procedure": r["procedure"],
+                        "scale": r["scale"],
+                        "metric": metric,
+                        "value": r[metric],
+                        "limit": limit,
+                    }
+                )
+    return regressions
+
+
+def _to_baseline(results: List[Dict[str, Any]], previous: Dict[str, Any]) -> Dict:
+    """計測結果を基準値の形式に変換する（許容倍率・増加量は既存の設定を引き継ぐ）"""
+    baseline: Dict[str, Any] = {
+        "tolerance": {**_DEFAULT_TOLERANCE, **previous.get("tolerance", {})},
+        "min_delta": {**_DEFAULT_MIN_DELTA, **previous.get("min_delta", {})},
+        "results": {},
+    }
+    for r in results:
+        baseline["results"].setdefault(str(r["scale"]), {})[r["procedure"]] = {
+            "wall_seconds": round(r["wall_seconds"], 3),
+            "peak_rss_mb": round(r["peak_rss_mb"], 1),
+        }
+    return baseline
+
+
+def _report(results: List[Dict[str, Any]], regressions: List[Dict[str, Any]]) -> None:
+    print(
+        f"{'procedure':<16} {'scale':>7} {'seconds':>9} {'baseline':>9} "
+        f"{'peak MB':>8} {'baseline':>9} {'rows':>8} {'rows/s':>10}"
+    )
+    for r in results:
+        base_seconds = r.get("wall_seconds_baseline")
+        base_rss = r.get("peak_rss_mb_baseline")
+        print(
+            f"{r['procedure']:<16} {r['scale']:>7} {r['wall_seconds']:>9.2f} "
+            f"{base_seconds if base_seconds is not None else '-':>9} "
+            f"{r['peak_rss_mb']:>8.0f} {base_rss if base_rss is not None else '-':>9} "
+            f"{r['rows']:>8} {r['rows_per_second']:>10.0f}"
+        )
+    for g in regressions:
+        print(
+            f"REGRESSION {g['procedure']} (rows={g['scale']}): {g['metric']} "
+            f"{g['value']:.2f} > {g['limit']:.2f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pipeline benchmark with baselines")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(_SCALES))
+    parser.add_argument("--baseline", type=str, default=str(_BASELINE_PATH))
+    parser.add_argument(
+        "--update-baseline", action="store_true", help="計測結果で基準値を上書きする"
+    )
+    parser.add_argument("--output", type=str, help="結果を書き出す JSON ファイル")
+    parser.add_argument("--worker", type=str, help=argparse.SUPPRESS)
+    parser.add_argument("--root-dir", type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.getLogger("src").setLevel(logging.WARNING)
+    if args.worker:
+        # 標準出力にはログも出力されるため、結果は保存先のファイルで受け渡す
+        metrics = _run_procedure(args.worker, args.root_dir, args.scales[0])
+        (Path(args.root_dir) / f"{args.worker}.json").write_text(json.dumps(metrics))
+        return
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    results = run(args.scales)
+    regressions = compare(results, baseline)
+    _report(results, regressions)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results, "regressions": regressions}, f, indent=2)
+    if args.update_baseline:
+        baseline_path.write_text(
+            json.dumps(_to_baseline(results, baseline), indent=2) + "\n"
+        )
+        return
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
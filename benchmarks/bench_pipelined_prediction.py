@@ -0,0 +1,143 @@
+"""
+ストリーミング推論の取得・推論・書き込みを並行実行した場合の処理時間を比較するベンチマーク
+
+SyntheticSession に受信・書き込みの待ち時間を加え、pipeline_depth ごとに
+sproc_prediction 全体の処理時間とステージごとの busy / idle / blocked 時間を計測する。
+depth=0 は逐次実行となる。
+
+使用例:
+    python -m benchmarks.bench_pipelined_prediction --n-rows 2000000 --depths 0 1 2 4
+"""
+
+import argparse
+import json
+import logging
+import time
+from dataclasses import asdict
+from typing import Dict, List
+from unittest import mock
+
+from benchmarks.bench_streaming_prediction import _LocalModelVersion
+from benchmarks.fake_session import SyntheticSession
+from benchmarks.synthetic import generate_sessions
+from src.models.trainer import create_model_pipeline
+from src.pipelines import sproc_prediction as prediction
+from src.utils.config import replace_config
+from src.utils.constants import TARGET
+from src.utils.pipelined import PipelinedExecutor, StageStats
+
+
+class _RecordingExecutor(PipelinedExecutor):
+    last_stats: List[StageStats] = []
+
+    def run(self, *args, **kwargs) -> List[StageStats]:
+        stats = super().run(*args, **kwargs)
+        _RecordingExecutor.last_stats = stats
+        return stats
+
+
+def run(
+    n_rows: int,
+    batch_size: int,
+    depths: List[int],
+    fetch_latency: float,
+    write_latency: float,
+    n_estimators: int,
+    max_depth: int,
+) -> List[Dict[str, object]]:
+    """pipeline_depth ごとに処理時間とステージごとの内訳を計測する"""
+    train = generate_sessions(10_000, seed=0, with_uid=False)
+    pipeline = create_model_pipeline(
+        params={"n_estimators": n_estimators, "max_depth": max_depth}
+    ).fit(train.drop(columns=["UID", "SESSION_DATE"] + TARGET), train[TARGET[0]])
+    mv = _LocalModelVersion(pipeline)
+
+    results = []
+    for depth in depths:
+        session = SyntheticSession(
+            n_rows,
+            fetch_rows=batch_size,
+            fetch_latency=fetch_latency,
+            write_latency=write_latency,
+        )
+        start = time.perf_counter()
+        with (
+            mock.patch.object(
+                prediction,
+                "config",
+                replace_config(
+                    prediction.config,
+                    "prediction",
+                    streaming=True,
+                    incremental=False,
+                    batch_size=batch_size,
+                    pipeline_depth=depth,
+                ),
+            ),
+            mock.patch.object(
+                prediction, "load_default_model_version", return_value=mv
+            ),
+            mock.patch.object(prediction, "setup_logging"),
+            mock.patch.object(prediction, "PipelinedExecutor", _RecordingExecutor),
+        ):
+            prediction.sproc_prediction(session, "2024-10-01")
+        seconds = time.perf_counter() - start
+        results.append(
+            {
+                "depth": depth,
+                "seconds": seconds,
+                "rows_per_sec": n_rows / seconds,
+                "stages": [asdict(s) for s in _RecordingExecutor.last_stats],
+            }
+        )
+
+    baseline = results[0]["seconds"]
+    for r in results:
+        print(
+            f"depth={r['depth']}: {r['seconds']:.1f}s "
+            f"({r['rows_per_sec']:.0f} rows/s, x{baseline / r['seconds']:.2f})"
+        )
+        for s in r["stages"]:
+            print(
+                f"  {s['name']:>8} busy {s['busy_seconds']:6.1f}s "
+                f"idle {s['idle_seconds']:6.1f}s blocked {s['blocked_seconds']:6.1f}s"
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pipelined prediction benchmark")
+    parser.add_argument("--n-rows", type=int, default=2_000_000)
+    parser.add_argument("--batch-size", type=int, default=200_000)
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument(
+        "--fetch-latency",
+        type=float,
+        default=1.0,
+        help="結果バッチ1つあたりの受信待ち（秒）",
+    )
+    parser.add_argument(
+        "--write-latency", type=float, default=1.0, help="書き込み1回あたりの待ち（秒）"
+    )
+    parser.add_argument("--n-estimators", type=int, default=20)
+    parser.add_argument("--max-depth", type=int, default=8)
+    parser.add_argument("--output", type=str, help="結果を書き出す JSON ファイル")
+    args = parser.parse_args()
+
+    logging.getLogger("src").setLevel(logging.WARNING)
+    results = run(
+        args.n_rows,
+        args.batch_size,
+        args.depths,
+        args.fetch_latency,
+        args.write_latency,
+        args.n_estimators,
+        args.max_depth,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
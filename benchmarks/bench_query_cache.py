@@ -0,0 +1,159 @@
+"""
+バインドパラメータによる SQL 文の再利用率（コンパイルキャッシュのヒット率）を計測するベンチマーク
+
+日次バッチで発行される SQL 文（推論用データの取得・差分推論の anti-join・スコアの
+置き換え・シャドウスコアの削除・データセットの作成）を SyntheticSession に記録し、
+SQL 文の文字列をキーとするキャッシュのヒット率を比較する。
+
+- bound: 実際に発行する SQL 文（値は ? でバインド）
+- literal: 値を SQL 文に埋め込んだ場合（バインドした値を文字列として展開した SQL 文）
+
+Snowflake のコンパイル結果・クエリ履歴は SQL 文の文字列ごとに管理されるため、
+異なる SQL 文の数がそのままコンパイルの回数・履歴上の別クエリの数となる。
+
+使用例:
+    python -m benchmarks.bench_query_cache --days 30
+"""
+
+import argparse
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fake_session import SyntheticSession
+from src.data.dataset import create_ml_dataset
+from src.data.loader import (
+    fetch_prediction_dataset,
+    fetch_unscored_prediction_dataset,
+    iter_prediction_batches,
+)
+from src.data.scores import get_model_id, write_shadow_scores
+from src.utils.constants import SCHEMA, SCORES_BASE
+from src.utils.snowflake import upload_dataframe_to_snowflake
+
+_DATABASE = "BENCH_DB"
+
+
+def _literal(value: Any) -> str:
+    return str(value) if isinstance(value, (int, float)) else f"'{value}'"
+
+
+def _inline(text: str, params: Tuple[Any, ...]) -> str:
+    """バインドした値を SQL 文に埋め込んだ文字列を作成する"""
+    parts = text.split("?")
+    if len(parts) != len(params) + 1:
+        raise ValueError(f"Parameter count mismatch: {text}")
+    return parts[0] + "".join(_literal(p) + rest for p, rest in zip(params, parts[1:]))
+
+
+def _run_day(session: SyntheticSession, day: pd.Timestamp, shadow_days: int) -> None:
+    """1日分の日次バッチで発行される SQL 文を記録する"""
+    date = day.strftime("%Y-%m-%d")
+    create_ml_dataset(session, target_date=date, database_name=_DATABASE)
+
+    # モデルは月次で更新される
+    model_id = get_model_id(
+        session, _DATABASE, SCHEMA, "RANDOM_FOREST", f"V_{day:%y%m}01_100000"
+    )
+    df = fetch_prediction_dataset(session, prediction_date=date)
+    fetch_unscored_prediction_dataset(session, prediction_date=date, model_id=model_id)
+    for _ in iter_prediction_batches(
+        session, prediction_date=date, batch_size=len(df), model_id=model_id
+    ):
+        pass
+
+    scores_df = pd.DataFrame(
+        {
+            "UID": df["UID"].values,
+            "SESSION_DATE": date,
+            "MODEL_ID": np.int64(model_id),
+            "SCORE": 0.5,
+        }
+    )
+    upload_dataframe_to_snowflake(
+        session,
+        scores_df,
+        database_name=_DATABASE,
+        schema_name=SCHEMA,
+        table_name=SCORES_BASE,
+        mode="swap",
+    )
+
+    # 遅れて到着した行を含む直近数日分のシャドウスコアを置き換える
+    dates = pd.Series(
+        [(day - pd.Timedelta(days=i)).strftime("%Y-%m-%d") for i in range(shadow_days)]
+    )
+    write_shadow_scores(
+        session,
+        uids=pd.Series(["uid"] * len(dates)),
+        session_date=dates,
+        model_ids={"V_SHADOW": model_id + 1},
+        scores={"V_SHADOW": np.zeros(len(dates))},
+        database_name=_DATABASE,
+        schema_name=SCHEMA,
+    )
+
+
+def _hit_rate(keys: Iterable[str]) -> Dict[str, float]:
+    seen = set()
+    hits = 0
+    total = 0
+    for key in keys:
+        total += 1
+        if key in seen:
+            hits += 1
+        seen.add(key)
+    return {"statements": total, "distinct": len(seen), "hit_rate": hits / total}
+
+
+def run(days: int, rows_per_day: int, max_shadow_days: int) -> List[Dict[str, Any]]:
+    """日数分の日次バッチを記録し、SQL 文の再利用率を比較する"""
+    session = SyntheticSession(rows_per_day, fetch_rows=rows_per_day)
+    for i, day in enumerate(pd.date_range("2024-10-01", periods=days)):
+        _run_day(session, day, shadow_days=1 + i % max_shadow_days)
+
+    # ステージングテーブル名は実行ごとに異なるため、比較から除く
+    queries = [
+        (text, params)
+        for text, params in session.queries
+        if "_STAGING_" not in text and text not in ("BEGIN", "COMMIT")
+    ]
+    results = [
+        {"mode": "literal", **_hit_rate(_inline(t, p) for t, p in queries)},
+        {"mode": "bound", **_hit_rate(t for t, _ in queries)},
+    ]
+
+    print(f"{'mode':>8} {'statements':>11} {'distinct':>9} {'hit rate':>9}")
+    for r in results:
+        print(
+            f"{r['mode']:>8} {r['statements']:>11} {r['distinct']:>9} "
+            f"{r['hit_rate']:>9.1%}"
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Query cache hit rate benchmark")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--rows-per-day", type=int, default=1_000)
+    parser.add_argument(
+        "--max-shadow-days",
+        type=int,
+        default=3,
+        help="シャドウスコアを置き換える日数の最大値（IN リストの長さが変わる）",
+    )
+    parser.add_argument("--output", type=str, help="結果を書き出す JSON ファイル")
+    args = parser.parse_args()
+
+    logging.getLogger("src").setLevel(logging.WARNING)
+    results = run(args.days, args.rows_per_day, args.max_shadow_days)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+スコアテーブルの列構成・クラスタリングによる日付絞り込みのプルーニング効果を計測するベンチマーク
+
+Snowflake のマイクロパーティションの代わりに、行グループごとに最小値・最大値の統計を
+持つ Parquet ファイルを用いる。日付で絞り込むクエリは統計から対象外の行グループを
+読み飛ばすため、SESSION_DATE でクラスタリングされているかどうかで読み込む量が変わる。
+
+- legacy: MODEL_NAME / MODEL_VERSION を文字列で持ち、クラスタリングなし（到着順が混在）
+- base: MODEL_ID（NUMBER）で持ち、SESSION_DATE でクラスタリング
+
+使用例:
+    python -m benchmarks.bench_scores_pruning --days 90 --rows-per-day 50000
+"""
+
+import argparse
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+LAYOUTS = {
+    "legacy": {"model_id": False, "clustered": False},
+    "legacy_clustered": {"model_id": False, "clustered": True},
+    "base_unclustered": {"model_id": True, "clustered": False},
+    "base": {"model_id": True, "clustered": True},
+}
+
+
+def _generate_scores(days: int, rows_per_day: int, seed: int) -> pd.DataFrame:
+    """期間分のスコアを生成する（行の並びは日付が混在した到着順）"""
+    rng = np.random.default_rng(seed)
+    n_rows = days * rows_per_day
+    dates = pd.date_range("2024-01-01", periods=days).date
+    df = pd.DataFrame(
+        {
+            "UID": np.char.add("uid_", np.arange(n_rows).astype(str)),
+            "SESSION_DATE": np.repeat(dates, rows_per_day),
+            "MODEL_ID": np.int64(1),
+            "SCORE": rng.random(n_rows),
+        }
+    )
+    # 再スコアリングや遅れて到着した行の追記で、クラスタリングがない場合は
+    # 1つのパーティションに様々な日付が混在する
+    return df.iloc[rng.permutation(n_rows)].reset_index(drop=True)
+
+
+def _to_layout(df: pd.DataFrame, model_id: bool, clustered: bool) -> pa.Table:
+    if not model_id:
+        df = df.drop(columns=["MODEL_ID"])
+        df.insert(2, "MODEL_NAME", "RANDOM_FOREST")
+        df.insert(3, "MODEL_VERSION", "V_240101_100000")
+    if clustered:
+        df = df.sort_values("SESSION_DATE", kind="stable")
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _scanned_row_groups(path: Path, start, end) -> List[int]:
+    """統計からプルーニングできない（日付範囲が重なる）行グループを返す"""
+    metadata = pq.ParquetFile(path).metadata
+    column = metadata.schema.to_arrow_schema().get_field_index("SESSION_DATE")
+    scanned = []
+    for i in range(metadata.num_row_groups):
+        stats = metadata.row_group(i).column(column).statistics
+        if stats.max >= start and stats.min <= end:
+            scanned.append(i)
+    return scanned
+
+
+def _median_seconds(fn: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def run(
+    days: int, rows_per_day: int, partition_rows: int, query_days: int, repeat: int
+) -> List[Dict[str, float]]:
+    """列構成・クラスタリングごとに、日付で絞り込むクエリの読み込み量と時間を計測する"""
+    scores = _generate_scores(days, rows_per_day, seed=0)
+    start = scores["SESSION_DATE"].min() + pd.Timedelta(days=days // 2)
+    end = start + pd.Timedelta(days=query_days - 1)
+    expected = rows_per_day * query_days
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, layout in LAYOUTS.items():
+            path = Path(tmp_dir) / f"{name}.parquet"
+            table = _to_layout(scores, **layout)
+            pq.write_table(table, path, row_group_size=partition_rows)
+            del table
+
+            metadata = pq.ParquetFile(path).metadata
+            scanned = _scanned_row_groups(path, start, end)
+            scanned_bytes = sum(metadata.row_group(i).total_byte_size for i in scanned)
+            dataset = ds.dataset(path, format="parquet")
+            condition = (ds.field("SESSION_DATE") >= pa.scalar(start)) & (
+                ds.field("SESSION_DATE") <= pa.scalar(end)
+            )
+            result = dataset.to_table(filter=condition)
+            if result.num_rows != expected:
+                raise AssertionError(f"Expected {expected} rows, got {result.num_rows}")
+
+            results.append(
+                {
+                    "layout": name,
+                    "file_mb": path.stat().st_size / 2**20,
+                    "partitions": metadata.num_row_groups,
+                    "scanned": len(scanned),
+                    "scanned_mb": scanned_bytes / 2**20,
+                    # 圧縮・辞書エンコードを展開した後の結果の大きさ
+                    "result_mb": result.nbytes / 2**20,
+                    "seconds": _median_seconds(
+                        lambda: dataset.to_table(filter=condition), repeat
+                    ),
+                }
+            )
+
+    print(
+        f"{'layout':>17} {'file MB':>8} {'partitions':>11} {'scanned':>8} "
+        f"{'scanned MB':>11} {'result MB':>10} {'seconds':>8}"
+    )
+    for r in results:
+        print(
+            f"{r['layout']:>17} {r['file_mb']:>8.1f} {r['partitions']:>11} "
+            f"{r['scanned']:>8} {r['scanned_mb']:>11.1f} {r['result_mb']:>10.1f} "
+            f"{r['seconds']:>8.3f}"
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Scores table pruning benchmark")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--rows-per-day", type=int, default=50_000)
+    parser.add_argument(
+        "--partition-rows",
+        type=int,
+        default=50_000,
+        help="1パーティション（行グループ）あたりの行数",
+    )
+    parser.add_argument(
+        "--query-days", type=int, default=1, help="クエリで絞り込む日数"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=str, help="結果を書き出す JSON ファイル")
+    args = parser.parse_args()
+
+    logging.getLogger("src").setLevel(logging.WARNING)
+    results = run(
+        args.days,
+        args.rows_per_day,
+        args.partition_rows,
+        args.query_days,
+        args.repeat,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+sproc_prediction の一括モードとストリーミングモードのピークメモリを比較するベンチマーク
+
+Snowflake の代わりに合成データを返す SyntheticSession を用い、推論処理が保持した
+メモリのピークを tracemalloc で計測する。一括モードは1日分を全てメモリに載せるため、
+行数の大きいケースは --full-max-rows を超える分をスキップする。
+
+使用例:
+    python -m benchmarks.bench_streaming_prediction --n-rows 1000000 10000000
+"""
+
+import argparse
+import gc
+import json
+import logging
+import time
+import tracemalloc
+from typing import Dict, List
+from unittest import mock
+
+import pandas as pd
+from sklearn.pipeline import Pipeline
+
+from benchmarks.fake_session import SyntheticSession
+from benchmarks.synthetic import generate_sessions
+from src.models.trainer import create_model_pipeline
+from src.pipelines import sproc_prediction as prediction
+from src.utils.config import replace_config
+from src.utils.constants import TARGET
+
+DEFAULT_N_ROWS = [1_000_000, 10_000_000]
+
+
+class _LocalModelVersion:
+    """mv.run と同じ形式の結果を返すモデルバージョン"""
+
+    def __init__(self, pipeline: Pipeline) -> None:
+        self._pipeline = pipeline
+        self._model_name = self.model_name = "RANDOM_FOREST"
+        self._version_name = self.version_name = "V_BENCH"
+
+    def run(self, features: pd.DataFrame, function_name: str) -> pd.DataFrame:
+        proba = getattr(self._pipeline, function_name)(features)
+        return pd.DataFrame(
+            {"output_feature_0": proba[:, 0], "output_feature_1": proba[:, 1]}
+        )
+
+
+def _measure(
+    mv: _LocalModelVersion, n_rows: int, streaming: bool, batch_size: int
+) -> Dict[str, float]:
+    session = SyntheticSession(n_rows)
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    with (
+        mock.patch.object(
+            prediction,
+            "config",
+            replace_config(
+                prediction.config,
+                "prediction",
+                streaming=streaming,
+                incremental=False,
+                batch_size=batch_size,
+            ),
+        ),
+        mock.patch.object(prediction, "load_default_model_version", return_value=mv),
+        mock.patch.object(prediction, "setup_logging"),
+    ):
+        prediction.sproc_prediction(session, "2024-10-01")
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    written = sum(session.table_rows.values())
+    if written != n_rows:
+        raise AssertionError(f"Expected {n_rows} rows to be written, got {written}")
+    return {
+        "mode": "streaming" if streaming else "full",
+        "n_rows": n_rows,
+        "peak_mb": peak / 2**20,
+        "seconds": seconds,
+        "rows_per_sec": n_rows / seconds,
+    }
+
+
+def run(
+    n_rows_list: List[int],
+    batch_size: int,
+    full_max_rows: int,
+    n_estimators: int,
+    max_depth: int,
+) -> List[Dict[str, float]]:
+    """行数ごとに両モードのピークメモリと処理時間を計測する"""
+    train = generate_sessions(10_000, seed=0, with_uid=False)
+    pipeline = create_model_pipeline(
+        params={"n_estimators": n_estimators, "max_depth": max_depth}
+    ).fit(train.drop(columns=["UID", "SESSION_DATE"] + TARGET), train[TARGET[0]])
+    mv = _LocalModelVersion(pipeline)
+
+    results = []
+    for n_rows in n_rows_list:
+        results.append(_measure(mv, n_rows, streaming=True, batch_size=batch_size))
+        if n_rows <= full_max_rows:
+            results.append(_measure(mv, n_rows, streaming=False, batch_size=batch_size))
+
+    print(f"{'mode':>10} {'rows':>11} {'peak MB':>9} {'seconds':>8} {'rows/s':>10}")
+    for r in results:
+        print(
+            f"{r['mode']:>10} {r['n_rows']:>11} {r['peak_mb']:>9.1f} "
+            f"{r['seconds']:>8.1f} {r['rows_per_sec']:>10.0f}"
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Streaming prediction benchmark")
+    parser.add_argument("--n-rows", type=int, nargs="+", default=DEFAULT_N_ROWS)
+    parser.add_argument("--batch-size", type=int, default=500_000)
+    parser.add_argument(
+        "--full-max-rows",
+        type=int,
+        default=2_000_000,
+        help="一括モードを計測する最大行数（これを超える行数はストリーミングのみ）",
+    )
+    parser.add_argument("--n-estimators", type=int, default=20)
+    parser.add_argument("--max-depth", type=int, default=8)
+    parser.add_argument("--output", type=str, help="結果を書き出す JSON ファイル")
+    args = parser.parse_args()
+
+    logging.getLogger("src").setLevel(logging.WARNING)
+    results = run(
+        args.n_rows,
+        args.batch_size,
+        args.full_max_rows,
+        args.n_estimators,
+        args.max_depth,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
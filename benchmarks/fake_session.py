@@ -0,0 +1,158 @@
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from benchmarks.synthetic import generate_sessions
+
+
+class _QueryRecord(NamedTuple):
+    query_id: str
+    sql_text: str
+    thread_id: Optional[int]
+
+
+class _QueryHistory:
+    """Snowpark の QueryHistory と同様に、ブロック内で実行された SQL 文を記録する"""
+
+    def __init__(self, session: "SyntheticSession", include_thread_id: bool) -> None:
+        self._session = session
+        self._include_thread_id = include_thread_id
+        self.queries: List[_QueryRecord] = []
+
+    def __enter__(self) -> "_QueryHistory":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._session._listeners.remove(self)
+
+    def _notify(self, sql_text: str) -> None:
+        thread_id = threading.get_ident() if self._include_thread_id else None
+        self.queries.append(_QueryRecord(uuid.uuid4().hex, sql_text, thread_id))
+
+
+class _Writer:
+    def __init__(self, session: "SyntheticSession", df: pd.DataFrame) -> None:
+        self._session = session
+        self._df = df
+        self._mode = "errorifexists"
+
+    def mode(self, mode: str) -> "_Writer":
+        self._mode = mode
+        return self
+
+    def save_as_table(self, table_name: str, **kwargs) -> None:
+        time.sleep(self._session.write_latency)
+        if self._mode == "overwrite":
+            self._session.table_rows[table_name] = 0
+        self._session.table_rows[table_name] += len(self._df)
+
+
+class _DataFrame:
+    def __init__(self, session: "SyntheticSession", df: pd.DataFrame) -> None:
+        self.write = _Writer(session, df)
+
+
+class _Table:
+    def __init__(self, n_rows: int) -> None:
+        self._n_rows = n_rows
+
+    def count(self) -> int:
+        return self._n_rows
+
+
+class _QueryResult:
+    def __init__(self, session: "SyntheticSession", query: str) -> None:
+        self._session = session
+        self._query = query
+
+    def collect(self) -> List[tuple]:
+        statement = " ".join(self._query.split())
+        self._session._execute(self._query)
+        # モデルディメンションテーブルの参照には登録済みの MODEL_ID を返す
+        if statement.startswith("SELECT MODEL_ID"):
+            return [(1,)]
+        return []
+
+    def to_pandas_batches(self) -> Iterator[pd.DataFrame]:
+        # Snowflake の結果バッチと同様に、大きさの揃わないバッチを順に返す
+        self._session._execute(self._query)
+        sizes = (self._session.fetch_rows, self._session.fetch_rows // 3)
+        start = 0
+        i = 0
+        while start < self._session.n_rows:
+            n = min(sizes[i % 2], self._session.n_rows - start)
+            time.sleep(self._session.fetch_latency)
+            yield generate_sessions(n, seed=i, with_uid=False)
+            start += n
+            i += 1
+
+    def to_pandas(self) -> pd.DataFrame:
+        return pd.concat(list(self.to_pandas_batches()), ignore_index=True)
+
+
+class SyntheticSession:
+    """
+    ベンチマーク用に Snowpark Session の一部を模したセッション
+
+    クエリの結果は合成データ（n_rows 行）を都度生成して返し、書き込みは行数のみを記録する。
+    結果のデータを保持しないため、計測されるメモリは処理側が保持したもののみとなる。
+    fetch_latency / write_latency を指定すると、結果バッチの受信・テーブルへの書き込み
+    ごとにネットワーク越しの待ち時間（GIL を解放する sleep）を加える。
+    query_tag・query_history は Snowpark と同じインターフェースで、実行した SQL 文に
+    クエリ ID を割り当て、その時点のクエリタグを query_tags に記録する。
+    """
+
+    def __init__(
+        self,
+        n_rows: int,
+        fetch_rows: int = 120_000,
+        fetch_latency: float = 0.0,
+        write_latency: float = 0.0,
+    ) -> None:
+        self.n_rows = n_rows
+        self.fetch_rows = fetch_rows
+        self.fetch_latency = fetch_latency
+        self.write_latency = write_latency
+        self.statements: List[str] = []
+        # sql() に渡された SQL 文とバインドパラメータ（実行したかどうかによらない）
+        self.queries: List[Tuple[str, Tuple[Any, ...]]] = []
+        self.table_rows: Dict[str, int] = defaultdict(int)
+        self.query_tag: Optional[str] = None
+        # 実行した SQL 文と、その時点のクエリタグ
+        self.query_tags: List[Tuple[str, Optional[str]]] = []
+        self._listeners: List[_QueryHistory] = []
+
+    def _execute(self, query: str) -> None:
+        statement = " ".join(query.split())
+        self.statements.append(statement)
+        self.query_tags.append((statement, self.query_tag))
+        for listener in list(self._listeners):
+            listener._notify(query)
+
+    def query_history(self, include_thread_id: bool = False) -> _QueryHistory:
+        history = _QueryHistory(self, include_thread_id)
+        self._listeners.append(history)
+        return history
+
+    def sql(self, query: str, params: Optional[Sequence[Any]] = None) -> _QueryResult:
+        self.queries.append((" ".join(query.split()), tuple(params or ())))
+        return _QueryResult(self, query)
+
+    def create_dataframe(self, df: pd.DataFrame) -> _DataFrame:
+        return _DataFrame(self, df)
+
+    def table(self, table_name: str) -> _Table:
+        return _Table(self.table_rows[table_name])
+
+    def use_database(self, database_name: str) -> None:
+        pass
+
+    def use_schema(self, schema_name: str) -> None:
+        pass
+
+    def get_current_database(self) -> str:
+        return "BENCH_DB"
@@ -0,0 +1,53 @@
+import uuid
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.utils.constants import CATEGORICAL_FEATURES, NUMERICAL_FEATURES, TARGET
+
+VISITOR_TYPES = ["New_Visitor", "Returning_Visitor", "Other"]
+
+
+def generate_sessions(
+    n_rows: int,
+    session_dates: Sequence[str] = ("2024-10-01",),
+    seed: int = 0,
+    with_uid: bool = True,
+) -> pd.DataFrame:
+    """
+    dataset テーブルと同じカラム構成の合成データを生成する
+
+    Args:
+        n_rows (int): 行数
+        session_dates (Sequence[str]): SESSION_DATE に割り振る日付（均等に割り当てる）
+        seed (int): 乱数シード
+        with_uid (bool): UID を生成するかどうか（大規模データでは生成コストが大きい）
+
+    Returns:
+        pd.DataFrame: 合成データ
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {col: rng.exponential(10.0, n_rows).round(2) for col in NUMERICAL_FEATURES}
+    )
+    for col in CATEGORICAL_FEATURES:
+        if col == "VISITORTYPE":
+            df[col] = rng.choice(VISITOR_TYPES, n_rows)
+        elif col == "WEEKEND":
+            df[col] = rng.integers(0, 2, n_rows)
+        else:
+            df[col] = rng.integers(1, 10, n_rows)
+
+    noise = rng.normal(0.0, 5.0, n_rows)
+    df[TARGET[0]] = (df["PAGEVALUES"] + noise > 12).astype(int)
+
+    dates = np.asarray(session_dates)
+    df.insert(0, "SESSION_DATE", dates[np.arange(n_rows) % len(dates)])
+    if with_uid:
+        df.insert(
+            0, "UID", [str(uuid.UUID(bytes=rng.bytes(16))) for _ in range(n_rows)]
+        )
+    else:
+        df.insert(0, "UID", np.char.add("uid_", np.arange(n_rows).astype(str)))
+    return df
@@ -3,6 +3,7 @@ import logging
 from snowflake.snowpark.session import Session
 
 from src.utils.constants import DATABASE_DEV, DATASET, SCHEMA, SOURCE
+from src.utils.query import Query, qualified_name, run_query
 from src.utils.snowflake import upload_dataframe_to_snowflake
 
 logger = logging.getLogger(__name__)
@@ -36,7 +37,7 @@ def create_ml_dataset(
 
         logger.info(f"Starting dataset generation. Target date: {target_date}")
         gen_query = f"""
-        create or replace table {database_name}.{schema_name}.{table_name} as
+        create or replace table {qualified_name(database_name, schema_name, table_name)} as
         select
             UID,
             SESSION_DATE, 
@@ -57,10 +58,10 @@ def create_ml_dataset(
             TRAFFICTYPE,
             VISITORTYPE,
             cast(WEEKEND as integer) as WEEKEND
-        from {database_name}.{schema_name}.{source_table_name}
-        where session_date <= '{target_date}'
+        from {qualified_name(database_name, schema_name, source_table_name)}
+        where session_date <= ?
         """
-        session.sql(gen_query).collect()
+        run_query(session, Query(gen_query, (target_date,))).collect()
         logger.info(
             f"Dataset generation completed: {database_name}.{schema_name}.{table_name}"
         )
@@ -77,7 +78,7 @@ def update_ml_dataset(
     schema_name: str = "ml",
     table_name: str = "dataset",
     source_table_name: str = "online_shoppers_intention",
-) -> None:
+) -> int:
     """
     prepare_online_shoppers_data関数で作成されたデータテーブルをsourceとして、
     指定された日付までのデータを取得しSnowflakeにロード
@@ -89,6 +90,9 @@ def update_ml_dataset(
         schema_name (str): スキーマ名
         table_name (str): テーブル名
         source_table_name (str): ソーステーブル名
+
+    Returns:
+        int: 追加した行数
     """
 
     try:
@@ -117,12 +121,11 @@ def update_ml_dataset(
                 VISITORTYPE,
                 cast(WEEKEND as integer) as WEEKEND
             from 
-                {database_name}.{schema_name}.{source_table_name}
+                {qualified_name(database_name, schema_name, source_table_name)}
             where
-                session_date = '{target_date}'
+                session_date = ?
         """
-        logger.debug(f"Executing query: {dataset_query}")
-        append_df = session.sql(dataset_query).to_pandas()
+        append_df = run_query(session, Query(dataset_query, (target_date,))).to_pandas()
         logger.info(f"Retrieved {len(append_df)} records")
 
         if len(append_df) > 0:
@@ -135,11 +138,12 @@ def update_ml_dataset(
                 database_name=database_name,
                 schema_name=schema_name,
                 table_name=table_name,
-                mode="append",
+                mode="swap",
             )
             logger.info("Data append completed successfully")
         else:
             logger.warning(f"No data found for target date: {target_date}")
+        return len(append_df)
 
     except Exception as e:
         logger.error(f"Error occurred during dataset update: {str(e)}")
@@ -1,5 +1,6 @@
 import logging
 from datetime import datetime
+from typing import Iterator, List, Optional
 
 import pandas as pd
 from snowflake.ml.model import ModelVersion
@@ -11,8 +12,11 @@ from src.utils.constants import (
     DATASET,
     NUMERICAL_FEATURES,
     SCHEMA,
+    SCORES_BASE,
     TARGET,
 )
+from src.utils.query import Query, column_list, qualified_name, run_query
+from src.utils.snowflake import session_date_condition
 
 logger = logging.getLogger(__name__)
 config = load_config()
@@ -24,6 +28,19 @@ def _get_base_config():
     return SCHEMA, DATASET, select_columns
 
 
+def _dataset_query(date_condition: Query) -> Query:
+    """データセットテーブルから条件に合う行を取得するクエリを作成する"""
+    schema, table, select_columns = _get_base_config()
+    return Query(
+        f"""
+        SELECT {column_list(select_columns)}
+        FROM {qualified_name(schema, table)}
+        WHERE {date_condition.text}
+        """,
+        date_condition.params,
+    )
+
+
 def fetch_training_dataset(session: Session) -> pd.DataFrame:
     """学習用データセットを取得する関数
 
@@ -34,25 +51,19 @@ def fetch_training_dataset(session: Session) -> pd.DataFrame:
         pd.DataFrame: 取得したデータフレーム
     """
     try:
-        schema, table, select_columns = _get_base_config()
-        period_months = config["data"]["period"]["months"]
+        period_months = config.data.period.months
 
         end_date = pd.Timestamp.now().strftime("%Y-%m-%d")
         start_date = (
             pd.Timestamp.now() - pd.DateOffset(months=period_months)
         ).strftime("%Y-%m-%d")
-        date_condition = f"SESSION_DATE BETWEEN '{start_date}' AND '{end_date}'"
 
         logger.info(
             f"Retrieving training data: period from {start_date} to {end_date} ({period_months} months)"
         )
 
-        query_string = f"""
-            SELECT {', '.join(select_columns)} 
-            FROM {schema}.{table}
-            WHERE {date_condition}
-        """
-        df = session.sql(query_string).to_pandas()
+        query = _dataset_query(session_date_condition(start_date, end_date))
+        df = run_query(session, query).to_pandas()
 
         if len(df) == 0:
             raise ValueError("No data found for the specified period.")
@@ -81,17 +92,10 @@ def fetch_prediction_dataset(session: Session, prediction_date: str) -> pd.DataF
         if not prediction_date:
             raise ValueError("prediction_date is required for inference")
 
-        schema, table, select_columns = _get_base_config()
-        date_condition = f"SESSION_DATE = '{prediction_date}'"
-
         logger.info(f"Retrieving inference data for date: {prediction_date}")
 
-        query_string = f"""
-            SELECT {', '.join(select_columns)} 
-            FROM {schema}.{table}
-            WHERE {date_condition}
-        """
-        df = session.sql(query_string).to_pandas()
+        query = _dataset_query(session_date_condition(prediction_date))
+        df = run_query(session, query).to_pandas()
 
         if len(df) == 0:
             raise ValueError("No data found for the specified date.")
@@ -106,6 +110,142 @@ def fetch_prediction_dataset(session: Session, prediction_date: str) -> pd.DataF
         )
 
 
+def _prediction_query(
+    prediction_date: str,
+    model_id: Optional[int] = None,
+    end_date: Optional[str] = None,
+) -> Query:
+    """
+    推論用データセットのクエリを作成する
+
+    各行の SESSION_DATE を含めて取得し、model_id 指定時は未スコアの行のみとする。
+    """
+    schema, table, select_columns = _get_base_config()
+    date_condition = session_date_condition(prediction_date, end_date, "d.SESSION_DATE")
+    query = Query(
+        f"""
+        SELECT {column_list(["SESSION_DATE"] + select_columns, alias="d")}
+        FROM {qualified_name(schema, table)} d
+        WHERE {date_condition.text}
+        """,
+        date_condition.params,
+    )
+    if model_id is not None:
+        query += Query(
+            f"""
+          AND NOT EXISTS (
+            SELECT 1
+            FROM {qualified_name(schema, SCORES_BASE)} s
+            WHERE s.UID = d.UID
+              AND s.SESSION_DATE = d.SESSION_DATE
+              AND s.MODEL_ID = ?
+          )
+            """,
+            (int(model_id),),
+        )
+    return query
+
+
+def fetch_unscored_prediction_dataset(
+    session: Session, prediction_date: str, model_id: int
+) -> pd.DataFrame:
+    """推論用データセットのうち、指定バージョンで未スコアの行のみを取得する関数
+
+    スコアテーブルとの anti-join を Snowflake 側で行うため、スコア済みの行は転送されない。
+    差分推論（遅れて到着したセッションのみのスコアリング）で使用する。
+
+    Args:
+        session (Session): Snowflakeセッション
+        prediction_date (str): 推論日付（YYYY-MM-DD）
+        model_id (int): スコアテーブルの MODEL_ID と比較するモデルバージョンのキー
+
+    Returns:
+        pd.DataFrame: 取得したデータフレーム（未スコアの行がない場合は空）
+    """
+    try:
+        if not prediction_date:
+            raise ValueError("prediction_date is required for inference")
+
+        logger.info(
+            f"Retrieving unscored inference data for date: {prediction_date}, "
+            f"model id: {model_id}"
+        )
+
+        query = _prediction_query(prediction_date, model_id)
+        df = run_query(session, query).to_pandas()
+
+        logger.info(f"Unscored prediction dataset retrieval completed: {len(df)} rows")
+        return df
+
+    except Exception as e:
+        logger.error(
+            f"Error occurred during unscored prediction dataset retrieval: {str(e)}"
+        )
+        raise RuntimeError(
+            f"Error occurred during unscored prediction dataset retrieval: {str(e)}"
+        )
+
+
+def iter_prediction_batches(
+    session: Session,
+    prediction_date: str,
+    batch_size: int,
+    model_id: Optional[int] = None,
+    end_date: Optional[str] = None,
+) -> Iterator[pd.DataFrame]:
+    """推論用データセットを固定行数のバッチに分けて順に取得する関数
+
+    to_pandas_batches で受け取る可変長のバッチを batch_size 行ずつにまとめ直すため、
+    同時に保持するのは高々 batch_size 行と受信中のバッチ1つ分のみとなる。
+
+    Args:
+        session (Session): Snowflakeセッション
+        prediction_date (str): 推論日付（YYYY-MM-DD）
+        batch_size (int): 1バッチあたりの行数（最後のバッチのみ少なくなる）
+        model_id (int | None): 指定した場合はこのモデルバージョンで未スコアの行のみを取得する
+        end_date (str | None): 指定した場合は prediction_date から end_date までの期間を取得する
+
+    Yields:
+        pd.DataFrame: batch_size 行ずつのデータフレーム（SESSION_DATE 列を含む）
+    """
+    try:
+        if not prediction_date:
+            raise ValueError("prediction_date is required for inference")
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+
+        period = f"{prediction_date} to {end_date}" if end_date else prediction_date
+        logger.info(
+            f"Streaming inference data for date: {period} (batch size: {batch_size})"
+        )
+
+        query = _prediction_query(prediction_date, model_id, end_date)
+        buffer: List[pd.DataFrame] = []
+        buffered = 0
+        total = 0
+        for frame in run_query(session, query).to_pandas_batches():
+            while len(frame) > 0:
+                chunk = frame.iloc[: batch_size - buffered]
+                frame = frame.iloc[len(chunk) :]
+                buffer.append(chunk)
+                buffered += len(chunk)
+                if buffered == batch_size:
+                    total += buffered
+                    yield pd.concat(buffer, ignore_index=True)
+                    buffer, buffered = [], 0
+        if buffered:
+            total += buffered
+            yield pd.concat(buffer, ignore_index=True)
+
+        logger.info(f"Prediction dataset streaming completed: {total} rows")
+
+    except Exception as e:
+        logger.error(f"Error occurred during prediction dataset streaming: {str(e)}")
+        raise RuntimeError(
+            f"Error occurred during prediction dataset streaming: {str(e)}"
+        )
+
+
 def fetch_test_dataset(session: Session, model_version: ModelVersion) -> pd.DataFrame:
     """テスト用データセットを取得する関数
 
@@ -117,8 +257,6 @@ def fetch_test_dataset(session: Session, model_version: ModelVersion) -> pd.Data
         pd.DataFrame: 取得したデータフレーム
     """
     try:
-        schema, table, select_columns = _get_base_config()
-
         # モデルバージョンの作成日を取得
         model_version_name = model_version.version_name
         model_created_date = datetime.strptime(f"20{model_version_name[2:8]}", "%Y%m%d")
@@ -126,16 +264,11 @@ def fetch_test_dataset(session: Session, model_version: ModelVersion) -> pd.Data
         # 評価期間の設定（モデル作成日から2週間）
         start_date = (model_created_date + pd.DateOffset(days=1)).strftime("%Y-%m-%d")
         end_date = (model_created_date + pd.DateOffset(days=14)).strftime("%Y-%m-%d")
-        date_condition = f"SESSION_DATE BETWEEN '{start_date}' AND '{end_date}'"
 
         logger.info(f"Retrieving testing data: period from {start_date} to {end_date}")
 
-        query_string = f"""
-            SELECT {', '.join(select_columns)} 
-            FROM {schema}.{table}
-            WHERE {date_condition}
-        """
-        df = session.sql(query_string).to_pandas()
+        query = _dataset_query(session_date_condition(start_date, end_date))
+        df = run_query(session, query).to_pandas()
 
         if len(df) == 0:
             raise ValueError("No data found for the specified period.")
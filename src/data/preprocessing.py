@@ -18,7 +18,7 @@ def split_data(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
     random_state = 0
 
     logger.info(f"Starting data split (test_size: {test_size})")
-    logger.debug(f"Input data shape: {df.shape}")
+    logger.debug("Input data shape: %s", df.shape)
 
     train_val, test = train_test_split(
         df, test_size=test_size, random_state=random_state
@@ -32,8 +32,8 @@ def split_data(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
 
 def create_preprocessor() -> ColumnTransformer:
     """特徴量の前処理パイプラインを作成"""
-    numeric_features = config["data"]["features"]["numeric"]
-    categorical_features = config["data"]["features"]["categorical"]
+    numeric_features = list(config.data.features.numeric)
+    categorical_features = list(config.data.features.categorical)
 
     logger.info("Starting preprocessing pipeline creation")
 
@@ -0,0 +1,182 @@
+import logging
+import threading
+import weakref
+from typing import Dict, Iterable, Union
+
+import numpy as np
+import pandas as pd
+from snowflake.snowpark import Session
+
+from src.utils.constants import MODELS, SCORES_SHADOW
+from src.utils.query import Query, and_conditions, in_list, qualified_name, run_query
+from src.utils.snowflake import append_to_table
+
+logger = logging.getLogger(__name__)
+
+
+# セッションごとに解決済みの MODEL_ID（登録済みバージョンの MODEL_ID は変わらない）
+_model_ids: "weakref.WeakKeyDictionary[Session, Dict[tuple, int]]" = (
+    weakref.WeakKeyDictionary()
+)
+_model_ids_lock = threading.Lock()
+
+
+def get_model_id(
+    session: Session,
+    database_name: str,
+    schema_name: str,
+    model_name: str,
+    version_name: str,
+) -> int:
+    """
+    モデルディメンションテーブルからモデルバージョンの整数キーを取得する
+    （未登録の場合は登録し、MODEL_ID はシーケンスで採番する）
+
+    登録は MERGE で行うため、並行して同じバージョンを登録しても MODEL_ID が
+    重複することはない。万一同じバージョンの行が複数できた場合も、最小の MODEL_ID を
+    返すため全ての呼び出し元で同じ値となる。解決した MODEL_ID はセッションごとに
+    プロセス内で保持し、以降の呼び出しではクエリを発行しない。
+
+    Args:
+        session (Session): Snowflakeセッション
+        database_name (str): データベース名
+        schema_name (str): スキーマ名
+        model_name (str): モデル名
+        version_name (str): バージョン名
+
+    Returns:
+        int: MODEL_ID
+    """
+    key = (database_name, schema_name, model_name, version_name)
+    with _model_ids_lock:
+        model_id = _model_ids.get(session, {}).get(key)
+    if model_id is not None:
+        return model_id
+
+    models_table = qualified_name(database_name, schema_name, MODELS)
+    names = (model_name, version_name)
+    select = Query(
+        f"""
+        SELECT MODEL_ID FROM {models_table}
+        WHERE MODEL_NAME = ? AND MODEL_VERSION = ?
+        ORDER BY MODEL_ID
+        LIMIT 1
+        """,
+        names,
+    )
+    rows = run_query(session, select).collect()
+    if not rows:
+        merge = Query(
+            f"""
+            MERGE INTO {models_table} t
+            USING (SELECT ? AS MODEL_NAME, ? AS MODEL_VERSION) s
+            ON t.MODEL_NAME = s.MODEL_NAME AND t.MODEL_VERSION = s.MODEL_VERSION
+            WHEN NOT MATCHED THEN
+                INSERT (MODEL_NAME, MODEL_VERSION) VALUES (s.MODEL_NAME, s.MODEL_VERSION)
+            """,
+            names,
+        )
+        run_query(session, merge).collect()
+        rows = run_query(session, select).collect()
+    if not rows:
+        raise ValueError(f"Failed to register model {model_name}.{version_name}")
+
+    model_id = int(rows[0][0])
+    logger.info(f"Model id for {model_name}.{version_name}: {model_id}")
+    with _model_ids_lock:
+        _model_ids.setdefault(session, {})[key] = model_id
+    return model_id
+
+
+def clear_model_id_cache() -> None:
+    """プロセス内で保持している MODEL_ID を全て破棄する"""
+    with _model_ids_lock:
+        _model_ids.clear()
+
+
+def write_shadow_scores(
+    session: Session,
+    uids: pd.Series,
+    session_date: Union[str, pd.Series],
+    model_ids: Dict[str, int],
+    scores: Dict[str, np.ndarray],
+    database_name: str,
+    schema_name: str,
+    replace: bool = True,
+) -> None:
+    """
+    シャドウバージョンのスコアをシャドウスコアテーブルに書き込む
+
+    モデル名・バージョン名は MODELS テーブルへの整数キー（MODEL_ID）として保存する。
+    replace が True の場合、同じ日付・同じ MODEL_ID の既存行は置き換える。
+
+    Args:
+        session (Session): Snowflakeセッション
+        uids (pd.Series): スコア対象の UID
+        session_date (str | pd.Series): 対象日付（YYYY-MM-DD）、または行ごとの日付
+        model_ids (Dict[str, int]): バージョン名ごとの MODEL_ID
+        scores (Dict[str, np.ndarray]): バージョン名ごとのスコア
+        database_name (str): データベース名
+        schema_name (str): スキーマ名
+        replace (bool): 既存行を削除してから書き込むか（False の場合は追記のみ）
+    """
+    full_table_name = qualified_name(database_name, schema_name, SCORES_SHADOW)
+    shadow_df = pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "UID": uids.values,
+                    "SESSION_DATE": session_date,
+                    "MODEL_ID": np.int64(model_ids[version_name]),
+                    "SCORE": version_scores,
+                }
+            )
+            for version_name, version_scores in scores.items()
+        ],
+        ignore_index=True,
+    )
+    logger.info(
+        f"Writing {len(shadow_df)} shadow scores to {full_table_name} "
+        f"for versions: {', '.join(scores)}"
+    )
+
+    if replace:
+        dates = [session_date] if isinstance(session_date, str) else session_date
+        delete_shadow_scores(
+            session=session,
+            model_ids=[model_ids[name] for name in scores],
+            date_condition=in_list("SESSION_DATE", sorted(set(map(str, dates)))),
+            database_name=database_name,
+            schema_name=schema_name,
+        )
+    append_to_table(session, shadow_df, full_table_name)
+    logger.info("Shadow scores upload completed")
+
+
+def delete_shadow_scores(
+    session: Session,
+    model_ids: Iterable[int],
+    date_condition: Query,
+    database_name: str,
+    schema_name: str,
+) -> None:
+    """
+    シャドウスコアテーブルから指定した MODEL_ID・日付条件の行を削除する
+
+    Args:
+        session (Session): Snowflakeセッション
+        model_ids (Iterable[int]): 削除対象の MODEL_ID
+        date_condition (Query): SESSION_DATE の条件式（WHERE 句）
+        database_name (str): データベース名
+        schema_name (str): スキーマ名
+    """
+    full_table_name = qualified_name(database_name, schema_name, SCORES_SHADOW)
+    condition = and_conditions(
+        date_condition, in_list("MODEL_ID", [int(i) for i in model_ids], "NUMBER")
+    )
+    run_query(
+        session,
+        Query(
+            f"DELETE FROM {full_table_name} WHERE {condition.text}", condition.params
+        ),
+    ).collect()
@@ -0,0 +1,14 @@
+from src.local.registry import LocalModel, LocalModelVersion, LocalRegistry
+from src.local.runner import LocalDagRunner, LocalStep, StepResult
+from src.local.session import LocalSession, translate_sql
+
+__all__ = [
+    "LocalDagRunner",
+    "LocalModel",
+    "LocalModelVersion",
+    "LocalRegistry",
+    "LocalSession",
+    "LocalStep",
+    "StepResult",
+    "translate_sql",
+]
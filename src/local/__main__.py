@@ -0,0 +1,69 @@
+"""
+パイプラインの DAG を LocalSession 上で実行する
+
+環境（ソースのデータなど）は benchmarks.bench_local_pipeline --root-dir などで
+構築しておく。--pipeline all では推論を学習の後に実行する。学習済みのモデルが
+ない状態で --pipeline daily を実行する場合は、先に --pipeline model を実行する。
+
+使用例:
+    python -m src.local 2024-10-01 2024-10-07 --root-dir .local \\
+        --cache .local/dag_cache.json
+"""
+
+import argparse
+
+from src.local.runner import LocalDagRunner, default_procedures, pipeline_steps
+from src.local.session import LocalSession
+from src.pipelines.backfill import split_date_range
+from src.utils.logger import setup_logging
+
+
+def main() -> None:
+    setup_logging()
+
+    parser = argparse.ArgumentParser(description="Run the pipeline DAG locally")
+    parser.add_argument("start_date", type=str, help="Start date (YYYY-MM-DD)")
+    parser.add_argument(
+        "end_date", type=str, nargs="?", help="End date (YYYY-MM-DD, inclusive)"
+    )
+    parser.add_argument("--root-dir", type=str, required=True)
+    parser.add_argument("--pipeline", choices=["all", "daily", "model"], default="all")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--retries", type=int, default=1)
+    parser.add_argument("--retry-delay", type=float, default=1.0)
+    parser.add_argument(
+        "--cache",
+        type=str,
+        default=None,
+        help="File to record completed steps; steps with the same inputs are skipped",
+    )
+    args = parser.parse_args()
+
+    dates = [
+        start
+        for start, _ in split_date_range(
+            args.start_date, args.end_date or args.start_date, 1
+        )
+    ]
+    steps = pipeline_steps(
+        dates,
+        default_procedures(),
+        daily=args.pipeline in ("all", "daily"),
+        model=args.pipeline in ("all", "model"),
+    )
+
+    session = LocalSession(root_dir=args.root_dir)
+    try:
+        LocalDagRunner(
+            session,
+            max_workers=args.workers,
+            retries=args.retries,
+            retry_delay=args.retry_delay,
+            cache_path=args.cache,
+        ).run(steps)
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import joblib
+import pandas as pd
+
+_MODEL_FILE = "model.joblib"
+_META_FILE = "meta.json"
+_DEFAULT_FILE = "model.json"
+
+
+def _resolve(name: str) -> str:
+    """引用符なしの識別子と同じく大文字に揃える（引用符付きの場合はそのまま）"""
+    if len(name) > 1 and name.startswith('"') and name.endswith('"'):
+        return name[1:-1]
+    return name.upper()
+
+
+class LocalModelVersion:
+    """
+    ファイルシステム上に保存したモデルバージョン（snowflake.ml の ModelVersion の代替）
+
+    Attributes:
+        model_name (str): モデル名
+        version_name (str): バージョン名
+    """
+
+    def __init__(self, path: Path, model_name: str, version_name: str) -> None:
+        self._path = path
+        self.model_name = model_name
+        self.version_name = version_name
+        # sproc_prediction は ModelVersion の内部属性を参照するため合わせる
+        self._model_name = model_name
+        self._version_name = version_name
+        self._model: Optional[Any] = None
+        self._lock = threading.Lock()
+
+    def load(self, **kwargs: Any) -> Any:
+        """保存したモデルを読み込む（同じインスタンスでは一度だけ読み込む）"""
+        with self._lock:
+            if self._model is None:
+                self._model = joblib.load(self._path / _MODEL_FILE)
+            return self._model
+
+    def run(
+        self, X: pd.DataFrame, *, function_name: str, **kwargs: Any
+    ) -> pd.DataFrame:
+        """
+        モデルのメソッドを実行する
+
+        Args:
+            X (pd.DataFrame): 入力データ
+            function_name (str): 実行するメソッド名（"predict", "predict_proba" など）
+
+        Returns:
+            pd.DataFrame: ModelVersion.run と同じく、入力の列に output_feature_i の列を
+                追加したデータフレーム
+        """
+        output = getattr(self.load(), function_name)(X)
+        output = pd.DataFrame(output, index=X.index)
+        output.columns = [f"output_feature_{i}" for i in range(output.shape[1])]
+        return pd.concat([X, output], axis=1)
+
+    def show_metrics(self) -> Dict[str, Any]:
+        return self._meta()["metrics"]
+
+    def get_metric(self, metric_name: str) -> Any:
+        return self.show_metrics()[metric_name]
+
+    def _meta(self) -> Dict[str, Any]:
+        return json.loads((self._path / _META_FILE).read_text())
+
+    def __repr__(self) -> str:
+        return (
+            f"LocalModelVersion(model_name={self.model_name!r}, "
+            f"version_name={self.version_name!r})"
+        )
+
+
+class LocalModel:
+    """ファイルシステム上のモデル（snowflake.ml の Model の代替）"""
+
+    def __init__(self, path: Path, name: str) -> None:
+        self._path = path
+        self.name = name
+
+    @property
+    def default(self) -> LocalModelVersion:
+        """デフォルトバージョン（未設定の場合は最初に登録したバージョン）"""
+        default_file = self._path / _DEFAULT_FILE
+        if default_file.exists():
+            return self.version(json.loads(default_file.read_text())["default"])
+        return self.versions()[0]
+
+    @default.setter
+    def default(self, version: Any) -> None:
+        version_name = getattr(version, "version_name", version)
+        self.version(version_name)
+        (self._path / _DEFAULT_FILE).write_text(
+            json.dumps({"default": _resolve(version_name)})
+        )
+
+    def version(self, version_name: str) -> LocalModelVersion:
+        """
+        バージョンを取得する
+
+        Raises:
+            ValueError: バージョンが存在しない場合
+        """
+        resolved = _resolve(version_name)
+        if not (self._path / resolved / _MODEL_FILE).exists():
+            raise ValueError(
+                f"Unable to find version with name {resolved} in model {self.name}"
+            )
+        return LocalModelVersion(self._path / resolved, self.name, resolved)
+
+    def versions(self) -> List[LocalModelVersion]:
+        """登録順のバージョン一覧"""
+        return [
+            LocalModelVersion(meta.parent, self.name, meta.parent.name)
+            for meta in sorted(
+                self._path.glob(f"*/{_META_FILE}"),
+                key=lambda p: (json.loads(p.read_text())["created_on"], p.parent.name),
+            )
+        ]
+
+    def last(self) -> LocalModelVersion:
+        """最後に登録したバージョン"""
+        return self.versions()[-1]
+
+    def show_versions(self) -> pd.DataFrame:
+        default = self.default.version_name
+        return pd.DataFrame(
+            [
+                {
+                    "name": mv.version_name,
+                    "created_on": mv._meta()["created_on"],
+                    "is_default_version": mv.version_name == default,
+                }
+                for mv in self.versions()
+            ]
+        )
+
+
+class LocalRegistry:
+    """
+    モデルを root_dir/<モデル名>/<バージョン名>/ に保存するファイルシステム上の Registry
+
+    snowflake.ml の Registry のうち、プロジェクトで使用する get_model / log_model のみを
+    実装する。モデルは joblib で保存し、評価指標と登録日時を meta.json に保存する。
+    """
+
+    def __init__(self, root_dir: Path) -> None:
+        self.root_dir = Path(root_dir)
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def get_model(self, model_name: str) -> LocalModel:
+        """
+        モデルを取得する
+
+        Raises:
+            ValueError: モデルが存在しない場合
+        """
+        path = self.root_dir / _resolve(model_name)
+        if not path.is_dir():
+            raise ValueError(f"Unable to find model with name {_resolve(model_name)}")
+        return LocalModel(path, _resolve(model_name))
+
+    def log_model(
+        self,
+        model: Any,
+        *,
+        model_name: str,
+        version_name: str,
+        metrics: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> LocalModelVersion:
+        """
+        モデルを新しいバージョンとして保存する
+
+        sample_input_data などの Snowflake 固有の引数は受け取って無視する。
+
+        Raises:
+            ValueError: 同じ名前のバージョンが既に存在する場合
+        """
+        path = self.root_dir / _resolve(model_name) / _resolve(version_name)
+        with self._lock:
+            if path.exists():
+                raise ValueError(
+                    f"Version {_resolve(version_name)} of model "
+                    f"{_resolve(model_name)} already exists"
+                )
+            path.mkdir(parents=True)
+            joblib.dump(model, path / _MODEL_FILE)
+            (path / _META_FILE).write_text(
+                json.dumps(
+                    {
+                        "created_on": datetime.now().isoformat(),
+                        "metrics": metrics or {},
+                    },
+                    default=float,
+                )
+            )
+        return LocalModelVersion(path, _resolve(model_name), _resolve(version_name))
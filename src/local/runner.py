@@ -0,0 +1,396 @@
+"""
+パイプラインのステップをプロセス内で依存関係に従って実行する
+
+タスクグラフの定義（src/tasks/dag.py）をステップに変換し、LocalSession 上で
+データセット更新 → 推論、学習 → オフラインテストの順に実行する。依存関係のない
+ステップ（日付ごとのデータセット更新・推論など）は最大 max_workers 個のスレッドで
+並列に実行する。
+
+コマンドラインからの実行は src/local/__main__.py を参照。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.local.session import LocalSession
+from src.tasks.dag import (
+    DAILY_DAG,
+    OFFLINE_TESTING_DAG,
+    TARGET_DATE,
+    TRAINING_DAG,
+    TaskDefinition,
+)
+from src.utils.async_query import StepTiming, critical_path_seconds, validate_steps
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class LocalStep:
+    """
+    プロセス内で実行するステップ
+
+    Attributes:
+        name (str): ステップ名（depends_on で参照する）
+        func (Callable[..., Any]): セッションと args を受け取る関数（ストアドプロシージャ）
+        args (Tuple[Any, ...]): 引数（キャッシュのキーにも使用する）
+        depends_on (Tuple[str, ...]): 完了を待つステップ名
+        retries (int | None): 失敗時の再試行回数（None の場合は LocalDagRunner の設定）
+    """
+
+    name: str
+    func: Callable[..., Any]
+    args: Tuple[Any, ...] = ()
+    depends_on: Tuple[str, ...] = ()
+    retries: Optional[int] = None
+
+
+@dataclass
+class StepResult(StepTiming):
+    """
+    ステップの実行結果（run の開始からの経過秒）
+
+    Attributes:
+        attempts (int): 実行回数（キャッシュにより省略した場合は 0）
+        cached (bool): 完了済みとしてキャッシュから省略したか
+    """
+
+    attempts: int = 1
+    cached: bool = False
+
+
+@dataclass
+class StepCache:
+    """
+    完了したステップを入力（関数・引数・依存先のキー）のキーで記録する JSON ファイル
+
+    BackfillCheckpoint と同じく、完了ごとに一時ファイルへ書き出してから置き換える。
+    """
+
+    path: Path
+    completed: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> "StepCache":
+        """キャッシュを読み込む（存在しない場合は新規に作成する）"""
+        cache = cls(Path(path))
+        if cache.path.exists():
+            cache.completed = json.loads(cache.path.read_text())
+        return cache
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.completed
+
+    def mark_completed(self, key: str, name: str, seconds: float) -> None:
+        """ステップを完了済みとして記録する"""
+        self.completed[key] = {
+            "step": name,
+            "seconds": round(seconds, 3),
+            "completed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.completed, f, indent=2)
+        os.replace(tmp_name, self.path)
+
+
+def cache_keys(steps: Sequence[LocalStep]) -> Dict[str, str]:
+    """
+    ステップごとのキャッシュのキーを求める
+
+    キーは関数・引数と依存先のキーから求めるため、依存先の入力が変わった場合は
+    後続のステップも再実行される。
+
+    Args:
+        steps (Sequence[LocalStep]): ステップ（依存関係は検証済みであること）
+
+    Returns:
+        Dict[str, str]: ステップ名ごとのキー
+    """
+    by_name = {step.name: step for step in steps}
+    keys: Dict[str, str] = {}
+
+    def key(name: str) -> str:
+        if name not in keys:
+            step = by_name[name]
+            func = getattr(step.func, "__qualname__", repr(step.func))
+            payload = json.dumps(
+                [
+                    f"{getattr(step.func, '__module__', '')}.{func}",
+                    list(step.args),
+                    sorted(key(dep) for dep in step.depends_on),
+                ],
+                default=str,
+            )
+            keys[name] = hashlib.sha256(payload.encode()).hexdigest()
+        return keys[name]
+
+    for step in steps:
+        key(step.name)
+    return keys
+
+
+def steps_from_tasks(
+    tasks: Sequence[TaskDefinition],
+    procedures: Dict[str, Callable[..., Any]],
+    values: Optional[Dict[str, Any]] = None,
+    partition: Optional[str] = None,
+    depends_on: Tuple[str, ...] = (),
+) -> List[LocalStep]:
+    """
+    タスクグラフの定義をステップに変換する
+
+    Args:
+        tasks (Sequence[TaskDefinition]): タスクの定義
+        procedures (Dict[str, Callable]): ストアドプロシージャ名ごとの関数
+        values (Dict[str, Any] | None): タスクの引数（SQL の式）ごとのローカルでの値
+        partition (str | None): ステップ名に付加する区間名（同じ定義を日付ごとに
+            並列に実行する場合に指定する）
+        depends_on (Tuple[str, ...]): ルートのタスクに追加する依存先
+            （Snowflake ではスケジュールで順序付けている処理の順序を表す）
+
+    Returns:
+        List[LocalStep]: ステップ（タスクの定義と同じ順）
+
+    Raises:
+        ValueError: プロシージャの関数または引数の値がない場合
+    """
+    values = values or {}
+
+    def name(task_name: str) -> str:
+        return f"{task_name}[{partition}]" if partition else task_name
+
+    steps = []
+    for task in tasks:
+        if task.procedure not in procedures:
+            raise ValueError(f"No local function for procedure: {task.procedure}")
+        missing = [arg for arg in task.args if arg not in values]
+        if missing:
+            raise ValueError(f"No local value for arguments of {task.name}: {missing}")
+        steps.append(
+            LocalStep(
+                name=name(task.name),
+                func=procedures[task.procedure],
+                args=tuple(values[arg] for arg in task.args),
+                depends_on=tuple(name(t) for t in task.after) or depends_on,
+            )
+        )
+    return steps
+
+
+class LocalDagRunner:
+    """
+    ステップを依存関係に従ってプロセス内のスレッドで実行する
+
+    各ステップは depends_on の全てが完了してから開始し、同時に実行するのは最大
+    max_workers 個まで。失敗したステップは retry_delay 秒から倍々に待って再試行する。
+    再試行しても失敗した場合は新たなステップを開始せず、実行中のステップの完了を
+    待ってから例外を送出する。cache_path を指定した場合は完了したステップを記録し、
+    次回以降は入力が同じステップを省略する（失敗後の再実行で完了済みの処理を飛ばす）。
+
+    LocalSession の場合、各ステップは cursor で作成した専用のセッションで実行する
+    （use_database / use_schema・トランザクションを並列のステップと共有しない）。
+    """
+
+    def __init__(
+        self,
+        session: Any,
+        max_workers: int = 4,
+        retries: int = 0,
+        retry_delay: float = 1.0,
+        cache_path: Optional[str] = None,
+    ) -> None:
+        if max_workers <= 0:
+            raise ValueError("max_workers must be positive")
+        if retries < 0:
+            raise ValueError("retries must not be negative")
+        self.session = session
+        self.max_workers = max_workers
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.cache_path = cache_path
+
+    def run(self, steps: Sequence[LocalStep]) -> Dict[str, StepResult]:
+        """
+        ステップを依存関係に従って実行する
+
+        Args:
+            steps (Sequence[LocalStep]): 実行するステップ（依存関係を満たすものは
+                記載順に開始する）
+
+        Returns:
+            Dict[str, StepResult]: ステップ名ごとの実行結果
+
+        Raises:
+            ValueError: ステップ名の重複・未定義の依存先・循環依存がある場合
+            RuntimeError: いずれかのステップが再試行しても失敗した場合
+        """
+        validate_steps(steps)
+        keys = cache_keys(steps)
+        cache = StepCache.load(self.cache_path) if self.cache_path else None
+        origin = time.perf_counter()
+        pending: List[LocalStep] = list(steps)
+        running: Dict[Future, Tuple[LocalStep, float]] = {}
+        results: Dict[str, StepResult] = {}
+        failure: Optional[Tuple[str, Exception]] = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while True:
+                # キャッシュで省略したステップの後続も開始できるよう、変化がなくなるまで
+                started = True
+                while failure is None and started:
+                    started = False
+                    for step in list(pending):
+                        if len(running) >= self.max_workers:
+                            break
+                        if not all(dep in results for dep in step.depends_on):
+                            continue
+                        pending.remove(step)
+                        started = True
+                        now = time.perf_counter() - origin
+                        if cache is not None and keys[step.name] in cache:
+                            results[step.name] = StepResult(
+                                step.name, now, now, attempts=0, cached=True
+                            )
+                            logger.info(f"Skipped step (cached): {step.name}")
+                            continue
+                        running[pool.submit(self._run_step, step)] = (step, now)
+                        logger.info(f"Started step: {step.name}")
+
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step, start = running.pop(future)
+                    try:
+                        attempts = future.result()
+                    except Exception as e:
+                        logger.error(f"Step '{step.name}' failed: {str(e)}")
+                        failure = failure or (step.name, e)
+                        continue
+                    end = time.perf_counter() - origin
+                    results[step.name] = StepResult(
+                        step.name, start, end, attempts=attempts
+                    )
+                    if cache is not None:
+                        cache.mark_completed(keys[step.name], step.name, end - start)
+                    logger.info(f"Completed step: {step.name} ({end - start:.2f}s)")
+
+        self._log_report(steps, results, time.perf_counter() - origin)
+        if failure is not None:
+            name, error = failure
+            raise RuntimeError(f"Step '{name}' failed: {str(error)}") from error
+        return results
+
+    def _run_step(self, step: LocalStep) -> int:
+        """ステップを実行し、実行回数を返す"""
+        retries = self.retries if step.retries is None else step.retries
+        attempt = 0
+        while True:
+            attempt += 1
+            session = (
+                self.session.cursor()
+                if isinstance(self.session, LocalSession)
+                else self.session
+            )
+            try:
+                step.func(session, *step.args)
+                return attempt
+            except Exception as e:
+                if attempt > retries:
+                    raise
+                delay = self.retry_delay * 2 ** (attempt - 1)
+                logger.warning(
+                    f"Step '{step.name}' failed (attempt {attempt}/{retries + 1}), "
+                    f"retrying in {delay:.1f}s: {str(e)}"
+                )
+                time.sleep(delay)
+            finally:
+                if session is not self.session:
+                    session.close()
+
+    @staticmethod
+    def _log_report(
+        steps: Sequence[LocalStep], results: Dict[str, StepResult], total: float
+    ) -> None:
+        """ステップごとの開始時刻・実行時間・実行回数と全体の時間を出力する"""
+        logger.info(f"{'step':<40} {'start':>8} {'seconds':>9} {'attempts':>8}")
+        for r in sorted(results.values(), key=lambda r: r.start):
+            attempts = "cached" if r.cached else str(r.attempts)
+            logger.info(f"{r.name:<40} {r.start:>8.2f} {r.seconds:>9.2f} {attempts:>8}")
+        completed = [step for step in steps if step.name in results]
+        serial = sum(r.seconds for r in results.values())
+        critical = critical_path_seconds(completed, results)
+        logger.info(
+            f"Executed {len(results)}/{len(steps)} steps in {total:.2f}s "
+            f"(sequential {serial:.2f}s, critical path {critical:.2f}s)"
+        )
+
+
+def default_procedures() -> Dict[str, Callable[..., Any]]:
+    """ストアドプロシージャ名ごとの関数（インポートが重いため呼び出し時に読み込む）"""
+    from src.pipelines.sproc_dataset import sproc_dataset
+    from src.pipelines.sproc_offline_testing import sproc_offline_testing
+    from src.pipelines.sproc_prediction import sproc_prediction
+    from src.pipelines.sproc_training import sproc_training
+
+    return {
+        "dataset": sproc_dataset,
+        "prediction": sproc_prediction,
+        "training": sproc_training,
+        "offline_testing": sproc_offline_testing,
+    }
+
+
+def pipeline_steps(
+    dates: Sequence[str],
+    procedures: Dict[str, Callable[..., Any]],
+    daily: bool = True,
+    model: bool = True,
+) -> List[LocalStep]:
+    """
+    ローカルで実行するパイプラインのステップを作成する
+
+    日次のタスクグラフ（データセット更新 → 推論）は日付ごとに並列に実行する。
+    学習は全ての日付のデータセット更新の後に、オフラインテストは学習の後に実行する
+    （Snowflake では毎月1日・15日のスケジュールで順序付けている）。両方を実行する
+    場合、推論は学習の後に実行する（推論はデフォルトのモデルのバージョンを使用する
+    ため、学習を依存先とすることでキャッシュのキーにもモデルの変更を含める）。
+
+    Args:
+        dates (Sequence[str]): 処理対象日（YYYY-MM-DD）
+        procedures (Dict[str, Callable]): ストアドプロシージャ名ごとの関数
+        daily (bool): データセット更新・推論を実行するか
+        model (bool): 学習・オフラインテストを実行するか
+
+    Returns:
+        List[LocalStep]: ステップ
+    """
+    steps: List[LocalStep] = []
+    if daily:
+        for target_date in dates:
+            steps += steps_from_tasks(
+                DAILY_DAG, procedures, {TARGET_DATE: target_date}, partition=target_date
+            )
+    if model:
+        datasets = tuple(step.name for step in steps if not step.depends_on)
+        training = steps_from_tasks(TRAINING_DAG, procedures, depends_on=datasets)
+        trained = tuple(step.name for step in training)
+        steps = [
+            step
+            if not step.depends_on
+            else replace(step, depends_on=step.depends_on + trained)
+            for step in steps
+        ]
+        steps += training
+        steps += steps_from_tasks(OFFLINE_TESTING_DAG, procedures, depends_on=trained)
+    return steps
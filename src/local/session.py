@@ -0,0 +1,431 @@
+import copy
+import json
+import logging
+import re
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import duckdb
+import pandas as pd
+
+from src.local.registry import LocalRegistry
+from src.utils.constants import DATABASE_DEV, SCHEMA
+from src.utils.query import quote_identifier
+
+logger = logging.getLogger(__name__)
+
+# to_pandas_batches で1回に受け取る行数
+_BATCH_ROWS = 100_000
+
+# Snowflake の型名のうち DuckDB にないもの
+_TYPE_ALIASES = {"NUMBER": "BIGINT"}
+
+# Snowflake の SQL 文を DuckDB で実行できる形に書き換える規則（上から順に適用）
+_REWRITES: List[Tuple[re.Pattern, Any]] = [
+    # in_list: JSON 配列として1つにバインドした値を展開する
+    (
+        re.compile(
+            r"SELECT\s+VALUE::(\w+(?:\(\d+(?:,\s*\d+)?\))?)\s+FROM\s+"
+            r"TABLE\(FLATTEN\(INPUT\s*=>\s*PARSE_JSON\(\?\)\)\)",
+            re.IGNORECASE,
+        ),
+        lambda m: (
+            f"SELECT CAST(VALUE AS {_TYPE_ALIASES.get(m[1].upper(), m[1])}) "
+            "FROM (SELECT UNNEST(CAST(CAST(? AS JSON) AS VARCHAR[])) AS VALUE)"
+        ),
+    ),
+    # DuckDB の COUNT_IF は対象行がない場合に NULL を返す（Snowflake は 0）
+    (re.compile(r"\bCOUNT_IF\(", re.IGNORECASE), "memory.main.SF_COUNT_IF("),
+    # 一時テーブルは別カタログに作成されるため、通常のテーブルとして作成する
+    (
+        re.compile(r"CREATE\s+TEMPORARY\s+TABLE\s+(\S+)\s+LIKE\s+(\S+)", re.IGNORECASE),
+        r"CREATE TABLE \1 AS SELECT * FROM \2 LIMIT 0",
+    ),
+    (re.compile(r"\bCLUSTER\s+BY\s*\([^)]*\)", re.IGNORECASE), ""),
+    # 精度指定のない NUMBER（Snowflake では NUMBER(38, 0)）
+    (re.compile(r"\bNUMBER\b(?!\s*\()", re.IGNORECASE), "BIGINT"),
+    # シーケンスによる既定値（seq.NEXTVAL）
+    (
+        re.compile(r"\bDEFAULT\s+(\S+)\.NEXTVAL\b", re.IGNORECASE),
+        r"DEFAULT nextval('\1')",
+    ),
+    (
+        re.compile(
+            r"SHOW\s+TABLES\s+LIKE\s+'([^']*)'\s+IN\s+SCHEMA\s+(\S+)\.(\S+)",
+            re.IGNORECASE,
+        ),
+        lambda m: (
+            "SELECT table_name FROM information_schema.tables "
+            f"WHERE table_catalog ILIKE '{m[2].strip(chr(34))}' "
+            f"AND table_schema ILIKE '{m[3].strip(chr(34))}' "
+            f"AND table_name ILIKE '{m[1]}' AND table_type = 'BASE TABLE'"
+        ),
+    ),
+]
+_CREATE_DATABASE = re.compile(
+    r"^\s*CREATE\s+DATABASE\s+IF\s+NOT\s+EXISTS\s+(\S+)\s*$", re.IGNORECASE
+)
+# ローカルでは意味を持たない SQL 文（実行せずに成功とする）
+_NO_OP = re.compile(r"^\s*(CREATE\s+STAGE|ALTER\s+PROCEDURE)\b", re.IGNORECASE)
+# 書き込みのロックを取得する SQL 文（トランザクションの開始・終了と書き込み）
+_BEGIN = re.compile(r"^\s*(BEGIN|START\s+TRANSACTION)\b", re.IGNORECASE)
+_END = re.compile(r"^\s*(COMMIT|ROLLBACK)\b", re.IGNORECASE)
+_WRITE = re.compile(
+    r"^\s*(INSERT|UPDATE|DELETE|MERGE|CREATE|DROP|ALTER|TRUNCATE)\b", re.IGNORECASE
+)
+
+
+def translate_sql(text: str) -> str:
+    """Snowflake の SQL 文をプロジェクトで使用する範囲で DuckDB の SQL 文に書き換える"""
+    for pattern, replacement in _REWRITES:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+class _QueryRecord(NamedTuple):
+    query_id: str
+    sql_text: str
+    thread_id: Optional[int]
+
+
+class _QueryHistory:
+    """Snowpark の QueryHistory と同様に、ブロック内で実行された SQL 文を記録する"""
+
+    def __init__(self, session: "LocalSession", include_thread_id: bool) -> None:
+        self._session = session
+        self._include_thread_id = include_thread_id
+        self.queries: List[_QueryRecord] = []
+
+    def __enter__(self) -> "_QueryHistory":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._session._remove_listener(self)
+
+    def _notify(self, query_id: str, sql_text: str) -> None:
+        thread_id = threading.get_ident() if self._include_thread_id else None
+        self.queries.append(_QueryRecord(query_id, sql_text, thread_id))
+
+
+class LocalAsyncJob:
+    """collect_nowait の戻り値（ローカルでは送信時に実行を終えている）"""
+
+    def __init__(
+        self,
+        query_id: str,
+        rows: Optional[List[tuple]],
+        error: Optional[Exception] = None,
+    ) -> None:
+        self.query_id = query_id
+        self._rows = rows
+        self._error = error
+
+    def is_done(self) -> bool:
+        return True
+
+    def cancel(self) -> None:
+        pass
+
+    def result(self, result_type: str = "row") -> Any:
+        if self._error is not None:
+            raise self._error
+        return self._rows
+
+
+class LocalDataFrame:
+    """SQL 文の結果（collect / to_pandas などを呼び出した時点で実行する）"""
+
+    def __init__(
+        self, session: "LocalSession", text: str, params: Optional[Sequence[Any]]
+    ) -> None:
+        self._session = session
+        self._text = text
+        self._params = list(params or [])
+
+    def collect(self) -> List[tuple]:
+        with self._session._execute(self._text, self._params) as cursor:
+            return cursor.fetchall() if cursor.description else []
+
+    def to_pandas(self) -> pd.DataFrame:
+        with self._session._execute(self._text, self._params) as cursor:
+            return _convert_dates(cursor.fetch_df(), cursor.description)
+
+    def to_pandas_batches(self) -> Iterator[pd.DataFrame]:
+        # 受信中に同じスレッドで別の SQL 文を実行しても結果が破棄されないよう、
+        # 専用のカーソルで実行する
+        with self._session._execute(self._text, self._params, dedicated=True) as cursor:
+            reader = cursor.to_arrow_reader(_BATCH_ROWS)
+            description = cursor.description
+        for batch in reader:
+            yield _convert_dates(batch.to_pandas(), description)
+
+    def collect_nowait(self) -> LocalAsyncJob:
+        try:
+            with self._session._execute(self._text, self._params) as cursor:
+                rows = cursor.fetchall() if cursor.description else []
+                return LocalAsyncJob(self._session._local.query_id, rows)
+        except Exception as e:
+            return LocalAsyncJob(self._session._local.query_id, None, e)
+
+    def count(self) -> int:
+        with self._session._execute(
+            f"SELECT COUNT(*) FROM ({self._text})", self._params
+        ) as cursor:
+            return cursor.fetchone()[0]
+
+
+class _LocalWriter:
+    def __init__(self, session: "LocalSession", df: pd.DataFrame) -> None:
+        self._session = session
+        self._df = df
+        self._mode = "errorifexists"
+
+    def mode(self, mode: str) -> "_LocalWriter":
+        self._mode = mode
+        return self
+
+    def save_as_table(self, table_name: str, **kwargs: Any) -> None:
+        self._session._save_as_table(self._df, table_name, self._mode)
+
+
+class _LocalPandasFrame:
+    """create_dataframe の戻り値（テーブルへの書き込みのみに対応）"""
+
+    def __init__(self, session: "LocalSession", df: pd.DataFrame) -> None:
+        self.write = _LocalWriter(session, df)
+
+
+def _convert_dates(df: pd.DataFrame, description: Optional[list]) -> pd.DataFrame:
+    """DATE 型の列を Snowpark と同じく datetime.date に変換する"""
+    for name, type_code, *_ in description or []:
+        if (
+            str(type_code) == "DATE"
+            and name in df.columns
+            and pd.api.types.is_datetime64_any_dtype(df[name])
+        ):
+            df[name] = df[name].dt.date
+    return df
+
+
+class LocalSession:
+    """
+    DuckDB をバックエンドとするローカル用の Snowpark Session の代替
+
+    プロジェクトで使用する範囲（sql().collect() / to_pandas() / to_pandas_batches() /
+    collect_nowait()、create_dataframe().write.save_as_table()、table().count()、
+    get_current_database()、query_tag / query_history）を実装する。Snowflake 固有の
+    SQL 文は translate_sql で書き換えて実行する。モデルの Registry は root_dir 配下の
+    ファイルシステムに保存する（src.models.registry は create_registry で取得する）。
+
+    root_dir を指定した場合はデータベースを root_dir 配下のファイルに保存し、
+    プロセスをまたいで再利用できる。未指定の場合はメモリ上に作成し、close で破棄する。
+
+    DuckDB は同じテーブルへの並行な書き込みを競合として失敗させるが、Snowflake は
+    テーブルのロックで待ち合わせる。そのため書き込み（トランザクションは BEGIN から
+    COMMIT / ROLLBACK まで）は cursor で作成したセッションをまたいで1つずつ実行する。
+    """
+
+    def __init__(
+        self,
+        root_dir: Optional[str] = None,
+        database: str = DATABASE_DEV,
+        schema: str = SCHEMA,
+    ) -> None:
+        self._tmp_dir = None if root_dir else tempfile.TemporaryDirectory()
+        self.root_dir = Path(root_dir or self._tmp_dir.name)
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self._persistent = root_dir is not None
+        self._conn = duckdb.connect()
+        self._conn.execute("CREATE MACRO SF_COUNT_IF(x) AS COALESCE(COUNT_IF(x), 0)")
+        self._lock = threading.RLock()
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+        self._listeners: List[_QueryHistory] = []
+        self.query_tag: Optional[str] = None
+
+        self._attach(quote_identifier(database))
+        self._database = quote_identifier(database)
+        self._schema = quote_identifier(schema)
+        self._conn.execute(
+            f"CREATE SCHEMA IF NOT EXISTS {self._database}.{self._schema}"
+        )
+        self._registry = LocalRegistry(self.root_dir / "registry")
+
+    # Snowpark Session のインターフェース
+
+    def sql(self, query: str, params: Optional[Sequence[Any]] = None) -> LocalDataFrame:
+        return LocalDataFrame(self, query, params)
+
+    def create_dataframe(self, df: pd.DataFrame) -> _LocalPandasFrame:
+        return _LocalPandasFrame(self, df)
+
+    def table(self, table_name: str) -> LocalDataFrame:
+        return LocalDataFrame(self, f"SELECT * FROM {table_name}", None)
+
+    def get_current_database(self) -> str:
+        return self._database
+
+    def get_current_schema(self) -> str:
+        return self._schema
+
+    def use_database(self, database_name: str) -> None:
+        self._database = quote_identifier(database_name)
+
+    def use_schema(self, schema_name: str) -> None:
+        self._schema = quote_identifier(schema_name)
+
+    def query_history(self, include_thread_id: bool = False) -> _QueryHistory:
+        history = _QueryHistory(self, include_thread_id)
+        with self._lock:
+            self._listeners.append(history)
+        return history
+
+    def close(self) -> None:
+        if getattr(self._local, "transaction", False):
+            self._local.transaction = False
+            self._write_lock.release()
+        self._conn.close()
+        if self._tmp_dir is not None:
+            self._tmp_dir.cleanup()
+
+    def cursor(self) -> "LocalSession":
+        """
+        同じデータベース・Registry を共有する別のセッションを作成する
+
+        DuckDB の接続（connection.cursor()）、カレントのデータベース・スキーマ、
+        query_tag・query_history、トランザクションはセッションごとに独立する。
+        並列に実行する処理ごとに作成し、終了後に close する（作成した接続のみを閉じる）。
+        """
+        session = copy.copy(self)
+        session._tmp_dir = None
+        session._conn = self._conn.cursor()
+        session._lock = threading.RLock()
+        session._local = threading.local()
+        session._listeners = []
+        session.query_tag = None
+        return session
+
+    def create_registry(self) -> LocalRegistry:
+        """src.models.registry が Registry の代わりに使用するファイルシステム上の Registry"""
+        return self._registry
+
+    # 実装
+
+    def _attach(self, database: str) -> None:
+        name = database.strip('"')
+        path = str(self.root_dir / f"{name}.duckdb") if self._persistent else ":memory:"
+        self._conn.execute(f"ATTACH IF NOT EXISTS '{path}' AS {database}")
+
+    def _remove_listener(self, history: _QueryHistory) -> None:
+        with self._lock:
+            self._listeners.remove(history)
+
+    def _cursor(self, dedicated: bool) -> duckdb.DuckDBPyConnection:
+        """スレッドごとのカーソル（現在のデータベース・スキーマを使用する）"""
+        if dedicated:
+            cursor = self._conn.cursor()
+            cursor.execute(f"USE {self._database}.{self._schema}")
+            return cursor
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self._local.cursor = self._conn.cursor()
+            self._local.context = None
+        if self._local.context != (self._database, self._schema):
+            cursor.execute(f"USE {self._database}.{self._schema}")
+            self._local.context = (self._database, self._schema)
+        return cursor
+
+    @contextmanager
+    def _execute(
+        self, text: str, params: Sequence[Any], dedicated: bool = False
+    ) -> Iterator[duckdb.DuckDBPyConnection]:
+        query_id = uuid.uuid4().hex
+        self._local.query_id = query_id
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener._notify(query_id, text)
+
+        cursor = self._cursor(dedicated)
+        create_database = _CREATE_DATABASE.match(text)
+        with self._writing(text):
+            start = time.perf_counter()
+            if create_database:
+                self._attach(create_database[1])
+                cursor.execute("SELECT 1 WHERE FALSE")
+            elif _NO_OP.match(text):
+                cursor.execute("SELECT 1 WHERE FALSE")
+            else:
+                cursor.execute(translate_sql(text), list(params) or None)
+            logger.debug(
+                "Local query %s finished in %.3fs",
+                query_id,
+                time.perf_counter() - start,
+            )
+            yield cursor
+
+    @contextmanager
+    def _writing(self, text: str) -> Iterator[None]:
+        """
+        書き込みの間はセッション共通のロックを保持する（トランザクション中は
+        BEGIN から COMMIT / ROLLBACK まで保持する）
+        """
+        local = self._local
+        if _BEGIN.match(text):
+            self._write_lock.acquire()
+            try:
+                yield
+            except BaseException:
+                self._write_lock.release()
+                raise
+            local.transaction = True
+        elif _END.match(text):
+            try:
+                yield
+            finally:
+                if getattr(local, "transaction", False):
+                    local.transaction = False
+                    self._write_lock.release()
+        elif _WRITE.match(text) and not getattr(local, "transaction", False):
+            with self._write_lock:
+                yield
+        else:
+            yield
+
+    def _table_exists(self, table_name: str) -> bool:
+        try:
+            with self._execute(f"SELECT * FROM {table_name} LIMIT 0", []):
+                return True
+        except duckdb.CatalogException:
+            return False
+
+    def _save_as_table(self, df: pd.DataFrame, table_name: str, mode: str) -> None:
+        view = f"_df_{uuid.uuid4().hex}"
+        exists = self._table_exists(table_name)
+        if exists and mode == "ignore":
+            return
+        if exists and mode in ("errorifexists", "error"):
+            raise ValueError(f"Table {table_name} already exists")
+
+        cursor = self._cursor(dedicated=False)
+        cursor.register(view, df)
+        try:
+            if exists and mode == "append":
+                # Snowpark と同じく列の位置で対応付ける
+                statement = f"INSERT INTO {table_name} SELECT * FROM {view}"
+            else:
+                statement = (
+                    f"CREATE OR REPLACE TABLE {table_name} AS SELECT * FROM {view}"
+                )
+            with self._execute(statement, []):
+                pass
+        finally:
+            cursor.unregister(view)
+
+    def __repr__(self) -> str:
+        return f"LocalSession(root_dir={json.dumps(str(self.root_dir))})"
@@ -0,0 +1,259 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import joblib
+from snowflake.ml.model import ModelVersion
+
+from src.utils.config import load_config
+
+logger = logging.getLogger(__name__)
+config = load_config()
+
+_VALID_NAME = re.compile(r"^[A-Za-z0-9_]+$")
+_CHUNK_SIZE = 1 << 20
+
+
+def _sha256(path: Path) -> str:
+    """ファイルの SHA-256 を計算する"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelArtifactCache:
+    """
+    モデルバージョンの sklearn パイプラインをローカルディスクにキャッシュする
+
+    アーティファクトは非圧縮の joblib 形式で保存し、mmap_mode="r" で読み込む。
+    各アーティファクトには SHA-256 とサイズを記録したサイドカーファイルを付与し、
+    読み込み時に検証する。合計サイズが max_bytes を超えた場合は最終アクセスが
+    最も古いものから削除する（LRU）。
+    """
+
+    def __init__(self, cache_dir: str | os.PathLike, max_bytes: int) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._verified: Dict[Path, tuple] = {}
+        self._lock = threading.RLock()
+
+    def artifact_path(self, model_name: str, version_name: str) -> Path:
+        """アーティファクトの保存先パスを返す"""
+        for name in (model_name, version_name):
+            if not _VALID_NAME.match(name):
+                raise ValueError(f"Invalid model or version name: {name}")
+        return self.cache_dir / model_name / f"{version_name}.joblib"
+
+    @staticmethod
+    def _meta_path(path: Path) -> Path:
+        return path.with_suffix(".json")
+
+    @staticmethod
+    def _mkstemp(path: Path) -> Path:
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        os.close(fd)
+        return Path(tmp_name)
+
+    def _is_valid(self, path: Path) -> bool:
+        """サイドカーの SHA-256 とサイズでアーティファクトを検証する"""
+        meta_path = self._meta_path(path)
+        if not path.exists() or not meta_path.exists():
+            return False
+
+        stat = path.stat()
+        signature = (stat.st_size, stat.st_mtime_ns)
+        # 同一プロセス内で検証済みかつ変更がなければ再計算しない
+        if self._verified.get(path) == signature:
+            return True
+
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if meta.get("size") != stat.st_size or meta.get("sha256") != _sha256(path):
+            return False
+
+        self._verified[path] = signature
+        return True
+
+    def _remove(self, path: Path) -> None:
+        self._verified.pop(path, None)
+        for p in (path, self._meta_path(path)):
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+
+    def get(self, model_name: str, version_name: str) -> Optional[Any]:
+        """
+        キャッシュからモデルを読み込む
+
+        Returns:
+            Any | None: 検証に成功した場合はモデル、存在しないか破損している場合は None
+        """
+        path = self.artifact_path(model_name, version_name)
+        with self._lock:
+            if not self._is_valid(path):
+                if path.exists():
+                    logger.warning(f"Discarding corrupted model artifact: {path}")
+                    self._remove(path)
+                return None
+
+            # LRU 判定用に最終アクセス時刻を更新（mtime は検証用に保持）
+            os.utime(path, ns=(time.time_ns(), path.stat().st_mtime_ns))
+            logger.info(f"Loading cached model artifact: {path}")
+            return joblib.load(path, mmap_mode="r")
+
+    def put(self, model_name: str, version_name: str, model: Any) -> Path:
+        """
+        モデルをキャッシュに保存する
+
+        アーティファクトとサイドカーはそれぞれ一時ファイルに書き出した後に置き換えるため、
+        書き込み途中のファイルが読み込まれることはない。サイドカーを先に置き換えるため、
+        並行した get() が検証前のアーティファクトを破損と判定して削除することもない。
+        """
+        path = self.artifact_path(model_name, version_name)
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+            tmp_path = self._mkstemp(path)
+            tmp_meta_path = self._mkstemp(path)
+            try:
+                # 圧縮すると mmap できないため非圧縮で保存する
+                joblib.dump(model, tmp_path, compress=0)
+                meta = {"sha256": _sha256(tmp_path), "size": tmp_path.stat().st_size}
+                with open(tmp_meta_path, "w") as f:
+                    json.dump(meta, f)
+                # サイドカーを先に置き換え、アーティファクトが見えた時点で
+                # 検証に使うサイドカーが揃っているようにする
+                os.replace(tmp_meta_path, self._meta_path(path))
+                os.replace(tmp_path, path)
+            finally:
+                for p in (tmp_path, tmp_meta_path):
+                    if p.exists():
+                        p.unlink()
+
+            logger.info(f"Stored model artifact: {path} ({meta['size']} bytes)")
+
+            self.evict(keep=path)
+            return path
+
+    def evict(self, keep: Optional[Path] = None) -> None:
+        """合計サイズが上限を超えている間、最終アクセスが古いものから削除する"""
+        with self._lock:
+            artifacts = sorted(
+                self.cache_dir.glob("*/*.joblib"), key=lambda p: p.stat().st_atime_ns
+            )
+            total = sum(p.stat().st_size for p in artifacts)
+            for path in artifacts:
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                total -= path.stat().st_size
+                logger.info(f"Evicting model artifact: {path}")
+                self._remove(path)
+
+
+def _default_cache_dir() -> str:
+    cache_dir = config.model.inference.cache_dir
+    return cache_dir or os.path.join(tempfile.gettempdir(), "ml_model_cache")
+
+
+_artifact_cache = ModelArtifactCache(
+    cache_dir=_default_cache_dir(),
+    max_bytes=config.model.inference.cache_max_bytes,
+)
+
+
+@dataclass
+class _LoadedModel:
+    """プロセス内に読み込んだモデルと、そこから変換したもの（CompiledForest など）"""
+
+    model: Any
+    derived: Dict[str, Any] = field(default_factory=dict)
+
+
+# プロセス内に保持するモデル（最近使われたものから loaded_max_models 個まで）
+_loaded_models: OrderedDict[tuple, _LoadedModel] = OrderedDict()
+_loaded_lock = threading.Lock()
+
+
+def _load(mv: ModelVersion) -> _LoadedModel:
+    """モデルをプロセス内に読み込む（_loaded_lock の中で呼ぶ）"""
+    key = (mv.model_name, mv.version_name)
+    if key in _loaded_models:
+        _loaded_models.move_to_end(key)
+        return _loaded_models[key]
+
+    model = _artifact_cache.get(*key)
+    if model is None:
+        logger.info(f"Downloading model artifact: {key[0]}.{key[1]}")
+        _artifact_cache.put(*key, mv.load())
+        model = _artifact_cache.get(*key)
+
+    entry = _loaded_models[key] = _LoadedModel(model)
+    while len(_loaded_models) > config.model.inference.loaded_max_models:
+        evicted, _ = _loaded_models.popitem(last=False)
+        logger.info(f"Releasing loaded model: {evicted[0]}.{evicted[1]}")
+    return entry
+
+
+def load_local_model(mv: ModelVersion) -> Any:
+    """
+    モデルバージョンの sklearn パイプラインをプロセス内に読み込む
+
+    プロセス内で読み込み済みであればそれを返し、なければディスクキャッシュ、
+    それもなければ Registry からダウンロードしてキャッシュに保存する。
+    プロセス内に保持するモデルは model.inference.loaded_max_models 個までとし、
+    超えた場合は最後に使われたのが最も古いものから破棄する。
+
+    Args:
+        mv (ModelVersion): 対象のモデルバージョン
+
+    Returns:
+        Any: 学習済みの sklearn パイプライン
+    """
+    with _loaded_lock:
+        return _load(mv).model
+
+
+def load_local_derived(mv: ModelVersion, kind: str, build: Callable[[Any], Any]) -> Any:
+    """
+    プロセス内に読み込んだモデルを変換したもの（CompiledForest など）を取得する
+
+    変換結果はモデルと同じエントリに保持するため、loaded_max_models を超えて
+    モデルを破棄する際に一緒に破棄される。
+
+    Args:
+        mv (ModelVersion): 対象のモデルバージョン
+        kind (str): 変換の種類（モデルごとに種類ごとに一度だけ変換する）
+        build (Callable[[Any], Any]): sklearn パイプラインを変換する関数
+
+    Returns:
+        Any: 変換結果
+    """
+    with _loaded_lock:
+        entry = _load(mv)
+        if kind not in entry.derived:
+            entry.derived[kind] = build(entry.model)
+        return entry.derived[kind]
+
+
+def clear_loaded_models() -> None:
+    """プロセス内に読み込んだモデルを破棄する（ディスクキャッシュは保持）"""
+    with _loaded_lock:
+        _loaded_models.clear()
@@ -0,0 +1,282 @@
+import logging
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OrdinalEncoder, StandardScaler
+from sklearn.utils.fixes import parse_version
+
+logger = logging.getLogger(__name__)
+
+# sklearn 1.4 以降は tree_.value に正規化済みの割合が格納されている
+_VALUE_IS_FRACTION = parse_version(sklearn.__version__) >= parse_version("1.4")
+# 1チャンクで保持する (木の数 x サンプル数) の要素数の上限
+_MAX_CHUNK_ELEMENTS = 1 << 20
+_SIGN_BIT = np.uint64(1 << 63)
+
+
+def _to_ordered(x: np.ndarray) -> np.ndarray:
+    """float64 を大小関係を保ったまま uint64 に写像する"""
+    bits = x.view(np.uint64)
+    return np.where(bits & _SIGN_BIT, ~bits, bits | _SIGN_BIT)
+
+
+def _from_ordered(key: np.ndarray) -> np.ndarray:
+    """_to_ordered の逆変換"""
+    bits = np.where(key & _SIGN_BIT, key ^ _SIGN_BIT, ~key)
+    return bits.view(np.float64)
+
+
+def _fold_scaler_thresholds(
+    threshold: np.ndarray, mean: np.ndarray, scale: np.ndarray
+) -> np.ndarray:
+    """
+    標準化後の特徴量に対する閾値を、標準化前の値に対する閾値に変換する
+
+    sklearn の判定は float32((x - mean) / scale) <= threshold であり、この左辺は x について
+    単調非減少なので、判定が真となる x は下に閉じた集合になる。その最大値 T を
+    float64 の全順序上の二分探索で求めることで、x <= T が元の判定と全ての x で一致する。
+    """
+
+    def passes(x: np.ndarray) -> np.ndarray:
+        with np.errstate(over="ignore", invalid="ignore"):
+            scaled = ((x - mean) / scale).astype(np.float32).astype(np.float64)
+        return scaled <= threshold
+
+    lo = _to_ordered(np.full(threshold.shape, -np.inf))
+    hi = _to_ordered(np.full(threshold.shape, np.inf))
+    while True:
+        active = hi - lo > 1
+        if not active.any():
+            break
+        mid = lo + (hi - lo) // np.uint64(2)
+        ok = passes(_from_ordered(mid))
+        lo = np.where(active & ok, mid, lo)
+        hi = np.where(active & ~ok, mid, hi)
+    return _from_ordered(lo)
+
+
+@dataclass
+class CompiledForest:
+    """
+    RandomForestClassifier を連続した NumPy 配列に展開した推論エンジン
+
+    全ての木のノードを1つの配列に連結し、深さごとに全ての木・全てのサンプルを
+    まとめて1段ずつ進めることで、木ごとの Python オーバーヘッドをなくしている。
+    StandardScaler は閾値に畳み込み済みのため、数値特徴量は生の値のまま比較する。
+
+    入力の数値特徴量は float64（または整数）で与えられることを前提とする。
+    """
+
+    numeric_columns: List[str]
+    categorical_columns: List[str]
+    encoder: OrdinalEncoder | None
+    classes: np.ndarray
+    feature: np.ndarray
+    threshold: np.ndarray
+    children: np.ndarray
+    missing_left: np.ndarray
+    leaf_value: np.ndarray
+    roots: np.ndarray
+    max_depth: int
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def encoding_key(self) -> tuple:
+        """
+        encode の結果を共有できるかの判定キー
+
+        数値特徴量は生の値を用いるため、列構成とカテゴリの対応が同じであれば
+        異なるモデル間でも同じ特徴量行列を使い回せる。
+        """
+        categories = (
+            tuple(tuple(c.tolist()) for c in self.encoder.categories_)
+            if self.encoder is not None
+            else ()
+        )
+        return (
+            tuple(self.numeric_columns),
+            tuple(self.categorical_columns),
+            categories,
+        )
+
+    def encode(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        入力データフレームを木の比較に用いる特徴量行列（特徴量 x サンプル）に変換する
+
+        数値特徴量は生の値、カテゴリ特徴量は学習時の OrdinalEncoder によるコードとなる。
+        """
+        blocks = []
+        if self.numeric_columns:
+            blocks.append(np.asarray(df[self.numeric_columns], dtype=np.float64))
+        if self.categorical_columns and self.encoder is not None:
+            blocks.append(
+                np.asarray(
+                    self.encoder.transform(df[self.categorical_columns]),
+                    dtype=np.float64,
+                )
+            )
+        return np.ascontiguousarray(np.hstack(blocks).T)
+
+    def _apply(self, X_t: np.ndarray) -> np.ndarray:
+        """各木・各サンプルが到達する葉ノードの番号を返す（木 x サンプル）"""
+        n_samples = X_t.shape[1]
+        node = np.repeat(self.roots[:, None], n_samples, axis=1)
+        sample_offset = np.arange(n_samples, dtype=np.intp)[None, :]
+        flat_X = X_t.ravel()
+        has_missing = bool(np.isnan(flat_X).any())
+
+        for _ in range(self.max_depth):
+            x = flat_X[self.feature[node] * n_samples + sample_offset]
+            # children は [左, 右] の順に並んでいるため、右に進む場合は +1 する
+            go_right = x > self.threshold[node]
+            if has_missing:
+                nan = np.isnan(x)
+                go_right = np.where(nan, ~self.missing_left[node], go_right)
+            node = self.children[2 * node + go_right]
+        return node
+
+    def predict_proba_encoded(self, X_t: np.ndarray) -> np.ndarray:
+        """
+        encode 済みの特徴量行列に対してクラス確率を計算する
+
+        sklearn と同じく木の順に逐次加算してから木の数で割るため、結果はビット単位で一致する。
+        """
+        n_samples = X_t.shape[1]
+        proba = np.zeros((n_samples, len(self.classes)), dtype=np.float64)
+        chunk = max(1, _MAX_CHUNK_ELEMENTS // max(self.n_trees, 1))
+
+        for start in range(0, n_samples, chunk):
+            stop = min(start + chunk, n_samples)
+            leaves = self._apply(X_t[:, start:stop])
+            out = proba[start:stop]
+            for tree_leaves in leaves:
+                out += self.leaf_value[tree_leaves]
+
+        proba /= self.n_trees
+        return proba
+
+    def predict_proba(self, df: pd.DataFrame) -> np.ndarray:
+        """Pipeline.predict_proba と同じ結果を返す"""
+        return self.predict_proba_encoded(self.encode(df))
+
+    def predict(self, df: pd.DataFrame) -> np.ndarray:
+        """Pipeline.predict と同じ結果を返す"""
+        return self.classes.take(np.argmax(self.predict_proba(df), axis=1), axis=0)
+
+
+def compile_pipeline(pipeline: Pipeline) -> CompiledForest:
+    """
+    create_model_pipeline で作成・学習したパイプラインを CompiledForest に変換する
+
+    Args:
+        pipeline (Pipeline): preprocessor（ColumnTransformer）と classifier（RandomForestClassifier）
+            からなる学習済みパイプライン
+
+    Returns:
+        CompiledForest: 変換後の推論エンジン
+
+    Raises:
+        ValueError: 対応していない構成のパイプラインの場合
+    """
+    preprocessor = pipeline.named_steps.get("preprocessor")
+    classifier = pipeline.named_steps.get("classifier")
+    if not isinstance(preprocessor, ColumnTransformer) or not isinstance(
+        classifier, RandomForestClassifier
+    ):
+        raise ValueError("Pipeline must consist of ColumnTransformer and RandomForest")
+    if classifier.n_outputs_ != 1:
+        raise ValueError("Only single-output forests are supported")
+
+    # 変換後の列順（ColumnTransformer の出力順）ごとに前処理の情報を集める
+    numeric_columns: List[str] = []
+    categorical_columns: List[str] = []
+    encoder = None
+    means: List[float] = []
+    scales: List[float] = []
+    for name, transformer, columns in preprocessor.transformers_:
+        if name == "remainder" or transformer == "drop":
+            continue
+        if isinstance(transformer, StandardScaler) and not categorical_columns:
+            numeric_columns += list(columns)
+            n = len(columns)
+            mean = transformer.mean_ if transformer.with_mean else np.zeros(n)
+            scale = transformer.scale_ if transformer.with_std else np.ones(n)
+            means += list(mean)
+            scales += list(scale)
+        elif isinstance(transformer, OrdinalEncoder) and encoder is None:
+            categorical_columns += list(columns)
+            encoder = transformer
+        else:
+            raise ValueError(f"Unsupported preprocessing step: {name}")
+
+    n_numeric = len(numeric_columns)
+    n_classes = len(classifier.classes_)
+
+    features, thresholds, lefts, rights, missing, values, roots = ([] for _ in range(7))
+    max_depth = 0
+    offset = 0
+    for estimator in classifier.estimators_:
+        tree = estimator.tree_
+        n_nodes = tree.node_count
+        is_leaf = tree.children_left == -1
+        node_ids = np.arange(offset, offset + n_nodes)
+
+        # 葉は自分自身を指すようにし、全ての木を同じ段数だけ進められるようにする
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+        rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+        missing.append(np.where(is_leaf, True, tree.missing_go_to_left.astype(bool)))
+
+        value = tree.value[:, 0, :n_classes].astype(np.float64)
+        if not _VALUE_IS_FRACTION:
+            normalizer = value.sum(axis=1)[:, None]
+            normalizer[normalizer == 0.0] = 1.0
+            value = value / normalizer
+        values.append(value)
+
+        roots.append(offset)
+        max_depth = max(max_depth, tree.max_depth)
+        offset += n_nodes
+
+    feature = np.concatenate(features).astype(np.intp)
+    threshold = np.concatenate(thresholds).astype(np.float64)
+
+    # 数値特徴量の分岐は標準化を閾値に畳み込む
+    numeric_split = (feature < n_numeric) & np.isfinite(threshold)
+    if numeric_split.any():
+        idx = feature[numeric_split]
+        threshold[numeric_split] = _fold_scaler_thresholds(
+            threshold[numeric_split],
+            np.asarray(means, dtype=np.float64)[idx],
+            np.asarray(scales, dtype=np.float64)[idx],
+        )
+
+    compiled = CompiledForest(
+        numeric_columns=numeric_columns,
+        categorical_columns=categorical_columns,
+        encoder=encoder,
+        classes=classifier.classes_,
+        feature=feature,
+        threshold=threshold,
+        children=np.column_stack([np.concatenate(lefts), np.concatenate(rights)])
+        .ravel()
+        .astype(np.intp),
+        missing_left=np.concatenate(missing),
+        leaf_value=np.ascontiguousarray(np.concatenate(values)),
+        roots=np.asarray(roots, dtype=np.intp),
+        max_depth=max_depth,
+    )
+    logger.info(
+        f"Compiled forest: {compiled.n_trees} trees, {offset} nodes, max depth {max_depth}"
+    )
+    return compiled
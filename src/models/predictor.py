@@ -1,43 +1,166 @@
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
 import numpy as np
 import pandas as pd
 from snowflake.ml.model import ModelVersion
-from snowflake.ml.registry import Registry
 from snowflake.snowpark import Session
 
+from src.models.artifact_cache import load_local_derived, load_local_model
+from src.models.registry import get_default_version, get_latest_version, get_version
+from src.utils.config import load_config
+
+if TYPE_CHECKING:
+    from src.models.compiled_forest import CompiledForest
+
+config = load_config()
+
+INFERENCE_MODES = ("registry", "local")
+INFERENCE_ENGINES = ("sklearn", "compiled")
+
 
 def load_latest_model_version(session: Session) -> ModelVersion:
     """
-    最新のモデルバージョンを取得する
+    最新のモデルバージョンを取得する（プロセス内キャッシュを利用）
     """
-    registry = Registry(session=session)
-    model_ref = registry.get_model("random_forest")
-    mv = model_ref.last()
-
-    return mv
+    return get_latest_version(session)
 
 
 def load_default_model_version(session: Session) -> ModelVersion:
     """
-    デフォルトバージョンを取得する
+    デフォルトバージョンを取得する（プロセス内キャッシュを利用）
+    """
+    return get_default_version(session)
+
+
+def load_model_version(session: Session, version_name: str) -> ModelVersion:
+    """
+    指定したバージョンを取得する（プロセス内キャッシュを利用）
+    """
+    return get_version(session, version_name)
+
+
+def _resolve_mode(mode: Optional[str]) -> str:
+    """推論モードを決定する（未指定の場合は config の設定値）"""
+    mode = mode or config.model.inference.mode
+    if mode not in INFERENCE_MODES:
+        raise ValueError(f"Unsupported inference mode: {mode}")
+    return mode
+
+
+def load_local_engine(mv: ModelVersion, engine: Optional[str] = None) -> Any:
+    """
+    プロセス内推論に用いるエンジンを取得する
+
+    Args:
+        mv (ModelVersion): モデルバージョン
+        engine (str | None): "sklearn"（パイプラインをそのまま使用）または
+            "compiled"（CompiledForest に変換）。未指定の場合は config の設定値
+
+    Returns:
+        Any: predict_proba / predict を持つ推論エンジン
+    """
+    engine = engine or config.model.inference.engine
+    if engine not in INFERENCE_ENGINES:
+        raise ValueError(f"Unsupported inference engine: {engine}")
+
+    if engine == "sklearn":
+        return load_local_model(mv)
+    # 変換結果は読み込んだモデルと一緒に保持・破棄する（loaded_max_models 個まで）
+    return load_local_derived(mv, "compiled", _compile)
+
+
+def _compile(model: Any) -> "CompiledForest":
+    # sklearn.compose / sklearn.ensemble の読み込みは 1 秒以上かかるため、
+    # compiled エンジンを使う場合のみ読み込む（registry モードの推論では不要）
+    from src.models.compiled_forest import compile_pipeline
+
+    return compile_pipeline(model)
+
+
+def _run_local(
+    features: pd.DataFrame, mv: ModelVersion, function_name: str
+) -> np.ndarray:
+    """
+    ローカルにキャッシュしたパイプラインでバッチごとにプロセス内推論を行う
     """
-    registry = Registry(session=session)
-    model_ref = registry.get_model("random_forest")
-    mv = model_ref.default
-    return mv
+    model = load_local_engine(mv)
+    method = getattr(model, function_name)
+    batch_size = config.model.inference.batch_size
+
+    outputs = [
+        method(features.iloc[start : start + batch_size])
+        for start in range(0, len(features), batch_size)
+    ]
+    return np.concatenate(outputs) if outputs else method(features)
 
 
-def predict_proba(features: pd.DataFrame, mv: ModelVersion) -> np.ndarray:
+def predict_proba(
+    features: pd.DataFrame, mv: ModelVersion, mode: Optional[str] = None
+) -> np.ndarray:
     """
     モデルを用いて推論を行う
+
+    Args:
+        features (pd.DataFrame): 特徴量
+        mv (ModelVersion): モデルバージョン
+        mode (str | None): "registry"（mv.run 経由）または "local"（プロセス内推論）
     """
+    if _resolve_mode(mode) == "local":
+        return _run_local(features, mv, "predict_proba")[:, 1]
+
     # run の結果は output_feature_0, output_feature_1 の2つの列を持つデータフレーム
     pred_probas_df = mv.run(features, function_name="predict_proba")
     return pred_probas_df.output_feature_1.values
 
 
-def predict_label(features: pd.DataFrame, mv: ModelVersion) -> np.ndarray:
+def predict_label(
+    features: pd.DataFrame, mv: ModelVersion, mode: Optional[str] = None
+) -> np.ndarray:
     """
     モデルを用いて推論を行う
+
+    Args:
+        features (pd.DataFrame): 特徴量
+        mv (ModelVersion): モデルバージョン
+        mode (str | None): "registry"（mv.run 経由）または "local"（プロセス内推論）
     """
+    if _resolve_mode(mode) == "local":
+        return _run_local(features, mv, "predict")
+
     pred_df = mv.run(features, function_name="predict")
     return pred_df.output_feature_0.values
+
+
+def predict_proba_many(
+    features: pd.DataFrame, mvs: List[ModelVersion]
+) -> Dict[str, np.ndarray]:
+    """
+    複数のモデルバージョンで同じ特徴量を推論する（シャドウスコアリング用）
+
+    各バージョンを CompiledForest としてプロセス内に読み込み、特徴量のエンコードは
+    エンコード方法が同じモデル間で一度だけ行う。追加のコストは木の評価のみとなる。
+
+    Args:
+        features (pd.DataFrame): 特徴量
+        mvs (List[ModelVersion]): 推論に用いるモデルバージョン
+
+    Returns:
+        Dict[str, np.ndarray]: バージョン名ごとの正例の確率
+    """
+    batch_size = config.model.inference.batch_size
+    engines = {mv.version_name: load_local_engine(mv, engine="compiled") for mv in mvs}
+    outputs: Dict[str, List[np.ndarray]] = {name: [] for name in engines}
+
+    for start in range(0, len(features), batch_size):
+        batch = features.iloc[start : start + batch_size]
+        encoded: Dict[tuple, np.ndarray] = {}
+        for name, engine in engines.items():
+            if engine.encoding_key not in encoded:
+                encoded[engine.encoding_key] = engine.encode(batch)
+            proba = engine.predict_proba_encoded(encoded[engine.encoding_key])
+            outputs[name].append(proba[:, 1])
+
+    return {
+        name: np.concatenate(chunks) if chunks else np.empty(0)
+        for name, chunks in outputs.items()
+    }
@@ -0,0 +1,181 @@
+import logging
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+from snowflake.ml.model import Model, ModelVersion
+from snowflake.ml.registry import Registry
+from snowflake.snowpark import Session
+
+from src.utils.config import load_config
+
+logger = logging.getLogger(__name__)
+config = load_config()
+
+MODEL_NAME: str = config.model.name
+
+
+def _create_registry(session: Session) -> Registry:
+    """
+    セッションに対応する Registry を作成する
+
+    ローカル実行用のセッション（src.local.LocalSession）は create_registry で
+    ファイルシステム上の Registry を提供するため、そちらを使用する。
+    """
+    # Mock などインスタンスで任意の属性を返すオブジェクトと区別するため、クラスで判定する
+    if callable(getattr(type(session), "create_registry", None)):
+        return session.create_registry()
+    return Registry(session=session)
+
+
+@dataclass
+class _RegistryEntry:
+    """セッション1つ分のキャッシュエントリ"""
+
+    session_ref: weakref.ref
+    registry: Registry
+    created_at: float
+    model_refs: Dict[str, Model] = field(default_factory=dict)
+    versions: Dict[tuple, ModelVersion] = field(default_factory=dict)
+
+
+class RegistryCache:
+    """
+    Registry / ModelReference / 解決済みモデルバージョンをプロセス内で保持するキャッシュ
+
+    Registry の生成や get_model、default / last の解決はいずれもメタデータ問い合わせを伴うため、
+    セッションごとに一度だけ解決し、TTL が切れるか明示的に無効化されるまで再利用する。
+    """
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[int, _RegistryEntry] = {}
+        self._lock = threading.RLock()
+
+    def _get_entry(self, session: Session) -> _RegistryEntry:
+        key = id(session)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            # id の再利用や TTL 切れの場合はエントリを作り直す
+            if (
+                entry is None
+                or entry.session_ref() is not session
+                or now - entry.created_at > self.ttl_seconds
+            ):
+                logger.info("Creating model registry handle")
+                entry = _RegistryEntry(
+                    session_ref=weakref.ref(session),
+                    registry=_create_registry(session),
+                    created_at=now,
+                )
+                self._entries[key] = entry
+            return entry
+
+    def get_registry(self, session: Session) -> Registry:
+        """キャッシュ済みの Registry を取得する"""
+        return self._get_entry(session).registry
+
+    def get_model_ref(self, session: Session, model_name: str = MODEL_NAME) -> Model:
+        """キャッシュ済みの ModelReference を取得する"""
+        entry = self._get_entry(session)
+        with self._lock:
+            if model_name not in entry.model_refs:
+                entry.model_refs[model_name] = entry.registry.get_model(model_name)
+            return entry.model_refs[model_name]
+
+    def get_version(
+        self,
+        session: Session,
+        key: str,
+        resolver: Callable[[Model], ModelVersion],
+        model_name: str = MODEL_NAME,
+    ) -> ModelVersion:
+        """
+        key 単位で解決済みのモデルバージョンを取得する
+
+        Args:
+            session (Session): Snowflakeセッション
+            key (str): キャッシュキー（"default", "last" またはバージョン名）
+            resolver (Callable): ModelReference からバージョンを解決する関数
+            model_name (str): モデル名
+        """
+        model_ref = self.get_model_ref(session, model_name)
+        entry = self._get_entry(session)
+        with self._lock:
+            if (model_name, key) not in entry.versions:
+                entry.versions[(model_name, key)] = resolver(model_ref)
+            return entry.versions[(model_name, key)]
+
+    def invalidate_versions(self, session: Optional[Session] = None) -> None:
+        """
+        解決済みバージョンのみを破棄する（Registry / ModelReference は保持）
+
+        Args:
+            session (Session | None): 対象セッション。None の場合は全セッション
+        """
+        with self._lock:
+            for key, entry in self._entries.items():
+                if session is None or key == id(session):
+                    entry.versions.clear()
+
+    def clear(self) -> None:
+        """キャッシュを全て破棄する"""
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = RegistryCache(ttl_seconds=config.model.registry.cache_ttl_seconds)
+
+
+def get_registry(session: Session) -> Registry:
+    """プロセス内でキャッシュされた Registry を取得する"""
+    return _cache.get_registry(session)
+
+
+def get_model_ref(session: Session) -> Model:
+    """プロセス内でキャッシュされた ModelReference を取得する"""
+    return _cache.get_model_ref(session)
+
+
+def get_default_version(session: Session) -> ModelVersion:
+    """キャッシュ経由でデフォルトバージョンを取得する"""
+    return _cache.get_version(session, "default", lambda ref: ref.default)
+
+
+def get_latest_version(session: Session) -> ModelVersion:
+    """キャッシュ経由で最新バージョンを取得する"""
+    return _cache.get_version(session, "last", lambda ref: ref.last())
+
+
+def get_version(session: Session, version_name: str) -> ModelVersion:
+    """キャッシュ経由で指定バージョンを取得する"""
+    return _cache.get_version(
+        session, f"version:{version_name}", lambda ref: ref.version(version_name)
+    )
+
+
+def set_default_version(session: Session, mv: ModelVersion) -> None:
+    """
+    デフォルトバージョンを更新し、解決済みバージョンのキャッシュを無効化する
+
+    Args:
+        session (Session): Snowflakeセッション
+        mv (ModelVersion): 新しいデフォルトバージョン
+    """
+    model_ref = get_model_ref(session)
+    model_ref.default = mv
+    _cache.invalidate_versions()
+    logger.info("Model version cache invalidated after default version update")
+
+
+def invalidate_versions(session: Optional[Session] = None) -> None:
+    """解決済みバージョンのキャッシュを無効化する（モデル登録後など）"""
+    _cache.invalidate_versions(session)
+
+
+def clear_registry_cache() -> None:
+    """Registry キャッシュを全て破棄する"""
+    _cache.clear()
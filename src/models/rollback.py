@@ -1,9 +1,9 @@
 import argparse
 import logging
 
-from snowflake.ml.registry import Registry
 from snowflake.snowpark import Session
 
+from src.models.registry import get_model_ref, set_default_version
 from src.utils.logger import setup_logging
 from src.utils.snowflake import create_session
 
@@ -22,8 +22,7 @@ def rollback_model(session: Session, version_name: str) -> None:
         Exception: ロールバック処理中にエラーが発生した場合
     """
     try:
-        registry = Registry(session=session)
-        model_ref = registry.get_model("random_forest")
+        model_ref = get_model_ref(session)
 
         # 指定されたバージョンが存在するか確認
         try:
@@ -37,8 +36,8 @@ def rollback_model(session: Session, version_name: str) -> None:
         logger.info(f"Current default version: {current_default.version_name}")
         logger.info(f"Target rollback version: {version_name}")
 
-        # デフォルトバージョンを更新
-        model_ref.default = target_version
+        # デフォルトバージョンを更新（解決済みバージョンのキャッシュも無効化）
+        set_default_version(session, target_version)
         logger.info(f"Default version updated to {version_name}")
 
     except Exception as e:
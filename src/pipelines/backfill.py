@@ -0,0 +1,247 @@
+import argparse
+import json
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, List, Optional, Set, Tuple
+
+import pandas as pd
+from snowflake.snowpark import Session
+
+from src.utils.config import load_config
+from src.utils.logger import setup_logging
+from src.utils.session_pool import SessionPool
+from src.utils.snowflake import create_session
+
+logger = logging.getLogger(__name__)
+config = load_config()
+
+Partition = Tuple[str, str]
+
+
+def split_date_range(
+    start_date: str, end_date: str, partition_days: int
+) -> List[Partition]:
+    """
+    期間を partition_days 日ずつの重複しない区間に分割する
+
+    Args:
+        start_date (str): 開始日（YYYY-MM-DD）
+        end_date (str): 終了日（YYYY-MM-DD、この日を含む）
+        partition_days (int): 1区間の日数
+
+    Returns:
+        List[Tuple[str, str]]: (開始日, 終了日) のリスト（両端を含む）
+    """
+    if partition_days <= 0:
+        raise ValueError("partition_days must be positive")
+    start = pd.Timestamp(start_date)
+    end = pd.Timestamp(end_date)
+    if end < start:
+        raise ValueError("end_date must not be earlier than start_date")
+
+    partitions = []
+    while start <= end:
+        stop = min(start + pd.Timedelta(days=partition_days - 1), end)
+        partitions.append((start.strftime("%Y-%m-%d"), stop.strftime("%Y-%m-%d")))
+        start = stop + pd.Timedelta(days=1)
+    return partitions
+
+
+@dataclass
+class BackfillCheckpoint:
+    """
+    バックフィルの完了済み区間を記録する JSON ファイル
+
+    区間の完了ごとに一時ファイルへ書き出してから置き換えるため、途中で中断しても
+    ファイルが壊れることはなく、再実行時は完了済みの区間を飛ばして再開できる。
+    """
+
+    path: Path
+    start_date: str
+    end_date: str
+    partition_days: int
+    completed: Set[Partition] = field(default_factory=set)
+
+    @classmethod
+    def load(
+        cls,
+        path: str | os.PathLike,
+        start_date: str,
+        end_date: str,
+        partition_days: int,
+    ) -> "BackfillCheckpoint":
+        """
+        チェックポイントを読み込む（存在しない場合は新規に作成する）
+
+        Raises:
+            ValueError: 既存のチェックポイントと期間・区間の日数が異なる場合
+        """
+        checkpoint = cls(Path(path), start_date, end_date, partition_days)
+        if not checkpoint.path.exists():
+            return checkpoint
+
+        with open(checkpoint.path) as f:
+            data = json.load(f)
+        saved = (data["start_date"], data["end_date"], data["partition_days"])
+        if saved != (start_date, end_date, partition_days):
+            raise ValueError(
+                f"Checkpoint {checkpoint.path} was created for a different backfill: "
+                f"{saved[0]} to {saved[1]} ({saved[2]} days per partition)"
+            )
+        checkpoint.completed = {tuple(p) for p in data["completed"]}  # type: ignore
+        return checkpoint
+
+    def mark_completed(self, partition: Partition) -> None:
+        """区間を完了済みとして記録する"""
+        self.completed.add(partition)
+        data = {
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "partition_days": self.partition_days,
+            "completed": sorted(self.completed),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_name, self.path)
+
+
+def run_backfill(
+    start_date: str,
+    end_date: str,
+    session_factory: Callable[[], Optional[Session]],
+    workers: int,
+    partition_days: int,
+    checkpoint_path: Optional[str] = None,
+    procedure_name: str = "PREDICTION",
+) -> List[Partition]:
+    """
+    期間を日付の区間に分割し、ワーカーセッションのプールで並列に推論する
+
+    各区間は推論のストアドプロシージャを (開始日, 終了日) で呼び出して処理する。
+    プロシージャは自分の区間のスコアのみを置き換えるため、区間が重ならない限り
+    ワーカー間で削除が衝突することはない。ワーカーは最大 workers 個（設定の
+    session_pool.max_size を上限とする）のセッションのプールを共有して使い回し、
+    推論自体はウェアハウス側で並列に実行される。
+
+    Args:
+        start_date (str): 開始日（YYYY-MM-DD）
+        end_date (str): 終了日（YYYY-MM-DD、この日を含む）
+        session_factory (Callable[[], Session]): ワーカーセッションを作成する関数
+        workers (int): ワーカー数
+        partition_days (int): 1区間の日数
+        checkpoint_path (str | None): 進捗を記録するチェックポイントファイル。
+            指定した場合は完了済みの区間を飛ばして再開する
+        procedure_name (str): 呼び出すストアドプロシージャ名
+
+    Returns:
+        List[Tuple[str, str]]: 今回の実行で完了した区間
+
+    Raises:
+        RuntimeError: いずれかの区間が失敗した場合（他の区間は最後まで処理する）
+    """
+    if workers <= 0:
+        raise ValueError("workers must be positive")
+
+    partitions = split_date_range(start_date, end_date, partition_days)
+    checkpoint = (
+        BackfillCheckpoint.load(checkpoint_path, start_date, end_date, partition_days)
+        if checkpoint_path
+        else None
+    )
+    pending = [
+        p for p in partitions if checkpoint is None or p not in checkpoint.completed
+    ]
+    logger.info(
+        f"Backfill {start_date} to {end_date}: {len(partitions)} partitions, "
+        f"{len(partitions) - len(pending)} already completed, {workers} workers"
+    )
+
+    # ワーカーごとにセッションを作り直さず、プールから認証済みのセッションを借りる
+    pool_config = config.session_pool
+    pool = SessionPool(
+        session_factory,
+        max_size=min(workers, pool_config.max_size),
+        idle_timeout_seconds=pool_config.idle_timeout_seconds,
+        health_check_interval_seconds=pool_config.health_check_interval_seconds,
+    )
+
+    def process(partition: Partition) -> None:
+        logger.info(f"Starting partition {partition[0]} to {partition[1]}")
+        with pool.session() as session:
+            session.call(procedure_name, *partition)
+
+    completed: List[Partition] = []
+    failed: List[Partition] = []
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(process, p): p for p in pending}
+            for future in as_completed(futures):
+                partition = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(
+                        f"Partition {partition[0]} to {partition[1]} failed: {str(e)}"
+                    )
+                    failed.append(partition)
+                    continue
+
+                completed.append(partition)
+                if checkpoint is not None:
+                    checkpoint.mark_completed(partition)
+                logger.info(
+                    f"Completed partition {partition[0]} to {partition[1]} "
+                    f"({len(completed)}/{len(pending)})"
+                )
+    finally:
+        pool.close()
+
+    if failed:
+        raise RuntimeError(
+            f"{len(failed)} partitions failed: "
+            + ", ".join(f"{s} to {e}" for s, e in sorted(failed))
+        )
+    return completed
+
+
+def main() -> None:
+    setup_logging()
+
+    parser = argparse.ArgumentParser(description="Parallel prediction backfill")
+    parser.add_argument("start_date", type=str, help="Start date (YYYY-MM-DD)")
+    parser.add_argument("end_date", type=str, help="End date (YYYY-MM-DD, inclusive)")
+    parser.add_argument(
+        "--workers", type=int, default=config.prediction.backfill.workers
+    )
+    parser.add_argument(
+        "--partition-days",
+        type=int,
+        default=config.prediction.backfill.partition_days,
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default=None,
+        help="Checkpoint file to record progress and resume from",
+    )
+    args = parser.parse_args()
+
+    run_backfill(
+        args.start_date,
+        args.end_date,
+        session_factory=create_session,
+        workers=args.workers,
+        partition_days=args.partition_days,
+        checkpoint_path=args.checkpoint,
+    )
+    logger.info("Backfill completed successfully")
+
+
+if __name__ == "__main__":
+    main()
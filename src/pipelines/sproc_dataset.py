@@ -7,14 +7,19 @@ from snowflake.snowpark import Session
 from src.data.dataset import update_ml_dataset
 from src.utils.config import load_config
 from src.utils.constants import DATABASE_DEV, DATASET, IMPORTS_DIR, SCHEMA, SOURCE
+from src.utils.cpu_profile import profiled
 from src.utils.logger import setup_logging
+from src.utils.query_profile import report_slowest_queries
 from src.utils.snowflake import create_session
+from src.utils.tracing import configure_tracing, span, timed
 
 logger = logging.getLogger(__name__)
 
 config = load_config()
 
 
+@profiled()
+@timed("dataset")
 def sproc_dataset(session: Session, target_date: str) -> int:
     """
     sourceテーブルから対象日のデータをdatasetテーブルに格納
@@ -31,23 +36,28 @@ def sproc_dataset(session: Session, target_date: str) -> int:
     """
     try:
         setup_logging()
+        configure_tracing(session)
 
         database_name = session.get_current_database() or DATABASE_DEV
 
-        update_ml_dataset(
-            session=session,
-            target_date=target_date,
-            database_name=database_name,
-            schema_name=SCHEMA,
-            table_name=DATASET,
-            source_table_name=SOURCE,
-        )
+        with span("update_dataset", target_date=target_date) as stage:
+            stage.rows = update_ml_dataset(
+                session=session,
+                target_date=target_date,
+                database_name=database_name,
+                schema_name=SCHEMA,
+                table_name=DATASET,
+                source_table_name=SOURCE,
+            )
         return 1
 
     except Exception as e:
         logger.error(f"An error occurred: {str(e)}")
         raise e
 
+    finally:
+        report_slowest_queries()
+
 
 if __name__ == "__main__":
     try:
@@ -65,10 +75,29 @@ if __name__ == "__main__":
                 (os.path.join(IMPORTS_DIR, "data"), "src.data"),
                 (os.path.join(IMPORTS_DIR, "utils/logger.py"), "src.utils.logger"),
                 (os.path.join(IMPORTS_DIR, "utils/config.py"), "src.utils.config"),
+                (
+                    os.path.join(IMPORTS_DIR, "utils/constants.py"),
+                    "src.utils.constants",
+                ),
+                (os.path.join(IMPORTS_DIR, "utils/query.py"), "src.utils.query"),
                 (
                     os.path.join(IMPORTS_DIR, "utils/snowflake.py"),
                     "src.utils.snowflake",
                 ),
+                (
+                    os.path.join(IMPORTS_DIR, "utils/query_profile.py"),
+                    "src.utils.query_profile",
+                ),
+                (
+                    os.path.join(IMPORTS_DIR, "utils/memory_profile.py"),
+                    "src.utils.memory_profile",
+                ),
+                (
+                    os.path.join(IMPORTS_DIR, "utils/cpu_profile.py"),
+                    "src.utils.cpu_profile",
+                ),
+                (os.path.join(IMPORTS_DIR, "utils/tracing.py"), "src.utils.tracing"),
+                os.path.join(IMPORTS_DIR, "config.yml"),
             ],
             "replace": True,
             "execute_as": "caller",
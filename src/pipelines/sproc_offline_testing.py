@@ -2,7 +2,6 @@ import logging
 import os
 import sys
 
-from snowflake.ml.registry import Registry
 from snowflake.snowpark import Session
 
 from src.data.loader import fetch_test_dataset
@@ -12,16 +11,22 @@ from src.models.predictor import (
     predict_label,
     predict_proba,
 )
+from src.models.registry import set_default_version
 from src.models.trainer import calc_evaluation_metrics
 from src.utils.config import load_config
 from src.utils.constants import IMPORTS_DIR, SCHEMA
+from src.utils.cpu_profile import profiled
 from src.utils.logger import setup_logging
+from src.utils.query_profile import report_slowest_queries
 from src.utils.snowflake import create_session
+from src.utils.tracing import configure_tracing, span, timed
 
 logger = logging.getLogger(__name__)
 config = load_config()
 
 
+@profiled()
+@timed("offline_testing")
 def sproc_offline_testing(session: Session) -> int:
     """
     Challenger vs Champion モデルの評価
@@ -37,40 +42,46 @@ def sproc_offline_testing(session: Session) -> int:
     """
     try:
         setup_logging()
+        configure_tracing(session)
         logger.info("Starting offline testing procedure")
 
-        # Championモデルの取得（Defalutバージョン）
-        logger.info("Loading champion model (default version)")
-        champion_mv = load_default_model_version(session)
-        logger.info(f"Champion model version: {champion_mv.version}")
+        with span("load_models"):
+            # Championモデルの取得（Defalutバージョン）
+            logger.info("Loading champion model (default version)")
+            champion_mv = load_default_model_version(session)
+            logger.info(f"Champion model version: {champion_mv.version_name}")
 
-        # Challengerモデルの取得（作成日が最新のバージョン）
-        logger.info("Loading challenger model (latest version)")
-        challenger_mv = load_latest_model_version(session)
-        logger.info(f"Challenger model version: {challenger_mv.version}")
+            # Challengerモデルの取得（作成日が最新のバージョン）
+            logger.info("Loading challenger model (latest version)")
+            challenger_mv = load_latest_model_version(session)
+            logger.info(f"Challenger model version: {challenger_mv.version_name}")
 
         # テストデータの取得
         logger.info("Fetching test dataset")
-        test_df = fetch_test_dataset(session, challenger_mv)
-        TARGET_COL = config["data"]["target"][0]
+        with span("fetch_test_dataset") as stage:
+            test_df = fetch_test_dataset(session, challenger_mv)
+            stage.rows = len(test_df)
+        TARGET_COL = config.data.target[0]
         test_features = test_df.drop(columns=[TARGET_COL, "UID"])
         test_target = test_df[TARGET_COL]
         logger.info(f"Test dataset size: {len(test_df)} rows")
 
         # モデル比較
         logger.info("Starting model comparison")
-        challenger_pred_proba = predict_proba(test_features, challenger_mv)
-        champion_pred_proba = predict_proba(test_features, champion_mv)
-        challenger_pred_label = predict_label(test_features, challenger_mv)
-        champion_pred_label = predict_label(test_features, champion_mv)
+        with span("predict", rows=len(test_features)):
+            challenger_pred_proba = predict_proba(test_features, challenger_mv)
+            champion_pred_proba = predict_proba(test_features, champion_mv)
+            challenger_pred_label = predict_label(test_features, challenger_mv)
+            champion_pred_label = predict_label(test_features, champion_mv)
 
         logger.info("Calculating evaluation metrics")
-        challenger_scores = calc_evaluation_metrics(
-            test_target, challenger_pred_label, challenger_pred_proba
-        )
-        champion_scores = calc_evaluation_metrics(
-            test_target, champion_pred_label, champion_pred_proba
-        )
+        with span("evaluate", rows=len(test_target)):
+            challenger_scores = calc_evaluation_metrics(
+                test_target, challenger_pred_label, challenger_pred_proba
+            )
+            champion_scores = calc_evaluation_metrics(
+                test_target, champion_pred_label, champion_pred_proba
+            )
 
         logger.info(f"Champion model scores: {champion_scores}")
         logger.info(f"Challenger model scores: {challenger_scores}")
@@ -81,9 +92,8 @@ def sproc_offline_testing(session: Session) -> int:
             )
             logger.info("Updating default version to challenger model")
 
-            registry = Registry(session=session)
-            m = registry.get_model("random_forest")
-            m.default = challenger_mv
+            with span("set_default_version"):
+                set_default_version(session, challenger_mv)
             logger.info("Default version updated successfully")
 
         else:
@@ -101,6 +111,9 @@ def sproc_offline_testing(session: Session) -> int:
         )
         raise e
 
+    finally:
+        report_slowest_queries()
+
 
 if __name__ == "__main__":
     try:
@@ -122,7 +135,29 @@ if __name__ == "__main__":
                 (os.path.join(IMPORTS_DIR, "data"), "src.data"),
                 (os.path.join(IMPORTS_DIR, "models"), "src.models"),
                 (os.path.join(IMPORTS_DIR, "utils/config.py"), "src.utils.config"),
+                (
+                    os.path.join(IMPORTS_DIR, "utils/constants.py"),
+                    "src.utils.constants",
+                ),
                 (os.path.join(IMPORTS_DIR, "utils/logger.py"), "src.utils.logger"),
+                (os.path.join(IMPORTS_DIR, "utils/query.py"), "src.utils.query"),
+                (
+                    os.path.join(IMPORTS_DIR, "utils/snowflake.py"),
+                    "src.utils.snowflake",
+                ),
+                (
+                    os.path.join(IMPORTS_DIR, "utils/query_profile.py"),
+                    "src.utils.query_profile",
+                ),
+                (
+                    os.path.join(IMPORTS_DIR, "utils/memory_profile.py"),
+                    "src.utils.memory_profile",
+                ),
+                (
+                    os.path.join(IMPORTS_DIR, "utils/cpu_profile.py"),
+                    "src.utils.cpu_profile",
+                ),
+                (os.path.join(IMPORTS_DIR, "utils/tracing.py"), "src.utils.tracing"),
                 os.path.join(IMPORTS_DIR, "config.yml"),
             ],
             "replace": True,
@@ -1,28 +1,227 @@
 import logging
 import os
 import sys
+from dataclasses import asdict
+from typing import Dict, List, Optional, Tuple, Union
 
+import numpy as np
+import pandas as pd
+from snowflake.ml.model import ModelVersion
 from snowflake.snowpark import Session
 
-from src.data.loader import fetch_prediction_dataset
-from src.models.predictor import load_default_model_version, predict_proba
+from src.data.loader import (
+    fetch_prediction_dataset,
+    fetch_unscored_prediction_dataset,
+    iter_prediction_batches,
+)
+from src.data.scores import (
+    delete_shadow_scores,
+    get_model_id,
+    write_shadow_scores,
+)
+from src.models.predictor import (
+    load_default_model_version,
+    load_model_version,
+    predict_proba,
+    predict_proba_many,
+)
 from src.utils.config import load_config
-from src.utils.constants import DATABASE_DEV, IMPORTS_DIR, SCHEMA
+from src.utils.constants import DATABASE_DEV, IMPORTS_DIR, SCHEMA, SCORES_BASE
+from src.utils.cpu_profile import profiled
 from src.utils.logger import setup_logging
-from src.utils.snowflake import create_session, upload_dataframe_to_snowflake
+from src.utils.pipelined import PipelinedExecutor
+from src.utils.query import Query, and_conditions, qualified_name
+from src.utils.query_profile import report_slowest_queries
+from src.utils.snowflake import (
+    append_to_table,
+    create_session,
+    create_staging_table,
+    publish_staging_table,
+    session_date_condition,
+    upload_dataframe_to_snowflake,
+)
+from src.utils.tracing import configure_tracing, span, timed
 
 logger = logging.getLogger(__name__)
 
 config = load_config()
 
+# 推論時に特徴量から除くカラム
+_NON_FEATURE_COLUMNS = ["UID", "SESSION_DATE"]
 
-def sproc_prediction(session: Session, prediction_date: str = "2024-10-01") -> int:
+# ストリーミング時に推論ステージから書き込みステージへ渡す
+# (UID, SESSION_DATE, スコア, シャドウのスコア)
+_Scored = Tuple[pd.Series, pd.Series, np.ndarray, Dict[str, np.ndarray]]
+
+
+def _score(
+    df: pd.DataFrame, mv: ModelVersion, shadow_mvs: List[ModelVersion]
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """チャンピオンのスコアと、シャドウバージョンごとのスコアを計算する"""
+    features = df.drop(columns=_NON_FEATURE_COLUMNS, errors="ignore")
+    if not shadow_mvs:
+        return predict_proba(features, mv), {}
+
+    # チャンピオンとシャドウを同じ特徴量で一度にスコアリング
+    all_scores = predict_proba_many(features, [mv, *shadow_mvs])
+    shadow_scores = {
+        smv.version_name: all_scores[smv.version_name] for smv in shadow_mvs
+    }
+    return all_scores[mv.version_name], shadow_scores
+
+
+def _get_model_ids(
+    session: Session, database_name: str, mvs: List[ModelVersion]
+) -> Dict[str, int]:
+    """モデルバージョンごとの MODEL_ID を取得する"""
+    return {
+        mv.version_name: get_model_id(
+            session, database_name, SCHEMA, mv.model_name, mv.version_name
+        )
+        for mv in mvs
+    }
+
+
+def _build_scores_frame(
+    uids: pd.Series,
+    session_dates: Union[str, pd.Series],
+    scores: np.ndarray,
+    model_id: int,
+) -> pd.DataFrame:
+    """スコアテーブルの列構成のデータフレームを作成する（入力データはコピーしない）"""
+    return pd.DataFrame(
+        {
+            "UID": uids.values,
+            "SESSION_DATE": (
+                session_dates
+                if isinstance(session_dates, str)
+                else session_dates.values
+            ),
+            "MODEL_ID": np.int64(model_id),
+            "SCORE": scores,
+        }
+    )
+
+
+def _predict_streaming(
+    session: Session,
+    prediction_date: str,
+    end_date: Optional[str],
+    mv: ModelVersion,
+    model_id: int,
+    shadow_mvs: List[ModelVersion],
+    incremental: bool,
+    database_name: str,
+) -> int:
+    """
+    データを固定行数のバッチで読み込み、バッチごとに推論してステージングテーブルに書き込む
+
+    取得・推論・書き込みは PipelinedExecutor で並行に実行し、バッチ N+1 の取得中に
+    バッチ N の推論とバッチ N-1 の書き込みを進める。全てのバッチを書き込んだ後、
+    スコアテーブルの対象期間を1つのトランザクションで置き換える。同時に保持する
+    バッチ数は pipeline_depth で決まるため、ピークメモリは対象期間の行数によらない。
+
+    Returns:
+        int: 推論した行数
     """
-    指定日のデータにおける推論処理
+    batch_size = config.prediction.batch_size
+    date_condition = session_date_condition(prediction_date, end_date)
+    model_ids = _get_model_ids(session, database_name, shadow_mvs)
+    staging_table_name = None
+    n_rows = 0
+
+    if shadow_mvs and not incremental:
+        # シャドウスコアは追記のみで書き込むため、対象期間の既存行を先に削除する
+        delete_shadow_scores(
+            session=session,
+            model_ids=model_ids.values(),
+            date_condition=date_condition,
+            database_name=database_name,
+            schema_name=SCHEMA,
+        )
+
+    def score(batch: pd.DataFrame) -> _Scored:
+        scores, shadow_scores = _score(batch, mv, shadow_mvs)
+        return batch["UID"], batch["SESSION_DATE"], scores, shadow_scores
+
+    def upload(scored: _Scored) -> None:
+        nonlocal staging_table_name, n_rows
+        uids, session_dates, scores, shadow_scores = scored
+        # 新しい行がない場合にクエリを増やさないよう、最初のバッチで作成する
+        if staging_table_name is None:
+            staging_table_name = create_staging_table(
+                session, database_name, SCHEMA, SCORES_BASE
+            )
+
+        append_to_table(
+            session,
+            _build_scores_frame(uids, session_dates, scores, model_id),
+            staging_table_name,
+        )
+        if shadow_mvs:
+            write_shadow_scores(
+                session=session,
+                uids=uids,
+                session_date=session_dates,
+                model_ids=model_ids,
+                scores=shadow_scores,
+                database_name=database_name,
+                schema_name=SCHEMA,
+                replace=False,
+            )
+        n_rows += len(uids)
+        logger.info(f"Scored {n_rows} rows")
+
+    batches = iter_prediction_batches(
+        session,
+        prediction_date=prediction_date,
+        batch_size=batch_size,
+        model_id=model_id if incremental else None,
+        end_date=end_date,
+    )
+    executor = PipelinedExecutor(depth=config.prediction.pipeline_depth)
+    with span("score_batches") as stage:
+        stats = executor.run(batches, [("score", score), ("upload", upload)])
+        stage.rows = n_rows
+        stage.set(stages={s.name: asdict(s) for s in stats})
+
+    if staging_table_name is None:
+        return 0
+
+    if incremental:
+        # 旧バージョンのスコアは今回の行で置き換わるため、同じトランザクションで削除する
+        date_condition = and_conditions(
+            date_condition, Query("MODEL_ID <> ?", (model_id,))
+        )
+    with span("publish", rows=n_rows):
+        publish_staging_table(
+            session,
+            staging_table_name,
+            qualified_name(database_name, SCHEMA, SCORES_BASE),
+            delete_condition=date_condition,
+        )
+    return n_rows
+
+
+@profiled()
+@timed("prediction")
+def sproc_prediction(
+    session: Session,
+    prediction_date: str = "2024-10-01",
+    end_date: Optional[str] = None,
+) -> int:
+    """
+    指定日（または期間）のデータにおける推論処理
+
+    end_date を指定した場合は prediction_date から end_date までの期間をまとめて推論する
+    （モデル変更後の再スコアリング用）。モデルバージョンの解決は一度のみで、期間の
+    データはストリーミングモードと同じくバッチごとに推論し、スコアテーブルの対象期間を
+    1つのトランザクションで置き換える。期間内にデータがない場合は 0 行の成功として扱う。
 
     Args:
         session (Session): Snowflakeセッション
-        prediction_date (str): 推論日付（YYYY-MM-DD）
+        prediction_date (str): 推論日付、または期間の開始日（YYYY-MM-DD）
+        end_date (str | None): 期間の終了日（YYYY-MM-DD、この日を含む）
 
     Returns:
         int: 成功時は1、失敗時は例外を発生
@@ -32,45 +231,133 @@ def sproc_prediction(session: Session, prediction_date: str = "2024-10-01") -> i
     """
     try:
         setup_logging()
+        configure_tracing(session)
 
-        logger.info(f"Starting prediction process, prediction_date={prediction_date}")
+        logger.info(
+            f"Starting prediction process, prediction_date={prediction_date}, "
+            f"end_date={end_date}"
+        )
+        if end_date is not None and end_date < prediction_date:
+            raise ValueError("end_date must not be earlier than prediction_date")
 
-        df = fetch_prediction_dataset(session, prediction_date=prediction_date)
-        if df is None:
-            raise ValueError("Failed to fetch dataset")
-        features = df.drop(columns=["UID"])
-        logger.info(f"Dataset fetched successfully. Number of rows: {len(df)}")
+        incremental = config.prediction.incremental
+        # 期間指定の場合は行数が大きくなるため、常にストリーミングで処理する
+        streaming = config.prediction.streaming or end_date is not None
+
+        # 差分推論・ストリーミングでは取得時にバージョンを用いるため、モデルの解決後に取得する
+        if not (incremental or streaming):
+            with span("fetch_dataset") as stage:
+                df = fetch_prediction_dataset(session, prediction_date=prediction_date)
+                if df is None:
+                    raise ValueError("Failed to fetch dataset")
+                stage.rows = len(df)
+
+        with span("load_model"):
+            mv = load_default_model_version(session)
+            logger.info("Model loading completed")
 
-        mv = load_default_model_version(session)
-        logger.info("Model loading completed")
+            shadow_versions = config.prediction.shadow_versions
+            if shadow_versions:
+                logger.info(f"Shadow scoring enabled: {', '.join(shadow_versions)}")
+            shadow_mvs = [load_model_version(session, v) for v in shadow_versions]
 
-        df["SCORE"] = predict_proba(features, mv)
+            database_name = session.get_current_database() or DATABASE_DEV
+            # スコアテーブルにはモデル名・バージョン名ではなく MODEL_ID を保存する
+            model_id = get_model_id(
+                session,
+                database_name,
+                SCHEMA,
+                str(mv._model_name),
+                str(mv._version_name),
+            )
+
+        if streaming:
+            with span("predict_streaming") as stage:
+                n_rows = _predict_streaming(
+                    session,
+                    prediction_date=prediction_date,
+                    end_date=end_date,
+                    mv=mv,
+                    model_id=model_id,
+                    shadow_mvs=shadow_mvs,
+                    incremental=incremental,
+                    database_name=database_name,
+                )
+                stage.rows = n_rows
+            # 期間指定（バックフィルのパーティション）では対象データがない期間もあり得る
+            if n_rows == 0 and not incremental and end_date is None:
+                raise ValueError("No data found for the specified date.")
+            logger.info(f"Streaming prediction completed: {n_rows} rows")
+            return 1
+
+        if incremental:
+            # 差分推論: 現在のバージョンで未スコアの行のみを取得する
+            with span("fetch_unscored_dataset") as stage:
+                df = fetch_unscored_prediction_dataset(
+                    session, prediction_date=prediction_date, model_id=model_id
+                )
+                stage.rows = len(df)
+            if len(df) == 0:
+                logger.info("No unscored rows found. Skipping prediction")
+                return 1
+
+        logger.info(f"Dataset fetched successfully. Number of rows: {len(df)}")
+
+        with span("score", rows=len(df), shadow_versions=len(shadow_mvs)):
+            scores, shadow_scores = _score(df, mv, shadow_mvs)
         logger.info("Prediction completed")
 
         # 推論結果をスコアテーブルに書き込み
-        scores_df = df[["UID", "SCORE"]]
-        scores_df["SESSION_DATE"] = prediction_date
-        scores_df["MODEL_NAME"] = str(mv._model_name)
-        scores_df["MODEL_VERSION"] = str(mv._version_name)
-        scores_df = scores_df[
-            ["UID", "SESSION_DATE", "MODEL_NAME", "MODEL_VERSION", "SCORE"]
-        ]
-
-        upload_dataframe_to_snowflake(
-            session=session,
-            df=scores_df,
-            database_name=session.get_current_database() or DATABASE_DEV,
-            schema_name=SCHEMA,
-            table_name="SCORES",
-            mode="append",
-        )
+        scores_df = _build_scores_frame(df["UID"], prediction_date, scores, model_id)
+        with span("write_scores", rows=len(scores_df)):
+            if incremental:
+                # 旧バージョンのスコアは今回の行で置き換わるため、追記と同じトランザクションで削除する
+                staging_table_name = create_staging_table(
+                    session, database_name, SCHEMA, SCORES_BASE
+                )
+                append_to_table(session, scores_df, staging_table_name)
+                publish_staging_table(
+                    session,
+                    staging_table_name,
+                    qualified_name(database_name, SCHEMA, SCORES_BASE),
+                    delete_condition=and_conditions(
+                        session_date_condition(prediction_date),
+                        Query("MODEL_ID <> ?", (model_id,)),
+                    ),
+                )
+            else:
+                # 対象日のスコアをステージング経由で1つのトランザクションで置き換える
+                upload_dataframe_to_snowflake(
+                    session=session,
+                    df=scores_df,
+                    database_name=database_name,
+                    schema_name=SCHEMA,
+                    table_name=SCORES_BASE,
+                    mode="swap",
+                )
         logger.info("Prediction results upload completed")
+
+        if shadow_mvs:
+            with span("write_shadow_scores", rows=len(df) * len(shadow_mvs)):
+                write_shadow_scores(
+                    session=session,
+                    uids=df["UID"],
+                    session_date=prediction_date,
+                    model_ids=_get_model_ids(session, database_name, shadow_mvs),
+                    scores=shadow_scores,
+                    database_name=database_name,
+                    schema_name=SCHEMA,
+                    replace=not incremental,
+                )
         return 1
 
     except Exception as e:
         logger.error(f"An error occurred: {str(e)}")
         raise e
 
+    finally:
+        report_slowest_queries()
+
 
 if __name__ == "__main__":
     try:
@@ -93,11 +380,33 @@ if __name__ == "__main__":
                 (os.path.join(IMPORTS_DIR, "data"), "src.data"),
                 (os.path.join(IMPORTS_DIR, "models"), "src.models"),
                 (os.path.join(IMPORTS_DIR, "utils/config.py"), "src.utils.config"),
+                (
+                    os.path.join(IMPORTS_DIR, "utils/constants.py"),
+                    "src.utils.constants",
+                ),
                 (os.path.join(IMPORTS_DIR, "utils/logger.py"), "src.utils.logger"),
+                (
+                    os.path.join(IMPORTS_DIR, "utils/pipelined.py"),
+                    "src.utils.pipelined",
+                ),
+                (os.path.join(IMPORTS_DIR, "utils/query.py"), "src.utils.query"),
                 (
                     os.path.join(IMPORTS_DIR, "utils/snowflake.py"),
                     "src.utils.snowflake",
                 ),
+                (
+                    os.path.join(IMPORTS_DIR, "utils/query_profile.py"),
+                    "src.utils.query_profile",
+                ),
+                (
+                    os.path.join(IMPORTS_DIR, "utils/memory_profile.py"),
+                    "src.utils.memory_profile",
+                ),
+                (
+                    os.path.join(IMPORTS_DIR, "utils/cpu_profile.py"),
+                    "src.utils.cpu_profile",
+                ),
+                (os.path.join(IMPORTS_DIR, "utils/tracing.py"), "src.utils.tracing"),
                 os.path.join(IMPORTS_DIR, "config.yml"),
             ],
             "replace": True,
@@ -105,7 +414,7 @@ if __name__ == "__main__":
         }
         session.sproc.register(func=sproc_prediction, **sproc_config)  # type: ignore
         session.sql(
-            "ALTER PROCEDURE PREDICTION(VARCHAR) SET LOG_LEVEL = 'INFO'"
+            "ALTER PROCEDURE PREDICTION(VARCHAR, VARCHAR) SET LOG_LEVEL = 'INFO'"
         ).collect()
 
     except Exception as e:
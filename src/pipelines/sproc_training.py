@@ -3,22 +3,27 @@ import os
 import sys
 from datetime import datetime
 
-from snowflake.ml.registry import Registry
 from snowflake.snowpark import Session
 
 from src.data.loader import fetch_training_dataset
 from src.data.preprocessing import split_data
+from src.models.registry import MODEL_NAME, get_registry, invalidate_versions
 from src.models.trainer import calc_evaluation_metrics, train_model
 from src.utils.config import load_config
 from src.utils.constants import IMPORTS_DIR, SCHEMA
+from src.utils.cpu_profile import profiled
 from src.utils.logger import setup_logging
+from src.utils.query_profile import report_slowest_queries
 from src.utils.snowflake import create_session
+from src.utils.tracing import configure_tracing, span, timed
 
 logger = logging.getLogger(__name__)
 
 config = load_config()
 
 
+@profiled()
+@timed("training")
 def sproc_training(session: Session) -> int:
     """
     モデルの学習
@@ -34,52 +39,62 @@ def sproc_training(session: Session) -> int:
     """
     try:
         setup_logging()
+        configure_tracing(session)
 
-        target_column = config["data"]["target"]
+        target_column = list(config.data.target)
 
-        df = fetch_training_dataset(session)
-        if df is None:
-            raise ValueError("Failed to fetch dataset")
+        with span("fetch_dataset") as stage:
+            df = fetch_training_dataset(session)
+            if df is None:
+                raise ValueError("Failed to fetch dataset")
+            stage.rows = len(df)
         logger.info(f"Dataset fetched successfully. Number of rows: {len(df)}")
 
-        df_train_val, df_test = split_data(df.drop(columns=["UID"]))
+        with span("split", rows=len(df)):
+            df_train_val, df_test = split_data(df.drop(columns=["UID"]))
         logger.info(
             f"Dataset split completed. Training/validation data: {len(df_train_val)} rows, Test data: {len(df_test)} rows"
         )
 
-        model_pipeline, _ = train_model(
-            df=df_train_val,
-            n_splits=5,
-            random_state=0,
-            optimize_hyperparams=True,
-            n_trials=10,
-        )
+        with span("train", rows=len(df_train_val), n_trials=10):
+            model_pipeline, _ = train_model(
+                df=df_train_val,
+                n_splits=5,
+                random_state=0,
+                optimize_hyperparams=True,
+                n_trials=10,
+            )
         logger.info("Model training completed")
 
         # テストデータで推論・評価
-        test_scores = calc_evaluation_metrics(
-            y_true=df_test[target_column],
-            y_pred=model_pipeline.predict(df_test.drop(columns=target_column)),
-            y_pred_proba=model_pipeline.predict_proba(
-                df_test.drop(columns=target_column)
-            )[:, 1],
-        )
+        with span("evaluate", rows=len(df_test)):
+            test_scores = calc_evaluation_metrics(
+                y_true=df_test[target_column],
+                y_pred=model_pipeline.predict(df_test.drop(columns=target_column)),
+                y_pred_proba=model_pipeline.predict_proba(
+                    df_test.drop(columns=target_column)
+                )[:, 1],
+            )
         logger.info("Model evaluation completed")
 
         # バージョン名に時刻も追加して一意性を確保
         # 数字始まりはNGなので、v_を先頭につける ref) https://docs.snowflake.com/en/sql-reference/identifiers-syntax
         version_name = f"v_{datetime.now().strftime('%y%m%d_%H%M%S')}"
 
-        registry = Registry(session=session)
-        _ = registry.log_model(
-            model=model_pipeline,
-            model_name="random_forest",
-            version_name=version_name,
-            metrics=test_scores,
-            sample_input_data=df_train_val.drop(columns=target_column).head(
-                1
-            ),  # サンプル入力データを追加
-        )
+        with span("log_model", version_name=version_name):
+            registry = get_registry(session)
+            _ = registry.log_model(
+                model=model_pipeline,
+                model_name=MODEL_NAME,
+                version_name=version_name,
+                metrics=test_scores,
+                sample_input_data=df_train_val.drop(columns=target_column).head(
+                    1
+                ),  # サンプル入力データを追加
+            )
+
+        # 最新バージョンが変わるため解決済みバージョンのキャッシュを破棄
+        invalidate_versions(session)
 
         # ToDo: 本当は新モデルには challenger タグをつけて管理したい（2025/02/14現在, タグは Enterprise以上でしか利用できない）
         logger.info("Model logging completed")
@@ -90,6 +105,9 @@ def sproc_training(session: Session) -> int:
         logger.error(f"An error occurred: {str(e)}")
         raise e
 
+    finally:
+        report_slowest_queries()
+
 
 if __name__ == "__main__":
     try:
@@ -114,7 +132,29 @@ if __name__ == "__main__":
                 (os.path.join(IMPORTS_DIR, "data"), "src.data"),
                 (os.path.join(IMPORTS_DIR, "models"), "src.models"),
                 (os.path.join(IMPORTS_DIR, "utils/config.py"), "src.utils.config"),
+                (
+                    os.path.join(IMPORTS_DIR, "utils/constants.py"),
+                    "src.utils.constants",
+                ),
                 (os.path.join(IMPORTS_DIR, "utils/logger.py"), "src.utils.logger"),
+                (os.path.join(IMPORTS_DIR, "utils/query.py"), "src.utils.query"),
+                (
+                    os.path.join(IMPORTS_DIR, "utils/snowflake.py"),
+                    "src.utils.snowflake",
+                ),
+                (
+                    os.path.join(IMPORTS_DIR, "utils/query_profile.py"),
+                    "src.utils.query_profile",
+                ),
+                (
+                    os.path.join(IMPORTS_DIR, "utils/memory_profile.py"),
+                    "src.utils.memory_profile",
+                ),
+                (
+                    os.path.join(IMPORTS_DIR, "utils/cpu_profile.py"),
+                    "src.utils.cpu_profile",
+                ),
+                (os.path.join(IMPORTS_DIR, "utils/tracing.py"), "src.utils.tracing"),
                 os.path.join(IMPORTS_DIR, "config.yml"),
             ],
             "replace": True,
@@ -1,69 +1,190 @@
 import logging
 from datetime import datetime
+from typing import List
 
 from snowflake.snowpark import Session
 
 from src.data.dataset import create_ml_dataset
 from src.data.source import prepare_online_shoppers_data
-from src.utils.constants import DATABASE_DEV, DATASET, SCHEMA, SOURCE
+from src.utils.async_query import AsyncQueryExecutor, Step
+from src.utils.constants import (
+    DATABASE_DEV,
+    DATASET,
+    MODELS,
+    MODELS_ID_SEQUENCE,
+    SCHEMA,
+    SCORES,
+    SCORES_BASE,
+    SCORES_SHADOW,
+    SOURCE,
+)
 from src.utils.logger import setup_logging
+from src.utils.query import Query, qualified_name, run_query
 from src.utils.snowflake import create_session
 
 logger = logging.getLogger(__name__)
 
 
-def setup_environment(session: Session) -> None:
-    try:
-        setup_logging()
-
-        database_name = session.get_current_database() or DATABASE_DEV
-
-        # データベースが存在しない場合は作成
-        session.sql(f"CREATE DATABASE IF NOT EXISTS {database_name}").collect()
-        logger.info(f"Ensured database {database_name} exists")
-
-        # スキーマが存在しない場合は作成
-        session.sql(f"CREATE SCHEMA IF NOT EXISTS {database_name}.{SCHEMA}").collect()
-        logger.info(f"Ensured schema {SCHEMA} exists in database {database_name}")
-
-        # ソーステーブルを作成
-        prepare_online_shoppers_data(
-            session=session,
-            database_name=database_name,
-            schema_name=SCHEMA,
-            table_name=SOURCE,
+def _drop_legacy_scores_table(session: Session, database_name: str) -> None:
+    """旧来の SCORES テーブルが残っている場合は、同名のビューで置き換えるため削除する"""
+    schema = qualified_name(database_name, SCHEMA)
+    show_tables = Query(f"SHOW TABLES LIKE '{SCORES}' IN SCHEMA {schema}")
+    if run_query(session, show_tables).collect():
+        drop_table = Query(
+            f"DROP TABLE {qualified_name(database_name, SCHEMA, SCORES)}"
         )
-
-        # データセットテーブルを作成
-        today = datetime.now().strftime("%Y-%m-%d")
-        create_ml_dataset(
-            session=session,
-            target_date=today,
-            database_name=database_name,
-            schema_name=SCHEMA,
-            table_name=DATASET,
-            source_table_name=SOURCE,
-        )
-
-        # Scores テーブルを作成
-        session.sql("""
-            create or replace table SCORES (
+        run_query(session, drop_table).collect()
+
+
+def setup_steps(database_name: str) -> List[Step]:
+    """
+    環境構築の各処理と依存関係を定義する
+
+    データベース・スキーマの作成後、スコア関連のテーブル・ステージの作成は互いに
+    独立して実行できる。ソースのロードとデータセットの作成はそれらの完了後に行う。
+
+    Args:
+        database_name (str): データベース名
+
+    Returns:
+        List[Step]: 環境構築の処理
+    """
+    schema = qualified_name(database_name, SCHEMA)
+
+    def table(name: str) -> str:
+        return qualified_name(database_name, SCHEMA, name)
+
+    ddl_steps = [
+        Step(
+            "database",
+            Query(f"CREATE DATABASE IF NOT EXISTS {qualified_name(database_name)}"),
+        ),
+        Step(
+            "schema",
+            Query(f"CREATE SCHEMA IF NOT EXISTS {schema}"),
+            depends_on=("database",),
+        ),
+        # MODEL_ID を採番するシーケンスを作成
+        Step(
+            "models_sequence",
+            Query(f"create sequence if not exists {table(MODELS_ID_SEQUENCE)}"),
+            depends_on=("schema",),
+        ),
+        # モデルディメンションテーブルを作成（スコアテーブルからは MODEL_ID で参照）
+        Step(
+            "models",
+            Query(f"""
+            create table if not exists {table(MODELS)} (
+                MODEL_ID NUMBER NOT NULL DEFAULT {table(MODELS_ID_SEQUENCE)}.NEXTVAL,
+                MODEL_NAME VARCHAR NOT NULL,
+                MODEL_VERSION VARCHAR NOT NULL,
+                primary key (MODEL_ID),
+                unique (MODEL_NAME, MODEL_VERSION)
+            )
+            """),
+            depends_on=("models_sequence",),
+        ),
+        # スコアテーブルを作成
+        # モデルは MODEL_ID で参照し、日付での絞り込みがプルーニングされるよう
+        # SESSION_DATE でクラスタリングする
+        Step(
+            "scores_base",
+            Query(f"""
+            create or replace table {table(SCORES_BASE)} (
                 UID VARCHAR(16777216) NOT NULL,
                 SESSION_DATE DATE NOT NULL,
-                MODEL_NAME VARCHAR(16777216),
-                MODEL_VERSION VARCHAR(16777216),
+                MODEL_ID NUMBER NOT NULL,
                 SCORE FLOAT,
                 primary key (UID, SESSION_DATE)
-            )        
-        """).collect()
-        logger.info("Created SCORES table")
-
+            )
+            cluster by (SESSION_DATE)
+            """),
+            depends_on=("schema",),
+        ),
+        Step(
+            "legacy_scores",
+            lambda session: _drop_legacy_scores_table(session, database_name),
+            depends_on=("schema",),
+        ),
+        # 既存の参照元向けに、モデル名・バージョン名を展開した互換ビューを作成
+        Step(
+            "scores_view",
+            Query(f"""
+            create or replace view {table(SCORES)} as
+            select
+                s.UID,
+                s.SESSION_DATE,
+                m.MODEL_NAME,
+                m.MODEL_VERSION,
+                s.SCORE
+            from {table(SCORES_BASE)} s
+            join {table(MODELS)} m on m.MODEL_ID = s.MODEL_ID
+            """),
+            depends_on=("models", "scores_base", "legacy_scores"),
+        ),
+        # シャドウスコアテーブルを作成
+        Step(
+            "shadow_scores",
+            Query(f"""
+            create or replace table {table(SCORES_SHADOW)} (
+                UID VARCHAR(16777216) NOT NULL,
+                SESSION_DATE DATE NOT NULL,
+                MODEL_ID NUMBER NOT NULL,
+                SCORE FLOAT,
+                primary key (UID, SESSION_DATE, MODEL_ID)
+            )
+            """),
+            depends_on=("schema",),
+        ),
         # sproc ステージを作成
-        session.sql("""
-            CREATE STAGE IF NOT EXISTS sproc
+        Step(
+            "stage",
+            Query(f"""
+            CREATE STAGE IF NOT EXISTS {table("sproc")}
             DIRECTORY = (ENABLE = TRUE)
-        """).collect()
-        logger.info("Created sproc stage")
+            """),
+            depends_on=("schema",),
+        ),
+    ]
+    # ソースのロードは use_database / use_schema でセッションのデータベース・スキーマを
+    # 切り替えるため、同じセッションで送信した DDL が実行中にならないよう全ての完了後に開始する
+    return ddl_steps + [
+        # ソーステーブルを作成
+        Step(
+            "source",
+            lambda session: prepare_online_shoppers_data(
+                session=session,
+                database_name=database_name,
+                schema_name=SCHEMA,
+                table_name=SOURCE,
+            ),
+            depends_on=tuple(step.name for step in ddl_steps),
+        ),
+        # データセットテーブルを作成
+        Step(
+            "dataset",
+            lambda session: create_ml_dataset(
+                session=session,
+                target_date=datetime.now().strftime("%Y-%m-%d"),
+                database_name=database_name,
+                schema_name=SCHEMA,
+                table_name=DATASET,
+                source_table_name=SOURCE,
+            ),
+            depends_on=("source",),
+        ),
+    ]
+
+
+def setup_environment(session: Session) -> None:
+    try:
+        setup_logging()
+
+        database_name = session.get_current_database() or DATABASE_DEV
+
+        # 依存関係のない処理は非同期に送信して並行に実行する
+        AsyncQueryExecutor(session).run(setup_steps(database_name))
+        logger.info(f"Environment setup completed in database {database_name}")
 
     except Exception as e:
         logger.error(f"An error occurred: {str(e)}")
@@ -0,0 +1,155 @@
+import logging
+import sys
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from snowflake.snowpark import Session
+
+from src.utils.logger import setup_logging
+from src.utils.snowflake import create_session
+
+logger = logging.getLogger(__name__)
+
+WAREHOUSE = "COMPUTE_WH"
+
+# 実行時に解決する処理対象日（YYYY-MM-DD、JST での前日）
+# タスクグラフの実行の予定時刻を基準とするため、グラフ内の全てのタスクで同じ日付になり、
+# 遅延・再実行した場合も予定時刻の前日を処理する
+TARGET_DATE = (
+    "TO_VARCHAR(DATEADD(DAY, -1, CONVERT_TIMEZONE('Asia/Tokyo', "
+    "TO_TIMESTAMP_LTZ(SYSTEM$TASK_RUNTIME_INFO("
+    "'CURRENT_TASK_GRAPH_ORIGINAL_SCHEDULED_TIMESTAMP')))::DATE), 'YYYY-MM-DD')"
+)
+
+
+@dataclass(frozen=True)
+class TaskDefinition:
+    """
+    ストアドプロシージャを実行するタスクの定義
+
+    Attributes:
+        name (str): タスク名
+        procedure (str): 実行するストアドプロシージャ名
+        args (Tuple[str, ...]): 引数（実行時に評価する SQL の式）
+        schedule (str | None): ルートのタスクのスケジュール
+        after (Tuple[str, ...]): 先行するタスク名（全て完了した後に実行する）
+    """
+
+    name: str
+    procedure: str
+    args: Tuple[str, ...] = field(default_factory=tuple)
+    schedule: Optional[str] = None
+    after: Tuple[str, ...] = field(default_factory=tuple)
+
+
+# 日次のタスクグラフ（データセットの更新が完了した直後に推論する）
+# 先行するタスクより後に並べる
+DAILY_DAG: List[TaskDefinition] = [
+    TaskDefinition(
+        name="task_dataset",
+        procedure="dataset",
+        args=(TARGET_DATE,),
+        schedule="USING CRON 0 5 * * * Asia/Tokyo",
+    ),
+    TaskDefinition(
+        name="task_prediction",
+        procedure="prediction",
+        args=(TARGET_DATE,),
+        after=("task_dataset",),
+    ),
+]
+
+# 学習（毎月1日）とオフラインテスト（毎月15日、学習後2週間のデータで評価する）
+TRAINING_DAG: List[TaskDefinition] = [
+    TaskDefinition(
+        name="task_training",
+        procedure="training",
+        schedule="USING CRON 0 10 1 * * Asia/Tokyo",
+    ),
+]
+OFFLINE_TESTING_DAG: List[TaskDefinition] = [
+    TaskDefinition(
+        name="task_offline_testing",
+        procedure="offline_testing",
+        schedule="USING CRON 0 10 15 * * Asia/Tokyo",
+    ),
+]
+
+
+def create_task_sql(task: TaskDefinition) -> str:
+    """
+    タスクを作成する SQL を生成する
+
+    Raises:
+        ValueError: スケジュールと先行するタスクの一方のみが指定されていない場合
+    """
+    if (task.schedule is None) == (not task.after):
+        raise ValueError(
+            f"Task {task.name} must have either a schedule or predecessors"
+        )
+    trigger = (
+        f"SCHEDULE = '{task.schedule}'"
+        if task.schedule is not None
+        else f"AFTER {', '.join(task.after)}"
+    )
+    return f"""
+        CREATE OR REPLACE TASK {task.name}
+            WAREHOUSE = {WAREHOUSE}
+            {trigger}
+        AS
+            CALL {task.procedure}({", ".join(task.args)});
+        """
+
+
+def create_task_graph(session: Session, dag: List[TaskDefinition]) -> None:
+    """
+    タスクグラフを作成して有効化する
+
+    ルートのタスクを停止してから先行するタスクの順に作成し直し（先行するタスクを
+    作成し直すと後続のタスクとの依存関係が外れるため、全てのタスクを作成し直す）、
+    後続のタスクを含めて有効化する。
+
+    Args:
+        session (Session): Snowflakeセッション
+        dag (List[TaskDefinition]): タスクの定義（先行するタスクより後に並べる）
+
+    Raises:
+        Exception: タスクの作成に失敗した場合
+    """
+    try:
+        setup_logging()
+        roots = [task.name for task in dag if task.schedule is not None]
+        logger.info(f"Starting task graph creation, roots={roots}")
+
+        for root in roots:
+            session.sql(f"ALTER TASK IF EXISTS {root} SUSPEND").collect()
+
+        for task in dag:
+            session.sql(create_task_sql(task)).collect()
+            logger.info(f"Task {task.name} created successfully")
+
+        # ルートと後続の全てのタスクを有効化する
+        for root in roots:
+            session.sql(f"SELECT SYSTEM$TASK_DEPENDENTS_ENABLE('{root}')").collect()
+        logger.info("Task graph resumed successfully")
+
+    except Exception as e:
+        error_msg = f"Failed to create task graph: {str(e)}"
+        logger.error(error_msg)
+        raise
+
+
+if __name__ == "__main__":
+    try:
+        session = create_session()
+        if session is None:
+            raise RuntimeError("Failed to create Snowflake session")
+
+        create_task_graph(session, DAILY_DAG)
+
+    except Exception as e:
+        print(f"An error occurred: {str(e)}")
+        sys.exit(1)
+    finally:
+        if session:
+            session.close()
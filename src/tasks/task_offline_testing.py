@@ -1,47 +1,24 @@
-import logging
 import sys
 
 from snowflake.snowpark import Session
 
-from src.utils.logger import setup_logging
+from src.tasks.dag import OFFLINE_TESTING_DAG, create_task_graph
 from src.utils.snowflake import create_session
 
-logger = logging.getLogger(__name__)
-
 
 def create_offline_testing_task(session: Session) -> None:
     """
     オフラインテスト用のストアドプロシージャを実行するタスクを作成する
 
+    タスクの定義は src/tasks/dag.py にあり、ローカルでの実行（src/local/runner.py）と共通。
+
     Args:
         session (Session): Snowflakeセッション
 
     Raises:
         Exception: タスクの作成に失敗した場合
     """
-    try:
-        setup_logging()
-        logger.info("Starting offline testing task creation")
-
-        # タスクの作成
-        create_task_sql = """
-        CREATE OR REPLACE TASK task_offline_testing
-            WAREHOUSE = COMPUTE_WH
-            SCHEDULE = 'USING CRON 0 10 15 * * Asia/Tokyo'  -- 毎月15日の午前10時に実行
-        AS
-            CALL offline_testing();
-        """
-        session.sql(create_task_sql).collect()
-        logger.info("Task created successfully")
-
-        # タスクの有効化
-        session.sql("ALTER TASK task_offline_testing RESUME").collect()
-        logger.info("Task resumed successfully")
-
-    except Exception as e:
-        error_msg = f"Failed to create offline testing task: {str(e)}"
-        logger.error(error_msg)
-        raise
+    create_task_graph(session, OFFLINE_TESTING_DAG)
 
 
 if __name__ == "__main__":
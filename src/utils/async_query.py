@@ -0,0 +1,214 @@
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Sequence, Tuple, Union
+
+from snowflake.snowpark import AsyncJob, Session
+
+from src.utils.query import Query, run_query
+
+logger = logging.getLogger(__name__)
+
+Action = Union[Query, Callable[[Session], Any]]
+
+
+@dataclass(frozen=True)
+class Step:
+    """
+    依存関係付きの処理の単位
+
+    Attributes:
+        name (str): ステップ名（depends_on で参照する）
+        action (Query | Callable[[Session], Any]): 実行する SQL 文、
+            またはセッションを受け取る関数（データのロードなど SQL 文1つで表せない処理）
+        depends_on (Tuple[str, ...]): 完了を待つステップ名
+    """
+
+    name: str
+    action: Action
+    depends_on: Tuple[str, ...] = ()
+
+
+@dataclass
+class StepTiming:
+    """
+    ステップの実行時間（run の開始からの経過秒）
+
+    Attributes:
+        name (str): ステップ名
+        start (float): 開始時刻
+        end (float): 終了時刻
+    """
+
+    name: str
+    start: float
+    end: float
+
+    @property
+    def seconds(self) -> float:
+        return self.end - self.start
+
+
+def validate_steps(steps: Sequence[Any]) -> None:
+    """
+    ステップ名の重複・未定義の依存先・循環依存を検出する
+
+    Args:
+        steps (Sequence[Any]): name と depends_on を持つステップ
+
+    Raises:
+        ValueError: ステップ名の重複・未定義の依存先・循環依存がある場合
+    """
+    names = [step.name for step in steps]
+    if len(set(names)) != len(names):
+        raise ValueError("Step names must be unique")
+    for step in steps:
+        unknown = set(step.depends_on) - set(names)
+        if unknown:
+            raise ValueError(
+                f"Step '{step.name}' depends on unknown steps: {sorted(unknown)}"
+            )
+
+    remaining = {step.name: set(step.depends_on) for step in steps}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Circular dependency among steps: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def critical_path_seconds(
+    steps: Sequence[Any], timings: Mapping[str, StepTiming]
+) -> float:
+    """
+    依存先の完了を待つ経路のうち、ステップの実行時間の合計が最大のものを求める
+
+    Args:
+        steps (Sequence[Any]): name と depends_on を持つステップ
+        timings (Mapping[str, StepTiming]): ステップ名ごとの実行時間（全てのステップ分）
+
+    Returns:
+        float: クリティカルパスの実行時間の合計（秒）
+    """
+    # 依存先は必ず先に終了するため、終了順に計算する
+    path_seconds: Dict[str, float] = {}
+    for step in sorted(steps, key=lambda s: timings[s.name].end):
+        path_seconds[step.name] = timings[step.name].seconds + max(
+            (path_seconds[dep] for dep in step.depends_on), default=0.0
+        )
+    return max(path_seconds.values(), default=0.0)
+
+
+class AsyncQueryExecutor:
+    """
+    依存関係のないステップを並行に実行する
+
+    SQL 文は collect_nowait で非同期に送信し、完了を待たずに次のステップを送信する。
+    関数のステップはスレッドで実行する。各ステップは depends_on の全てが完了してから
+    開始するため、全体の処理時間は依存関係の最長経路（クリティカルパス）に近づく。
+    いずれかのステップが失敗した場合は新たなステップを開始せず、実行中の SQL 文を
+    キャンセルしてから例外を送出する。
+    """
+
+    def __init__(
+        self, session: Session, max_concurrency: int = 8, poll_interval: float = 0.05
+    ) -> None:
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")
+        self.session = session
+        self.max_concurrency = max_concurrency
+        self.poll_interval = poll_interval
+
+    def run(self, steps: Sequence[Step]) -> Dict[str, StepTiming]:
+        """
+        ステップを依存関係に従って実行する
+
+        Args:
+            steps (Sequence[Step]): 実行するステップ（依存関係を満たすものは記載順に開始する）
+
+        Returns:
+            Dict[str, StepTiming]: ステップ名ごとの実行時間
+
+        Raises:
+            ValueError: ステップ名の重複・未定義の依存先・循環依存がある場合
+            RuntimeError: いずれかのステップが失敗した場合
+        """
+        validate_steps(steps)
+        origin = time.perf_counter()
+        pending: List[Step] = list(steps)
+        running: Dict[str, Tuple[Union[AsyncJob, Future], float]] = {}
+        timings: Dict[str, StepTiming] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            while pending or running:
+                for step in list(pending):
+                    if len(running) >= self.max_concurrency:
+                        break
+                    if all(dep in timings for dep in step.depends_on):
+                        pending.remove(step)
+                        running[step.name] = (
+                            self._start(step, pool),
+                            time.perf_counter() - origin,
+                        )
+                        logger.debug("Started step: %s", step.name)
+
+                finished = False
+                for name, (handle, start) in list(running.items()):
+                    if not self._is_done(handle):
+                        continue
+                    finished = True
+                    del running[name]
+                    try:
+                        handle.result()
+                    except Exception as e:
+                        self._cancel(running)
+                        logger.error(f"Step '{name}' failed: {str(e)}")
+                        raise RuntimeError(f"Step '{name}' failed: {str(e)}") from e
+                    timings[name] = StepTiming(
+                        name, start, time.perf_counter() - origin
+                    )
+                    logger.info(
+                        f"Completed step: {name} ({timings[name].seconds:.2f}s)"
+                    )
+
+                if not finished:
+                    time.sleep(self.poll_interval)
+
+        self._log_summary(steps, timings, time.perf_counter() - origin)
+        return timings
+
+    def _start(self, step: Step, pool: ThreadPoolExecutor) -> Union[AsyncJob, Future]:
+        if isinstance(step.action, Query):
+            return run_query(self.session, step.action).collect_nowait()
+        return pool.submit(step.action, self.session)
+
+    @staticmethod
+    def _is_done(handle: Union[AsyncJob, Future]) -> bool:
+        return handle.done() if isinstance(handle, Future) else handle.is_done()
+
+    @staticmethod
+    def _cancel(running: Dict[str, Tuple[Union[AsyncJob, Future], float]]) -> None:
+        """実行中の SQL 文をキャンセルし、実行中の関数は完了を待つ"""
+        for name, (handle, _) in running.items():
+            if isinstance(handle, Future):
+                continue
+            try:
+                handle.cancel()
+                logger.info(f"Cancelled step: {name}")
+            except Exception as e:
+                logger.warning(f"Failed to cancel step '{name}': {str(e)}")
+
+    @staticmethod
+    def _log_summary(
+        steps: Sequence[Step], timings: Dict[str, StepTiming], total: float
+    ) -> None:
+        serial = sum(t.seconds for t in timings.values())
+        critical = critical_path_seconds(steps, timings)
+        logger.info(
+            f"Executed {len(steps)} steps in {total:.2f}s "
+            f"(sequential {serial:.2f}s, critical path {critical:.2f}s)"
+        )
@@ -1,43 +1,370 @@
 import logging
 import os
 import sys
+import threading
+import types
+from dataclasses import dataclass, fields, is_dataclass, replace
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
 
 import yaml
 
 logger = logging.getLogger(__name__)
 
 
-def load_config(config_path: Optional[str] = None) -> Dict[str, Any]:
+def _require(condition: bool, message: str) -> None:
+    if not condition:
+        raise ValueError(f"Invalid config: {message}")
+
+
+@dataclass(frozen=True, slots=True)
+class SnowflakeConfig:
+    database_dev: str
+    database_prod: str
+    schema: str
+    dataset_table: str
+    source_table: str
+    scores_table: str
+    scores_base_table: str
+    shadow_scores_table: str
+    model_table: str
+
+
+@dataclass(frozen=True, slots=True)
+class FeaturesConfig:
+    numeric: Tuple[str, ...]
+    categorical: Tuple[str, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class PeriodConfig:
+    months: int
+
+    def __post_init__(self) -> None:
+        _require(self.months > 0, "data.period.months must be positive")
+
+
+@dataclass(frozen=True, slots=True)
+class SplitConfig:
+    test_size: float
+    random_state: int
+
+    def __post_init__(self) -> None:
+        _require(0 < self.test_size < 1, "data.split.test_size must be in (0, 1)")
+
+
+@dataclass(frozen=True, slots=True)
+class DataConfig:
+    snowflake: SnowflakeConfig
+    target: Tuple[str, ...]
+    features: FeaturesConfig
+    period: PeriodConfig
+    split: SplitConfig
+
+    def __post_init__(self) -> None:
+        _require(len(self.target) == 1, "data.target must have exactly one column")
+
+
+@dataclass(frozen=True, slots=True)
+class RegistryConfig:
+    cache_ttl_seconds: float
+
+
+@dataclass(frozen=True, slots=True)
+class InferenceConfig:
+    mode: str
+    engine: str
+    batch_size: int
+    cache_dir: Optional[str]
+    cache_max_bytes: int
+    loaded_max_models: int
+
+    def __post_init__(self) -> None:
+        _require(
+            self.mode in ("registry", "local"),
+            f"model.inference.mode must be 'registry' or 'local': {self.mode!r}",
+        )
+        _require(
+            self.engine in ("sklearn", "compiled"),
+            f"model.inference.engine must be 'sklearn' or 'compiled': {self.engine!r}",
+        )
+        _require(self.batch_size > 0, "model.inference.batch_size must be positive")
+        _require(
+            self.loaded_max_models > 0,
+            "model.inference.loaded_max_models must be positive",
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class CVConfig:
+    n_splits: int
+
+    def __post_init__(self) -> None:
+        _require(self.n_splits >= 2, "model.cv.n_splits must be at least 2")
+
+
+@dataclass(frozen=True, slots=True)
+class RandomForestConfig:
+    random_state: int
+    n_estimators_min: int
+    n_estimators_max: int
+    max_depth_min: int
+    max_depth_max: int
+    min_samples_split_min: int
+    min_samples_split_max: int
+    min_samples_leaf_min: int
+    min_samples_leaf_max: int
+    max_features: Tuple[str, ...]
+    criterion: Tuple[str, ...]
+
+    def __post_init__(self) -> None:
+        for name in ("n_estimators", "max_depth", "min_samples_split"):
+            _require(
+                getattr(self, f"{name}_min") <= getattr(self, f"{name}_max"),
+                f"model.random_forest.{name}_min must not exceed {name}_max",
+            )
+        _require(
+            self.min_samples_leaf_min <= self.min_samples_leaf_max,
+            "model.random_forest.min_samples_leaf_min must not exceed "
+            "min_samples_leaf_max",
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ModelConfig:
+    name: str
+    registry: RegistryConfig
+    inference: InferenceConfig
+    cv: CVConfig
+    random_forest: RandomForestConfig
+
+
+@dataclass(frozen=True, slots=True)
+class BackfillConfig:
+    workers: int
+    partition_days: int
+
+    def __post_init__(self) -> None:
+        _require(self.workers > 0, "prediction.backfill.workers must be positive")
+        _require(
+            self.partition_days > 0,
+            "prediction.backfill.partition_days must be positive",
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class PredictionConfig:
+    incremental: bool
+    streaming: bool
+    batch_size: int
+    pipeline_depth: int
+    shadow_versions: Tuple[str, ...]
+    backfill: BackfillConfig
+
+    def __post_init__(self) -> None:
+        _require(self.batch_size > 0, "prediction.batch_size must be positive")
+        _require(
+            self.pipeline_depth >= 0, "prediction.pipeline_depth must not be negative"
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class SessionPoolConfig:
+    max_size: int
+    idle_timeout_seconds: float
+    health_check_interval_seconds: float
+
+    def __post_init__(self) -> None:
+        _require(self.max_size > 0, "session_pool.max_size must be positive")
+
+
+@dataclass(frozen=True, slots=True)
+class TracingConfig:
+    file: Optional[str]
+    table: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
     """
-    設定ファイルを読み込む
+    config.yml の内容（読み込み時にスキーマを検証した読み取り専用のオブジェクト）
+
+    リストは tuple として保持する。pandas / scikit-learn に列名の一覧として渡す場合は
+    list に変換する（tuple は単一の列キーとして解釈される）。
+    """
+
+    data: DataConfig
+    model: ModelConfig
+    prediction: PredictionConfig
+    session_pool: SessionPoolConfig
+    tracing: TracingConfig
+
+
+def _convert(tp: Any, value: Any, path: str) -> Any:
+    """値を型ヒントの型に検証・変換する"""
+    if is_dataclass(tp):
+        return _build(tp, value, path)
+
+    origin = get_origin(tp)
+    if origin in (Union, types.UnionType):
+        args = get_args(tp)
+        if value is None and type(None) in args:
+            return None
+        (tp,) = [arg for arg in args if arg is not type(None)]
+        return _convert(tp, value, path)
+    if origin is tuple:
+        _require(isinstance(value, list), f"{path} must be a list")
+        item_type = get_args(tp)[0]
+        return tuple(
+            _convert(item_type, item, f"{path}[{i}]") for i, item in enumerate(value)
+        )
+
+    # bool は int のサブクラスのため、数値としては受け付けない
+    if tp is float:
+        _require(
+            isinstance(value, (int, float)) and not isinstance(value, bool),
+            f"{path} must be a number",
+        )
+        return float(value)
+    if tp is int:
+        _require(
+            isinstance(value, int) and not isinstance(value, bool),
+            f"{path} must be an integer",
+        )
+        return value
+    _require(isinstance(value, tp), f"{path} must be of type {tp.__name__}")
+    return value
+
+
+def _build(cls: Any, data: Any, path: str) -> Any:
+    """辞書からデータクラスを作成する（キーの過不足・型の誤りはエラー）"""
+    _require(isinstance(data, dict), f"{path or 'config'} must be a mapping")
+    prefix = f"{path}." if path else ""
+    names = [f.name for f in fields(cls)]
+    missing = [name for name in names if name not in data]
+    _require(not missing, f"missing keys: {', '.join(prefix + m for m in missing)}")
+    unknown = [key for key in data if key not in names]
+    _require(
+        not unknown, f"unknown keys: {', '.join(prefix + str(u) for u in unknown)}"
+    )
+    hints = get_type_hints(cls)
+    return cls(
+        **{name: _convert(hints[name], data[name], prefix + name) for name in names}
+    )
+
+
+def parse_config(data: Dict[str, Any]) -> Config:
+    """
+    辞書をスキーマに従って検証し、Config を作成する
 
     Args:
-        config_path: 設定ファイルのパス。Noneの場合はデフォルトのパスを使用
+        data (Dict[str, Any]): config.yml を読み込んだ辞書
+
     Returns:
-        Dict[str, Any]: 設定内容を含む辞書
-    """
-    if config_path is None:
-        root_dir = Path(__file__).parent.parent.parent
-
-        # CI環境またはローカル環境の場合
-        if "snowflake_import_directory" not in sys._xoptions:
-            config_path = f"{root_dir}/src/config.yml"
-        # ストアドプロシージャ内で実行されている場合
-        else:  # pragma: no cover
-            config_path = os.path.join(
-                sys._xoptions["snowflake_import_directory"], "config.yml"
-            )
+        Config: 検証済みの設定
+
+    Raises:
+        ValueError: キーの過不足・型の誤り・値の範囲外がある場合
+    """
+    return _build(Config, data, "")
+
+
+def replace_config(config: Config, section: str, **changes: Any) -> Config:
+    """
+    セクションの一部の値を置き換えた Config を作成する（元の Config は変更しない）
+
+    Args:
+        config (Config): 元の設定
+        section (str): 対象のセクション（例: "prediction", "prediction.backfill"）
+        **changes: 置き換える値
+
+    Returns:
+        Config: 値を置き換えた設定（置き換え後の値も検証される）
+    """
+    return _replace_section(config, section.split("."), changes)
+
+
+def _replace_section(obj: Any, path: List[str], changes: Dict[str, Any]) -> Any:
+    if not path:
+        return replace(obj, **changes)
+    head, *rest = path
+    return replace(obj, **{head: _replace_section(getattr(obj, head), rest, changes)})
+
+
+def _default_config_path() -> str:
+    root_dir = Path(__file__).parent.parent.parent
+
+    # CI環境またはローカル環境の場合
+    if "snowflake_import_directory" not in sys._xoptions:
+        return f"{root_dir}/src/config.yml"
+    # ストアドプロシージャ内で実行されている場合
+    else:  # pragma: no cover
+        return os.path.join(sys._xoptions["snowflake_import_directory"], "config.yml")
 
-    logger.info(f"Loading config file: {config_path}")
 
+# 設定ファイルのパスごとの (更新時刻, 設定)
+_loaded: Dict[str, Tuple[float, Config]] = {}
+_lock = threading.Lock()
+
+
+def _read(config_path: str) -> Tuple[float, Config]:
+    logger.info(f"Loading config file: {config_path}")
     try:
+        mtime = os.stat(config_path).st_mtime
         with open(config_path, "r") as f:
-            config = yaml.safe_load(f)
-        logger.info("Config file loaded successfully")
-        return config
-
-    except Exception as e:  # pragma: no cover
+            config = parse_config(yaml.safe_load(f))
+    except Exception as e:
         logger.error(f"Failed to load config file: {str(e)}")
         raise
+    return mtime, config
+
+
+def load_config(config_path: Optional[str] = None) -> Config:
+    """
+    設定ファイルを読み込む
+
+    プロセス内で1回だけ読み込み・検証し、以降は同じオブジェクトを返す。
+
+    Args:
+        config_path: 設定ファイルのパス。Noneの場合はデフォルトのパスを使用
+    Returns:
+        Config: 検証済みの設定
+
+    Raises:
+        ValueError: 設定ファイルがスキーマに合わない場合
+    """
+    config_path = config_path or _default_config_path()
+    with _lock:
+        if config_path not in _loaded:
+            _loaded[config_path] = _read(config_path)
+        return _loaded[config_path][1]
+
+
+def reload_config(config_path: Optional[str] = None) -> Config:
+    """
+    設定ファイルの更新時刻が変わっている場合のみ読み込み直す
+
+    モジュールが読み込み時に取得した設定は置き換わらないため、長時間動作する
+    プロセスで設定を反映する場合は戻り値を使用する。
+
+    Args:
+        config_path: 設定ファイルのパス。Noneの場合はデフォルトのパスを使用
+    Returns:
+        Config: 最新の設定（変更がない場合はキャッシュ済みのオブジェクト）
+    """
+    config_path = config_path or _default_config_path()
+    with _lock:
+        cached = _loaded.get(config_path)
+        if cached is None or os.stat(config_path).st_mtime != cached[0]:
+            _loaded[config_path] = _read(config_path)
+        return _loaded[config_path][1]
@@ -5,14 +5,19 @@ from src.utils.config import load_config
 config = load_config()
 
 # Snowflake関連の定数
-DATABASE_DEV = config["data"]["snowflake"]["database_dev"]
-SCHEMA = config["data"]["snowflake"]["schema"]
-DATASET = config["data"]["snowflake"]["dataset_table"]
-SOURCE = config["data"]["snowflake"]["source_table"]
+DATABASE_DEV = config.data.snowflake.database_dev
+SCHEMA = config.data.snowflake.schema
+DATASET = config.data.snowflake.dataset_table
+SOURCE = config.data.snowflake.source_table
+SCORES = config.data.snowflake.scores_table
+SCORES_BASE = config.data.snowflake.scores_base_table
+SCORES_SHADOW = config.data.snowflake.shadow_scores_table
+MODELS = config.data.snowflake.model_table
+MODELS_ID_SEQUENCE = f"{MODELS}_ID_SEQ"
 
-CATEGORICAL_FEATURES = config["data"]["features"]["categorical"]
-NUMERICAL_FEATURES = config["data"]["features"]["numeric"]
-TARGET = config["data"]["target"]
+CATEGORICAL_FEATURES = list(config.data.features.categorical)
+NUMERICAL_FEATURES = list(config.data.features.numeric)
+TARGET = list(config.data.target)
 
 # ディレクトリパス関連の定数
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
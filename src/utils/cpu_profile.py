@@ -0,0 +1,299 @@
+"""
+処理の CPU プロファイル（cProfile）を取得する
+
+環境変数 ML_PROFILE_CPU、または Python から呼び出す場合の profile 引数で有効化し、
+@profiled を付けた関数（ストアドプロシージャ・train_model）を
+cProfile の下で実行して pstats 形式のファイルに書き出す。無効の場合は環境変数を
+参照するのみで、プロファイラは起動しない。
+
+cProfile は呼び出したスレッドのみを記録するため、プロファイル中に PipelinedExecutor
+が起動したスレッド（ストリーミング・期間指定の推論での取得・推論・書き込み）は
+profile_thread を通してスレッドごとにプロファイルを取得し、書き出す際に合算する。
+
+- ML_PROFILE_CPU: "1" / "true" / "all" で全ての対象、カンマ区切りの関数名
+  （例: "sproc_training,train_model"）で指定した対象のみ
+- ML_PROFILE_DIR: 書き出し先のディレクトリ（デフォルトは profiles）
+
+いずれもプロセスの環境変数・Python の引数で指定するため、ローカル（LocalSession・
+ベンチマーク・テスト）での実行のみが対象となる。Snowflake 上のストアドプロシージャ・
+タスクからは有効化できない。
+
+2つのプロファイルの差分は以下で表示する:
+    python -m src.utils.cpu_profile diff before.prof after.prof
+"""
+
+import argparse
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+CPU_PROFILE_ENV = "ML_PROFILE_CPU"
+PROFILE_DIR_ENV = "ML_PROFILE_DIR"
+DEFAULT_PROFILE_DIR = "profiles"
+# プロファイル取得後にログに出力する関数の件数
+_LOG_TOP = 15
+# 差分の比較ではこのディレクトリからの相対パスで関数を識別する
+_PROJECT_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+_STDLIB_DIR = os.path.dirname(os.__file__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# 実行中のプロファイル名。入れ子の対象は外側のプロファイルに含まれるため取得しない。
+# Python 3.12 以降の cProfile はプロセスで同時に1つしか有効化できないため、
+# スレッドをまたいで1つに制限する
+_active: Optional[str] = None
+_lock = threading.Lock()
+# Python 3.12 以降は別スレッドでプロファイラを同時に有効化できないため、
+# スレッドごとのプロファイルは取得しない（呼び出し元のスレッドのみとなる）
+_PER_THREAD = sys.version_info < (3, 12)
+
+
+@dataclass
+class _Collector:
+    """取得中のプロファイルと、合算する他のスレッドのプロファイル"""
+
+    name: str
+    thread_id: int
+    threads: List[cProfile.Profile] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+# 取得中のプロファイル（スレッドはコンテキストのコピーで引き継ぐ）
+_current: ContextVar[Optional[_Collector]] = ContextVar(
+    "cpu_profile_current", default=None
+)
+
+
+def _is_target(name: str, profile: Optional[bool]) -> bool:
+    """引数 profile、なければ環境変数 ML_PROFILE_CPU で対象かどうかを判定する"""
+    if profile is not None:
+        return profile
+    value = os.environ.get(CPU_PROFILE_ENV, "").strip().lower()
+    if value in ("", "0", "false"):
+        return False
+    if value in ("1", "true", "all"):
+        return True
+    return name.lower() in {v.strip() for v in value.split(",")}
+
+
+def _acquire(name: str) -> bool:
+    """他のプロファイルが実行中でなければ name を実行中とする"""
+    global _active
+    with _lock:
+        if _active is not None:
+            return False
+        _active = name
+        return True
+
+
+def _release() -> None:
+    global _active
+    with _lock:
+        _active = None
+
+
+def profiled(name: Optional[str] = None) -> Callable[[F], F]:
+    """
+    関数の呼び出しを cProfile の下で実行するデコレータ
+
+    有効化されている場合のみプロファイルを取得する。呼び出し時に profile=True / False
+    を指定すると環境変数より優先する（この引数は関数には渡さない）。
+
+    Args:
+        name (str | None): プロファイル名（ML_PROFILE_CPU での指定・ファイル名に使用）。
+            None の場合は関数名
+    """
+
+    def decorator(func: F) -> F:
+        profile_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, profile: Optional[bool] = None, **kwargs: Any) -> Any:
+            if not _is_target(profile_name, profile) or not _acquire(profile_name):
+                return func(*args, **kwargs)
+
+            collector = _Collector(profile_name, threading.get_ident())
+            token = _current.set(collector)
+            profiler = cProfile.Profile()
+            try:
+                return profiler.runcall(func, *args, **kwargs)
+            finally:
+                _current.reset(token)
+                _release()
+                with collector.lock:
+                    threads = list(collector.threads)
+                _save(profiler, profile_name, threads)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def profile_thread(func: F) -> F:
+    """
+    取得中のプロファイルがあれば、別スレッドでの func の実行もプロファイルに含める
+
+    プロファイル中の処理が起動するスレッドの関数に付け、コンテキストのコピーの中で
+    実行する（copy_context().run）。プロファイルがない場合・同じスレッドの場合は
+    そのまま実行する。合算されるのは、外側の対象が戻る前に終了したスレッドのみ。
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        collector = _current.get()
+        if (
+            collector is None
+            or not _PER_THREAD
+            or collector.thread_id == threading.get_ident()
+        ):
+            return func(*args, **kwargs)
+
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(func, *args, **kwargs)
+        finally:
+            with collector.lock:
+                collector.threads.append(profiler)
+
+    return wrapper  # type: ignore[return-value]
+
+
+def _save(
+    profiler: cProfile.Profile, name: str, threads: Sequence[cProfile.Profile] = ()
+) -> Optional[str]:
+    """
+    他のスレッドのプロファイルを合算して書き出し、上位の関数をログに出力する
+    （失敗しても処理は止めない）
+    """
+    try:
+        directory = os.environ.get(PROFILE_DIR_ENV) or DEFAULT_PROFILE_DIR
+        os.makedirs(directory, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        path = os.path.join(directory, f"{name}_{timestamp}_{os.getpid()}.prof")
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        for thread_profiler in threads:
+            stats.add(thread_profiler)
+        stats.dump_stats(path)
+
+        stats.sort_stats("cumulative").print_stats(_LOG_TOP)
+        logger.info(
+            f"CPU profile for {name} ({len(threads)} worker threads) written to "
+            f"{path}\n{stream.getvalue()}"
+        )
+        return path
+    except Exception as e:
+        logger.warning(f"Failed to write CPU profile for {name}: {str(e)}")
+        return None
+
+
+def _label(filename: str, funcname: str) -> str:
+    """
+    関数の識別子（環境・行番号の違いで変わらないよう、パスを短縮して行番号を含めない）
+    """
+    if "site-packages/" in filename:
+        filename = filename.split("site-packages/", 1)[1]
+    elif filename.startswith(_STDLIB_DIR + os.sep):
+        filename = os.path.relpath(filename, _STDLIB_DIR)
+    elif filename.startswith(_PROJECT_ROOT + os.sep):
+        filename = os.path.relpath(filename, _PROJECT_ROOT)
+    return f"{filename}:{funcname}"
+
+
+def load_profile(path: str) -> Dict[str, Tuple[int, float, float]]:
+    """
+    pstats のファイルを関数ごとの呼び出し回数・自身の時間・累積時間に変換する
+
+    Args:
+        path (str): pstats 形式のファイル
+
+    Returns:
+        Dict[str, Tuple[int, float, float]]: 関数ごとの (ncalls, tottime, cumtime)
+            （同じファイル・関数名のものは合計する）
+    """
+    stats = pstats.Stats(path).stats  # type: ignore[attr-defined]
+    functions: Dict[str, Tuple[int, float, float]] = {}
+    for (filename, _, funcname), (_, ncalls, tottime, cumtime, _) in stats.items():
+        label = _label(filename, funcname)
+        calls, tt, ct = functions.get(label, (0, 0.0, 0.0))
+        functions[label] = (calls + ncalls, tt + tottime, ct + cumtime)
+    return functions
+
+
+def diff_profiles(
+    before: str, after: str, sort: str = "tottime", top: int = 20
+) -> List[Dict[str, Any]]:
+    """
+    2つのプロファイルの関数ごとの時間の差分を求める
+
+    Args:
+        before (str): 変更前のプロファイル
+        after (str): 変更後のプロファイル
+        sort (str): 差分を比較する時間（"tottime" または "cumtime"）
+        top (int): 差分の絶対値が大きい順に返す件数
+
+    Returns:
+        List[Dict[str, Any]]: function, before, after, delta, calls_before, calls_after
+    """
+    index = {"tottime": 1, "cumtime": 2}[sort]
+    a, b = load_profile(before), load_profile(after)
+    rows = []
+    for label in set(a) | set(b):
+        x = a.get(label, (0, 0.0, 0.0))
+        y = b.get(label, (0, 0.0, 0.0))
+        rows.append(
+            {
+                "function": label,
+                "before": x[index],
+                "after": y[index],
+                "delta": y[index] - x[index],
+                "calls_before": x[0],
+                "calls_after": y[0],
+            }
+        )
+    return sorted(rows, key=lambda r: abs(r["delta"]), reverse=True)[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CPU profile tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    diff = subparsers.add_parser("diff", help="2つのプロファイルの差分を表示する")
+    diff.add_argument("before", type=str)
+    diff.add_argument("after", type=str)
+    diff.add_argument("--sort", choices=["tottime", "cumtime"], default="tottime")
+    diff.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = diff_profiles(args.before, args.after, args.sort, args.top)
+    total_before = sum(v[1] for v in load_profile(args.before).values())
+    total_after = sum(v[1] for v in load_profile(args.after).values())
+    print(
+        f"total: {total_before:.3f}s -> {total_after:.3f}s "
+        f"({total_after - total_before:+.3f}s)"
+    )
+    print(
+        f"{'before':>9} {'after':>9} {'delta':>9} {'calls':>15}  function ({args.sort})"
+    )
+    for r in rows:
+        calls = f"{r['calls_before']}->{r['calls_after']}"
+        print(
+            f"{r['before']:>9.3f} {r['after']:>9.3f} {r['delta']:>+9.3f} "
+            f"{calls:>15}  {r['function']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
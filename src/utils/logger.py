@@ -1,5 +1,30 @@
+import atexit
 import logging.config
+import logging.handlers
+import queue
+import threading
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional
+
+# ハンドラーを取り付けるロガー
+_LOGGER_NAME = "src"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _log_dir() -> Optional[Path]:
+    """ログファイルの出力先を作成する（書き込めない場合は None。確認はプロセスで1回のみ）"""
+    try:
+        log_dir = Path("logs")
+        log_dir.mkdir(exist_ok=True)
+        return log_dir
+    except OSError:
+        # ファイルシステムが読み取り専用の場合はスキップ
+        return None
 
 
 # ロァイルハンドラーを条件付きで設定
@@ -18,7 +43,7 @@ def get_logging_config():
             }
         },
         "loggers": {
-            "src": {
+            _LOGGER_NAME: {
                 "level": "DEBUG",
                 "handlers": ["console"],
             }
@@ -26,10 +51,8 @@ def get_logging_config():
     }
 
     # ローカル環境の場合のみファイルハンドラーを追加
-    try:
-        log_dir = Path("logs")
-        log_dir.mkdir(exist_ok=True)
-
+    log_dir = _log_dir()
+    if log_dir is not None:
         config["handlers"]["file"] = {
             "class": "logging.handlers.RotatingFileHandler",
             "level": "DEBUG",
@@ -38,14 +61,51 @@ def get_logging_config():
             "maxBytes": 10485760,
             "backupCount": 3,
         }
-        config["loggers"]["src"]["handlers"].append("file")
-    except OSError:
-        # ファイルシステムが読み取り専用の場合はスキップ
-        pass
+        config["loggers"][_LOGGER_NAME]["handlers"].append("file")
 
     return config
 
 
 def setup_logging():
-    """ロギング設定を初期化"""
-    logging.config.dictConfig(get_logging_config())
+    """
+    ロギング設定を初期化
+
+    プロセスで1回だけ設定し、2回目以降の呼び出しは何もしない。ロガーには
+    QueueHandler のみを取り付け、コンソール・ファイルへの書き込みは QueueListener の
+    スレッドで行う（呼び出し元のスレッドはキューに積むだけで戻る）。
+    """
+    global _listener, _queue_handler
+    with _lock:
+        if _listener is not None:
+            return
+        logging.config.dictConfig(get_logging_config())
+
+        src_logger = logging.getLogger(_LOGGER_NAME)
+        handlers = list(src_logger.handlers)
+        for handler in handlers:
+            src_logger.removeHandler(handler)
+
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        _queue_handler = logging.handlers.QueueHandler(log_queue)
+        src_logger.addHandler(_queue_handler)
+        _listener = logging.handlers.QueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+        _listener.start()
+
+
+def shutdown_logging():
+    """キューに残っているログを書き出してリスナーを停止する（未設定の場合は何もしない）"""
+    global _listener, _queue_handler
+    with _lock:
+        if _listener is None:
+            return
+        listener, _listener = _listener, None
+        logging.getLogger(_LOGGER_NAME).removeHandler(_queue_handler)
+        _queue_handler = None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,202 @@
+import logging
+import os
+import threading
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 整数の場合は確保元として記録するスタックの深さ（"true" などは 1）とし、
+# "0" / "false" / 空文字列では無効とする。スタックが深いほど確保元をプロジェクトの
+# コードまで遡れるが、tracemalloc のオーバーヘッドが大きい（学習では 1 で約5倍、
+# 16 で約50倍の時間がかかる）
+MEMORY_PROFILE_ENV = "ML_PROFILE_MEMORY"
+# スパンごとに記録する確保元の件数
+TOP_ALLOCATIONS = 5
+# 確保元はこのディレクトリ配下（site-packages を除く）で最も内側のフレームとする
+# （numpy / pandas の内部ではなく、それを呼び出したプロジェクトのコードの行を示すため）
+_PROJECT_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+# 計測自体による確保は除く
+_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+]
+
+_MB = 2**20
+
+
+def traceback_frames() -> int:
+    """環境変数 ML_PROFILE_MEMORY から記録するスタックの深さを取得する（無効の場合は 0）"""
+    value = os.environ.get(MEMORY_PROFILE_ENV, "").strip().lower()
+    if value in ("", "0", "false"):
+        return 0
+    return int(value) if value.isdigit() else 1
+
+
+def memory_profiling_enabled() -> bool:
+    """環境変数 ML_PROFILE_MEMORY でメモリのプロファイリングが有効化されているか"""
+    return traceback_frames() > 0
+
+
+@dataclass
+class _Frame:
+    """計測中のスパン1つ分の状態"""
+
+    path: str
+    trace_id: str
+    start_bytes: int
+    peak_bytes: int
+    snapshot: tracemalloc.Snapshot
+
+
+@dataclass
+class _Run:
+    """パイプライン実行（ルートのスパン）ごとのステージの計測結果"""
+
+    stages: List[Tuple[str, float, float]] = field(default_factory=list)
+
+
+_frames: List[_Frame] = []
+_runs: Dict[str, _Run] = {}
+_lock = threading.Lock()
+# このモジュールで tracemalloc を開始したか（計測中のスパンがなくなった時点で停止する）
+_owns_tracing = False
+
+
+def _fold_peak() -> int:
+    """
+    前回の境界からのピークを計測中の全てのスパンに反映し、ピークをリセットする
+
+    tracemalloc のピークはプロセスで1つのため、スパンの開始・終了のたびに区間の
+    ピークを計測中のスパンに振り分ける（入れ子のスパンでもそれぞれのピークが求まる）。
+    """
+    current, peak = tracemalloc.get_traced_memory()
+    for frame in _frames:
+        frame.peak_bytes = max(frame.peak_bytes, peak)
+    tracemalloc.reset_peak()
+    return current
+
+
+def start(path: str, trace_id: str) -> _Frame:
+    """
+    スパンの開始時に呼び出し、メモリの計測を開始する
+
+    tracemalloc が未開始の場合は開始し、計測中のスパンがなくなった時点で停止する。
+
+    Args:
+        path (str): スパンのパス
+        trace_id (str): パイプライン実行の ID
+
+    Returns:
+        _Frame: stop に渡す計測中の状態
+    """
+    global _owns_tracing
+    with _lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(traceback_frames())
+            _owns_tracing = True
+        current = _fold_peak()
+        frame = _Frame(
+            path=path,
+            trace_id=trace_id,
+            start_bytes=current,
+            peak_bytes=current,
+            snapshot=tracemalloc.take_snapshot(),
+        )
+        _frames.append(frame)
+        return frame
+
+
+def stop(frame: _Frame) -> Dict[str, Any]:
+    """
+    スパンの終了時に呼び出し、スパンに追加するメモリの計測結果を返す
+
+    ルートのスパンの終了時には、ステージごとのピークの増加量を多い順にログに出力する。
+
+    Args:
+        frame (_Frame): start の戻り値
+
+    Returns:
+        Dict[str, Any]: tracemalloc_peak_mb（ピーク）、tracemalloc_peak_increase_mb
+            （開始時点からのピークの増加量）、top_allocations（終了時点で開始時点から
+            増えているメモリの確保元の上位。ファイル名:行番号・増加量・個数）
+    """
+    global _owns_tracing
+    with _lock:
+        _fold_peak()
+        snapshot = tracemalloc.take_snapshot()
+        _frames.remove(frame)
+        if _owns_tracing and not _frames:
+            tracemalloc.stop()
+            _owns_tracing = False
+
+    top_allocations = _top_allocations(frame.snapshot, snapshot)
+    peak_mb = frame.peak_bytes / _MB
+    increase_mb = (frame.peak_bytes - frame.start_bytes) / _MB
+
+    with _lock:
+        run = _runs.setdefault(frame.trace_id, _Run())
+        run.stages.append((frame.path, peak_mb, increase_mb))
+        if "/" not in frame.path:
+            _runs.pop(frame.trace_id)
+            _report(frame.trace_id, run)
+
+    return {
+        "tracemalloc_peak_mb": round(peak_mb, 3),
+        "tracemalloc_peak_increase_mb": round(increase_mb, 3),
+        "top_allocations": top_allocations,
+    }
+
+
+def _site(traceback: tracemalloc.Traceback) -> str:
+    """確保元（プロジェクト内で最も内側のフレーム。なければ最も内側のフレーム）"""
+    frames = list(reversed(traceback))
+    for f in frames:
+        if f.filename.startswith(_PROJECT_ROOT) and "site-packages" not in f.filename:
+            return f"{os.path.relpath(f.filename, _PROJECT_ROOT)}:{f.lineno}"
+    return f"{frames[0].filename}:{frames[0].lineno}"
+
+
+def _top_allocations(
+    before: tracemalloc.Snapshot, after: tracemalloc.Snapshot
+) -> List[Dict[str, Any]]:
+    """開始時点から増えたメモリを確保元ごとに集計し、多い順に返す"""
+    sizes: Dict[str, List[int]] = {}
+    diffs = after.filter_traces(_FILTERS).compare_to(
+        before.filter_traces(_FILTERS), "traceback"
+    )
+    for d in diffs:
+        size_count = sizes.setdefault(_site(d.traceback), [0, 0])
+        size_count[0] += d.size_diff
+        size_count[1] += d.count_diff
+    top = sorted(
+        ((site, size, count) for site, (size, count) in sizes.items() if size > 0),
+        key=lambda t: t[1],
+        reverse=True,
+    )[:TOP_ALLOCATIONS]
+    return [
+        {"site": site, "size_mb": round(size / _MB, 3), "count": count}
+        for site, size, count in top
+    ]
+
+
+def _report(trace_id: str, run: _Run) -> None:
+    logger.info(f"Memory peaks in run {trace_id} (tracemalloc, MB):")
+    for path, peak_mb, increase_mb in sorted(
+        run.stages, key=lambda s: s[2], reverse=True
+    ):
+        logger.info(f"  {increase_mb:+10.1f} {peak_mb:10.1f}  {path}")
+
+
+def reset() -> None:
+    """計測中の状態を破棄する（テスト用）"""
+    global _owns_tracing
+    with _lock:
+        _frames.clear()
+        _runs.clear()
+        if _owns_tracing:
+            tracemalloc.stop()
+            _owns_tracing = False
@@ -0,0 +1,214 @@
+import contextvars
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, List, Sequence, Tuple
+
+from src.utils.cpu_profile import profile_thread
+
+logger = logging.getLogger(__name__)
+
+# キューの空き・要素を待つ間に停止要求を確認する間隔（秒）
+_POLL_SECONDS = 0.1
+_END = object()
+
+
+@dataclass
+class StageStats:
+    """
+    ステージごとの処理時間の内訳
+
+    Attributes:
+        name (str): ステージ名
+        items (int): 処理した要素数
+        busy_seconds (float): 処理に要した時間
+        idle_seconds (float): 前段からの入力を待っていた時間
+        blocked_seconds (float): 後段のキューに空きができるのを待っていた時間
+    """
+
+    name: str
+    items: int = 0
+    busy_seconds: float = 0.0
+    idle_seconds: float = 0.0
+    blocked_seconds: float = 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.name}: {self.items} items, busy {self.busy_seconds:.2f}s, "
+            f"idle {self.idle_seconds:.2f}s, blocked {self.blocked_seconds:.2f}s"
+        )
+
+
+class PipelinedExecutor:
+    """
+    入力の取得と各ステージを別スレッドで並行に実行する
+
+    ステージ間は要素数 depth の有界キューでつなぐため、例えば取得・推論・書き込みの
+    3段であれば、バッチ N+1 の取得・バッチ N の推論・バッチ N-1 の書き込みが同時に進む。
+    先行できるのは depth 個までのため、同時に保持するバッチ数も有界となる。
+    depth が 0 の場合は呼び出し元のスレッドで逐次実行する（比較・デバッグ用）。
+
+    ネットワーク I/O や NumPy・scikit-learn の処理は GIL を解放するため、
+    スレッドでも I/O と推論が重なって実行される。
+    各スレッドは呼び出し元のコンテキスト（実行中のスパンなど）を引き継ぎ、
+    CPU プロファイルの取得中であれば各スレッドの処理も同じプロファイルに含める。
+    """
+
+    def __init__(self, depth: int = 2) -> None:
+        if depth < 0:
+            raise ValueError("depth must be non-negative")
+        self.depth = depth
+
+    def run(
+        self,
+        source: Iterable[Any],
+        stages: Sequence[Tuple[str, Callable[[Any], Any]]],
+        source_name: str = "fetch",
+    ) -> List[StageStats]:
+        """
+        source の各要素を stages の順に処理する
+
+        Args:
+            source (Iterable): 入力（要素の取得自体も1つのステージとして計測する）
+            stages (Sequence[Tuple[str, Callable]]): (ステージ名, 処理関数) のリスト。
+                各関数の戻り値が次のステージの入力となり、最後の戻り値は破棄する
+            source_name (str): 入力の取得ステージの名前
+
+        Returns:
+            List[StageStats]: 取得ステージを先頭とするステージごとの処理時間
+
+        Raises:
+            Exception: いずれかのステージで発生した例外（残りのステージは停止する）
+        """
+        stats = [StageStats(source_name)] + [StageStats(name) for name, _ in stages]
+        if self.depth == 0:
+            self._run_sequential(source, stages, stats)
+        else:
+            self._run_threaded(source, stages, stats)
+
+        for s in stats:
+            logger.info(f"Stage {s}")
+        bottleneck = max(stats, key=lambda s: s.busy_seconds)
+        logger.info(f"Bottleneck stage: {bottleneck.name}")
+        return stats
+
+    @staticmethod
+    def _timed_iter(source: Iterable[Any], stats: StageStats) -> Iterator[Any]:
+        iterator = iter(source)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                stats.busy_seconds += time.perf_counter() - start
+                return
+            stats.busy_seconds += time.perf_counter() - start
+            stats.items += 1
+            yield item
+
+    def _run_sequential(
+        self,
+        source: Iterable[Any],
+        stages: Sequence[Tuple[str, Callable[[Any], Any]]],
+        stats: List[StageStats],
+    ) -> None:
+        for item in self._timed_iter(source, stats[0]):
+            for (_, fn), stage_stats in zip(stages, stats[1:]):
+                start = time.perf_counter()
+                item = fn(item)
+                stage_stats.busy_seconds += time.perf_counter() - start
+                stage_stats.items += 1
+
+    def _run_threaded(
+        self,
+        source: Iterable[Any],
+        stages: Sequence[Tuple[str, Callable[[Any], Any]]],
+        stats: List[StageStats],
+    ) -> None:
+        queues: List[queue.Queue] = [
+            queue.Queue(maxsize=self.depth) for _ in range(len(stages))
+        ]
+        stop = threading.Event()
+        errors: List[BaseException] = []
+
+        def put(q: queue.Queue, item: Any, stage_stats: StageStats) -> bool:
+            start = time.perf_counter()
+            try:
+                while not stop.is_set():
+                    try:
+                        q.put(item, timeout=_POLL_SECONDS)
+                        return True
+                    except queue.Full:
+                        continue
+                return False
+            finally:
+                stage_stats.blocked_seconds += time.perf_counter() - start
+
+        def get(q: queue.Queue, stage_stats: StageStats) -> Any:
+            start = time.perf_counter()
+            try:
+                while not stop.is_set():
+                    try:
+                        return q.get(timeout=_POLL_SECONDS)
+                    except queue.Empty:
+                        continue
+                return _END
+            finally:
+                stage_stats.idle_seconds += time.perf_counter() - start
+
+        def produce() -> None:
+            try:
+                for item in self._timed_iter(source, stats[0]):
+                    if not put(queues[0], item, stats[0]):
+                        return
+                put(queues[0], _END, stats[0])
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+
+        def consume(index: int, fn: Callable[[Any], Any]) -> None:
+            stage_stats = stats[index + 1]
+            out = queues[index + 1] if index + 1 < len(queues) else None
+            try:
+                while True:
+                    item = get(queues[index], stage_stats)
+                    if item is _END:
+                        if out is not None:
+                            put(out, _END, stage_stats)
+                        return
+                    start = time.perf_counter()
+                    result = fn(item)
+                    stage_stats.busy_seconds += time.perf_counter() - start
+                    stage_stats.items += 1
+                    if out is not None and not put(out, result, stage_stats):
+                        return
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+
+        # 呼び出し元のスパンの中で SQL 文が記録されるよう、各スレッドはコンテキストの
+        # コピーの中で実行する（同じコンテキストには複数のスレッドから入れない）
+        threads = [
+            threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(profile_thread(produce),),
+                name=f"stage-{stats[0].name}",
+            )
+        ]
+        threads += [
+            threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(profile_thread(consume), i, fn),
+                name=f"stage-{name}",
+            )
+            for i, (name, fn) in enumerate(stages)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        if errors:
+            raise errors[0]
@@ -0,0 +1,127 @@
+import json
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional, Tuple
+
+from snowflake.snowpark import Session
+
+from src.utils.query_profile import ProfiledDataFrame
+
+logger = logging.getLogger(__name__)
+
+# 引用符なしで指定できる識別子（Snowflake では大文字として解決される）
+_IDENTIFIER_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_$]*$")
+# 引用符で囲まれた識別子（get_current_database などの戻り値）
+_QUOTED_IDENTIFIER_PATTERN = re.compile(r'^"([^"]|"")+"$')
+# 値の一覧を展開する際の型名
+_SQL_TYPE_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\(\d+(,\s*\d+)?\))?$")
+
+
+@dataclass(frozen=True)
+class Query:
+    """
+    バインドパラメータ付きの SQL 文（または WHERE 句などの断片）
+
+    値は text 中の ? の位置に params の順でバインドする。値を SQL 文に埋め込まないため、
+    値が異なっても SQL 文は同一となり、Snowflake 側でコンパイル結果が再利用される。
+
+    Attributes:
+        text (str): SQL 文（値の位置は ?）
+        params (Tuple[Any, ...]): バインドする値
+    """
+
+    text: str
+    params: Tuple[Any, ...] = ()
+
+    def __add__(self, other: "Query") -> "Query":
+        return Query(self.text + other.text, self.params + other.params)
+
+
+def quote_identifier(name: str) -> str:
+    """
+    識別子を検証し、引用符で囲んで返す
+
+    引用符なしの識別子は大文字として解決されるため、大文字に変換してから囲む
+    （意味は引用符なしで書いた場合と同じになる）。既に引用符で囲まれている場合は
+    そのまま返す。
+
+    Args:
+        name (str): テーブル名・カラム名などの識別子
+
+    Returns:
+        str: 引用符で囲んだ識別子
+
+    Raises:
+        ValueError: 識別子として使えない文字を含む場合
+    """
+    if _QUOTED_IDENTIFIER_PATTERN.match(name):
+        return name
+    if not _IDENTIFIER_PATTERN.match(name):
+        raise ValueError(f"Invalid identifier: {name!r}")
+    return f'"{name.upper()}"'
+
+
+def qualified_name(*parts: str) -> str:
+    """データベース名・スキーマ名・テーブル名などを検証し、完全修飾名として連結する"""
+    return ".".join(quote_identifier(part) for part in parts)
+
+
+def column_list(columns: Iterable[str], alias: Optional[str] = None) -> str:
+    """カラム名を検証し、SELECT 句のカラム一覧を作成する（alias 指定時は別名を付与）"""
+    prefix = f"{quote_identifier(alias)}." if alias else ""
+    return ", ".join(prefix + quote_identifier(column) for column in columns)
+
+
+def in_list(column: str, values: Iterable[Any], sql_type: str = "DATE") -> Query:
+    """
+    column IN (values) の条件式を作成する
+
+    値の一覧は JSON 配列として1つのパラメータにバインドし、FLATTEN で展開する。
+    値の個数によらず SQL 文が同一となる。
+
+    Args:
+        column (str): 対象カラム（テーブル別名付きも可）
+        values (Iterable): 値の一覧
+        sql_type (str): 展開した値を変換する型
+
+    Returns:
+        Query: 条件式
+    """
+    if not _SQL_TYPE_PATTERN.match(sql_type):
+        raise ValueError(f"Invalid SQL type: {sql_type!r}")
+    values = [v if isinstance(v, (int, float)) else str(v) for v in values]
+    return Query(
+        f"{column} IN (SELECT VALUE::{sql_type} "
+        "FROM TABLE(FLATTEN(INPUT => PARSE_JSON(?))))",
+        (json.dumps(values),),
+    )
+
+
+def and_conditions(*conditions: Query) -> Query:
+    """条件式を AND で連結する"""
+    return Query(
+        " AND ".join(c.text for c in conditions),
+        tuple(p for c in conditions for p in c.params),
+    )
+
+
+def run_query(session: Session, query: Query) -> ProfiledDataFrame:
+    """
+    バインドパラメータ付きで SQL 文を実行する DataFrame を作成する
+
+    スパンの中で結果を取得した場合は、セッションにクエリタグ（procedure・run_id）を
+    設定し、実行したスレッドのスパン（stage）ごとにクエリ ID・経過時間・行数を記録する
+    （query_profile を参照）。
+
+    Args:
+        session (Session): Snowflakeセッション
+        query (Query): 実行する SQL 文
+
+    Returns:
+        ProfiledDataFrame: collect / to_pandas などで結果を取得する Snowpark DataFrame
+    """
+    logger.debug("Executing query: %s with params: %s", query.text, query.params)
+    return ProfiledDataFrame(
+        session, session.sql(query.text, params=list(query.params) or None), query.text
+    )
@@ -0,0 +1,349 @@
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import AbstractContextManager, contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from snowflake.snowpark import (
+    AsyncJob,
+    DataFrame as SnowparkDataFrame,
+    Session,
+)
+
+from src.utils.tracing import Span, current_span
+
+logger = logging.getLogger(__name__)
+
+# レポートに含める SQL 文の最大文字数
+_SQL_TEXT_LIMIT = 200
+
+
+@dataclass(frozen=True)
+class QueryRecord:
+    """
+    SQL 文1回分の実行記録
+
+    Attributes:
+        run_id (str): パイプライン実行の ID（ルートのスパンの trace_id）
+        procedure (str): ストアドプロシージャ名（ルートのスパン名）
+        stage (str): 実行したステージ（スパンのパス）
+        query_id (str | None): Snowflake のクエリ ID（取得できない場合は None）
+        sql_text (str): SQL 文
+        elapsed_seconds (float): 実行から結果の受信までの経過時間
+        rows (int | None): 結果の行数（書き込みの場合は書き込んだ行数）
+        status (str): "ok" または "error"
+        thread_id (int | None): 実行したスレッドの ID
+    """
+
+    run_id: str
+    procedure: str
+    stage: str
+    query_id: Optional[str]
+    sql_text: str
+    elapsed_seconds: float
+    rows: Optional[int]
+    status: str = "ok"
+    thread_id: Optional[int] = None
+
+
+_records: Dict[str, List[QueryRecord]] = defaultdict(list)
+_records_lock = threading.Lock()
+
+
+def query_tag(current: Span) -> str:
+    """
+    スパンに対応するクエリタグを作成する
+
+    クエリタグはセッション全体で共有されるため、同じセッションで複数のスレッドが
+    別々のステージの SQL 文を実行すると互いに上書きしてしまう。そのためタグには
+    実行中は変わらない procedure・run_id のみを含める。Snowflake の QUERY_HISTORY を
+    QUERY_TAG で絞り込むとパイプライン実行ごとのウェアハウスの使用時間を集計でき、
+    ステージごとの内訳は、SQL 文を実行したスレッドのスパンから記録した
+    QueryRecord（クエリ ID・stage）と突き合わせて求める。
+
+    Args:
+        current (Span): 実行中のスパン
+
+    Returns:
+        str: procedure・run_id を含む JSON 文字列
+    """
+    return json.dumps(
+        {"procedure": current.path.split("/")[0], "run_id": current.trace_id},
+        separators=(",", ":"),
+    )
+
+
+def _apply_query_tag(session: Session, current: Span) -> None:
+    """セッションのクエリタグを更新する（変わらない場合は ALTER SESSION を発行しない）"""
+    tag = query_tag(current)
+    if getattr(session, "query_tag", None) != tag:
+        session.query_tag = tag
+
+
+@contextmanager
+def _query_history(session: Session) -> Iterator[Optional[Any]]:
+    """ブロック内で発行された SQL 文の履歴を記録する（記録できないセッションでは None）"""
+    factory = getattr(session, "query_history", None)
+    history = factory(include_thread_id=True) if callable(factory) else None
+    if not isinstance(history, AbstractContextManager):
+        yield None
+        return
+    with history:
+        yield history
+
+
+def _find_query_id(history: Optional[Any], sql_text: Optional[str]) -> Optional[str]:
+    """
+    履歴から、このスレッドで最後に発行された同じ SQL 文のクエリ ID を取得する
+    （sql_text が None の場合は、このスレッドで最後に発行された SQL 文）
+    """
+    if history is None:
+        return None
+    thread_id = threading.get_ident()
+    for record in reversed(history.queries):
+        # include_thread_id に対応していない場合は thread_id が None となる
+        record_thread_id = getattr(record, "thread_id", None)
+        if sql_text not in (None, record.sql_text):
+            continue
+        if record_thread_id in (None, thread_id):
+            return record.query_id
+    return None
+
+
+def _record(
+    current: Span,
+    sql_text: str,
+    query_id: Optional[str],
+    elapsed_seconds: float,
+    rows: Optional[int],
+    status: str,
+) -> None:
+    record = QueryRecord(
+        run_id=current.trace_id,
+        procedure=current.path.split("/")[0],
+        stage=current.path,
+        query_id=query_id,
+        sql_text=sql_text,
+        elapsed_seconds=elapsed_seconds,
+        rows=rows,
+        status=status,
+        thread_id=threading.get_ident(),
+    )
+    with _records_lock:
+        _records[record.run_id].append(record)
+        # ステージごとの SQL 文の実行回数・時間をスパンの付加情報として集計する
+        # （同じスパンの中で複数のスレッドが実行する場合があるため、ロック内で更新する）
+        current.set(
+            query_count=current.attributes.get("query_count", 0) + 1,
+            query_seconds=current.attributes.get("query_seconds", 0.0)
+            + elapsed_seconds,
+        )
+    logger.debug(
+        "Query %s finished in %.3fs (%s rows)", query_id, elapsed_seconds, rows
+    )
+
+
+def _execute(
+    session: Session,
+    current: Span,
+    sql_text: str,
+    match_sql: Optional[str],
+    action: Callable[[], Any],
+) -> Tuple[Any, Optional[str], float]:
+    """クエリタグを設定して実行し、結果・クエリ ID・経過時間を返す（失敗時は記録する）"""
+    _apply_query_tag(session, current)
+    start = time.perf_counter()
+    with _query_history(session) as history:
+        try:
+            result = action()
+        except Exception:
+            elapsed = time.perf_counter() - start
+            query_id = _find_query_id(history, match_sql)
+            _record(current, sql_text, query_id, elapsed, None, "error")
+            raise
+        query_id = _find_query_id(history, match_sql)
+    return result, query_id, time.perf_counter() - start
+
+
+def profile_query(
+    session: Session,
+    sql_text: str,
+    action: Callable[[], Any],
+    rows: Optional[int] = None,
+    match_sql: bool = True,
+) -> Any:
+    """
+    action の実行を SQL 文 sql_text として記録する（スパンの外ではそのまま実行する）
+
+    Args:
+        session (Session): Snowflakeセッション
+        sql_text (str): 記録する SQL 文（書き込みなどの場合は処理の説明）
+        action (Callable[[], Any]): 実行する処理
+        rows (int | None): 記録する行数（None の場合は結果の要素数）
+        match_sql (bool): クエリ ID を同じ SQL 文から探すか（False の場合は、
+            このスレッドで最後に発行された SQL 文のクエリ ID を記録する）
+
+    Returns:
+        Any: action の戻り値
+    """
+    current = current_span()
+    if current is None:
+        return action()
+    result, query_id, elapsed = _execute(
+        session, current, sql_text, sql_text if match_sql else None, action
+    )
+    if rows is None and hasattr(result, "__len__"):
+        rows = len(result)
+    _record(current, sql_text, query_id, elapsed, rows, "ok")
+    return result
+
+
+class ProfiledDataFrame:
+    """
+    結果を取得する操作の実行時間・行数・クエリ ID を記録する Snowpark DataFrame のラッパー
+
+    スパンの中で実行した場合のみ、実行前にセッションのクエリタグを設定して記録する。
+    記録しない属性・メソッドは元の DataFrame にそのまま委譲する。
+    """
+
+    def __init__(self, session: Session, df: SnowparkDataFrame, sql_text: str) -> None:
+        self._session = session
+        self._df = df
+        self._sql_text = sql_text
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._df, name)
+
+    def collect(self, *args: Any, **kwargs: Any) -> Any:
+        return self._profile(lambda: self._df.collect(*args, **kwargs))
+
+    def to_pandas(self, *args: Any, **kwargs: Any) -> Any:
+        return self._profile(lambda: self._df.to_pandas(*args, **kwargs))
+
+    def to_pandas_batches(self, *args: Any, **kwargs: Any) -> Iterator[Any]:
+        current = current_span()
+        if current is None:
+            return self._df.to_pandas_batches(*args, **kwargs)
+        batches, query_id, elapsed = _execute(
+            self._session,
+            current,
+            self._sql_text,
+            self._sql_text,
+            lambda: self._df.to_pandas_batches(*args, **kwargs),
+        )
+        return self._iter_batches(current, batches, query_id, elapsed)
+
+    def collect_nowait(self, *args: Any, **kwargs: Any) -> Any:
+        current = current_span()
+        if current is None:
+            return self._df.collect_nowait(*args, **kwargs)
+        _apply_query_tag(self._session, current)
+        job = self._df.collect_nowait(*args, **kwargs)
+        return _ProfiledJob(job, current, self._sql_text)
+
+    def _profile(self, action: Callable[[], Any]) -> Any:
+        return profile_query(self._session, self._sql_text, action)
+
+    def _iter_batches(
+        self,
+        current: Span,
+        batches: Iterator[Any],
+        query_id: Optional[str],
+        elapsed: float,
+    ) -> Iterator[Any]:
+        """バッチの受信時間のみを合計する（呼び出し元がバッチを処理する時間は除く）"""
+        status = "error"
+        rows = 0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    batch = next(batches)
+                except StopIteration:
+                    status = "ok"
+                    return
+                finally:
+                    elapsed += time.perf_counter() - start
+                rows += len(batch)
+                yield batch
+        finally:
+            _record(current, self._sql_text, query_id, elapsed, rows, status)
+
+
+class _ProfiledJob:
+    """送信から結果の取得までを記録する AsyncJob のラッパー"""
+
+    def __init__(self, job: AsyncJob, current: Span, sql_text: str) -> None:
+        self._job = job
+        self._current = current
+        self._sql_text = sql_text
+        self._start = time.perf_counter()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._job, name)
+
+    def result(self, *args: Any, **kwargs: Any) -> Any:
+        status = "error"
+        result = None
+        try:
+            result = self._job.result(*args, **kwargs)
+            status = "ok"
+            return result
+        finally:
+            _record(
+                self._current,
+                self._sql_text,
+                getattr(self._job, "query_id", None),
+                time.perf_counter() - self._start,
+                len(result) if hasattr(result, "__len__") else None,
+                status,
+            )
+
+
+def query_records(run_id: str) -> List[QueryRecord]:
+    """パイプライン実行で記録した SQL 文の一覧を取得する"""
+    with _records_lock:
+        return list(_records.get(run_id, []))
+
+
+def slowest_queries(run_id: str, limit: int = 10) -> List[QueryRecord]:
+    """パイプライン実行で記録した SQL 文のうち、時間のかかったものから limit 件を取得する"""
+    return sorted(query_records(run_id), key=lambda r: r.elapsed_seconds, reverse=True)[
+        :limit
+    ]
+
+
+def report_slowest_queries(limit: int = 10) -> List[QueryRecord]:
+    """
+    実行中のパイプラインで時間のかかった SQL 文をログに出力し、記録を破棄する
+
+    ルートのスパンの中で呼び出すと、一覧をスパンの付加情報（slowest_queries）にも
+    追加する（tracing の書き出し先に出力される）。
+
+    Args:
+        limit (int): 出力する件数
+
+    Returns:
+        List[QueryRecord]: 時間のかかった SQL 文（スパンの外で呼び出した場合は空）
+    """
+    current = current_span()
+    if current is None:
+        return []
+    slowest = slowest_queries(current.trace_id, limit)
+    with _records_lock:
+        total = len(_records.pop(current.trace_id, []))
+
+    logger.info(
+        f"Slowest queries in run {current.trace_id} ({len(slowest)} of {total}):"
+    )
+    for r in slowest:
+        sql_text = " ".join(r.sql_text.split())[:_SQL_TEXT_LIMIT]
+        logger.info(
+            f"  {r.elapsed_seconds:8.3f}s {str(r.rows):>10} rows "
+            f"{r.stage} [{r.query_id}] {sql_text}"
+        )
+    current.set(slowest_queries=[asdict(r) for r in slowest])
+    return slowest
@@ -0,0 +1,197 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional
+
+from snowflake.snowpark import Session
+
+from src.utils.snowflake import create_session
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(eq=False)
+class _PooledSession:
+    """プール内のセッション1つ分のエントリ"""
+
+    session: Session
+    last_used: float
+    last_checked: float
+
+
+class SessionPool:
+    """
+    認証済みの Snowflake セッションを再利用するプール
+
+    セッションの作成（ログイン）は数秒かかるため、処理の終わったセッションはプールに戻し、
+    次のチェックアウトで再利用する。同じスレッド内で入れ子にチェックアウトした場合は
+    同じセッションを返す。一定時間使われていないセッションは閉じ、しばらく使われていない
+    セッションは貸し出す前に SELECT 1 で接続を確認する。
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Optional[Session]] = create_session,
+        max_size: int = 4,
+        idle_timeout_seconds: float = 600,
+        health_check_interval_seconds: float = 60,
+    ) -> None:
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.session_factory = session_factory
+        self.max_size = max_size
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.health_check_interval_seconds = health_check_interval_seconds
+        # 最後に返却したものから再利用する（古いものから期限切れになる）
+        self._idle: List[_PooledSession] = []
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._local = threading.local()
+
+    @property
+    def size(self) -> int:
+        """作成済みのセッション数（貸し出し中を含む）"""
+        with self._cond:
+            return self._size
+
+    @contextmanager
+    def session(self, timeout: Optional[float] = None) -> Iterator[Session]:
+        """
+        セッションをチェックアウトし、ブロックを抜けるとプールに戻す
+
+        Args:
+            timeout (float | None): 空きセッションを待つ最大秒数。None の場合は無期限
+
+        Yields:
+            Session: Snowflakeセッション
+
+        Raises:
+            TimeoutError: timeout 秒以内に空きセッションがない場合
+            RuntimeError: プールが閉じられている、またはセッションの作成に失敗した場合
+        """
+        held: Optional[_PooledSession] = getattr(self._local, "held", None)
+        if held is not None:
+            yield held.session
+            return
+
+        entry = self._checkout(timeout)
+        self._local.held = entry
+        try:
+            yield entry.session
+        finally:
+            self._local.held = None
+            self._checkin(entry)
+
+    def close(self) -> None:
+        """待機中のセッションを閉じる（貸し出し中のものは返却時に閉じる）"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._close_session(entry)
+        if idle:
+            logger.info(f"Closed {len(idle)} pooled sessions")
+
+    def _checkout(self, timeout: Optional[float]) -> _PooledSession:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            entry = None
+            expired: List[_PooledSession] = []
+            try:
+                with self._cond:
+                    while True:
+                        if self._closed:
+                            raise RuntimeError("Session pool is closed")
+                        expired += self._pop_expired()
+                        if self._idle:
+                            entry = self._idle.pop()
+                            break
+                        if self._size < self.max_size:
+                            self._size += 1
+                            break
+                        remaining = (
+                            None if deadline is None else deadline - time.monotonic()
+                        )
+                        if remaining is not None and remaining <= 0:
+                            raise TimeoutError(
+                                f"No session available within {timeout} seconds"
+                            )
+                        self._cond.wait(remaining)
+            finally:
+                for e in expired:
+                    self._close_session(e)
+
+            if entry is None:
+                return self._create()
+            if self._is_healthy(entry):
+                return entry
+            self._discard(entry)
+
+    def _checkin(self, entry: _PooledSession) -> None:
+        entry.last_used = time.monotonic()
+        with self._cond:
+            closed = self._closed
+            if closed:
+                self._size -= 1
+            else:
+                self._idle.append(entry)
+            expired = self._pop_expired()
+            self._cond.notify()
+        for e in expired + ([entry] if closed else []):
+            self._close_session(e)
+
+    def _create(self) -> _PooledSession:
+        try:
+            session = self.session_factory()
+            if session is None:
+                raise RuntimeError("Failed to create Snowflake session")
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        now = time.monotonic()
+        logger.info(f"Created pooled session ({self.size}/{self.max_size})")
+        return _PooledSession(session, last_used=now, last_checked=now)
+
+    def _is_healthy(self, entry: _PooledSession) -> bool:
+        now = time.monotonic()
+        if now - entry.last_checked < self.health_check_interval_seconds:
+            return True
+        try:
+            entry.session.sql("SELECT 1").collect()
+        except Exception as e:
+            logger.warning(f"Discarding unhealthy pooled session: {str(e)}")
+            return False
+        entry.last_checked = now
+        return True
+
+    def _discard(self, entry: _PooledSession) -> None:
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+        self._close_session(entry)
+
+    def _pop_expired(self) -> List[_PooledSession]:
+        """アイドル時間が idle_timeout_seconds を超えたセッションを取り出す（ロック内で呼ぶ）"""
+        now = time.monotonic()
+        expired = [
+            e for e in self._idle if now - e.last_used > self.idle_timeout_seconds
+        ]
+        if expired:
+            self._idle = [e for e in self._idle if e not in expired]
+            self._size -= len(expired)
+            logger.info(f"Evicting {len(expired)} idle pooled sessions")
+        return expired
+
+    @staticmethod
+    def _close_session(entry: _PooledSession) -> None:
+        try:
+            entry.session.close()
+        except Exception as e:
+            logger.warning(f"Failed to close pooled session: {str(e)}")
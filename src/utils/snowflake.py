@@ -1,7 +1,9 @@
 import json
 import logging
 import os
-from typing import Optional
+import uuid
+from functools import lru_cache
+from typing import Any, Dict, Optional
 
 import pandas as pd
 from snowflake.snowpark import (
@@ -10,9 +12,34 @@ from snowflake.snowpark import (
 )
 from snowflake.snowpark.exceptions import SnowparkSessionException
 
+from src.utils.query import Query, in_list, qualified_name, run_query
+from src.utils.query_profile import profile_query
+
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def _read_connection_parameters(path: str) -> Dict[str, Any]:
+    """接続パラメータファイルを読み込む（プロセス内で1回だけ読み込む）"""
+    logger.debug("Loading connection parameters: %s", path)
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_connection_parameters(env: Optional[str] = None) -> Dict[str, Any]:
+    """
+    環境ごとの接続パラメータを取得する
+
+    Args:
+        env (str | None): 環境名。None の場合は環境変数 ML_ENV（デフォルトは dev）
+
+    Returns:
+        Dict[str, Any]: 接続パラメータ（キャッシュのコピー）
+    """
+    env = env or os.getenv("ML_ENV", "dev")
+    return dict(_read_connection_parameters(f"connection_parameters_{env}.json"))
+
+
 def create_session() -> Optional[Session]:
     """
     snowpark session を作成
@@ -26,15 +53,7 @@ def create_session() -> Optional[Session]:
     try:
         logger.info("Starting Snowflake session creation")
 
-        # 環境変数からENVを取得
-        env = os.getenv("ML_ENV", "dev")  # デフォルトはdev
-        connection_parameters_path = f"connection_parameters_{env}.json"
-
-        logger.debug(
-            f"Loading configuration file for environment {env}: {connection_parameters_path}"
-        )
-        with open(connection_parameters_path) as f:
-            connection_parameters = json.load(f)
+        connection_parameters = load_connection_parameters()
         logger.info("Attempting to connect to Snowflake")
         session = Session.builder.configs(connection_parameters).create()
         logger.info("Successfully created Snowflake session")
@@ -66,10 +85,14 @@ def upload_dataframe_to_snowflake(
         mode (str, optional): データ書き込みモード. Defaults to 'overwrite'.
             'overwrite': テーブルを上書き
             'append': 既存テーブルにデータを追加
+            'swap': ステージングテーブルに書き込み、同じSESSION_DATEの既存データと
+                1つのトランザクションで置き換え（既存テーブルとSESSION_DATEカラムが必要）
             'ignore': テーブルが存在する場合はスキップ
             'error': テーブルが存在する場合はエラー
 
     Raises:
+        ValueError: swapモードでSESSION_DATEカラムが存在しない場合、
+            またはデータベース名・スキーマ名・テーブル名が識別子として不正な場合
         Exception: Snowflakeへのロード中にエラーが発生した場合
     """
     try:
@@ -78,35 +101,198 @@ def upload_dataframe_to_snowflake(
         )
         logger.info(f"Upload mode: {mode}")
         logger.info(f"Number of rows in dataframe: {len(df)}")
-        logger.debug(f"Dataframe columns: {', '.join(df.columns)}")
+        logger.debug("Dataframe columns: %s", ", ".join(df.columns))
 
         session.use_database(database_name)
         session.use_schema(schema_name)
 
         df.columns = df.columns.str.upper()
 
-        full_table_name: str = f"{database_name}.{schema_name}.{table_name}"
-        # appendモードでSESSION_DATEカラムが存在する場合、既存データを削除
-        if mode == "append" and "SESSION_DATE" in df.columns:
-            unique_dates = df["SESSION_DATE"].unique()
-
-            logger.info(
-                f"Deleting existing data: SESSION_DATE IN ({', '.join(map(str, unique_dates))})"
-            )
-            delete_sql = f"""
-                DELETE FROM {full_table_name}
-                WHERE SESSION_DATE IN ({','.join([f"'{date}'" for date in unique_dates])})
-            """
-            session.sql(delete_sql).collect()
-
-        snowpark_df: SnowparkDataFrame = session.create_dataframe(df)
+        full_table_name: str = qualified_name(database_name, schema_name, table_name)
+        if mode == "swap":
+            _swap_session_dates(session, df, database_name, schema_name, table_name)
+            return
+
         logger.info(f"Starting write to table: {full_table_name}")
-        snowpark_df.write.mode(mode).save_as_table(full_table_name)
+        _save_as_table(session, df, full_table_name, mode)
 
-        row_count: int = session.table(full_table_name).count()
+        count = Query(f"SELECT COUNT(*) FROM {full_table_name}")
+        row_count: int = run_query(session, count).collect()[0][0]
         logger.info(f"Upload complete. Total rows in table: {row_count}")
 
     except Exception as e:
         error_msg = f"Failed to upload data: {str(e)}"
         logger.error(error_msg)
         raise
+
+
+def _swap_session_dates(
+    session: Session,
+    df: pd.DataFrame,
+    database_name: str,
+    schema_name: str,
+    table_name: str,
+) -> None:
+    """DataFrameをステージングテーブル経由で書き込み、同じSESSION_DATEの既存データと置き換える"""
+    if "SESSION_DATE" not in df.columns:
+        raise ValueError("swap mode requires a SESSION_DATE column")
+
+    unique_dates = df["SESSION_DATE"].unique()
+    logger.info(
+        f"Replacing existing data: SESSION_DATE IN ({', '.join(map(str, unique_dates))})"
+    )
+    full_table_name = qualified_name(database_name, schema_name, table_name)
+    staging_table_name = create_staging_table(
+        session, database_name, schema_name, table_name
+    )
+    try:
+        append_to_table(session, df, staging_table_name)
+    except Exception:
+        run_query(
+            session, Query(f"DROP TABLE IF EXISTS {staging_table_name}")
+        ).collect()
+        raise
+    publish_staging_table(
+        session,
+        staging_table_name,
+        full_table_name,
+        delete_condition=in_list("SESSION_DATE", unique_dates),
+    )
+    logger.info(f"Swap complete: {len(df)} rows published to {full_table_name}")
+
+
+def session_date_condition(
+    start_date: str, end_date: Optional[str] = None, column: str = "SESSION_DATE"
+) -> Query:
+    """
+    SESSION_DATE の条件式（WHERE 句）を作成する
+
+    Args:
+        start_date (str): 対象日付、または期間の開始日（YYYY-MM-DD）
+        end_date (str | None): 期間の終了日（YYYY-MM-DD、開始日と同じ日を含む）
+        column (str): 対象カラム名（テーブル別名付きも可）
+
+    Returns:
+        Query: end_date が未指定または開始日と同じ場合は等号、それ以外は BETWEEN の条件式
+            （日付はバインドパラメータ）
+    """
+    if end_date is None or end_date == start_date:
+        return Query(f"{column} = ?", (start_date,))
+    return Query(f"{column} BETWEEN ? AND ?", (start_date, end_date))
+
+
+def create_staging_table(
+    session: Session, database_name: str, schema_name: str, table_name: str
+) -> str:
+    """
+    ロード先テーブルと同じ構成の一時ステージングテーブルを作成する
+
+    一時テーブルのためセッション終了時に自動で削除される。名前には乱数を付与するため、
+    同じテーブルへの並行した書き込みとも衝突しない。
+
+    Args:
+        session (Session): Snowflakeセッション
+        database_name (str): ロード先のデータベース名
+        schema_name (str): ロード先のスキーマ名
+        table_name (str): ロード先のテーブル名
+
+    Returns:
+        str: ステージングテーブルの完全修飾名（各部分を引用符で囲んだもの）
+
+    Raises:
+        ValueError: データベース名・スキーマ名・テーブル名が識別子として不正な場合
+    """
+    full_table_name = qualified_name(database_name, schema_name, table_name)
+    staging_table_name = qualified_name(
+        database_name,
+        schema_name,
+        f"{table_name}_STAGING_{uuid.uuid4().hex[:8].upper()}",
+    )
+    logger.info(f"Creating staging table: {staging_table_name}")
+    run_query(
+        session,
+        Query(f"CREATE TEMPORARY TABLE {staging_table_name} LIKE {full_table_name}"),
+    ).collect()
+    return staging_table_name
+
+
+def append_to_table(session: Session, df: pd.DataFrame, full_table_name: str) -> None:
+    """
+    Pandas DataFrameを既存テーブルに追加する（既存データの削除や件数確認は行わない）
+
+    Args:
+        session (Session): Snowflakeセッション
+        df (pd.DataFrame): 追加するDataFrame
+        full_table_name (str): 追加先テーブルの完全修飾名
+    """
+    logger.debug("Appending %d rows to: %s", len(df), full_table_name)
+    _save_as_table(session, df, full_table_name, "append")
+
+
+def _save_as_table(
+    session: Session, df: pd.DataFrame, full_table_name: str, mode: str
+) -> None:
+    """
+    Pandas DataFrameをテーブルに書き込む
+
+    run_query と同様に、スパンの中では書き込みの経過時間・行数と、最後に発行された
+    SQL 文のクエリ ID を記録する。
+    """
+    snowpark_df: SnowparkDataFrame = session.create_dataframe(df)
+    profile_query(
+        session,
+        f"SAVE AS TABLE {full_table_name} (mode={mode})",
+        lambda: snowpark_df.write.mode(mode).save_as_table(full_table_name),
+        rows=len(df),
+        match_sql=False,
+    )
+
+
+def publish_staging_table(
+    session: Session,
+    staging_table_name: str,
+    full_table_name: str,
+    delete_condition: Optional[Query] = None,
+) -> None:
+    """
+    ステージングテーブルの内容を1つのトランザクションでロード先テーブルに反映する
+
+    既存データの削除と追加を同じトランザクションで行うため、読み手から途中の状態
+    （削除済みで未追加など）が見えることはない。失敗した場合はロールバックする。
+    反映後、ステージングテーブルは削除する。
+
+    Args:
+        session (Session): Snowflakeセッション
+        staging_table_name (str): ステージングテーブルの完全修飾名
+        full_table_name (str): ロード先テーブルの完全修飾名
+        delete_condition (Query | None): 追加前に削除する既存データの条件（WHERE 句）
+
+    Raises:
+        Exception: 反映中にエラーが発生した場合
+    """
+    try:
+        logger.info(f"Publishing {staging_table_name} to {full_table_name}")
+        run_query(session, Query("BEGIN")).collect()
+        if delete_condition is not None:
+            run_query(
+                session,
+                Query(
+                    f"DELETE FROM {full_table_name} WHERE {delete_condition.text}",
+                    delete_condition.params,
+                ),
+            ).collect()
+        run_query(
+            session,
+            Query(f"INSERT INTO {full_table_name} SELECT * FROM {staging_table_name}"),
+        ).collect()
+        run_query(session, Query("COMMIT")).collect()
+        logger.info("Publish completed")
+
+    except Exception as e:
+        logger.error(f"Failed to publish staging table: {str(e)}")
+        run_query(session, Query("ROLLBACK")).collect()
+        raise
+    finally:
+        run_query(
+            session, Query(f"DROP TABLE IF EXISTS {staging_table_name}")
+        ).collect()
@@ -0,0 +1,264 @@
+import contextvars
+import functools
+import json
+import logging
+import resource
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+import pandas as pd
+from snowflake.snowpark import Session
+
+from src.utils import memory_profile
+from src.utils.config import load_config
+from src.utils.constants import DATABASE_DEV, SCHEMA
+
+logger = logging.getLogger(__name__)
+config = load_config()
+
+F = TypeVar("F", bound=Callable[..., Any])
+Sink = Callable[[Dict[str, Any]], None]
+
+
+@dataclass
+class Span:
+    """
+    ステージ1つ分の計測結果
+
+    Attributes:
+        name (str): ステージ名
+        path (str): 親スパンを含めたステージ名（例: "prediction/score"）
+        trace_id (str): 同じパイプライン実行（ルートのスパン）で共通の ID
+        started_at (str): 開始時刻（UTC、ISO 8601）
+        wall_seconds (float): 経過時間
+        cpu_seconds (float): プロセスの CPU 時間（全スレッドの合計）
+        rows (int | None): 処理した行数
+        peak_rss_mb (float): 終了時点でのプロセスの最大常駐メモリ
+        status (str): "ok" または "error"
+        attributes (Dict[str, Any]): 任意の付加情報（JSON に変換できる値）
+    """
+
+    name: str
+    path: str
+    trace_id: str
+    started_at: str
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    rows: Optional[int] = None
+    peak_rss_mb: float = 0.0
+    status: str = "ok"
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def rows_per_second(self) -> Optional[float]:
+        if self.rows is None or self.wall_seconds <= 0:
+            return None
+        return self.rows / self.wall_seconds
+
+    def set(self, **attributes: Any) -> None:
+        """付加情報を追加する"""
+        self.attributes.update(attributes)
+
+    def to_record(self) -> Dict[str, Any]:
+        """JSON として書き出すレコードに変換する"""
+        return {**asdict(self), "rows_per_second": self.rows_per_second}
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+_sinks: Dict[str, Sink] = {}
+_sinks_lock = threading.Lock()
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux は KB、macOS はバイト単位
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+@contextmanager
+def span(name: str, rows: Optional[int] = None, **attributes: Any) -> Iterator[Span]:
+    """
+    ブロックの処理をスパンとして計測する
+
+    ブロック内で開始したスパンは子スパンとなる（別スレッドで開始したものはルートとなる）。
+    行数は開始時に rows で指定するか、ブロック内で span.rows に設定する。
+    環境変数 ML_PROFILE_MEMORY を設定した場合は、tracemalloc によるメモリのピークと
+    確保元の上位も付加情報に追加する（src.utils.memory_profile）。
+
+    Args:
+        name (str): ステージ名
+        rows (int | None): 処理する行数
+        **attributes: 付加情報
+
+    Yields:
+        Span: 計測中のスパン
+    """
+    parent = _current.get()
+    current = Span(
+        name=name,
+        path=f"{parent.path}/{name}" if parent else name,
+        trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+        started_at=datetime.now(timezone.utc).isoformat(),
+        rows=rows,
+        attributes=dict(attributes),
+    )
+    token = _current.set(current)
+    memory = (
+        memory_profile.start(current.path, current.trace_id)
+        if memory_profile.memory_profiling_enabled()
+        else None
+    )
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.set(error=f"{type(e).__name__}: {str(e)}")
+        raise
+    finally:
+        current.wall_seconds = time.perf_counter() - wall_start
+        current.cpu_seconds = time.process_time() - cpu_start
+        current.peak_rss_mb = _peak_rss_mb()
+        if memory is not None:
+            current.set(**memory_profile.stop(memory))
+        _current.reset(token)
+        _emit(current, flush=parent is None)
+
+
+def timed(name: Optional[str] = None) -> Callable[[F], F]:
+    """
+    関数の呼び出しをスパンとして計測するデコレータ
+
+    戻り値が DataFrame / Series / ndarray など shape を持つ場合は、その長さを行数として
+    記録する。
+
+    Args:
+        name (str | None): ステージ名。None の場合は関数名
+    """
+
+    def decorator(func: F) -> F:
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(span_name) as current:
+                result = func(*args, **kwargs)
+                if current.rows is None and hasattr(result, "shape"):
+                    current.rows = len(result)
+                return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def current_span() -> Optional[Span]:
+    """実行中のスパンを取得する"""
+    return _current.get()
+
+
+class JsonLinesSink:
+    """スパンを JSON Lines 形式でローカルファイルに追記する"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, default=str)
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+
+
+class TableSink:
+    """
+    スパンを Snowflake のテーブルに追記する
+
+    書き込みのクエリを増やさないよう、ルートのスパンが終了するまでまとめてから
+    1回で追記する（テーブルが存在しない場合は作成される）。
+    """
+
+    def __init__(self, session: Session, table_name: str) -> None:
+        self.session = session
+        self.table_name = table_name
+        self._records: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._records.append(record)
+
+    def flush(self) -> None:
+        with self._lock:
+            records, self._records = self._records, []
+        if not records:
+            return
+        df = pd.DataFrame(records)
+        df["attributes"] = df["attributes"].map(lambda a: json.dumps(a, default=str))
+        df.columns = df.columns.str.upper()
+        self.session.create_dataframe(df).write.mode("append").save_as_table(
+            self.table_name
+        )
+
+
+def set_sink(key: str, sink: Optional[Sink]) -> None:
+    """
+    スパンの書き出し先を登録する（同じ key の書き出し先は置き換える）
+
+    Args:
+        key (str): 書き出し先の名前
+        sink (Callable | None): レコードを受け取る関数。None の場合は登録を解除する
+    """
+    with _sinks_lock:
+        if sink is None:
+            _sinks.pop(key, None)
+        else:
+            _sinks[key] = sink
+
+
+def clear_sinks() -> None:
+    """登録済みの書き出し先を全て解除する"""
+    with _sinks_lock:
+        _sinks.clear()
+
+
+def configure_tracing(session: Optional[Session] = None) -> None:
+    """
+    config の tracing の設定に従って書き出し先を登録する
+
+    Args:
+        session (Session | None): テーブルに書き出す場合のセッション
+    """
+    if config.tracing.file:
+        set_sink("file", JsonLinesSink(config.tracing.file))
+    if config.tracing.table and session is not None:
+        # query は SQL 文の実行記録のために tracing を読み込むため、ここで読み込む
+        from src.utils.query import qualified_name
+
+        database_name = session.get_current_database() or DATABASE_DEV
+        table_name = qualified_name(database_name, SCHEMA, config.tracing.table)
+        set_sink("table", TableSink(session, table_name))
+
+
+def _emit(current: Span, flush: bool) -> None:
+    """スパンをログと登録済みの書き出し先に出力する（書き出しの失敗で処理は止めない）"""
+    record = current.to_record()
+    logger.info(f"Span {json.dumps(record, default=str)}")
+    with _sinks_lock:
+        sinks = list(_sinks.items())
+    for key, sink in sinks:
+        try:
+            sink(record)
+            if flush and hasattr(sink, "flush"):
+                sink.flush()
+        except Exception as e:
+            logger.warning(f"Failed to write span to {key}: {str(e)}")
@@ -0,0 +1,14 @@
+import pytest
+
+from src.data.scores import clear_model_id_cache
+from src.models.registry import clear_registry_cache
+
+
+@pytest.fixture(autouse=True)
+def _clear_registry_cache():
+    """テスト間で Registry キャッシュ・MODEL_ID のキャッシュが共有されないようにする"""
+    clear_registry_cache()
+    clear_model_id_cache()
+    yield
+    clear_registry_cache()
+    clear_model_id_cache()
@@ -53,8 +53,9 @@ def test_create_ml_dataset_success(mock_snowflake_session):
     mock_snowflake_session.sql.assert_called_once()
     # 実行されたSQLにテーブル名とターゲット日付が含まれていることを確認
     sql_call = mock_snowflake_session.sql.call_args[0][0]
-    assert "TEST_DB.TEST_SCHEMA.dataset" in sql_call
-    assert "session_date <= '2024-03-20'" in sql_call
+    assert '"TEST_DB"."TEST_SCHEMA"."DATASET"' in sql_call
+    assert "session_date <= ?" in sql_call
+    assert mock_snowflake_session.sql.call_args.kwargs["params"] == ["2024-03-20"]
 
 
 def test_update_ml_dataset_with_data(
@@ -67,7 +68,7 @@ def test_update_ml_dataset_with_data(
     # upload_dataframe_to_snowflakeをモック
     mock_upload = mocker.patch("src.data.dataset.upload_dataframe_to_snowflake")
 
-    update_ml_dataset(
+    rows = update_ml_dataset(
         session=mock_snowflake_session,
         target_date="2024-03-20",
         database_name="TEST_DB",
@@ -75,6 +76,7 @@ def test_update_ml_dataset_with_data(
         table_name="dataset",
         source_table_name="online_shoppers_intention",
     )
+    assert rows == len(mock_snowflake_data)
 
     # SQLが実行されたことを確認
     mock_snowflake_session.sql.assert_called_once()
@@ -90,12 +92,13 @@ def test_update_ml_dataset_no_data(mock_snowflake_session, mocker):
     # upload_dataframe_to_snowflakeをモック
     mock_upload = mocker.patch("src.data.dataset.upload_dataframe_to_snowflake")
 
-    update_ml_dataset(
+    rows = update_ml_dataset(
         session=mock_snowflake_session,
         target_date="2024-03-20",
         database_name="TEST_DB",
         schema_name="TEST_SCHEMA",
     )
+    assert rows == 0
 
     # SQLは実行されるが、データがないためアップロードは実行されないことを確認
     mock_snowflake_session.sql.assert_called_once()
@@ -5,6 +5,8 @@ from src.data.loader import (
     fetch_prediction_dataset,
     fetch_test_dataset,
     fetch_training_dataset,
+    fetch_unscored_prediction_dataset,
+    iter_prediction_batches,
 )
 from src.utils.config import load_config
 
@@ -20,13 +22,11 @@ def mock_snowflake_session(mocker):
     mock_data = pd.DataFrame(
         {
             # カテゴリカル特徴量
-            **{
-                str(col): ["A"] * 5 for col in config["data"]["features"]["categorical"]
-            },
+            **{str(col): ["A"] * 5 for col in config.data.features.categorical},
             # 数値特徴量
-            **{str(col): [1.0] * 5 for col in config["data"]["features"]["numeric"]},
+            **{str(col): [1.0] * 5 for col in config.data.features.numeric},
             # ターゲット
-            str(config["data"]["target"]): [0, 1, 0, 1, 0],
+            str(config.data.target[0]): [0, 1, 0, 1, 0],
         }
     )
 
@@ -53,12 +53,16 @@ def test_fetch_training_dataset(mock_snowflake_session, mocker):
 
     # SQLクエリに学習用の日付条件が含まれていることを確認
     sql_query = mock_snowflake_session.sql.call_args[0][0]
-    period_months = config["data"]["period"]["months"]
+    period_months = config.data.period.months
     expected_end_date = mock_now.strftime("%Y-%m-%d")
     expected_start_date = (mock_now - pd.DateOffset(months=period_months)).strftime(
         "%Y-%m-%d"
     )
-    assert f"BETWEEN '{expected_start_date}' AND '{expected_end_date}'" in sql_query
+    assert "SESSION_DATE BETWEEN ? AND ?" in sql_query
+    assert mock_snowflake_session.sql.call_args.kwargs["params"] == [
+        expected_start_date,
+        expected_end_date,
+    ]
 
 
 def test_fetch_prediction_dataset(mock_snowflake_session):
@@ -75,7 +79,9 @@ def test_fetch_prediction_dataset(mock_snowflake_session):
 
     # SQLクエリに推論用の日付が含まれていることを確認
     sql_query = mock_snowflake_session.sql.call_args[0][0]
-    assert f"SESSION_DATE = '{prediction_date}'" in sql_query
+    assert "SESSION_DATE = ?" in sql_query
+    assert prediction_date not in sql_query
+    assert mock_snowflake_session.sql.call_args.kwargs["params"] == [prediction_date]
 
 
 def test_fetch_dataset_columns(mock_snowflake_session, mocker):
@@ -84,11 +90,9 @@ def test_fetch_dataset_columns(mock_snowflake_session, mocker):
     mock_data = pd.DataFrame(
         {
             "UID": ["1"] * 5,  # UIDカラムを追加
-            **{
-                str(col): ["A"] * 5 for col in config["data"]["features"]["categorical"]
-            },
-            **{str(col): [1.0] * 5 for col in config["data"]["features"]["numeric"]},
-            str(config["data"]["target"]): [0, 1, 0, 1, 0],
+            **{str(col): ["A"] * 5 for col in config.data.features.categorical},
+            **{str(col): [1.0] * 5 for col in config.data.features.numeric},
+            str(config.data.target[0]): [0, 1, 0, 1, 0],
         }
     )
 
@@ -103,9 +107,9 @@ def test_fetch_dataset_columns(mock_snowflake_session, mocker):
     # 期待されるカラム
     expected_columns = (
         ["UID"]
-        + [str(col) for col in config["data"]["features"]["categorical"]]
-        + [str(col) for col in config["data"]["features"]["numeric"]]
-        + [str(config["data"]["target"])]
+        + [str(col) for col in config.data.features.categorical]
+        + [str(col) for col in config.data.features.numeric]
+        + [str(config.data.target[0])]
     )
 
     # アサーション
@@ -176,6 +180,93 @@ def test_fetch_empty_prediction_dataset(mocker):
     assert "Error occurred during prediction dataset retrieval" in str(exc_info.value)
 
 
+def test_fetch_unscored_prediction_dataset(mock_snowflake_session):
+    """差分推論用データセット取得ではスコアテーブルと anti-join すること"""
+    df = fetch_unscored_prediction_dataset(
+        mock_snowflake_session, prediction_date="2024-12-01", model_id=3
+    )
+
+    assert isinstance(df, pd.DataFrame)
+    sql_query = " ".join(mock_snowflake_session.sql.call_args[0][0].split())
+    assert "d.SESSION_DATE = ?" in sql_query
+    assert "NOT EXISTS" in sql_query
+    assert 'FROM "ONLINE_SHOPPERS_INTENTION"."SCORES_BASE" s' in sql_query
+    assert "s.MODEL_ID = ?" in sql_query
+    assert mock_snowflake_session.sql.call_args.kwargs["params"] == ["2024-12-01", 3]
+
+
+def test_fetch_empty_unscored_prediction_dataset(mocker):
+    """未スコアの行がない場合はエラーにせず空のデータフレームを返すこと"""
+    empty_session = mocker.Mock()
+    empty_session.sql.return_value.to_pandas.return_value = pd.DataFrame()
+
+    df = fetch_unscored_prediction_dataset(
+        empty_session, prediction_date="2024-12-01", model_id=3
+    )
+
+    assert len(df) == 0
+    empty_session.sql.assert_called_once()
+
+
+def test_iter_prediction_batches(mocker):
+    """可変長で受信したデータを固定行数のバッチにまとめ直すこと"""
+    session = mocker.Mock()
+    received = [pd.DataFrame({"UID": range(n)}) for n in (3, 5, 1, 4)]
+    session.sql.return_value.to_pandas_batches.return_value = iter(received)
+
+    batches = list(
+        iter_prediction_batches(session, prediction_date="2024-12-01", batch_size=4)
+    )
+
+    assert [len(b) for b in batches] == [4, 4, 4, 1]
+    assert pd.concat(batches)["UID"].tolist() == [
+        *range(3),
+        *range(5),
+        *range(1),
+        *range(4),
+    ]
+    sql_query = session.sql.call_args[0][0]
+    assert "d.SESSION_DATE = ?" in sql_query
+    assert "NOT EXISTS" not in sql_query
+    assert session.sql.call_args.kwargs["params"] == ["2024-12-01"]
+
+
+def test_iter_prediction_batches_unscored(mocker):
+    """model_id を指定した場合は未スコアの行のみを取得すること"""
+    session = mocker.Mock()
+    session.sql.return_value.to_pandas_batches.return_value = iter([])
+
+    batches = list(
+        iter_prediction_batches(
+            session, prediction_date="2024-12-01", batch_size=4, model_id=3
+        )
+    )
+
+    assert batches == []
+    assert "s.MODEL_ID = ?" in session.sql.call_args[0][0]
+    assert session.sql.call_args.kwargs["params"] == ["2024-12-01", 3]
+
+
+def test_iter_prediction_batches_date_range(mocker):
+    """end_date を指定した場合は期間のデータを SESSION_DATE 付きで取得すること"""
+    session = mocker.Mock()
+    session.sql.return_value.to_pandas_batches.return_value = iter([])
+
+    list(
+        iter_prediction_batches(
+            session,
+            prediction_date="2024-12-01",
+            batch_size=4,
+            end_date="2024-12-31",
+        )
+    )
+
+    sql_query = " ".join(session.sql.call_args[0][0].split())
+    assert 'SELECT "D"."SESSION_DATE", "D"."UID"' in sql_query
+    assert "d.SESSION_DATE BETWEEN ? AND ?" in sql_query
+    assert session.sql.call_args.kwargs["params"] == ["2024-12-01", "2024-12-31"]
+
+
 def test_fetch_test_dataset(mock_snowflake_session, mocker):
     """テスト用データセット取得のテスト"""
     # モデルバージョンのモック作成
@@ -193,7 +284,11 @@ def test_fetch_test_dataset(mock_snowflake_session, mocker):
     sql_query = mock_snowflake_session.sql.call_args[0][0]
     expected_start_date = "2025-01-31"  # モデル作成日の翌日
     expected_end_date = "2025-02-13"  # モデル作成日から14日後
-    assert f"BETWEEN '{expected_start_date}' AND '{expected_end_date}'" in sql_query
+    assert "BETWEEN ? AND ?" in sql_query
+    assert mock_snowflake_session.sql.call_args.kwargs["params"] == [
+        expected_start_date,
+        expected_end_date,
+    ]
 
 
 def test_fetch_test_dataset_error(mocker):
@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.scores import (
+    delete_shadow_scores,
+    get_model_id,
+    write_shadow_scores,
+)
+from src.utils.query import Query
+
+
+@pytest.fixture
+def mock_snowflake_session(mocker):
+    """Snowflakeセッションのモック"""
+    session = mocker.Mock()
+    session.sql.return_value.collect.return_value = [(3,)]
+    return session
+
+
+def test_get_model_id(mock_snowflake_session):
+    """登録済みなら参照のみで MODEL_ID を返すこと"""
+    model_id = get_model_id(
+        mock_snowflake_session, "TEST_DB", "TEST_SCHEMA", "random_forest", "v_1"
+    )
+
+    assert model_id == 3
+    (select_call,) = mock_snowflake_session.sql.call_args_list
+    select_sql = select_call[0][0]
+    assert 'FROM "TEST_DB"."TEST_SCHEMA"."MODELS"' in select_sql
+    assert "random_forest" not in select_sql
+    assert select_call.kwargs["params"] == ["random_forest", "v_1"]
+
+
+def test_get_model_id_registers_with_merge(mock_snowflake_session):
+    """未登録なら MERGE で登録してから MODEL_ID を返すこと"""
+    mock_snowflake_session.sql.return_value.collect.side_effect = [[], [], [(4,)]]
+
+    model_id = get_model_id(
+        mock_snowflake_session, "TEST_DB", "TEST_SCHEMA", "random_forest", "v_1"
+    )
+
+    assert model_id == 4
+    _, merge_call, _ = mock_snowflake_session.sql.call_args_list
+    merge_sql = " ".join(merge_call[0][0].split())
+    assert merge_sql.startswith('MERGE INTO "TEST_DB"."TEST_SCHEMA"."MODELS"')
+    # MODEL_ID はシーケンスの既定値で採番する
+    assert "INSERT (MODEL_NAME, MODEL_VERSION)" in merge_sql
+    assert merge_call.kwargs["params"] == ["random_forest", "v_1"]
+
+
+def test_get_model_id_is_cached_per_session(mock_snowflake_session):
+    """同じセッションで解決済みの MODEL_ID はクエリを発行せずに返すこと"""
+    args = ("TEST_DB", "TEST_SCHEMA", "random_forest", "v_1")
+
+    assert get_model_id(mock_snowflake_session, *args) == 3
+    assert get_model_id(mock_snowflake_session, *args) == 3
+
+    assert mock_snowflake_session.sql.call_count == 1
+
+
+def test_get_model_id_not_found(mock_snowflake_session):
+    """登録に失敗した場合はエラーになること"""
+    mock_snowflake_session.sql.return_value.collect.return_value = []
+
+    with pytest.raises(ValueError, match="Failed to register model"):
+        get_model_id(
+            mock_snowflake_session, "TEST_DB", "TEST_SCHEMA", "random_forest", "v_1"
+        )
+
+
+def test_write_shadow_scores(mock_snowflake_session):
+    """シャドウスコアを MODEL_ID 付きの縦持ちで書き込むこと"""
+    write_shadow_scores(
+        session=mock_snowflake_session,
+        uids=pd.Series(["a", "b"]),
+        session_date="2024-10-01",
+        model_ids={"v_1": 1, "v_2": 2},
+        scores={"v_1": np.array([0.1, 0.2]), "v_2": np.array([0.3, 0.4])},
+        database_name="TEST_DB",
+        schema_name="TEST_SCHEMA",
+    )
+
+    delete_sql = " ".join(mock_snowflake_session.sql.call_args[0][0].split())
+    assert delete_sql == (
+        'DELETE FROM "TEST_DB"."TEST_SCHEMA"."SCORES_SHADOW" '
+        "WHERE SESSION_DATE IN "
+        "(SELECT VALUE::DATE FROM TABLE(FLATTEN(INPUT => PARSE_JSON(?)))) "
+        "AND MODEL_ID IN "
+        "(SELECT VALUE::NUMBER FROM TABLE(FLATTEN(INPUT => PARSE_JSON(?))))"
+    )
+    assert mock_snowflake_session.sql.call_args.kwargs["params"] == [
+        '["2024-10-01"]',
+        "[1, 2]",
+    ]
+
+    written = mock_snowflake_session.create_dataframe.call_args[0][0]
+    assert list(written.columns) == ["UID", "SESSION_DATE", "MODEL_ID", "SCORE"]
+    assert written["MODEL_ID"].tolist() == [1, 1, 2, 2]
+    np.testing.assert_array_equal(written["SCORE"].values, [0.1, 0.2, 0.3, 0.4])
+    mock_snowflake_session.create_dataframe.return_value.write.mode.assert_called_once_with(
+        "append"
+    )
+
+
+def test_write_shadow_scores_without_replace(mock_snowflake_session):
+    """replace=False の場合は既存行を削除せず追記のみ行うこと"""
+    write_shadow_scores(
+        session=mock_snowflake_session,
+        uids=pd.Series(["a"]),
+        session_date="2024-10-01",
+        model_ids={"v_1": 1},
+        scores={"v_1": np.array([0.1])},
+        database_name="TEST_DB",
+        schema_name="TEST_SCHEMA",
+        replace=False,
+    )
+
+    mock_snowflake_session.sql.assert_not_called()
+    mock_snowflake_session.create_dataframe.assert_called_once()
+
+
+def test_write_shadow_scores_with_row_dates(mock_snowflake_session):
+    """行ごとの日付を渡した場合は、含まれる日付の既存行を置き換えること"""
+    write_shadow_scores(
+        session=mock_snowflake_session,
+        uids=pd.Series(["a", "b", "c"]),
+        session_date=pd.Series(["2024-10-02", "2024-10-01", "2024-10-02"]),
+        model_ids={"v_1": 1},
+        scores={"v_1": np.array([0.1, 0.2, 0.3])},
+        database_name="TEST_DB",
+        schema_name="TEST_SCHEMA",
+    )
+
+    params = mock_snowflake_session.sql.call_args.kwargs["params"]
+    assert params[0] == '["2024-10-01", "2024-10-02"]'
+    written = mock_snowflake_session.create_dataframe.call_args[0][0]
+    assert written["SESSION_DATE"].tolist() == [
+        "2024-10-02",
+        "2024-10-01",
+        "2024-10-02",
+    ]
+
+
+def test_delete_shadow_scores(mock_snowflake_session):
+    """日付条件と MODEL_ID で削除すること"""
+    delete_shadow_scores(
+        session=mock_snowflake_session,
+        model_ids=[1, 2],
+        date_condition=Query(
+            "SESSION_DATE BETWEEN ? AND ?", ("2024-10-01", "2024-10-31")
+        ),
+        database_name="TEST_DB",
+        schema_name="TEST_SCHEMA",
+    )
+
+    delete_sql = " ".join(mock_snowflake_session.sql.call_args[0][0].split())
+    assert delete_sql.startswith(
+        'DELETE FROM "TEST_DB"."TEST_SCHEMA"."SCORES_SHADOW" '
+        "WHERE SESSION_DATE BETWEEN ? AND ? AND MODEL_ID IN"
+    )
+    assert mock_snowflake_session.sql.call_args.kwargs["params"] == [
+        "2024-10-01",
+        "2024-10-31",
+        "[1, 2]",
+    ]
@@ -0,0 +1,67 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from src.local import LocalRegistry
+
+
+@pytest.fixture
+def features():
+    return pd.DataFrame({"A": [0.0, 1.0, 2.0, 3.0], "B": [1.0, 0.0, 1.0, 0.0]})
+
+
+@pytest.fixture
+def model(features):
+    return LogisticRegression().fit(features, [0, 0, 1, 1])
+
+
+def test_log_and_run(tmp_path, model, features):
+    """保存したモデルを読み込み、ModelVersion.run と同じ形式で推論する場合"""
+    registry = LocalRegistry(tmp_path)
+    mv = registry.log_model(
+        model,
+        model_name="random_forest",
+        version_name="v_250101_000000",
+        metrics={"PR-AUC": np.float64(0.9)},
+        sample_input_data=features.head(1),
+    )
+
+    assert (mv.model_name, mv.version_name) == ("RANDOM_FOREST", "V_250101_000000")
+    assert mv.get_metric("PR-AUC") == 0.9
+
+    result = mv.run(features, function_name="predict_proba")
+    np.testing.assert_allclose(
+        result.output_feature_1.values, model.predict_proba(features)[:, 1]
+    )
+    labels = mv.run(features, function_name="predict").output_feature_0.values
+    np.testing.assert_array_equal(labels, model.predict(features))
+
+    with pytest.raises(ValueError, match="already exists"):
+        registry.log_model(
+            model, model_name="random_forest", version_name="v_250101_000000"
+        )
+
+
+def test_default_and_last(tmp_path, model):
+    """デフォルトは最初のバージョン、last は最後に登録したバージョンとなる場合"""
+    registry = LocalRegistry(tmp_path)
+    for version_name in ("v_1", "v_2"):
+        registry.log_model(model, model_name="rf", version_name=version_name)
+        time.sleep(0.01)
+
+    model_ref = registry.get_model("rf")
+    assert model_ref.default.version_name == "V_1"
+    assert model_ref.last().version_name == "V_2"
+
+    model_ref.default = model_ref.version("v_2")
+    # 別のインスタンス（別プロセス）からも更新後のデフォルトを参照できる
+    assert LocalRegistry(tmp_path).get_model("RF").default.version_name == "V_2"
+    assert model_ref.show_versions()["is_default_version"].tolist() == [False, True]
+
+    with pytest.raises(ValueError, match="V_3"):
+        model_ref.version("v_3")
+    with pytest.raises(ValueError, match="UNKNOWN"):
+        registry.get_model("unknown")
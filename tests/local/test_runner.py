@@ -0,0 +1,217 @@
+import dataclasses
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.local import LocalDagRunner, LocalSession, LocalStep
+from src.local.runner import (
+    cache_keys,
+    default_procedures,
+    pipeline_steps,
+    steps_from_tasks,
+)
+from src.models.registry import MODEL_NAME, get_registry
+from src.models.trainer import create_model_pipeline
+from src.setup import setup_steps
+from src.tasks.dag import DAILY_DAG, TARGET_DATE
+from src.utils.async_query import AsyncQueryExecutor
+from src.utils.constants import (
+    CATEGORICAL_FEATURES,
+    DATASET,
+    NUMERICAL_FEATURES,
+    SCHEMA,
+    SCORES_BASE,
+    SOURCE,
+)
+from src.utils.snowflake import upload_dataframe_to_snowflake
+
+
+class FakeProcedures:
+    """呼び出しを記録するストアドプロシージャの代替"""
+
+    def __init__(self, fail_times: int = 0) -> None:
+        self.calls = []
+        self.fail_times = fail_times
+        self._lock = threading.Lock()
+
+    def __call__(self, name):
+        def procedure(session, *args):
+            with self._lock:
+                self.calls.append((name, *args))
+                failures = sum(1 for c in self.calls if c[0] == name)
+            if failures <= self.fail_times:
+                raise RuntimeError(f"{name} failed")
+            return 1
+
+        procedure.__qualname__ = name
+        return procedure
+
+    def mapping(self):
+        return {
+            name: self(name)
+            for name in ("dataset", "prediction", "training", "offline_testing")
+        }
+
+
+def test_steps_from_tasks():
+    """タスクの定義から日付ごとのステップを作成する場合"""
+    procedures = FakeProcedures().mapping()
+    dataset, prediction = steps_from_tasks(
+        DAILY_DAG, procedures, {TARGET_DATE: "2024-10-01"}, partition="2024-10-01"
+    )
+
+    assert dataset.name == "task_dataset[2024-10-01]"
+    assert dataset.args == ("2024-10-01",) and dataset.depends_on == ()
+    assert prediction.depends_on == ("task_dataset[2024-10-01]",)
+    with pytest.raises(ValueError):
+        steps_from_tasks(DAILY_DAG, procedures)
+
+
+def test_run_pipeline_in_dependency_order():
+    """日付ごとの処理を並列に、学習はデータセット更新の後、推論は学習の後に実行する場合"""
+    fake = FakeProcedures()
+    # 2つの日付のデータセット更新が同時に実行されなければ待ち合わせがタイムアウトする
+    barrier = threading.Barrier(2, timeout=5)
+    procedures = fake.mapping()
+    dataset = procedures["dataset"]
+    procedures["dataset"] = lambda session, d: (barrier.wait(), dataset(session, d))
+    steps = pipeline_steps(["2024-10-01", "2024-10-02"], procedures)
+
+    results = LocalDagRunner(object(), max_workers=2).run(steps)
+
+    assert len(results) == 6
+    order = [c[0] for c in fake.calls]
+    assert order.index("training") > max(
+        i for i, name in enumerate(order) if name == "dataset"
+    )
+    assert results["task_offline_testing"].start >= results["task_training"].end
+    for d in ("2024-10-01", "2024-10-02"):
+        prediction = results[f"task_prediction[{d}]"]
+        assert prediction.start >= results[f"task_dataset[{d}]"].end
+        assert prediction.start >= results["task_training"].end
+
+
+def test_prediction_cache_key_depends_on_training():
+    """学習の入力が変わった場合は推論のキャッシュのキーも変わる場合"""
+    procedures = FakeProcedures().mapping()
+    before = cache_keys(pipeline_steps(["2024-10-01"], procedures))
+    procedures["training"] = FakeProcedures()("training_v2")
+    after = cache_keys(pipeline_steps(["2024-10-01"], procedures))
+
+    assert before["task_dataset[2024-10-01]"] == after["task_dataset[2024-10-01]"]
+    assert before["task_prediction[2024-10-01]"] != after["task_prediction[2024-10-01]"]
+
+    daily = pipeline_steps(["2024-10-01"], procedures, model=False)
+    assert daily[1].depends_on == ("task_dataset[2024-10-01]",)
+
+
+def test_retry():
+    """失敗したステップを再試行する場合"""
+    fake = FakeProcedures(fail_times=1)
+    steps = [LocalStep("a", fake("a")), LocalStep("b", fake("b"), depends_on=("a",))]
+
+    results = LocalDagRunner(object(), retries=1, retry_delay=0).run(steps)
+
+    assert results["a"].attempts == 2 and results["b"].attempts == 2
+
+
+def test_failure_stops_dependents():
+    """再試行しても失敗した場合は後続のステップを実行せずに例外を送出する場合"""
+    fake = FakeProcedures(fail_times=1)
+    steps = [LocalStep("a", fake("a")), LocalStep("b", fake("b"), depends_on=("a",))]
+
+    with pytest.raises(RuntimeError, match="Step 'a' failed"):
+        LocalDagRunner(object()).run(steps)
+    assert fake.calls == [("a",)]
+
+
+def test_cache(tmp_path):
+    """入力が同じ完了済みのステップを省略し、依存先の入力が変わった場合は再実行する場合"""
+    cache_path = str(tmp_path / "cache.json")
+    fake = FakeProcedures()
+
+    def steps(day):
+        return [
+            LocalStep("a", fake("a"), args=(day,)),
+            LocalStep("b", fake("b")),
+            LocalStep("c", fake("c"), depends_on=("a", "b")),
+        ]
+
+    LocalDagRunner(object(), cache_path=cache_path).run(steps("2024-10-01"))
+    fake.calls.clear()
+
+    results = LocalDagRunner(object(), cache_path=cache_path).run(steps("2024-10-01"))
+    assert fake.calls == []
+    assert all(r.cached for r in results.values())
+
+    results = LocalDagRunner(object(), cache_path=cache_path).run(steps("2024-10-02"))
+    assert sorted(c[0] for c in fake.calls) == ["a", "c"]
+    assert results["b"].cached and not results["c"].cached
+
+
+def _source(session_dates, rows_per_date=30):
+    """ソーステーブルと同じカラム構成のデータ"""
+    rng = np.random.default_rng(0)
+    n_rows = rows_per_date * len(session_dates)
+    df = pd.DataFrame(
+        {col: rng.exponential(10.0, n_rows).round(2) for col in NUMERICAL_FEATURES}
+    )
+    for col in [*CATEGORICAL_FEATURES, "OPERATINGSYSTEMS"]:
+        df[col] = rng.integers(0, 2 if col == "WEEKEND" else 5, n_rows)
+    df["VISITORTYPE"] = rng.choice(["New_Visitor", "Returning_Visitor"], n_rows)
+    df["UID"] = [f"u{i:05d}" for i in range(n_rows)]
+    df["SESSION_DATE"] = np.repeat(session_dates, rows_per_date)
+    df["REVENUE"] = rng.random(n_rows) < 0.3
+    return df
+
+
+def test_parallel_dates_on_local_session():
+    """LocalSession で日付ごとのステップを並列に実行しても各日付の行が揃う場合"""
+    today = date.today()
+    history = [today - timedelta(days=d) for d in range(5, 0, -1)]
+    targets = [today + timedelta(days=d) for d in (1, 2)]
+    session = LocalSession()
+    database_name = session.get_current_database()
+
+    def upload_source(s):
+        upload_dataframe_to_snowflake(
+            s, _source(history + targets), database_name, SCHEMA, SOURCE
+        )
+
+    AsyncQueryExecutor(session).run(
+        [
+            dataclasses.replace(step, action=upload_source)
+            if step.name == "source"
+            else step
+            for step in setup_steps(database_name)
+        ]
+    )
+    dataset = session.table(DATASET).to_pandas()
+    features = dataset.drop(columns=["UID", "SESSION_DATE", "REVENUE"])
+    model = create_model_pipeline(params={"n_estimators": 5})
+    get_registry(session).log_model(
+        model.fit(features, dataset["REVENUE"]),
+        model_name=MODEL_NAME,
+        version_name="v_1",
+        sample_input_data=features.head(1),
+    )
+
+    dates = [d.isoformat() for d in targets]
+    steps = pipeline_steps(dates, default_procedures(), model=False)
+    try:
+        LocalDagRunner(session, max_workers=2, retries=0).run(steps)
+
+        def counts(table):
+            query = f"SELECT SESSION_DATE::VARCHAR, COUNT(*) FROM {table} GROUP BY 1"
+            return dict(session.sql(query).collect())
+
+        expected = {d: 30 for d in dates}
+        assert {d: counts(DATASET).get(d) for d in dates} == expected
+        assert {d: counts(SCORES_BASE).get(d) for d in dates} == expected
+        # 各ステップのセッションで切り替えたデータベースは元のセッションに影響しない
+        assert session.get_current_database() == database_name
+    finally:
+        session.close()
@@ -0,0 +1,117 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from src.data.scores import clear_model_id_cache, get_model_id
+from src.local import LocalSession, translate_sql
+from src.models.registry import get_default_version, get_registry
+from src.utils.query import Query, in_list, run_query
+from src.utils.snowflake import session_date_condition
+
+
+@pytest.fixture
+def session():
+    session = LocalSession()
+    yield session
+    session.close()
+
+
+def test_translate_sql():
+    """Snowflake 固有の構文を DuckDB の構文に書き換える場合"""
+    sql = translate_sql(
+        "SELECT COUNT_IF(A = 1) FROM T WHERE B IN "
+        "(SELECT VALUE::NUMBER FROM TABLE(FLATTEN(INPUT => PARSE_JSON(?))))"
+    )
+    assert "FLATTEN" not in sql
+    assert "CAST(VALUE AS BIGINT)" in sql
+    assert "memory.main.SF_COUNT_IF(A = 1)" in sql
+
+    sql = translate_sql("create table T (A DATE) cluster by (A)")
+    assert "cluster" not in sql
+
+
+def test_write_and_read(session):
+    """save_as_table で書き込み、条件付きの SQL 文で読み込む場合"""
+    df = pd.DataFrame(
+        {
+            "UID": ["a", "b", "c"],
+            "SESSION_DATE": [date(2024, 10, 1), date(2024, 10, 2), date(2024, 10, 3)],
+        }
+    )
+    session.create_dataframe(df).write.mode("overwrite").save_as_table("T")
+    session.create_dataframe(df.head(1)).write.mode("append").save_as_table("T")
+    assert session.table("T").count() == 4
+
+    query = Query("SELECT UID, SESSION_DATE FROM T WHERE ") + session_date_condition(
+        "2024-10-02", "2024-10-03"
+    )
+    result = run_query(session, query).to_pandas()
+    assert result["UID"].tolist() == ["b", "c"]
+    assert result["SESSION_DATE"].tolist() == [date(2024, 10, 2), date(2024, 10, 3)]
+
+    in_dates = Query("SELECT COUNT(*) FROM T WHERE ") + in_list(
+        "SESSION_DATE", ["2024-10-01", "2024-10-03"]
+    )
+    assert run_query(session, in_dates).collect() == [(3,)]
+
+    batches = list(run_query(session, Query("SELECT * FROM T")).to_pandas_batches())
+    assert sum(len(b) for b in batches) == 4
+
+    with pytest.raises(ValueError, match="already exists"):
+        session.create_dataframe(df).write.save_as_table("T")
+
+
+def test_async_job_and_query_history(session):
+    """collect_nowait のクエリ ID が query_history の記録と一致する場合"""
+    with session.query_history(include_thread_id=True) as history:
+        job = session.sql("SELECT 1").collect_nowait()
+    assert job.is_done()
+    assert job.result() == [(1,)]
+    assert [q.query_id for q in history.queries] == [job.query_id]
+
+    failed = session.sql("SELECT * FROM MISSING").collect_nowait()
+    with pytest.raises(Exception, match="MISSING"):
+        failed.result()
+
+
+def test_get_model_id(session):
+    """モデルディメンションテーブルへの採番が Snowflake と同じ結果になる場合"""
+    database_name = session.get_current_database()
+    session.sql("CREATE SCHEMA IF NOT EXISTS ML").collect()
+    session.sql("CREATE SEQUENCE ML.MODELS_ID_SEQ").collect()
+    session.sql(
+        "CREATE TABLE ML.MODELS (MODEL_ID NUMBER DEFAULT ML.MODELS_ID_SEQ.NEXTVAL, "
+        "MODEL_NAME VARCHAR, MODEL_VERSION VARCHAR, primary key (MODEL_ID))"
+    ).collect()
+
+    assert get_model_id(session, database_name, "ML", "RF", "V_1") == 1
+    assert get_model_id(session, database_name, "ML", "RF", "V_2") == 2
+    clear_model_id_cache()
+    assert get_model_id(session, database_name, "ML", "RF", "V_1") == 1
+    assert session.sql("SELECT COUNT(*) FROM ML.MODELS").collect() == [(2,)]
+
+
+def test_create_registry(session):
+    """src.models.registry がローカルの Registry を使用する場合"""
+    registry = get_registry(session)
+    assert registry is session.create_registry()
+
+    registry.log_model(
+        {"weights": [1, 2]}, model_name="random_forest", version_name="v_1"
+    )
+    assert get_default_version(session).version_name == "V_1"
+
+
+def test_cursor(session):
+    """cursor のセッションはデータベースを共有し、カレントのスキーマは独立する場合"""
+    session.sql("CREATE TABLE T (A INTEGER)").collect()
+    child = session.cursor()
+    try:
+        child.sql("INSERT INTO T VALUES (1)").collect()
+        child.use_schema("OTHER")
+        assert session.get_current_schema() != child.get_current_schema()
+        assert session.sql("SELECT COUNT(*) FROM T").collect() == [(1,)]
+    finally:
+        child.close()
+    assert session.sql("SELECT COUNT(*) FROM T").collect() == [(1,)]
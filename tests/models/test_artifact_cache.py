@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from src.models import artifact_cache
+from src.models.artifact_cache import (
+    ModelArtifactCache,
+    clear_loaded_models,
+    load_local_derived,
+    load_local_model,
+)
+from src.utils.config import load_config, replace_config
+
+
+@pytest.fixture
+def fitted_model():
+    """キャッシュ対象の学習済みモデル"""
+    X = pd.DataFrame({"f1": np.arange(20, dtype=float), "f2": np.ones(20)})
+    y = np.array([0, 1] * 10)
+    return LogisticRegression().fit(X, y), X
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ModelArtifactCache(cache_dir=tmp_path, max_bytes=10 * 1024 * 1024)
+
+
+def test_put_and_get_roundtrip(cache, fitted_model):
+    """保存したモデルを読み込んで同じ推論結果が得られること"""
+    model, X = fitted_model
+    cache.put("random_forest", "v_1", model)
+
+    loaded = cache.get("random_forest", "v_1")
+
+    np.testing.assert_array_equal(loaded.predict_proba(X), model.predict_proba(X))
+
+
+def test_get_missing_returns_none(cache):
+    """キャッシュにないバージョンは None を返すこと"""
+    assert cache.get("random_forest", "v_missing") is None
+
+
+def test_corrupted_artifact_is_discarded(cache, fitted_model):
+    """内容が改ざんされたアーティファクトは破棄されること"""
+    model, _ = fitted_model
+    path = cache.put("random_forest", "v_1", model)
+
+    with open(path, "r+b") as f:
+        f.seek(-8, 2)
+        f.write(b"\x00" * 8)
+
+    assert cache.get("random_forest", "v_1") is None
+    assert not path.exists()
+
+
+def test_invalid_version_name_rejected(cache):
+    """パスとして不正なバージョン名は拒否されること"""
+    with pytest.raises(ValueError, match="Invalid model or version name"):
+        cache.artifact_path("random_forest", "../v_1")
+
+
+def test_lru_eviction(tmp_path, fitted_model):
+    """サイズ上限を超えた場合に最終アクセスが古いものから削除されること"""
+    model, _ = fitted_model
+    probe = ModelArtifactCache(cache_dir=tmp_path / "probe", max_bytes=1 << 30)
+    size = probe.put("random_forest", "v_probe", model).stat().st_size
+
+    cache = ModelArtifactCache(cache_dir=tmp_path / "lru", max_bytes=size * 2)
+    cache.put("random_forest", "v_1", model)
+    cache.put("random_forest", "v_2", model)
+    # v_1 にアクセスして v_2 を最も古い状態にする
+    assert cache.get("random_forest", "v_1") is not None
+    cache.put("random_forest", "v_3", model)
+
+    assert cache.artifact_path("random_forest", "v_1").exists()
+    assert not cache.artifact_path("random_forest", "v_2").exists()
+    assert cache.artifact_path("random_forest", "v_3").exists()
+
+
+def test_load_local_model_downloads_once(mocker, tmp_path, fitted_model):
+    """ダウンロードは初回のみで、以降はキャッシュから読み込まれること"""
+    model, X = fitted_model
+    mocker.patch.object(
+        artifact_cache,
+        "_artifact_cache",
+        ModelArtifactCache(cache_dir=tmp_path, max_bytes=1 << 30),
+    )
+    clear_loaded_models()
+
+    mv = mocker.Mock()
+    mv.model_name = "random_forest"
+    mv.version_name = "v_1"
+    mv.load.return_value = model
+
+    first = load_local_model(mv)
+    second = load_local_model(mv)
+    # プロセス内のモデルを破棄してもディスクキャッシュから読み込まれる
+    clear_loaded_models()
+    third = load_local_model(mv)
+
+    assert first is second
+    mv.load.assert_called_once()
+    np.testing.assert_array_equal(third.predict_proba(X), model.predict_proba(X))
+    clear_loaded_models()
+
+
+def test_put_publishes_sidecar_before_artifact(mocker, cache, fitted_model):
+    """アーティファクトを置き換える時点でサイドカーが揃っていること"""
+    model, _ = fitted_model
+    path = cache.artifact_path("random_forest", "v_1")
+    replace = artifact_cache.os.replace
+    published = []
+
+    def tracking_replace(src, dst):
+        replace(src, dst)
+        if dst == path:
+            published.append(cache._is_valid(path))
+
+    mocker.patch.object(artifact_cache.os, "replace", side_effect=tracking_replace)
+    cache.put("random_forest", "v_1", model)
+
+    assert published == [True]
+    assert not list(path.parent.glob("*.tmp"))
+
+
+def test_loaded_models_are_bounded(mocker, tmp_path, fitted_model):
+    """プロセス内に保持するモデルが上限を超えた場合、最も古いものが破棄されること"""
+    model, _ = fitted_model
+    mocker.patch.object(
+        artifact_cache,
+        "_artifact_cache",
+        ModelArtifactCache(cache_dir=tmp_path, max_bytes=1 << 30),
+    )
+    mocker.patch.object(
+        artifact_cache,
+        "config",
+        replace_config(load_config(), "model.inference", loaded_max_models=2),
+    )
+    clear_loaded_models()
+
+    versions = []
+    for name in ("v_1", "v_2", "v_3"):
+        mv = mocker.Mock()
+        mv.model_name = "random_forest"
+        mv.version_name = name
+        mv.load.return_value = model
+        versions.append(mv)
+
+    load_local_model(versions[0])
+    load_local_model(versions[1])
+    # v_1 を使って v_2 を最も古い状態にする
+    load_local_model(versions[0])
+    load_local_model(versions[2])
+
+    assert list(artifact_cache._loaded_models) == [
+        ("random_forest", "v_1"),
+        ("random_forest", "v_3"),
+    ]
+    clear_loaded_models()
+
+
+def test_derived_released_with_model(mocker, tmp_path, fitted_model):
+    """変換結果はモデルごとに一度だけ作成し、モデルと一緒に破棄されること"""
+    model, _ = fitted_model
+    mocker.patch.object(
+        artifact_cache,
+        "_artifact_cache",
+        ModelArtifactCache(cache_dir=tmp_path, max_bytes=1 << 30),
+    )
+    mocker.patch.object(
+        artifact_cache,
+        "config",
+        replace_config(load_config(), "model.inference", loaded_max_models=1),
+    )
+    clear_loaded_models()
+    build = mocker.Mock(side_effect=lambda m: object())
+
+    versions = []
+    for name in ("v_1", "v_2"):
+        mv = mocker.Mock()
+        mv.model_name = "random_forest"
+        mv.version_name = name
+        mv.load.return_value = model
+        versions.append(mv)
+
+    first = load_local_derived(versions[0], "compiled", build)
+    assert load_local_derived(versions[0], "compiled", build) is first
+    assert build.call_count == 1
+
+    # v_2 を読み込むと v_1 のモデルと変換結果が破棄される
+    load_local_model(versions[1])
+    assert load_local_derived(versions[0], "compiled", build) is not first
+    assert build.call_count == 2
+    clear_loaded_models()
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from src.models.compiled_forest import compile_pipeline
+from src.models.trainer import create_model_pipeline
+from src.utils.config import load_config
+
+config = load_config()
+NUMERIC = config.data.features.numeric
+CATEGORICAL = config.data.features.categorical
+
+
+def _make_features(n_samples: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            **{col: rng.exponential(10.0, n_samples).round(2) for col in NUMERIC},
+            **{col: rng.integers(1, 6, n_samples) for col in CATEGORICAL},
+            "VISITORTYPE": rng.choice(["New_Visitor", "Returning_Visitor"], n_samples),
+        }
+    )
+
+
+@pytest.fixture(scope="module")
+def fitted_pipeline():
+    """学習済みのモデルパイプライン"""
+    X = _make_features(500, seed=0)
+    y = (X["PAGEVALUES"] + np.random.default_rng(0).normal(0, 5, len(X)) > 10).astype(
+        int
+    )
+    pipeline = create_model_pipeline(
+        params={"n_estimators": 20, "max_depth": 8}, random_state=0
+    )
+    return pipeline.fit(X, y), X
+
+
+def test_predict_proba_identical_to_sklearn(fitted_pipeline):
+    """未知カテゴリ・欠損値を含む入力でも sklearn と完全に一致すること"""
+    pipeline, _ = fitted_pipeline
+    compiled = compile_pipeline(pipeline)
+
+    X = _make_features(300, seed=1)
+    X.loc[:9, "PAGEVALUES"] = np.nan
+    X.loc[10:19, "VISITORTYPE"] = "Other"
+    X.loc[20:29, "BROWSER"] = 99
+
+    np.testing.assert_array_equal(compiled.predict_proba(X), pipeline.predict_proba(X))
+    np.testing.assert_array_equal(compiled.predict(X), pipeline.predict(X))
+
+
+def test_folded_thresholds_match_at_boundaries(fitted_pipeline):
+    """畳み込んだ閾値ちょうど・前後の値でも sklearn と分岐が一致すること"""
+    pipeline, X = fitted_pipeline
+    compiled = compile_pipeline(pipeline)
+
+    numeric_split = (compiled.feature < len(NUMERIC)) & np.isfinite(compiled.threshold)
+    rows = []
+    for feature, threshold in zip(
+        compiled.feature[numeric_split], compiled.threshold[numeric_split]
+    ):
+        for value in (
+            threshold,
+            np.nextafter(threshold, np.inf),
+            np.nextafter(threshold, -np.inf),
+        ):
+            row = X.iloc[0].copy()
+            row[NUMERIC[feature]] = value
+            rows.append(row)
+    boundary = pd.DataFrame(rows).astype(X.dtypes.to_dict())
+
+    np.testing.assert_array_equal(
+        compiled.predict_proba(boundary), pipeline.predict_proba(boundary)
+    )
+
+
+def test_single_row_prediction(fitted_pipeline):
+    """1行だけの入力でも一致すること"""
+    pipeline, X = fitted_pipeline
+    compiled = compile_pipeline(pipeline)
+    row = X.iloc[[5]]
+
+    np.testing.assert_array_equal(
+        compiled.predict_proba(row), pipeline.predict_proba(row)
+    )
+
+
+def test_unsupported_pipeline():
+    """想定外の構成のパイプラインはエラーになること"""
+    pipeline = Pipeline([("scaler", StandardScaler())])
+    with pytest.raises(ValueError, match="ColumnTransformer and RandomForest"):
+        compile_pipeline(pipeline)
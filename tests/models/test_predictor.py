@@ -4,12 +4,17 @@ import pytest
 from snowflake.ml.model import ModelVersion
 from snowflake.ml.registry import Registry
 
+from src.models import artifact_cache
+from src.models.artifact_cache import ModelArtifactCache, clear_loaded_models
 from src.models.predictor import (
     load_default_model_version,
     load_latest_model_version,
+    load_local_engine,
     predict_label,
     predict_proba,
+    predict_proba_many,
 )
+from src.utils.config import load_config, replace_config
 
 
 @pytest.fixture
@@ -31,7 +36,7 @@ def mock_registry(mocker):
 def test_load_latest_model_version(mocker, mock_registry):
     """load_latest_model_version のテスト"""
     # Registry クラスのモックを設定
-    mocker.patch("src.models.predictor.Registry", return_value=mock_registry)
+    mocker.patch("src.models.registry.Registry", return_value=mock_registry)
 
     # テスト実行
     session = mocker.Mock()
@@ -49,7 +54,7 @@ def test_load_latest_model_version(mocker, mock_registry):
 def test_load_default_model_version(mocker, mock_registry):
     """load_default_model_version のテスト"""
     # Registry クラスのモックを設定
-    mocker.patch("src.models.predictor.Registry", return_value=mock_registry)
+    mocker.patch("src.models.registry.Registry", return_value=mock_registry)
 
     # テスト実行
     session = mocker.Mock()
@@ -106,3 +111,94 @@ def test_predict_label(mocker):
     assert len(predictions) == 3
     np.testing.assert_array_almost_equal(predictions, np.array([1, 0, 1]))
     mock_model_version.run.assert_called_once_with(features, function_name="predict")
+
+
+def test_predict_proba_local_mode(mocker):
+    """local モードではキャッシュしたパイプラインでバッチごとに推論すること"""
+    features = pd.DataFrame({"feature1": [1, 2, 3], "feature2": [0.1, 0.2, 0.3]})
+    mock_model_version = mocker.Mock(spec=ModelVersion)
+
+    mock_model = mocker.Mock()
+    mock_model.predict_proba.side_effect = lambda X: np.column_stack(
+        [1 - X["feature2"].values, X["feature2"].values]
+    )
+    mocker.patch("src.models.predictor.load_local_model", return_value=mock_model)
+    mocker.patch(
+        "src.models.predictor.config",
+        replace_config(
+            load_config(),
+            "model.inference",
+            mode="registry",
+            engine="sklearn",
+            batch_size=2,
+        ),
+    )
+
+    predictions = predict_proba(features, mock_model_version, mode="local")
+
+    np.testing.assert_array_almost_equal(predictions, np.array([0.1, 0.2, 0.3]))
+    assert mock_model.predict_proba.call_count == 2
+    mock_model_version.run.assert_not_called()
+
+
+def test_predict_proba_invalid_mode(mocker):
+    """未対応の推論モードはエラーになること"""
+    features = pd.DataFrame({"feature1": [1]})
+    with pytest.raises(ValueError, match="Unsupported inference mode"):
+        predict_proba(features, mocker.Mock(spec=ModelVersion), mode="unknown")
+
+
+def test_load_local_engine_compiled(mocker, tmp_path):
+    """compiled エンジンではパイプラインを一度だけ変換して再利用すること"""
+    mocker.patch.object(
+        artifact_cache,
+        "_artifact_cache",
+        ModelArtifactCache(cache_dir=tmp_path, max_bytes=1 << 30),
+    )
+    clear_loaded_models()
+    mock_model_version = mocker.Mock(spec=ModelVersion)
+    mock_model_version.model_name = "random_forest"
+    mock_model_version.version_name = "v_compiled"
+    mock_model_version.load.return_value = "pipeline"
+    mock_compile = mocker.patch(
+        "src.models.compiled_forest.compile_pipeline", return_value="compiled"
+    )
+
+    first = load_local_engine(mock_model_version, engine="compiled")
+    second = load_local_engine(mock_model_version, engine="compiled")
+
+    assert first == second == "compiled"
+    mock_compile.assert_called_once_with("pipeline")
+    clear_loaded_models()
+
+
+def test_predict_proba_many_encodes_once(mocker):
+    """エンコード方法が同じモデル間では特徴量のエンコードを一度だけ行うこと"""
+    features = pd.DataFrame({"feature1": [1.0, 2.0, 3.0]})
+
+    def make_engine(offset):
+        engine = mocker.Mock()
+        engine.encoding_key = ("shared",)
+        engine.encode.side_effect = lambda df: df["feature1"].values[None, :]
+        engine.predict_proba_encoded.side_effect = lambda X: np.column_stack(
+            [1 - X[0] / 10 - offset, X[0] / 10 + offset]
+        )
+        return engine
+
+    engines = {"v_champion": make_engine(0.0), "v_shadow": make_engine(0.5)}
+    mocker.patch(
+        "src.models.predictor.load_local_engine",
+        side_effect=lambda mv, engine: engines[mv.version_name],
+    )
+    mvs = []
+    for name in engines:
+        mv = mocker.Mock(spec=ModelVersion)
+        mv.version_name = name
+        mvs.append(mv)
+
+    scores = predict_proba_many(features, mvs)
+
+    np.testing.assert_array_almost_equal(scores["v_champion"], [0.1, 0.2, 0.3])
+    np.testing.assert_array_almost_equal(scores["v_shadow"], [0.6, 0.7, 0.8])
+    engines["v_champion"].encode.assert_called_once()
+    engines["v_shadow"].encode.assert_not_called()
@@ -0,0 +1,125 @@
+import pytest
+
+from src.models import registry as registry_module
+from src.models.registry import (
+    RegistryCache,
+    get_default_version,
+    get_latest_version,
+    get_model_ref,
+    get_version,
+    set_default_version,
+)
+
+
+class CountingModelRef:
+    """メタデータ問い合わせ回数を数える ModelReference のスタンドイン"""
+
+    def __init__(self, counts):
+        self.counts = counts
+        self._default = "v_default"
+
+    @property
+    def default(self):
+        self.counts["default"] += 1
+        return self._default
+
+    @default.setter
+    def default(self, mv):
+        self.counts["set_default"] += 1
+        self._default = mv
+
+    def last(self):
+        self.counts["last"] += 1
+        return "v_last"
+
+    def version(self, version_name):
+        self.counts["version"] += 1
+        return version_name
+
+
+class CountingRegistry:
+    """Registry の生成・get_model 呼び出し回数を数えるスタンドイン"""
+
+    counts = {
+        "registry": 0,
+        "get_model": 0,
+        "default": 0,
+        "set_default": 0,
+        "last": 0,
+        "version": 0,
+    }
+
+    def __init__(self, session):
+        self.counts["registry"] += 1
+        self.model_ref = CountingModelRef(self.counts)
+
+    def get_model(self, model_name):
+        self.counts["get_model"] += 1
+        return self.model_ref
+
+
+@pytest.fixture
+def counting_registry(mocker):
+    """カウンタを初期化した CountingRegistry を Registry として差し込む"""
+    for key in CountingRegistry.counts:
+        CountingRegistry.counts[key] = 0
+    mocker.patch("src.models.registry.Registry", CountingRegistry)
+    return CountingRegistry.counts
+
+
+def test_metadata_resolved_once_per_session(mocker, counting_registry):
+    """同一セッションでは Registry / get_model / default 解決が一度だけ行われること"""
+    session = mocker.Mock()
+
+    for _ in range(3):
+        assert get_default_version(session) == "v_default"
+        assert get_latest_version(session) == "v_last"
+        assert get_version(session, "v_1") == "v_1"
+
+    assert counting_registry["registry"] == 1
+    assert counting_registry["get_model"] == 1
+    assert counting_registry["default"] == 1
+    assert counting_registry["last"] == 1
+    assert counting_registry["version"] == 1
+
+
+def test_separate_sessions_have_separate_entries(mocker, counting_registry):
+    """セッションが異なればキャッシュも別になること"""
+    get_model_ref(mocker.Mock())
+    get_model_ref(mocker.Mock())
+
+    assert counting_registry["registry"] == 2
+    assert counting_registry["get_model"] == 2
+
+
+def test_set_default_version_invalidates_versions(mocker, counting_registry):
+    """デフォルトバージョン更新後は default が再解決されること"""
+    session = mocker.Mock()
+
+    assert get_default_version(session) == "v_default"
+    set_default_version(session, "v_new")
+
+    assert get_default_version(session) == "v_new"
+    assert counting_registry["set_default"] == 1
+    assert counting_registry["default"] == 2
+    # Registry と ModelReference は再利用される
+    assert counting_registry["registry"] == 1
+    assert counting_registry["get_model"] == 1
+
+
+def test_ttl_expiry_recreates_entry(mocker, counting_registry):
+    """TTL を過ぎたエントリは作り直されること"""
+    cache = RegistryCache(ttl_seconds=10)
+    mocker.patch.object(registry_module, "_cache", cache)
+    mock_time = mocker.patch("src.models.registry.time.monotonic", return_value=0.0)
+    session = mocker.Mock()
+
+    get_default_version(session)
+    mock_time.return_value = 5.0
+    get_default_version(session)
+    assert counting_registry["registry"] == 1
+
+    mock_time.return_value = 20.0
+    get_default_version(session)
+    assert counting_registry["registry"] == 2
+    assert counting_registry["default"] == 2
@@ -31,7 +31,7 @@ def mock_registry():
 
 def test_rollback_model_success(mock_session, mock_registry):
     """正常系: モデルのロールバックが成功するケース"""
-    with patch("src.models.rollback.Registry", return_value=mock_registry):
+    with patch("src.models.registry.Registry", return_value=mock_registry):
         rollback_model(mock_session, "v_target")
 
         # Registryが正しく初期化されたことを確認
@@ -48,13 +48,13 @@ def test_rollback_model_version_not_found(mock_session, mock_registry):
         "Version not found"
     )
 
-    with patch("src.models.rollback.Registry", return_value=mock_registry):
+    with patch("src.models.registry.Registry", return_value=mock_registry):
         with pytest.raises(ValueError, match="Specified version v_target not found"):
             rollback_model(mock_session, "v_target")
 
 
 def test_rollback_model_registry_error(mock_session):
     """異常系: Registryの初期化に失敗するケース"""
-    with patch("src.models.rollback.Registry", side_effect=Exception("Registry error")):
+    with patch("src.models.registry.Registry", side_effect=Exception("Registry error")):
         with pytest.raises(Exception, match="Registry error"):
             rollback_model(mock_session, "v_target")
@@ -21,8 +21,8 @@ def sample_data():
     np.random.seed(42)
     n_samples = 100
 
-    numeric_features = config["data"]["features"]["numeric"]
-    categorical_features = config["data"]["features"]["categorical"]
+    numeric_features = config.data.features.numeric
+    categorical_features = config.data.features.categorical
 
     # 実際のデータ構造に合わせたカラムを追加
     X = pd.DataFrame(
@@ -0,0 +1,159 @@
+import json
+import threading
+
+import pytest
+
+from src.pipelines.backfill import (
+    BackfillCheckpoint,
+    config,
+    run_backfill,
+    split_date_range,
+)
+from src.utils.config import replace_config
+
+
+class FakeSession:
+    """call の呼び出しを記録するセッション"""
+
+    def __init__(self, calls, fail_on=None):
+        self.calls = calls
+        self.fail_on = fail_on
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def call(self, procedure_name, start_date, end_date):
+        if start_date == self.fail_on:
+            raise RuntimeError("プロシージャエラー")
+        with self.lock:
+            self.calls.append((procedure_name, start_date, end_date))
+
+    def close(self):
+        self.closed = True
+
+
+def test_split_date_range():
+    """期間を重複しない区間に分割すること"""
+    assert split_date_range("2024-01-30", "2024-02-05", 3) == [
+        ("2024-01-30", "2024-02-01"),
+        ("2024-02-02", "2024-02-04"),
+        ("2024-02-05", "2024-02-05"),
+    ]
+
+
+def test_split_date_range_invalid():
+    """終了日が開始日より前の場合はエラーになること"""
+    with pytest.raises(ValueError, match="end_date must not be earlier"):
+        split_date_range("2024-02-01", "2024-01-01", 7)
+
+
+def test_run_backfill(tmp_path):
+    """各区間をワーカーセッションで1回ずつ処理し、セッションを閉じること"""
+    calls = []
+    sessions = []
+
+    def session_factory():
+        session = FakeSession(calls)
+        sessions.append(session)
+        return session
+
+    completed = run_backfill(
+        "2024-01-01",
+        "2024-01-10",
+        session_factory=session_factory,
+        workers=2,
+        partition_days=4,
+        checkpoint_path=str(tmp_path / "checkpoint.json"),
+    )
+
+    expected = [
+        ("2024-01-01", "2024-01-04"),
+        ("2024-01-05", "2024-01-08"),
+        ("2024-01-09", "2024-01-10"),
+    ]
+    assert sorted(completed) == expected
+    assert sorted(calls) == [("PREDICTION", s, e) for s, e in expected]
+    assert 1 <= len(sessions) <= 2
+    assert all(s.closed for s in sessions)
+
+
+def test_run_backfill_session_limit(mocker):
+    """セッション数は session_pool.max_size を上限とすること"""
+    mocker.patch(
+        "src.pipelines.backfill.config",
+        replace_config(config, "session_pool", max_size=1),
+    )
+    calls = []
+    sessions = []
+
+    def session_factory():
+        sessions.append(FakeSession(calls))
+        return sessions[-1]
+
+    run_backfill(
+        "2024-01-01",
+        "2024-01-10",
+        session_factory=session_factory,
+        workers=3,
+        partition_days=4,
+    )
+
+    assert len(calls) == 3
+    assert len(sessions) == 1
+
+
+def test_run_backfill_resumes_from_checkpoint(tmp_path):
+    """チェックポイントに記録済みの区間は処理しないこと"""
+    checkpoint_path = tmp_path / "checkpoint.json"
+    checkpoint = BackfillCheckpoint.load(checkpoint_path, "2024-01-01", "2024-01-10", 4)
+    checkpoint.mark_completed(("2024-01-01", "2024-01-04"))
+
+    calls = []
+    completed = run_backfill(
+        "2024-01-01",
+        "2024-01-10",
+        session_factory=lambda: FakeSession(calls),
+        workers=2,
+        partition_days=4,
+        checkpoint_path=str(checkpoint_path),
+    )
+
+    assert sorted(completed) == [
+        ("2024-01-05", "2024-01-08"),
+        ("2024-01-09", "2024-01-10"),
+    ]
+    assert ("PREDICTION", "2024-01-01", "2024-01-04") not in calls
+    with open(checkpoint_path) as f:
+        assert len(json.load(f)["completed"]) == 3
+
+
+def test_run_backfill_records_progress_on_failure(tmp_path):
+    """失敗した区間があっても他の区間は処理し、完了分のみ記録すること"""
+    checkpoint_path = tmp_path / "checkpoint.json"
+    calls = []
+
+    with pytest.raises(RuntimeError, match="1 partitions failed: 2024-01-05"):
+        run_backfill(
+            "2024-01-01",
+            "2024-01-10",
+            session_factory=lambda: FakeSession(calls, fail_on="2024-01-05"),
+            workers=1,
+            partition_days=4,
+            checkpoint_path=str(checkpoint_path),
+        )
+
+    checkpoint = BackfillCheckpoint.load(checkpoint_path, "2024-01-01", "2024-01-10", 4)
+    assert checkpoint.completed == {
+        ("2024-01-01", "2024-01-04"),
+        ("2024-01-09", "2024-01-10"),
+    }
+
+
+def test_checkpoint_for_different_backfill(tmp_path):
+    """期間の異なるチェックポイントは再利用しないこと"""
+    checkpoint_path = tmp_path / "checkpoint.json"
+    BackfillCheckpoint.load(
+        checkpoint_path, "2024-01-01", "2024-01-10", 4
+    ).mark_completed(("2024-01-01", "2024-01-04"))
+
+    with pytest.raises(ValueError, match="different backfill"):
+        BackfillCheckpoint.load(checkpoint_path, "2024-01-01", "2024-01-31", 4)
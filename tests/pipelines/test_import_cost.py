@@ -0,0 +1,27 @@
+import subprocess
+import sys
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    "module, unused",
+    [
+        (
+            "src.pipelines.sproc_prediction",
+            ["optuna", "sklearn.compose", "sklearn.ensemble"],
+        ),
+        ("src.pipelines.sproc_offline_testing", ["optuna"]),
+    ],
+)
+def test_sproc_does_not_import_unused_packages(module, unused):
+    """プロシージャの読み込み時に、その処理で使わない重いパッケージを読み込まないこと"""
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {unused!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.strip() == ""
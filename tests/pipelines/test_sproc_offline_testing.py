@@ -20,10 +20,10 @@ def test_sproc_offline_testing_success(mocker, challenger_better):
 
     # モデルバージョンのモック
     champion_model = mocker.Mock()
-    champion_model.version = "V_250130_121116"
+    champion_model.version_name = "V_250130_121116"
 
     challenger_model = mocker.Mock()
-    challenger_model.version = "V_250202_121116"
+    challenger_model.version_name = "V_250202_121116"
 
     # テストデータの準備
     test_data = pd.DataFrame(
@@ -73,7 +73,7 @@ def test_sproc_offline_testing_success(mocker, challenger_better):
     mock_calc_metrics.side_effect = [challenger_scores, champion_scores]
 
     # Registryのモック
-    mock_registry = mocker.patch("src.pipelines.sproc_offline_testing.Registry")
+    mock_registry = mocker.patch("src.models.registry.Registry")
     mock_registry_instance = mocker.Mock()
     mock_registry.return_value = mock_registry_instance
     mock_model = mocker.Mock()
@@ -2,7 +2,15 @@ import pandas as pd
 import pytest
 from snowflake.snowpark import Session
 
-from src.pipelines.sproc_prediction import sproc_prediction
+from src.pipelines.sproc_prediction import config, sproc_prediction
+from src.utils.config import replace_config
+from src.utils.query import Query
+
+
+@pytest.fixture(autouse=True)
+def mock_get_model_id(mocker):
+    """チャンピオンの MODEL_ID の解決をモック化する"""
+    return mocker.patch("src.pipelines.sproc_prediction.get_model_id", return_value=5)
 
 
 def test_sproc_prediction_success(mocker):
@@ -43,6 +51,10 @@ def test_sproc_prediction_success(mocker):
     mock_load_model.assert_called_once_with(mock_session)
     mock_predict.assert_called_once()
     mock_upload.assert_called_once()
+    upload_kwargs = mock_upload.call_args.kwargs
+    assert upload_kwargs["mode"] == "swap"
+    assert upload_kwargs["table_name"] == "SCORES_BASE"
+    assert upload_kwargs["df"]["MODEL_ID"].tolist() == [5, 5]
 
 
 def test_sproc_prediction_fetch_dataset_returns_none(mocker):
@@ -53,3 +65,343 @@ def test_sproc_prediction_fetch_dataset_returns_none(mocker):
     with pytest.raises(ValueError, match="Failed to fetch dataset"):
         sproc_prediction(mock_session, "2024-03-20")
     mock_fetch.assert_called_once_with(mock_session, prediction_date="2024-03-20")
+
+
+def test_sproc_prediction_with_shadow_versions(mocker):
+    """シャドウモードではチャンピオンとシャドウを同じ特徴量でスコアリングすること"""
+    mock_session = mocker.Mock(spec=Session)
+    mock_session.get_current_database.return_value = "TEST_DB"
+
+    test_data = pd.DataFrame({"UID": [1, 2], "FEATURE1": [0.1, 0.2]})
+    mocker.patch(
+        "src.pipelines.sproc_prediction.fetch_prediction_dataset",
+        return_value=test_data,
+    )
+
+    champion = mocker.Mock(version_name="v_champion", model_name="random_forest")
+    champion._model_name = "random_forest"
+    champion._version_name = "v_champion"
+    shadow = mocker.Mock(version_name="v_shadow", model_name="random_forest")
+    mocker.patch(
+        "src.pipelines.sproc_prediction.load_default_model_version",
+        return_value=champion,
+    )
+    mock_load_version = mocker.patch(
+        "src.pipelines.sproc_prediction.load_model_version", return_value=shadow
+    )
+    mocker.patch(
+        "src.pipelines.sproc_prediction.config",
+        replace_config(config, "prediction", shadow_versions=("v_shadow",)),
+    )
+
+    mock_predict_many = mocker.patch(
+        "src.pipelines.sproc_prediction.predict_proba_many",
+        return_value={"v_champion": [0.8, 0.9], "v_shadow": [0.1, 0.2]},
+    )
+    mock_predict = mocker.patch("src.pipelines.sproc_prediction.predict_proba")
+    mock_upload = mocker.patch(
+        "src.pipelines.sproc_prediction.upload_dataframe_to_snowflake"
+    )
+    mocker.patch("src.pipelines.sproc_prediction.get_model_id", return_value=7)
+    mock_write_shadow = mocker.patch(
+        "src.pipelines.sproc_prediction.write_shadow_scores"
+    )
+
+    result = sproc_prediction(mock_session, "2024-03-20")
+
+    assert result == 1
+    mock_load_version.assert_called_once_with(mock_session, "v_shadow")
+    mock_predict_many.assert_called_once()
+    mock_predict.assert_not_called()
+
+    uploaded = mock_upload.call_args.kwargs["df"]
+    assert uploaded["SCORE"].tolist() == [0.8, 0.9]
+
+    shadow_kwargs = mock_write_shadow.call_args.kwargs
+    assert shadow_kwargs["model_ids"] == {"v_shadow": 7}
+    assert shadow_kwargs["scores"] == {"v_shadow": [0.1, 0.2]}
+    assert shadow_kwargs["session_date"] == "2024-03-20"
+
+
+def test_sproc_prediction_incremental(mocker):
+    """差分推論では未スコアの行のみを推論し、同じ日付の既存行を残して追記すること"""
+    mock_session = mocker.Mock(spec=Session)
+    mock_session.get_current_database.return_value = "TEST_DB"
+
+    mock_model_version = mocker.Mock()
+    mock_model_version._model_name = "test_model"
+    mock_model_version._version_name = "V_1"
+    mocker.patch(
+        "src.pipelines.sproc_prediction.load_default_model_version",
+        return_value=mock_model_version,
+    )
+    mocker.patch(
+        "src.pipelines.sproc_prediction.config",
+        replace_config(config, "prediction", incremental=True),
+    )
+
+    mock_fetch = mocker.patch("src.pipelines.sproc_prediction.fetch_prediction_dataset")
+    mock_fetch_unscored = mocker.patch(
+        "src.pipelines.sproc_prediction.fetch_unscored_prediction_dataset",
+        return_value=pd.DataFrame({"UID": [3], "FEATURE1": [0.3]}),
+    )
+    mocker.patch("src.pipelines.sproc_prediction.predict_proba", return_value=[0.7])
+    mocker.patch(
+        "src.pipelines.sproc_prediction.create_staging_table",
+        return_value="TEST_DB.TEST_SCHEMA.SCORES_STAGING",
+    )
+    mock_append = mocker.patch("src.pipelines.sproc_prediction.append_to_table")
+    mock_publish = mocker.patch("src.pipelines.sproc_prediction.publish_staging_table")
+    mock_upload = mocker.patch(
+        "src.pipelines.sproc_prediction.upload_dataframe_to_snowflake"
+    )
+
+    result = sproc_prediction(mock_session, "2024-03-20")
+
+    assert result == 1
+    mock_fetch.assert_not_called()
+    mock_fetch_unscored.assert_called_once_with(
+        mock_session, prediction_date="2024-03-20", model_id=5
+    )
+    mock_upload.assert_not_called()
+    assert mock_append.call_args[0][1]["UID"].tolist() == [3]
+    assert mock_publish.call_args.kwargs["delete_condition"] == Query(
+        "SESSION_DATE = ? AND MODEL_ID <> ?", ("2024-03-20", 5)
+    )
+
+
+def test_sproc_prediction_incremental_nothing_new(mocker):
+    """差分推論で未スコアの行がない場合は推論・書き込みを行わないこと"""
+    mock_session = mocker.Mock(spec=Session)
+
+    mock_model_version = mocker.Mock()
+    mock_model_version._version_name = "V_1"
+    mocker.patch(
+        "src.pipelines.sproc_prediction.load_default_model_version",
+        return_value=mock_model_version,
+    )
+    mocker.patch(
+        "src.pipelines.sproc_prediction.config",
+        replace_config(config, "prediction", incremental=True),
+    )
+    mocker.patch(
+        "src.pipelines.sproc_prediction.fetch_unscored_prediction_dataset",
+        return_value=pd.DataFrame(columns=["UID", "FEATURE1"]),
+    )
+    mock_predict = mocker.patch("src.pipelines.sproc_prediction.predict_proba")
+    mock_upload = mocker.patch(
+        "src.pipelines.sproc_prediction.upload_dataframe_to_snowflake"
+    )
+
+    result = sproc_prediction(mock_session, "2024-03-20")
+
+    assert result == 1
+    mock_predict.assert_not_called()
+    mock_upload.assert_not_called()
+
+
+def test_sproc_prediction_streaming(mocker):
+    """ストリーミングではバッチごとにステージングへ書き込み、最後に一度だけ反映すること"""
+    mock_session = mocker.Mock(spec=Session)
+    mock_session.get_current_database.return_value = "TEST_DB"
+
+    mock_model_version = mocker.Mock()
+    mock_model_version._model_name = "test_model"
+    mock_model_version._version_name = "V_1"
+    mocker.patch(
+        "src.pipelines.sproc_prediction.load_default_model_version",
+        return_value=mock_model_version,
+    )
+    mocker.patch(
+        "src.pipelines.sproc_prediction.config",
+        replace_config(config, "prediction", streaming=True, batch_size=2),
+    )
+
+    mock_fetch = mocker.patch("src.pipelines.sproc_prediction.fetch_prediction_dataset")
+    mock_iter = mocker.patch(
+        "src.pipelines.sproc_prediction.iter_prediction_batches",
+        return_value=iter(
+            [
+                pd.DataFrame(
+                    {
+                        "SESSION_DATE": ["2024-03-20"] * 2,
+                        "UID": [1, 2],
+                        "FEATURE1": [0.1, 0.2],
+                    }
+                ),
+                pd.DataFrame(
+                    {"SESSION_DATE": ["2024-03-20"], "UID": [3], "FEATURE1": [0.3]}
+                ),
+            ]
+        ),
+    )
+    mocker.patch(
+        "src.pipelines.sproc_prediction.predict_proba",
+        side_effect=lambda features, mv: features["FEATURE1"].values * 2,
+    )
+    mocker.patch(
+        "src.pipelines.sproc_prediction.create_staging_table", return_value="STAGING"
+    )
+    mock_append = mocker.patch("src.pipelines.sproc_prediction.append_to_table")
+    mock_publish = mocker.patch("src.pipelines.sproc_prediction.publish_staging_table")
+
+    result = sproc_prediction(mock_session, "2024-03-20")
+
+    assert result == 1
+    mock_fetch.assert_not_called()
+    assert mock_iter.call_args.kwargs["batch_size"] == 2
+    assert mock_iter.call_args.kwargs["model_id"] is None
+
+    written = [c[0][1] for c in mock_append.call_args_list]
+    assert [df["UID"].tolist() for df in written] == [[1, 2], [3]]
+    assert list(written[0].columns) == [
+        "UID",
+        "SESSION_DATE",
+        "MODEL_ID",
+        "SCORE",
+    ]
+    mock_publish.assert_called_once_with(
+        mock_session,
+        "STAGING",
+        '"TEST_DB"."ONLINE_SHOPPERS_INTENTION"."SCORES_BASE"',
+        delete_condition=Query("SESSION_DATE = ?", ("2024-03-20",)),
+    )
+
+
+def test_sproc_prediction_streaming_incremental_nothing_new(mocker):
+    """ストリーミングの差分推論で新しい行がない場合はステージングを作成しないこと"""
+    mock_session = mocker.Mock(spec=Session)
+
+    mock_model_version = mocker.Mock()
+    mock_model_version._version_name = "V_1"
+    mocker.patch(
+        "src.pipelines.sproc_prediction.load_default_model_version",
+        return_value=mock_model_version,
+    )
+    mocker.patch(
+        "src.pipelines.sproc_prediction.config",
+        replace_config(config, "prediction", streaming=True, incremental=True),
+    )
+    mock_iter = mocker.patch(
+        "src.pipelines.sproc_prediction.iter_prediction_batches",
+        return_value=iter([]),
+    )
+    mock_create = mocker.patch("src.pipelines.sproc_prediction.create_staging_table")
+    mock_publish = mocker.patch("src.pipelines.sproc_prediction.publish_staging_table")
+
+    result = sproc_prediction(mock_session, "2024-03-20")
+
+    assert result == 1
+    assert mock_iter.call_args.kwargs["model_id"] == 5
+    mock_create.assert_not_called()
+    mock_publish.assert_not_called()
+
+
+def test_sproc_prediction_date_range(mocker):
+    """期間指定ではモデルを一度だけ解決し、期間全体を1回の反映で置き換えること"""
+    mock_session = mocker.Mock(spec=Session)
+    mock_session.get_current_database.return_value = "TEST_DB"
+
+    mock_model_version = mocker.Mock()
+    mock_model_version._model_name = "test_model"
+    mock_model_version._version_name = "V_1"
+    mock_load_model = mocker.patch(
+        "src.pipelines.sproc_prediction.load_default_model_version",
+        return_value=mock_model_version,
+    )
+    mock_iter = mocker.patch(
+        "src.pipelines.sproc_prediction.iter_prediction_batches",
+        return_value=iter(
+            [
+                pd.DataFrame(
+                    {
+                        "SESSION_DATE": ["2024-03-01", "2024-03-02", "2024-03-31"],
+                        "UID": [1, 2, 3],
+                        "FEATURE1": [0.1, 0.2, 0.3],
+                    }
+                )
+            ]
+        ),
+    )
+    mock_predict = mocker.patch(
+        "src.pipelines.sproc_prediction.predict_proba",
+        return_value=[0.1, 0.2, 0.3],
+    )
+    mocker.patch(
+        "src.pipelines.sproc_prediction.create_staging_table", return_value="STAGING"
+    )
+    mock_append = mocker.patch("src.pipelines.sproc_prediction.append_to_table")
+    mock_publish = mocker.patch("src.pipelines.sproc_prediction.publish_staging_table")
+
+    result = sproc_prediction(mock_session, "2024-03-01", "2024-03-31")
+
+    assert result == 1
+    mock_load_model.assert_called_once_with(mock_session)
+    assert mock_iter.call_args.kwargs["end_date"] == "2024-03-31"
+    # SESSION_DATE は特徴量に含めない
+    assert list(mock_predict.call_args[0][0].columns) == ["FEATURE1"]
+
+    written = mock_append.call_args[0][1]
+    assert written["SESSION_DATE"].tolist() == [
+        "2024-03-01",
+        "2024-03-02",
+        "2024-03-31",
+    ]
+    mock_publish.assert_called_once_with(
+        mock_session,
+        "STAGING",
+        '"TEST_DB"."ONLINE_SHOPPERS_INTENTION"."SCORES_BASE"',
+        delete_condition=Query(
+            "SESSION_DATE BETWEEN ? AND ?", ("2024-03-01", "2024-03-31")
+        ),
+    )
+
+
+def test_sproc_prediction_invalid_date_range(mocker):
+    """終了日が開始日より前の場合はエラーになること"""
+    mock_session = mocker.Mock(spec=Session)
+
+    with pytest.raises(ValueError, match="end_date must not be earlier"):
+        sproc_prediction(mock_session, "2024-03-31", "2024-03-01")
+
+
+def test_sproc_prediction_date_range_empty(mocker):
+    """期間内にデータがない場合は 0 行の成功としてスコアテーブルを変更しないこと"""
+    mock_session = mocker.Mock(spec=Session)
+
+    mock_model_version = mocker.Mock()
+    mock_model_version._version_name = "V_1"
+    mocker.patch(
+        "src.pipelines.sproc_prediction.load_default_model_version",
+        return_value=mock_model_version,
+    )
+    mocker.patch(
+        "src.pipelines.sproc_prediction.iter_prediction_batches",
+        return_value=iter([]),
+    )
+    mock_create = mocker.patch("src.pipelines.sproc_prediction.create_staging_table")
+    mock_publish = mocker.patch("src.pipelines.sproc_prediction.publish_staging_table")
+
+    result = sproc_prediction(mock_session, "2024-03-01", "2024-03-31")
+
+    assert result == 1
+    mock_create.assert_not_called()
+    mock_publish.assert_not_called()
+
+
+def test_sproc_prediction_streaming_no_data(mocker):
+    """単日のストリーミング推論でデータがない場合はエラーになること"""
+    mock_session = mocker.Mock(spec=Session)
+
+    mocker.patch("src.pipelines.sproc_prediction.load_default_model_version")
+    mocker.patch(
+        "src.pipelines.sproc_prediction.config",
+        replace_config(config, "prediction", streaming=True),
+    )
+    mocker.patch(
+        "src.pipelines.sproc_prediction.iter_prediction_batches",
+        return_value=iter([]),
+    )
+
+    with pytest.raises(ValueError, match="No data found"):
+        sproc_prediction(mock_session, "2024-03-20")
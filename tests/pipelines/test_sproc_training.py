@@ -35,7 +35,9 @@ def test_sproc_training_success(mocker):
     mock_train.return_value = (mock_pipeline, ([{"accuracy": 0.85}], None))
 
     mock_registry = mocker.Mock()
-    mocker.patch("src.pipelines.sproc_training.Registry", return_value=mock_registry)
+    mocker.patch(
+        "src.pipelines.sproc_training.get_registry", return_value=mock_registry
+    )
 
     # テスト実行
     result = sproc_training(mock_session)
@@ -0,0 +1,47 @@
+import pytest
+from snowflake.snowpark import Session
+
+from src.tasks.dag import (
+    DAILY_DAG,
+    TARGET_DATE,
+    TaskDefinition,
+    create_task_graph,
+    create_task_sql,
+)
+
+
+def test_daily_dag_resolves_date_at_run_time():
+    """推論はデータセットの更新の後に実行し、処理対象日は実行時に解決する場合"""
+    dataset, prediction = (create_task_sql(task) for task in DAILY_DAG)
+
+    assert "SCHEDULE = 'USING CRON 0 5 * * * Asia/Tokyo'" in dataset
+    assert f"CALL dataset({TARGET_DATE});" in dataset
+    assert "AFTER task_dataset" in prediction
+    assert "SCHEDULE =" not in prediction
+    assert f"CALL prediction({TARGET_DATE});" in prediction
+
+
+@pytest.mark.parametrize(
+    "task",
+    [
+        TaskDefinition(name="t", procedure="p"),
+        TaskDefinition(name="t", procedure="p", schedule="1 MINUTE", after=("r",)),
+    ],
+)
+def test_create_task_sql_invalid_trigger(task):
+    """スケジュールと先行するタスクの一方のみが指定されていない場合"""
+    with pytest.raises(ValueError):
+        create_task_sql(task)
+
+
+def test_create_task_graph(mocker):
+    """ルートを停止してから順に作成し、後続を含めて有効化する場合"""
+    mock_session = mocker.Mock(spec=Session)
+
+    create_task_graph(mock_session, DAILY_DAG)
+
+    statements = [" ".join(c.args[0].split()) for c in mock_session.sql.call_args_list]
+    assert statements[0] == "ALTER TASK IF EXISTS task_dataset SUSPEND"
+    assert statements[1].startswith("CREATE OR REPLACE TASK task_dataset ")
+    assert statements[2].startswith("CREATE OR REPLACE TASK task_prediction ")
+    assert statements[3] == "SELECT SYSTEM$TASK_DEPENDENTS_ENABLE('task_dataset')"
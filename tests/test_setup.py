@@ -0,0 +1,13 @@
+from src.setup import setup_steps
+from src.utils.async_query import validate_steps
+
+
+def test_setup_steps_load_source_after_all_ddl():
+    """セッションのデータベースを切り替えるソースのロードは、他の全ステップの完了後に開始する場合"""
+    steps = setup_steps("TEST_DB")
+    validate_steps(steps)
+
+    by_name = {step.name: step for step in steps}
+    others = set(by_name) - {"source", "dataset"}
+    assert set(by_name["source"].depends_on) == others
+    assert by_name["dataset"].depends_on == ("source",)
@@ -0,0 +1,156 @@
+from typing import Dict, List, Optional
+
+import pytest
+
+from src.utils.async_query import AsyncQueryExecutor, Step
+from src.utils.query import Query
+
+
+class _FakeJob:
+    """指定回数の is_done の呼び出し後に完了する AsyncJob"""
+
+    def __init__(self, session: "_FakeSession", text: str) -> None:
+        self._session = session
+        self._text = text
+        self._polls = session.polls.get(text, 1)
+        self.cancelled = False
+
+    def is_done(self) -> bool:
+        self._polls -= 1
+        return self._polls <= 0
+
+    def result(self) -> list:
+        if self._text in self._session.failures:
+            raise Exception(f"{self._text} failed")
+        self._session.events.append(f"done {self._text}")
+        return []
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class _FakeSession:
+    def __init__(
+        self,
+        polls: Optional[Dict[str, int]] = None,
+        failures: tuple = (),
+    ) -> None:
+        self.polls = polls or {}
+        self.failures = failures
+        self.events: List[str] = []
+        self.jobs: Dict[str, _FakeJob] = {}
+        self.params: Dict[str, Optional[list]] = {}
+
+    def sql(self, text: str, params: Optional[list] = None) -> "_FakeSession":
+        self._text = text
+        self.params[text] = params
+        return self
+
+    def collect_nowait(self) -> _FakeJob:
+        self.events.append(f"submit {self._text}")
+        job = _FakeJob(self, self._text)
+        self.jobs[self._text] = job
+        return job
+
+
+def test_run_respects_dependencies_and_overlaps_independent_steps():
+    """依存先の完了後に開始し、独立したステップは完了を待たずに送信する場合"""
+    session = _FakeSession(polls={"B": 3, "C": 1})
+    steps = [
+        Step("a", Query("A")),
+        Step("b", Query("B"), depends_on=("a",)),
+        Step("c", Query("C"), depends_on=("a",)),
+        Step("d", Query("D"), depends_on=("b", "c")),
+    ]
+
+    timings = AsyncQueryExecutor(session, poll_interval=0).run(steps)
+
+    assert session.events == [
+        "submit A",
+        "done A",
+        "submit B",
+        "submit C",
+        "done C",
+        "done B",
+        "submit D",
+        "done D",
+    ]
+    assert set(timings) == {"a", "b", "c", "d"}
+    assert timings["d"].start >= max(timings["b"].end, timings["c"].end)
+
+
+def test_run_binds_params_and_runs_callables():
+    """SQL 文はパラメータ付きで送信し、関数にはセッションを渡して実行する場合"""
+    session = _FakeSession()
+    called = []
+
+    AsyncQueryExecutor(session, poll_interval=0).run(
+        [
+            Step("ddl", Query("CREATE X WHERE D = ?", ("2024-01-01",))),
+            Step("load", lambda s: called.append(s), depends_on=("ddl",)),
+        ]
+    )
+
+    assert session.params == {"CREATE X WHERE D = ?": ["2024-01-01"]}
+    assert called == [session]
+
+
+def test_run_limits_concurrency():
+    """max_concurrency を超えて同時に送信しない場合"""
+    session = _FakeSession(polls={"A": 2, "B": 2})
+
+    AsyncQueryExecutor(session, max_concurrency=1, poll_interval=0).run(
+        [Step("a", Query("A")), Step("b", Query("B"))]
+    )
+
+    assert session.events == ["submit A", "done A", "submit B", "done B"]
+
+
+def test_run_failure_cancels_running_steps():
+    """失敗した場合は実行中の SQL 文をキャンセルし、後続のステップを開始しない場合"""
+    session = _FakeSession(polls={"A": 1, "B": 5}, failures=("A",))
+    steps = [
+        Step("a", Query("A")),
+        Step("b", Query("B")),
+        Step("c", Query("C"), depends_on=("a",)),
+    ]
+
+    with pytest.raises(RuntimeError, match="Step 'a' failed: A failed"):
+        AsyncQueryExecutor(session, poll_interval=0).run(steps)
+
+    assert session.jobs["B"].cancelled
+    assert "submit C" not in session.events
+
+
+def test_run_callable_failure():
+    """関数のステップで発生した例外を RuntimeError として送出する場合"""
+
+    def fail(session):
+        raise ValueError("load error")
+
+    with pytest.raises(RuntimeError, match="Step 'load' failed: load error"):
+        AsyncQueryExecutor(_FakeSession(), poll_interval=0).run([Step("load", fail)])
+
+
+@pytest.mark.parametrize(
+    "steps, message",
+    [
+        ([Step("a", Query("A")), Step("a", Query("B"))], "unique"),
+        ([Step("a", Query("A"), depends_on=("x",))], "unknown steps"),
+        (
+            [
+                Step("a", Query("A"), depends_on=("b",)),
+                Step("b", Query("B"), depends_on=("a",)),
+            ],
+            "Circular dependency",
+        ),
+    ],
+)
+def test_run_invalid_steps(steps, message):
+    """ステップ名の重複・未定義の依存先・循環依存はエラーになる場合"""
+    session = _FakeSession()
+
+    with pytest.raises(ValueError, match=message):
+        AsyncQueryExecutor(session).run(steps)
+
+    assert session.events == []
@@ -0,0 +1,100 @@
+import dataclasses
+import os
+
+import pytest
+import yaml
+
+from src.utils.config import load_config, parse_config, reload_config, replace_config
+
+
+@pytest.fixture
+def raw_config():
+    """デフォルトの config.yml を読み込んだ辞書"""
+    with open("src/config.yml") as f:
+        return yaml.safe_load(f)
+
+
+@pytest.fixture
+def config_file(tmp_path, raw_config):
+    path = tmp_path / "config.yml"
+    path.write_text(yaml.safe_dump(raw_config))
+    return path
+
+
+def test_load_config_is_cached(config_file):
+    """同じパスは1回だけ読み込み、同じオブジェクトを返す場合"""
+    config = load_config(str(config_file))
+
+    assert load_config(str(config_file)) is config
+    assert config.data.target == ("REVENUE",)
+    assert config.model.inference.cache_dir is None
+    assert isinstance(config.model.registry.cache_ttl_seconds, float)
+
+
+def test_config_is_frozen(config_file):
+    """設定は変更できない場合"""
+    config = load_config(str(config_file))
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        config.prediction.batch_size = 1  # type: ignore[misc]
+    with pytest.raises((AttributeError, TypeError)):
+        config.prediction.extra = 1  # type: ignore[attr-defined]
+
+
+def test_reload_config_when_modified(config_file, raw_config):
+    """更新時刻が変わった場合のみ読み込み直す場合"""
+    config = load_config(str(config_file))
+    assert reload_config(str(config_file)) is config
+
+    raw_config["prediction"]["batch_size"] = 10
+    config_file.write_text(yaml.safe_dump(raw_config))
+    stat = config_file.stat()
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    reloaded = reload_config(str(config_file))
+    assert reloaded is not config
+    assert reloaded.prediction.batch_size == 10
+    assert load_config(str(config_file)) is reloaded
+
+
+@pytest.mark.parametrize(
+    "section, key, value, message",
+    [
+        ("prediction", "batch_size", "100", "prediction.batch_size must be an integer"),
+        ("prediction", "incremental", "yes", "prediction.incremental must be of type"),
+        ("prediction", "pipeline_depth", True, "must be an integer"),
+        ("prediction", "batch_size", 0, "prediction.batch_size must be positive"),
+        ("prediction", "unknown", 1, "unknown keys: prediction.unknown"),
+        ("session_pool", "max_size", None, "session_pool.max_size must be"),
+    ],
+)
+def test_parse_config_invalid(raw_config, section, key, value, message):
+    """型の誤り・値の範囲外・未定義のキーはエラーになる場合"""
+    raw_config[section][key] = value
+
+    with pytest.raises(ValueError, match=message):
+        parse_config(raw_config)
+
+
+def test_parse_config_missing_key(raw_config):
+    """必須のキーがない場合はエラーになる場合"""
+    del raw_config["model"]["inference"]["engine"]
+
+    with pytest.raises(ValueError, match="missing keys: model.inference.engine"):
+        parse_config(raw_config)
+
+
+def test_replace_config(raw_config):
+    """一部の値を置き換えた設定を作成し、置き換え後の値も検証する場合"""
+    config = parse_config(raw_config)
+
+    replaced = replace_config(config, "prediction.backfill", workers=8)
+
+    assert replaced.prediction.backfill.workers == 8
+    assert (
+        config.prediction.backfill.workers
+        == raw_config["prediction"]["backfill"]["workers"]
+    )
+    assert replaced.model is config.model
+    with pytest.raises(ValueError, match="workers must be positive"):
+        replace_config(config, "prediction.backfill", workers=0)
@@ -0,0 +1,118 @@
+import logging
+
+import pytest
+
+from src.utils import cpu_profile
+from src.utils.cpu_profile import (
+    CPU_PROFILE_ENV,
+    PROFILE_DIR_ENV,
+    diff_profiles,
+    profiled,
+)
+from src.utils.pipelined import PipelinedExecutor
+
+
+@pytest.fixture(autouse=True)
+def profile_dir(monkeypatch, tmp_path):
+    monkeypatch.delenv(CPU_PROFILE_ENV, raising=False)
+    monkeypatch.setenv(PROFILE_DIR_ENV, str(tmp_path))
+    return tmp_path
+
+
+def _busy(n: int) -> int:
+    return sum(i * i for i in range(n))
+
+
+@profiled()
+def outer(n: int) -> int:
+    return inner(n) + _busy(n)
+
+
+@profiled()
+def inner(n: int) -> int:
+    return _busy(n)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("", False),
+        ("0", False),
+        ("false", False),
+        ("1", True),
+        ("all", True),
+        ("inner, outer", True),
+        ("train_model", False),
+    ],
+)
+def test_is_target(monkeypatch, value, expected):
+    """環境変数の値で対象かどうかを判定する場合"""
+    monkeypatch.setenv(CPU_PROFILE_ENV, value)
+    assert cpu_profile._is_target("outer", None) is expected
+
+
+def test_disabled_by_default(profile_dir, mocker):
+    """無効の場合はプロファイラを起動せず、ファイルも書き出さない場合"""
+    profiler = mocker.patch("src.utils.cpu_profile.cProfile.Profile")
+    assert outer(10) == 2 * _busy(10)
+    profiler.assert_not_called()
+    assert list(profile_dir.iterdir()) == []
+
+
+def test_enabled_by_env(monkeypatch, profile_dir, caplog):
+    """環境変数で有効化した場合は外側の対象のみプロファイルを書き出す場合"""
+    monkeypatch.setenv(CPU_PROFILE_ENV, "1")
+    with caplog.at_level(logging.INFO, logger=cpu_profile.__name__):
+        assert outer(1000) == 2 * _busy(1000)
+
+    files = list(profile_dir.glob("*.prof"))
+    assert [f.name.split("_")[0] for f in files] == ["outer"]
+    # 入れ子の対象も外側のプロファイルに含まれる
+    functions = cpu_profile.load_profile(str(files[0]))
+    assert "tests/utils/test_cpu_profile.py:inner" in functions
+    assert functions["tests/utils/test_cpu_profile.py:_busy"][0] == 2
+    assert any("CPU profile for outer" in r.getMessage() for r in caplog.records)
+    assert cpu_profile._active is None
+
+
+def test_enabled_by_argument(monkeypatch, profile_dir):
+    """引数 profile が環境変数より優先される場合"""
+    assert inner(10, profile=True) == _busy(10)
+    assert len(list(profile_dir.glob("inner_*.prof"))) == 1
+
+    monkeypatch.setenv(CPU_PROFILE_ENV, "1")
+    inner(10, profile=False)
+    assert len(list(profile_dir.glob("*.prof"))) == 1
+
+
+@pytest.mark.skipif(not cpu_profile._PER_THREAD, reason="cProfile is per process")
+def test_worker_threads_merged(profile_dir):
+    """PipelinedExecutor のスレッドでの処理も外側のプロファイルに合算する場合"""
+
+    def _worker_busy(n: int) -> int:
+        return _busy(n)
+
+    @profiled("streaming")
+    def streaming():
+        PipelinedExecutor(depth=2).run(range(3), [("score", _worker_busy)])
+
+    streaming(profile=True)
+
+    (path,) = profile_dir.glob("streaming_*.prof")
+    functions = cpu_profile.load_profile(str(path))
+    worker = functions["tests/utils/test_cpu_profile.py:_worker_busy"]
+    assert worker[0] == 3 and worker[2] > 0
+
+
+def test_diff_profiles(profile_dir):
+    """同じ関数の時間と呼び出し回数の差分を大きい順に求める場合"""
+    inner(1000, profile=True)
+    outer(200_000, profile=True)
+    before, after = sorted(profile_dir.glob("*.prof"), key=lambda p: p.name)
+
+    rows = diff_profiles(str(before), str(after), sort="cumtime", top=50)
+    by_function = {r["function"]: r for r in rows}
+    busy = by_function["tests/utils/test_cpu_profile.py:_busy"]
+    assert (busy["calls_before"], busy["calls_after"]) == (1, 2)
+    assert busy["delta"] > 0
+    assert rows == sorted(rows, key=lambda r: abs(r["delta"]), reverse=True)
@@ -0,0 +1,58 @@
+import logging
+import logging.handlers
+import threading
+from unittest import mock
+
+import pytest
+
+from src.utils import logger as logger_module
+from src.utils.logger import setup_logging, shutdown_logging
+
+
+@pytest.fixture(autouse=True)
+def reset_logging():
+    """テストごとに設定をやり直し、終了後はデフォルトの設定に戻す"""
+    shutdown_logging()
+    yield
+    shutdown_logging()
+    setup_logging()
+
+
+def test_setup_logging_is_idempotent(mocker):
+    """2回目以降の呼び出しでは設定し直さない場合"""
+    dict_config = mocker.spy(logging.config, "dictConfig")
+
+    setup_logging()
+    setup_logging()
+
+    dict_config.assert_called_once()
+    handlers = logging.getLogger("src").handlers
+    assert len(handlers) == 1
+    assert isinstance(handlers[0], logging.handlers.QueueHandler)
+
+
+def test_records_are_written_by_listener_thread(tmp_path):
+    """ファイルへの書き込みは呼び出し元ではなくリスナーのスレッドで行う場合"""
+    emit_threads = []
+    emit = logging.handlers.RotatingFileHandler.emit
+
+    def recording_emit(self, record):
+        emit_threads.append(threading.current_thread())
+        emit(self, record)
+
+    with (
+        mock.patch.object(logger_module, "_log_dir", return_value=tmp_path),
+        mock.patch.object(logging.handlers.RotatingFileHandler, "emit", recording_emit),
+    ):
+        setup_logging()
+        logging.getLogger("src.test").debug("Trial %d finished", 3)
+        shutdown_logging()
+
+    assert "[DEBUG] src.test: Trial 3 finished" in (tmp_path / "app.log").read_text()
+    assert emit_threads and threading.main_thread() not in emit_threads
+
+
+def test_shutdown_logging_without_setup():
+    """設定前に呼び出しても何もしない場合"""
+    shutdown_logging()
+    assert logging.getLogger("src").handlers == []
@@ -0,0 +1,82 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from src.utils import memory_profile
+from src.utils.memory_profile import (
+    MEMORY_PROFILE_ENV,
+    memory_profiling_enabled,
+    traceback_frames,
+)
+from src.utils.tracing import clear_sinks, set_sink, span
+
+
+@pytest.fixture(autouse=True)
+def records():
+    clear_sinks()
+    memory_profile.reset()
+    emitted = []
+    set_sink("test", emitted.append)
+    yield emitted
+    clear_sinks()
+    memory_profile.reset()
+
+
+def _allocate(mb: int) -> np.ndarray:
+    return np.ones(mb * 2**20, dtype=np.uint8)
+
+
+@pytest.mark.parametrize(
+    "value, frames",
+    [(None, 0), ("", 0), ("0", 0), ("false", 0), ("true", 1), ("1", 1), ("8", 8)],
+)
+def test_traceback_frames(monkeypatch, value, frames):
+    """環境変数の値で有効・無効とスタックの深さを判定する場合"""
+    if value is None:
+        monkeypatch.delenv(MEMORY_PROFILE_ENV, raising=False)
+    else:
+        monkeypatch.setenv(MEMORY_PROFILE_ENV, value)
+    assert traceback_frames() == frames
+    assert memory_profiling_enabled() is (frames > 0)
+
+
+def test_disabled_by_default(monkeypatch, records):
+    """無効の場合はメモリの計測結果を追加せず、tracemalloc も開始しない場合"""
+    monkeypatch.delenv(MEMORY_PROFILE_ENV, raising=False)
+    with span("training"):
+        assert not tracemalloc.is_tracing()
+    assert "tracemalloc_peak_mb" not in records[0]["attributes"]
+
+
+def test_nested_span_peaks(monkeypatch, records, caplog):
+    """入れ子のスパンごとにピークと確保元を記録し、終了後に tracemalloc を停止する場合"""
+    # 確保元をテストの行まで遡れる深さで記録する
+    monkeypatch.setenv(MEMORY_PROFILE_ENV, "16")
+    with caplog.at_level("INFO", logger="src.utils.memory_profile"):
+        with span("training"):
+            with span("split"):
+                kept = _allocate(4)
+            with span("train"):
+                # 一時的な確保は終了時点で解放されていてもピークに含まれる
+                _allocate(16)
+
+    split, train, root = (r["attributes"] for r in records)
+    assert split["tracemalloc_peak_increase_mb"] == pytest.approx(4, abs=0.5)
+    assert train["tracemalloc_peak_increase_mb"] == pytest.approx(16, abs=0.5)
+    assert root["tracemalloc_peak_increase_mb"] >= 20 - 0.5
+    allocate_line = _allocate.__code__.co_firstlineno + 1
+    assert split["top_allocations"][0]["site"] == (
+        f"tests/utils/test_memory_profile.py:{allocate_line}"
+    )
+    assert split["top_allocations"][0]["size_mb"] == pytest.approx(4, abs=0.1)
+    assert all(a["size_mb"] < 1 for a in train["top_allocations"])
+    assert not tracemalloc.is_tracing()
+
+    report = [
+        r.getMessage() for r in caplog.records if r.name == memory_profile.__name__
+    ]
+    assert report[0].startswith("Memory peaks in run")
+    assert report[1].endswith("training")
+    assert report[2].endswith("training/train")
+    del kept
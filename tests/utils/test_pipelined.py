@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+from src.utils.pipelined import PipelinedExecutor
+from src.utils.tracing import current_span, span
+
+
+def test_run_preserves_order_and_counts():
+    """全ての要素を順序どおりに処理し、ステージごとの件数を記録する場合"""
+    results = []
+    stats = PipelinedExecutor(depth=2).run(
+        range(10),
+        [("double", lambda x: x * 2), ("collect", results.append)],
+    )
+
+    assert results == [x * 2 for x in range(10)]
+    assert [s.name for s in stats] == ["fetch", "double", "collect"]
+    assert [s.items for s in stats] == [10, 10, 10]
+
+
+def test_run_sequential():
+    """depth=0の場合は呼び出し元のスレッドで逐次実行する場合"""
+    threads = []
+    PipelinedExecutor(depth=0).run(
+        range(3), [("record", lambda x: threads.append(threading.current_thread()))]
+    )
+
+    assert threads == [threading.current_thread()] * 3
+
+
+def test_run_overlaps_stages():
+    """各ステージが並行に実行され、逐次実行より短い時間で終わる場合"""
+
+    def slow_source():
+        for i in range(10):
+            time.sleep(0.03)
+            yield i
+
+    def slow(x):
+        time.sleep(0.03)
+        return x
+
+    start = time.perf_counter()
+    stats = PipelinedExecutor(depth=2).run(
+        slow_source(), [("score", slow), ("upload", slow)]
+    )
+    elapsed = time.perf_counter() - start
+
+    # 逐次実行では約 0.9 秒、並行実行では約 0.36 秒
+    assert elapsed < 0.7
+    assert all(s.busy_seconds >= 0.25 for s in stats)
+    # 後段は前段の最初の要素を待つため、入力待ちの時間が記録される
+    assert stats[2].idle_seconds > 0
+
+
+def test_run_bounds_in_flight_items():
+    """後段が遅い場合でも、先行して取得する要素数が depth で制限される場合"""
+    fetched = []
+    uploaded = []
+    max_in_flight = 0
+
+    def source():
+        nonlocal max_in_flight
+        for i in range(20):
+            fetched.append(i)
+            max_in_flight = max(max_in_flight, len(fetched) - len(uploaded))
+            yield i
+
+    def upload(x):
+        time.sleep(0.01)
+        uploaded.append(x)
+
+    stats = PipelinedExecutor(depth=1).run(
+        source(), [("score", lambda x: x), ("upload", upload)]
+    )
+
+    assert uploaded == list(range(20))
+    assert max_in_flight <= 2 * 1 + 3
+    # 取得ステージは後段の空きを待つ
+    assert stats[0].blocked_seconds > 0
+
+
+def test_run_propagates_stage_error():
+    """途中のステージで例外が発生した場合、全体を停止して例外を送出する場合"""
+
+    def fail(x):
+        if x == 3:
+            raise ValueError("推論エラー")
+        return x
+
+    uploaded = []
+    with pytest.raises(ValueError, match="推論エラー"):
+        PipelinedExecutor(depth=2).run(
+            range(100), [("score", fail), ("upload", uploaded.append)]
+        )
+
+    assert uploaded == [0, 1, 2]
+
+
+def test_invalid_depth():
+    """depthが負の場合はエラーとなる場合"""
+    with pytest.raises(ValueError, match="depth must be non-negative"):
+        PipelinedExecutor(depth=-1)
+
+
+def test_run_threaded_inherits_current_span():
+    """各ステージのスレッドが呼び出し元のスパンを引き継ぐ場合"""
+    seen = []
+
+    def source():
+        for i in range(2):
+            seen.append(("fetch", current_span()))
+            yield i
+
+    with span("prediction") as root:
+        PipelinedExecutor(depth=1).run(
+            source(), [("upload", lambda x: seen.append(("upload", current_span())))]
+        )
+
+    assert len(seen) == 4
+    assert all(s is root for _, s in seen)
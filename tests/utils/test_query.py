@@ -0,0 +1,79 @@
+import json
+
+import pytest
+from snowflake.snowpark import Session
+
+from src.utils.query import (
+    Query,
+    and_conditions,
+    column_list,
+    in_list,
+    qualified_name,
+    quote_identifier,
+    run_query,
+)
+
+
+def test_quote_identifier():
+    """引用符なしの場合と同じく大文字で解決されるよう、大文字にして囲む場合"""
+    assert quote_identifier("online_shoppers_intention") == (
+        '"ONLINE_SHOPPERS_INTENTION"'
+    )
+    assert quote_identifier("SCORES$1") == '"SCORES$1"'
+    # get_current_database などが返す引用符付きの識別子はそのまま使う
+    assert quote_identifier('"MLSYSTEM_DEV"') == '"MLSYSTEM_DEV"'
+    assert quote_identifier('"My ""db"""') == '"My ""db"""'
+
+
+@pytest.mark.parametrize(
+    "name",
+    ["", "1TABLE", "TABLE; DROP TABLE SCORES", 'A"B', '"A"B"', "DB.TABLE", "A B"],
+)
+def test_quote_identifier_invalid(name):
+    """識別子として使えない文字を含む場合はエラーになる場合"""
+    with pytest.raises(ValueError, match="Invalid identifier"):
+        quote_identifier(name)
+
+
+def test_qualified_name_and_column_list():
+    """完全修飾名・カラム一覧の各要素を検証して引用符で囲む場合"""
+    assert qualified_name("db", "schema", "table") == '"DB"."SCHEMA"."TABLE"'
+    assert column_list(["UID", "score"], alias="d") == '"D"."UID", "D"."SCORE"'
+
+    with pytest.raises(ValueError):
+        qualified_name("db", "schema", "table;")
+
+
+def test_in_list():
+    """値の個数によらず同じ SQL 文になり、値は JSON 配列としてバインドされる場合"""
+    one = in_list("SESSION_DATE", ["2024-01-01"])
+    many = in_list("SESSION_DATE", ["2024-01-01", "2024-01-02", "2024-01-03"])
+
+    assert one.text == many.text
+    assert json.loads(many.params[0]) == ["2024-01-01", "2024-01-02", "2024-01-03"]
+    assert in_list("MODEL_ID", [1, 2], "NUMBER").params == ("[1, 2]",)
+
+    with pytest.raises(ValueError, match="Invalid SQL type"):
+        in_list("SESSION_DATE", [], "DATE) OR (1=1")
+
+
+def test_and_conditions_and_concatenation():
+    """条件式・断片を連結した場合はパラメータも順に連結される場合"""
+    condition = and_conditions(
+        Query("SESSION_DATE = ?", ("2024-01-01",)), Query("MODEL_ID <> ?", (3,))
+    )
+    assert condition == Query("SESSION_DATE = ? AND MODEL_ID <> ?", ("2024-01-01", 3))
+    assert Query("SELECT ?", (1,)) + Query(" UNION SELECT ?", (2,)) == Query(
+        "SELECT ? UNION SELECT ?", (1, 2)
+    )
+
+
+def test_run_query(mocker):
+    """パラメータがある場合のみ params として渡す場合"""
+    session = mocker.Mock(spec=Session)
+
+    run_query(session, Query("SELECT * FROM T WHERE A = ?", (1,)))
+    session.sql.assert_called_with("SELECT * FROM T WHERE A = ?", params=[1])
+
+    run_query(session, Query("SELECT 1"))
+    session.sql.assert_called_with("SELECT 1", params=None)
@@ -0,0 +1,227 @@
+import contextvars
+import json
+import threading
+import time
+from collections import namedtuple
+from typing import List, Optional
+
+import pandas as pd
+import pytest
+
+from src.utils.query import Query, run_query
+from src.utils.query_profile import (
+    profile_query,
+    query_records,
+    report_slowest_queries,
+    slowest_queries,
+)
+from src.utils.tracing import clear_sinks, span
+
+_Record = namedtuple("_Record", ["query_id", "sql_text", "thread_id"])
+
+
+class _FakeHistory:
+    def __init__(self, session: "_FakeSession") -> None:
+        self._session = session
+        self.queries: List[_Record] = []
+
+    def __enter__(self) -> "_FakeHistory":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._session.listeners.remove(self)
+
+
+class _FakeJob:
+    def __init__(self, query_id: str, rows: list) -> None:
+        self.query_id = query_id
+        self._rows = rows
+
+    def is_done(self) -> bool:
+        return True
+
+    def result(self) -> list:
+        return self._rows
+
+
+class _FakeResult:
+    def __init__(self, session: "_FakeSession", text: str) -> None:
+        self._session = session
+        self._text = text
+
+    def _execute(self) -> str:
+        self._session.tags.append(self._session.query_tag)
+        if self._text in self._session.failures:
+            raise Exception(f"{self._text} failed")
+        time.sleep(self._session.delays.get(self._text, 0))
+        query_id = f"q{len(self._session.tags)}"
+        for listener in self._session.listeners:
+            listener.queries.append(
+                _Record(query_id, self._text, threading.get_ident())
+            )
+        return query_id
+
+    def collect(self) -> list:
+        self._execute()
+        return [(1,), (2,)]
+
+    def to_pandas(self) -> pd.DataFrame:
+        self._execute()
+        return pd.DataFrame({"A": [1, 2, 3]})
+
+    def to_pandas_batches(self):
+        self._execute()
+        return iter([pd.DataFrame({"A": [1, 2]}), pd.DataFrame({"A": [3]})])
+
+    def collect_nowait(self) -> _FakeJob:
+        return _FakeJob(self._execute(), [(1,)])
+
+
+class _FakeSession:
+    def __init__(self, delays: Optional[dict] = None, failures: tuple = ()) -> None:
+        self.query_tag: Optional[str] = None
+        self.tags: List[Optional[str]] = []
+        self.listeners: List[_FakeHistory] = []
+        self.delays = delays or {}
+        self.failures = failures
+
+    def sql(self, text: str, params: Optional[list] = None) -> _FakeResult:
+        return _FakeResult(self, text)
+
+    def query_history(self, include_thread_id: bool = False) -> _FakeHistory:
+        history = _FakeHistory(self)
+        self.listeners.append(history)
+        return history
+
+
+@pytest.fixture(autouse=True)
+def no_sinks():
+    clear_sinks()
+    yield
+    clear_sinks()
+
+
+def test_run_query_outside_span():
+    """スパンの外ではクエリタグを設定せず、記録もしない場合"""
+    session = _FakeSession()
+
+    assert run_query(session, Query("SELECT 1")).collect() == [(1,), (2,)]
+    assert session.tags == [None]
+
+
+def test_run_query_sets_tag_and_records():
+    """スパンの中ではクエリタグを設定し、クエリ ID・行数・経過時間を記録する場合"""
+    session = _FakeSession(delays={"SELECT B": 0.02})
+
+    with span("prediction") as root:
+        with span("fetch_dataset") as stage:
+            run_query(session, Query("SELECT A")).to_pandas()
+            run_query(session, Query("SELECT B")).collect()
+
+    tag = json.loads(session.tags[0])
+    assert tag == {"procedure": "prediction", "run_id": root.trace_id}
+    assert session.tags[1] == session.tags[0]
+
+    records = query_records(root.trace_id)
+    assert [(r.query_id, r.sql_text, r.rows) for r in records] == [
+        ("q1", "SELECT A", 3),
+        ("q2", "SELECT B", 2),
+    ]
+    assert {r.stage for r in records} == {"prediction/fetch_dataset"}
+    assert {r.thread_id for r in records} == {threading.get_ident()}
+    assert records[1].elapsed_seconds >= 0.02
+    assert stage.attributes["query_count"] == 2
+    assert [r.sql_text for r in slowest_queries(root.trace_id, limit=1)] == ["SELECT B"]
+
+
+def test_run_query_batches_exclude_consumer_time():
+    """バッチの行数を合計し、呼び出し元の処理時間は経過時間に含めない場合"""
+    session = _FakeSession()
+
+    with span("prediction") as root:
+        for _ in run_query(session, Query("SELECT A")).to_pandas_batches():
+            time.sleep(0.02)
+
+    (record,) = query_records(root.trace_id)
+    assert record.rows == 3
+    assert record.query_id == "q1"
+    assert record.elapsed_seconds < 0.02
+
+
+def test_run_query_failure_and_async():
+    """失敗した SQL 文は error として、非同期の SQL 文は結果の取得時に記録する場合"""
+    session = _FakeSession(failures=("SELECT A",))
+
+    with span("setup") as root:
+        with pytest.raises(Exception, match="SELECT A failed"):
+            run_query(session, Query("SELECT A")).collect()
+        job = run_query(session, Query("SELECT B")).collect_nowait()
+        assert job.is_done()
+        job.result()
+
+    records = query_records(root.trace_id)
+    assert [(r.sql_text, r.status) for r in records] == [
+        ("SELECT A", "error"),
+        ("SELECT B", "ok"),
+    ]
+    assert records[1].query_id == "q2"
+
+
+def test_report_slowest_queries():
+    """時間のかかった順に出力してスパンに追加し、記録を破棄する場合"""
+    session = _FakeSession(delays={"SELECT B": 0.02})
+
+    with span("training") as root:
+        for text in ("SELECT A", "SELECT B", "SELECT C"):
+            run_query(session, Query(text)).collect()
+        slowest = report_slowest_queries(limit=2)
+
+    assert [r.sql_text for r in slowest][0] == "SELECT B"
+    assert len(slowest) == 2
+    assert root.attributes["slowest_queries"][0]["sql_text"] == "SELECT B"
+    assert query_records(root.trace_id) == []
+    assert report_slowest_queries() == []
+
+
+def test_run_query_attributes_concurrent_stages_by_thread():
+    """同じセッションで別スレッドが別ステージを実行しても、スレッドのスパンで記録する場合"""
+    session = _FakeSession(delays={"SELECT A": 0.02, "SELECT B": 0.02})
+    barrier = threading.Barrier(2)
+
+    def run_stage(name: str, text: str) -> None:
+        with span(name):
+            barrier.wait()
+            run_query(session, Query(text)).collect()
+
+    with span("prediction") as root:
+        threads = [
+            threading.Thread(
+                target=contextvars.copy_context().run, args=(run_stage, name, text)
+            )
+            for name, text in (("fetch", "SELECT A"), ("upload", "SELECT B"))
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    records = {r.sql_text: r for r in query_records(root.trace_id)}
+    assert records["SELECT A"].stage == "prediction/fetch"
+    assert records["SELECT B"].stage == "prediction/upload"
+    assert records["SELECT A"].thread_id != records["SELECT B"].thread_id
+    # クエリタグはスレッド間で変わらないため、互いに上書きされない
+    assert len(set(session.tags)) == 1
+
+
+def test_profile_query_records_writes():
+    """書き込みなどの処理を、このスレッドで最後に発行された SQL 文のクエリ ID で記録する場合"""
+    session = _FakeSession()
+
+    def write() -> None:
+        run_query(session, Query("INSERT A")).collect()
+
+    with span("prediction") as root:
+        profile_query(session, "SAVE AS TABLE T", write, rows=5, match_sql=False)
+
+    save = [r for r in query_records(root.trace_id) if r.sql_text == "SAVE AS TABLE T"]
+    assert [(r.query_id, r.rows, r.status) for r in save] == [("q1", 5, "ok")]
@@ -0,0 +1,171 @@
+import threading
+
+import pytest
+
+from src.utils.session_pool import SessionPool
+
+
+class FakeSession:
+    """close と SELECT 1 の呼び出しを記録するセッション"""
+
+    def __init__(self, healthy=True):
+        self.healthy = healthy
+        self.closed = False
+        self.checks = 0
+
+    def sql(self, query):
+        assert query == "SELECT 1"
+        self.checks += 1
+        return self
+
+    def collect(self):
+        if not self.healthy:
+            raise Exception("connection lost")
+        return [(1,)]
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def sessions():
+    return []
+
+
+@pytest.fixture
+def factory(sessions):
+    def create():
+        session = FakeSession()
+        sessions.append(session)
+        return session
+
+    return create
+
+
+def test_session_is_reused(factory, sessions):
+    """返却したセッションを次のチェックアウトで再利用する場合"""
+    pool = SessionPool(factory, max_size=2)
+
+    with pool.session() as first:
+        pass
+    with pool.session() as second:
+        pass
+
+    assert first is second
+    assert len(sessions) == 1
+    assert not first.closed
+
+
+def test_nested_checkout_in_same_thread(factory, sessions):
+    """同じスレッド内で入れ子にチェックアウトした場合は同じセッションを返す場合"""
+    pool = SessionPool(factory, max_size=1)
+
+    with pool.session() as outer:
+        with pool.session(timeout=0) as inner:
+            assert inner is outer
+
+    assert pool.size == 1
+
+
+def test_max_size_and_timeout(factory, sessions):
+    """max_size を超えて作成せず、空きがなければ timeout でエラーになる場合"""
+    pool = SessionPool(factory, max_size=1)
+    checked_out = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with pool.session():
+            checked_out.set()
+            release.wait()
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    checked_out.wait()
+    try:
+        with pytest.raises(TimeoutError):
+            with pool.session(timeout=0.01):
+                pass
+    finally:
+        release.set()
+        thread.join()
+
+    # 返却後は同じセッションを借りられる
+    with pool.session(timeout=1):
+        pass
+    assert len(sessions) == 1
+
+
+def test_parallel_workers_share_pool(factory, sessions):
+    """並列ワーカーは max_size 個までのセッションを共有する場合"""
+    pool = SessionPool(factory, max_size=2)
+    barrier = threading.Barrier(2)
+    used = []
+
+    def work():
+        with pool.session() as session:
+            barrier.wait()
+            used.append(session)
+
+    threads = [threading.Thread(target=work) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(sessions) == 2
+    assert used[0] is not used[1]
+    with pool.session():
+        pass
+    assert len(sessions) == 2
+
+
+def test_idle_sessions_are_evicted(factory, sessions):
+    """idle_timeout_seconds を超えて使われていないセッションは閉じて作り直す場合"""
+    pool = SessionPool(factory, max_size=1, idle_timeout_seconds=0)
+
+    with pool.session():
+        pass
+    with pool.session():
+        pass
+
+    assert len(sessions) == 2
+    assert all(s.closed for s in sessions)
+    assert pool.size == 0
+
+
+def test_unhealthy_session_is_replaced(factory, sessions):
+    """接続の確認に失敗したセッションは破棄して新しいセッションを作成する場合"""
+    pool = SessionPool(factory, max_size=1, health_check_interval_seconds=0)
+
+    with pool.session() as first:
+        first.healthy = False
+    with pool.session() as second:
+        pass
+
+    assert second is not first
+    assert first.checks == 1 and first.closed
+    assert pool.size == 1
+
+
+def test_factory_failure_releases_slot(sessions):
+    """セッションの作成に失敗した場合は枠を解放してエラーになる場合"""
+    pool = SessionPool(lambda: None, max_size=1)
+
+    with pytest.raises(RuntimeError, match="Failed to create Snowflake session"):
+        with pool.session():
+            pass
+    assert pool.size == 0
+
+
+def test_close(factory, sessions):
+    """close 後は待機中のセッションを閉じ、新たなチェックアウトはエラーになる場合"""
+    pool = SessionPool(factory, max_size=2)
+    with pool.session():
+        pass
+
+    pool.close()
+
+    assert sessions[0].closed
+    with pytest.raises(RuntimeError, match="closed"):
+        with pool.session():
+            pass
@@ -6,7 +6,15 @@ from snowflake.snowpark import Session
 from snowflake.snowpark.dataframe import DataFrame as SnowparkDataFrame
 from snowflake.snowpark.exceptions import SnowparkSessionException
 
-from src.utils.snowflake import create_session, upload_dataframe_to_snowflake
+from src.utils.query import Query
+from src.utils.snowflake import (
+    _read_connection_parameters,
+    create_session,
+    create_staging_table,
+    publish_staging_table,
+    session_date_condition,
+    upload_dataframe_to_snowflake,
+)
 
 TEST_CONNECTION_PARAMS = {
     "account": "test_account",
@@ -22,7 +30,9 @@ TEST_CONNECTION_PARAMS = {
 def mock_json_file(mocker):
     """設定ファイルのモックを作成するフィクスチャ"""
     mock_data = json.dumps(TEST_CONNECTION_PARAMS)
-    return mocker.patch("builtins.open", mocker.mock_open(read_data=mock_data))
+    _read_connection_parameters.cache_clear()
+    yield mocker.patch("builtins.open", mocker.mock_open(read_data=mock_data))
+    _read_connection_parameters.cache_clear()
 
 
 @pytest.fixture
@@ -48,7 +58,7 @@ def mock_snowflake_session(mocker, mock_snowpark_df):
     """Snowflakeセッションのモックを作成するフィクスチャ"""
     mock_session = mocker.MagicMock(spec=Session)
     mock_session.create_dataframe.return_value = mock_snowpark_df
-    mock_session.table.return_value.count.return_value = 10
+    mock_session.sql.return_value.collect.return_value = [(10,)]
     return mock_session
 
 
@@ -62,6 +72,15 @@ def test_create_session_success(mock_json_file, mock_session_builder):
     mock_session_builder.configs.assert_called_once_with(TEST_CONNECTION_PARAMS)
 
 
+def test_create_session_reads_parameters_once(mock_json_file, mock_session_builder):
+    """接続パラメータファイルは環境ごとに1回だけ読み込む場合"""
+    create_session()
+    create_session()
+
+    mock_json_file.assert_called_once_with("connection_parameters_dev.json")
+    assert mock_session_builder.configs.call_count == 2
+
+
 def test_create_session_connection_error(mock_json_file, mock_session_builder):
     """Snowflakeへの接続に失敗する場合"""
     # モックの設定
@@ -93,7 +112,7 @@ def test_upload_dataframe_to_snowflake_success(
     )
 
     # アサーション
-    expected_table_name = f"{test_params['database_name']}.{test_params['schema_name']}.{test_params['table_name']}"
+    expected_table_name = '"TEST_DB"."TEST_SCHEMA"."TEST_TABLE"'
     mock_snowflake_session.use_database.assert_called_once_with(
         test_params["database_name"]
     )
@@ -110,7 +129,7 @@ def test_upload_dataframe_to_snowflake_success(
 def test_upload_dataframe_to_snowflake_append_mode(
     mock_snowflake_session, mock_snowpark_df
 ):
-    """appendモードでSESSION_DATEカラムを含むデータフレームをアップロードする場合"""
+    """appendモードでSESSION_DATEカラムを含むデータフレームをそのまま追加する場合"""
     # テストデータの準備
     test_dates = ["2024-01-01", "2024-01-02"]
     test_df = pd.DataFrame({"SESSION_DATE": test_dates, "col1": [1, 2]})
@@ -120,15 +139,12 @@ def test_upload_dataframe_to_snowflake_append_mode(
         "table_name": "test_table",
     }
 
-    # SQLの実行結果のモック
-    mock_snowflake_session.sql.return_value.collect = lambda: None
-
     upload_dataframe_to_snowflake(
         session=mock_snowflake_session, df=test_df, mode="append", **test_params
     )
 
     # アサーション
-    expected_table_name = f"{test_params['database_name']}.{test_params['schema_name']}.{test_params['table_name']}"
+    expected_table_name = '"TEST_DB"."TEST_SCHEMA"."TEST_TABLE"'
 
     # データベースとスキーマの使用
     mock_snowflake_session.use_database.assert_called_once_with(
@@ -138,15 +154,10 @@ def test_upload_dataframe_to_snowflake_append_mode(
         test_params["schema_name"]
     )
 
-    # 既存データの削除
-    expected_delete_sql = f"DELETE FROM {expected_table_name} WHERE SESSION_DATE IN ('2024-01-01','2024-01-02')"
-
-    # 実際のSQL呼び出しの取得と正規化
-    actual_sql = mock_snowflake_session.sql.call_args[0][0]
-    normalized_actual_sql = " ".join(actual_sql.split())
-    normalized_expected_sql = " ".join(expected_delete_sql.split())
-
-    assert normalized_actual_sql == normalized_expected_sql
+    # 既存データは削除せずに追加し、件数のみ確認する（置き換えはswapモードで行う）
+    mock_snowflake_session.sql.assert_called_once_with(
+        f"SELECT COUNT(*) FROM {expected_table_name}", params=None
+    )
 
     # データフレームの作成と保存
     mock_snowflake_session.create_dataframe.assert_called_once_with(test_df)
@@ -172,10 +183,11 @@ def test_upload_dataframe_to_snowflake_append_mode_without_session_date(
         session=mock_snowflake_session, df=test_df, mode="append", **test_params
     )
 
-    # 既存データの削除が呼ばれていないことを確認
-    mock_snowflake_session.sql.assert_not_called()
-
-    expected_table_name = f"{test_params['database_name']}.{test_params['schema_name']}.{test_params['table_name']}"
+    # 既存データの削除は呼ばれず、件数のみ確認することを確認
+    expected_table_name = '"TEST_DB"."TEST_SCHEMA"."TEST_TABLE"'
+    mock_snowflake_session.sql.assert_called_once_with(
+        f"SELECT COUNT(*) FROM {expected_table_name}", params=None
+    )
     mock_snowflake_session.create_dataframe.assert_called_once_with(test_df)
     mock_snowpark_df.write.mode.assert_called_once_with("append")
     mock_snowpark_df.write.mode.return_value.save_as_table.assert_called_once_with(
@@ -183,6 +195,87 @@ def test_upload_dataframe_to_snowflake_append_mode_without_session_date(
     )
 
 
+def test_upload_dataframe_to_snowflake_swap_mode(
+    mock_snowflake_session, mock_snowpark_df
+):
+    """swapモードでステージング経由で同じ日付のデータを置き換える場合"""
+    test_df = pd.DataFrame(
+        {"SESSION_DATE": ["2024-01-01", "2024-01-02", "2024-01-01"], "col1": [1, 2, 3]}
+    )
+
+    upload_dataframe_to_snowflake(
+        session=mock_snowflake_session,
+        df=test_df,
+        database_name="test_db",
+        schema_name="test_schema",
+        table_name="test_table",
+        mode="swap",
+    )
+
+    calls = mock_snowflake_session.sql.call_args_list
+    statements = [c[0][0] for c in calls]
+    staging = statements[0].split()[3]
+    assert staging.startswith('"TEST_DB"."TEST_SCHEMA"."TEST_TABLE_STAGING_')
+    assert statements[1:] == [
+        "BEGIN",
+        'DELETE FROM "TEST_DB"."TEST_SCHEMA"."TEST_TABLE" WHERE SESSION_DATE IN '
+        "(SELECT VALUE::DATE FROM TABLE(FLATTEN(INPUT => PARSE_JSON(?))))",
+        f'INSERT INTO "TEST_DB"."TEST_SCHEMA"."TEST_TABLE" SELECT * FROM {staging}',
+        "COMMIT",
+        f"DROP TABLE IF EXISTS {staging}",
+    ]
+    assert calls[2].kwargs["params"] == ['["2024-01-01", "2024-01-02"]']
+    # ロード先テーブルには直接書き込まず、ステージングテーブルにのみ追加する
+    mock_snowpark_df.write.mode.assert_called_once_with("append")
+    mock_snowpark_df.write.mode.return_value.save_as_table.assert_called_once_with(
+        staging
+    )
+
+
+def test_upload_dataframe_to_snowflake_swap_mode_staging_write_fails(
+    mock_snowflake_session, mock_snowpark_df
+):
+    """swapモードでステージングへの書き込みに失敗した場合はロード先を変更しない場合"""
+    test_df = pd.DataFrame({"SESSION_DATE": ["2024-01-01"], "col1": [1]})
+    mock_snowpark_df.write.mode.return_value.save_as_table.side_effect = Exception(
+        "書き込みエラー"
+    )
+
+    with pytest.raises(Exception, match="書き込みエラー"):
+        upload_dataframe_to_snowflake(
+            session=mock_snowflake_session,
+            df=test_df,
+            database_name="test_db",
+            schema_name="test_schema",
+            table_name="test_table",
+            mode="swap",
+        )
+
+    statements = [c[0][0] for c in mock_snowflake_session.sql.call_args_list]
+    assert len(statements) == 2
+    assert statements[0].startswith("CREATE TEMPORARY TABLE")
+    assert statements[1].startswith("DROP TABLE IF EXISTS")
+
+
+def test_upload_dataframe_to_snowflake_swap_mode_without_session_date(
+    mock_snowflake_session,
+):
+    """swapモードでSESSION_DATEカラムが存在しない場合"""
+    test_df = pd.DataFrame({"col1": [1]})
+
+    with pytest.raises(ValueError, match="SESSION_DATE"):
+        upload_dataframe_to_snowflake(
+            session=mock_snowflake_session,
+            df=test_df,
+            database_name="test_db",
+            schema_name="test_schema",
+            table_name="test_table",
+            mode="swap",
+        )
+
+    mock_snowflake_session.sql.assert_not_called()
+
+
 def test_upload_dataframe_to_snowflake_error(mock_snowflake_session):
     """Snowflakeへのアップロードに失敗する場合"""
     test_df = pd.DataFrame({"col1": [1, 2, 3]})
@@ -199,3 +292,86 @@ def test_upload_dataframe_to_snowflake_error(mock_snowflake_session):
         )
 
     assert error_message in str(exc_info.value)
+
+
+def test_create_staging_table(mock_snowflake_session):
+    """ロード先と同じ構成の一時テーブルを作成する場合"""
+    staging = create_staging_table(
+        mock_snowflake_session, "test_db", "test_schema", "test_table"
+    )
+
+    assert staging.startswith('"TEST_DB"."TEST_SCHEMA"."TEST_TABLE_STAGING_')
+    mock_snowflake_session.sql.assert_called_once_with(
+        f'CREATE TEMPORARY TABLE {staging} LIKE "TEST_DB"."TEST_SCHEMA"."TEST_TABLE"',
+        params=None,
+    )
+
+
+def test_create_staging_table_invalid_identifier(mock_snowflake_session):
+    """識別子として不正なテーブル名は拒否する場合"""
+    with pytest.raises(ValueError, match="Invalid identifier"):
+        create_staging_table(
+            mock_snowflake_session, "test_db", "test_schema", "t; DROP TABLE x"
+        )
+
+    mock_snowflake_session.sql.assert_not_called()
+
+
+def test_publish_staging_table(mock_snowflake_session):
+    """削除と追加を1つのトランザクションで反映する場合"""
+    publish_staging_table(
+        mock_snowflake_session,
+        "test_db.test_schema.staging",
+        "test_db.test_schema.test_table",
+        delete_condition=Query("SESSION_DATE = ?", ("2024-01-01",)),
+    )
+
+    calls = mock_snowflake_session.sql.call_args_list
+    statements = [c[0][0] for c in calls]
+    assert statements == [
+        "BEGIN",
+        "DELETE FROM test_db.test_schema.test_table WHERE SESSION_DATE = ?",
+        "INSERT INTO test_db.test_schema.test_table "
+        "SELECT * FROM test_db.test_schema.staging",
+        "COMMIT",
+        "DROP TABLE IF EXISTS test_db.test_schema.staging",
+    ]
+    assert calls[1].kwargs["params"] == ["2024-01-01"]
+
+
+def test_publish_staging_table_rollback(mock_snowflake_session):
+    """反映に失敗した場合はロールバックする場合"""
+
+    def sql(query, params=None):
+        if query.startswith("INSERT"):
+            raise Exception("挿入エラー")
+        return mock_snowflake_session.sql.return_value
+
+    mock_snowflake_session.sql.side_effect = sql
+
+    with pytest.raises(Exception, match="挿入エラー"):
+        publish_staging_table(
+            mock_snowflake_session,
+            "test_db.test_schema.staging",
+            "test_db.test_schema.test_table",
+        )
+
+    statements = [c[0][0] for c in mock_snowflake_session.sql.call_args_list]
+    assert "COMMIT" not in statements
+    assert statements[-2:] == [
+        "ROLLBACK",
+        "DROP TABLE IF EXISTS test_db.test_schema.staging",
+    ]
+
+
+def test_session_date_condition():
+    """単日は等号、期間は BETWEEN の条件式になり、日付はバインドされる場合"""
+    assert session_date_condition("2024-01-01") == Query(
+        "SESSION_DATE = ?", ("2024-01-01",)
+    )
+    assert session_date_condition("2024-01-01", "2024-01-01") == Query(
+        "SESSION_DATE = ?", ("2024-01-01",)
+    )
+    assert session_date_condition(
+        "2024-01-01", "2024-01-31", "d.SESSION_DATE"
+    ) == Query("d.SESSION_DATE BETWEEN ? AND ?", ("2024-01-01", "2024-01-31"))
@@ -0,0 +1,133 @@
+import json
+
+import pandas as pd
+import pytest
+from snowflake.snowpark import Session
+
+from src.utils.tracing import (
+    JsonLinesSink,
+    TableSink,
+    clear_sinks,
+    current_span,
+    set_sink,
+    span,
+    timed,
+)
+
+
+@pytest.fixture(autouse=True)
+def records():
+    """スパンのレコードを記録する書き出し先を登録する"""
+    clear_sinks()
+    emitted = []
+    set_sink("test", emitted.append)
+    yield emitted
+    clear_sinks()
+
+
+def test_span_nesting(records):
+    """子スパンは親のパスと trace_id を引き継ぎ、子から順に出力される場合"""
+    with span("prediction", model="m") as root:
+        with span("score", rows=10) as child:
+            assert current_span() is child
+        assert current_span() is root
+    assert current_span() is None
+
+    assert [r["path"] for r in records] == ["prediction/score", "prediction"]
+    assert records[0]["trace_id"] == records[1]["trace_id"]
+    assert records[0]["rows"] == 10
+    assert records[1]["attributes"] == {"model": "m"}
+    assert records[1]["wall_seconds"] >= records[0]["wall_seconds"]
+    assert records[1]["peak_rss_mb"] > 0
+
+    with span("prediction"):
+        pass
+    assert records[2]["trace_id"] != records[1]["trace_id"]
+
+
+def test_span_rows_per_second():
+    """行数と経過時間からスループットを計算する場合"""
+    with span("score") as current:
+        current.rows = 100
+    assert current.rows_per_second == pytest.approx(100 / current.wall_seconds)
+
+    with span("score") as current:
+        pass
+    assert current.rows_per_second is None
+
+
+def test_span_error(records):
+    """例外が発生した場合は status を error にして再送出する場合"""
+    with pytest.raises(ValueError):
+        with span("train"):
+            raise ValueError("bad data")
+
+    assert records[0]["status"] == "error"
+    assert records[0]["attributes"]["error"] == "ValueError: bad data"
+
+
+def test_timed_counts_rows(records):
+    """戻り値の DataFrame の行数を記録する場合"""
+
+    @timed("fetch")
+    def fetch():
+        return pd.DataFrame({"A": [1, 2, 3]})
+
+    @timed()
+    def noop():
+        return None
+
+    assert len(fetch()) == 3
+    noop()
+
+    assert records[0]["name"] == "fetch"
+    assert records[0]["rows"] == 3
+    assert records[1]["name"] == "noop"
+    assert records[1]["rows"] is None
+
+
+def test_json_lines_sink(tmp_path):
+    """スパンごとに1行の JSON を追記する場合"""
+    path = tmp_path / "spans.jsonl"
+    set_sink("file", JsonLinesSink(str(path)))
+
+    with span("dataset"):
+        with span("update_dataset"):
+            pass
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["path"] for line in lines] == ["dataset/update_dataset", "dataset"]
+
+
+def test_table_sink_flushes_on_root(mocker):
+    """ルートのスパンの終了時にまとめて1回だけ追記する場合"""
+    session = mocker.Mock(spec=Session)
+    set_sink("table", TableSink(session, '"DB"."SCHEMA"."SPANS"'))
+
+    with span("training"):
+        with span("train", n_trials=5):
+            pass
+        session.create_dataframe.assert_not_called()
+
+    session.create_dataframe.assert_called_once()
+    df = session.create_dataframe.call_args.args[0]
+    assert list(df["PATH"]) == ["training/train", "training"]
+    assert json.loads(df["ATTRIBUTES"][0]) == {"n_trials": 5}
+    session.create_dataframe.return_value.write.mode.assert_called_with("append")
+    session.create_dataframe.return_value.write.mode.return_value.save_as_table.assert_called_with(  # noqa: E501
+        '"DB"."SCHEMA"."SPANS"'
+    )
+
+
+def test_failing_sink_does_not_raise(records):
+    """書き出しに失敗しても処理を止めず、他の書き出し先には出力する場合"""
+
+    def fail(record):
+        raise OSError("disk full")
+
+    set_sink("broken", fail)
+
+    with span("prediction"):
+        pass
+
+    assert len(records) == 1